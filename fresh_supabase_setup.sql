@@ -25,6 +25,10 @@ CREATE TABLE IF NOT EXISTS public.matches (
     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
+-- Match history pages are read newest first per user
+CREATE INDEX IF NOT EXISTS matches_user_id_created_at_id_idx
+    ON public.matches (user_id, created_at DESC, id DESC);
+
 -- Enable row level security
 ALTER TABLE public.profiles ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.matches ENABLE ROW LEVEL SECURITY;
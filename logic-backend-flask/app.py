@@ -1,11 +1,15 @@
 import os
+import hmac
+import json
 import random
 import sys
+import time
+import uuid
 import datetime
-from flask import Flask, request, jsonify
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 from supabase import create_client
-from z3 import Bool, And, Or, Xor, Implies, Not, Sum, If, Solver, sat
 from dotenv import load_dotenv
 from functools import wraps
 import jwt
@@ -20,6 +24,9 @@ if sys.platform == "win32":
 import easy_mode
 import medium_mode  
 import hard_mode
+import statement_compiler
+import uniqueness
+import puzzle_token
 
 # Add the parent directory to sys.path to import from puzzle_modes
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -56,15 +63,68 @@ from elo_system import (
     compute_placement_elo_change,
     calculate_final_placement_elo,
     PLACEMENT_MATCHES_REQUIRED,
-    DEFAULT_HIDDEN_ELO
+    DEFAULT_HIDDEN_ELO,
+    ELO_TIERS
 )
+from puzzle_pool import PuzzlePool
+from puzzle_bank import PuzzleBank
+from puzzle_store import PuzzleStore, make_shared_backend
+from batch_generation import BatchError, BatchGenerator, parse_specs
+from solver_pool import SolverPool, SolverUnavailable
+from profile_cache import ProfileCache
+from progress_writer import ProgressWriter
+from jwt_cache import MISS as JWT_CACHE_MISS, JWTCache
+from leaderboard_index import LEADERBOARD_MAX_WINDOW, LEADERBOARD_SIZE, LeaderboardIndex, rank_rows
+from single_flight import SingleFlight
+from match_history import MATCH_PAGE_DEFAULT, MATCH_PAGE_MAX, CursorError, fetch_match_page
+from match_journal import DiscardEvent, JournalError, MatchJournal
+from metrics import Metrics, route_label
+import solver_telemetry
+from profiling import RequestProfiler
+import structured_log
+from idempotency import IDEMPOTENCY_KEY_PREFIX, IDEMPOTENCY_REDIS_URL, IdempotencyCache
 
 # Load environment variables
 load_dotenv()
 
+# Request-path logging: leveled, sampled per route, written off the request thread (see structured_log.py)
+log = structured_log.get_logger(__name__)
+
 app = Flask(__name__)
 CORS(app, origins=["https://mindrank.net", "https://www.mindrank.net", "https://mind-rank.vercel.app"])
 
+# Request and phase latency histograms, served by GET /metrics and merged across workers
+metrics = Metrics()
+
+# Generation attempts, rejection reasons and solver work per (mode, num_players), also shown by /debug/generation
+solver_telemetry.telemetry.export_to(metrics)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get("request_started")
+    if started is not None:
+        metrics.observe_request(route_label(), request.method, response.status_code, time.perf_counter() - started)
+    return response
+
+# Opt-in profiles of single requests (admin X-Profile header or sampled), spooled as collapsed stacks
+request_profiler = RequestProfiler()
+
+@app.before_request
+def start_request_profile():
+    request_profiler.start()
+
+@app.after_request
+def finish_request_profile(response):
+    return request_profiler.finish(response)
+
+@app.teardown_request
+def abort_request_profile(exc):
+    request_profiler.abort(exc)
+
 # Initialize Supabase client
 supabase_url = os.getenv("SUPABASE_URL")
 supabase_key = os.getenv("SUPABASE_SERVICE_KEY") 
@@ -84,32 +144,74 @@ else:
         # print(f"❌ Failed to initialize Supabase client: {e}")
         supabase = None
 
+# Verified claims until each token's exp, plus recently rejected tokens
+jwt_cache = JWTCache()
+
+def _unverified_exp(token):
+    """Read a token's exp claim without checking its signature (only for cache lifetimes)."""
+    try:
+        return jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.InvalidTokenError:
+        return None
+
 def verify_jwt(token: str) -> dict:
-    """Verify JWT token and return user info."""
+    """Verify JWT token and return user info, caching the result per token."""
     if not supabase or not supabase_jwt_secret:
         # print("❌ Cannot verify JWT: Supabase not configured")
         return None
+    
+    cached = jwt_cache.get(token)
+    if cached is not JWT_CACHE_MISS:
+        return cached
+    
+    # Puzzle tokens may be signed with the same secret but never identify a user
+    if puzzle_token.is_puzzle_token(token):
+        jwt_cache.set_invalid(token)
+        return None
         
     try:
         # Decode the JWT token
         payload = jwt.decode(token, supabase_jwt_secret, algorithms=["HS256"])
-        return {"sub": payload.get("sub"), "email": payload.get("email")}
+        if not payload.get("sub"):
+            jwt_cache.set_invalid(token)
+            return None
+        user = {"sub": payload.get("sub"), "email": payload.get("email")}
+        jwt_cache.set_valid(token, user, payload.get("exp"))
+        return user
+    except jwt.ExpiredSignatureError:
+        # Correctly signed but expired - Supabase would reject it as well
+        jwt_cache.set_invalid(token)
+        return None
     except jwt.InvalidTokenError:
         try:
             # Try using Supabase auth verification as fallback
             response = supabase.auth.get_user(token)
             if response.user:
-                return {"sub": response.user.id, "email": response.user.email}
+                user = {"sub": response.user.id, "email": response.user.email}
+                jwt_cache.set_valid(token, user, _unverified_exp(token))
+                return user
         except Exception as e:
             # print(f"❌ Supabase auth verification failed: {e}")
-            pass
+            # Only remember tokens Supabase actually rejected, not network errors
+            if getattr(e, "status", None) not in (401, 403):
+                return None
+        jwt_cache.set_invalid(token)
         return None
 
-def get_or_create_user_profile(user_id: str, email: str) -> dict:
-    """Get user profile from database or create if doesn't exist."""
+# Profiles loaded by the auth decorators; every profile write must invalidate the user's entry
+profile_cache = ProfileCache()
+
+def get_or_create_user_profile(user_id: str, email: str, use_cache: bool = True) -> dict:
+    """Get user profile from the cache or database, or create it if it doesn't exist."""
     if not supabase:
         # print("❌ Cannot access user profile: Supabase not configured")
         return {"user_id": user_id, "email": email, "elo": 1000, "username": email.split('@')[0] if email else "User"}
+    
+    if use_cache:
+        cached = profile_cache.get(user_id)
+        if cached is not None:
+            return cached
+    fetched_at = time.monotonic()
         
     try:
         # Query profiles table
@@ -125,6 +227,7 @@ def get_or_create_user_profile(user_id: str, email: str) -> dict:
                 except Exception as e:
                     # print(f"Failed to initialize username: {e}")
                     profile["username"] = username
+            profile_cache.set(user_id, profile, fetched_at)
             return profile
         
         # Create new profile if doesn't exist
@@ -149,14 +252,305 @@ def get_or_create_user_profile(user_id: str, email: str) -> dict:
             "master_extreme_puzzles_solved": 0
         }
         inserted = supabase.table("profiles").insert(new_profile).execute()
-        return inserted.data[0] if inserted.data else new_profile
+        profile = inserted.data[0] if inserted.data else new_profile
+        profile_cache.set(user_id, profile, fetched_at)
+        return profile
     except Exception as e:
-        print(f"Error getting/creating user profile: {e}")
+        log.error("Error getting/creating user profile: %s", e)
         username = email.split('@')[0] if email else "User"
         return {"user_id": user_id, "email": email, "elo": 1000, "username": username}
 
-def auth_required(f):
-    """Decorator that requires authentication."""
+def increment_progress_rpc(user_id, increments):
+    """Atomically add to a user's progress counters, capped at 10 in the database."""
+    with metrics.phase("db_write"):
+        supabase.rpc("increment_puzzle_progress", {"p_user_id": user_id, "p_increments": increments}).execute()
+
+class RankedStateChanged(Exception):
+    """Raised when a ranked result was computed for a placement state the profile no longer has."""
+
+def commit_ranked_result(user_id, is_placement, delta, match, event_id=None):
+    """
+    Apply a ranked or placement result and record the match in one transaction.
+    
+    The commit_ranked_result RPC locks the profile row and applies `delta` to
+    its current Elo (or hidden Elo and placement count), so concurrent results
+    for the same user are applied in turn instead of overwriting each other.
+    
+    Args:
+        is_placement: Whether the result was computed as a placement match
+        delta: Elo change, or hidden Elo change for placement matches
+        match: mode, num_players, solved and time_taken for the match record
+        event_id: Journal event id; a second commit with the same id changes
+            nothing and returns the current state with duplicate=True
+    
+    Returns:
+        dict: elo, elo_before, elo_delta, hidden_elo, placement_matches_completed,
+        is_ranked, revealed, match_id and duplicate after the commit
+    
+    Raises:
+        RankedStateChanged: If the user finished placement (or otherwise changed
+            state) since the profile was read; nothing is written
+    """
+    try:
+        with metrics.phase("db_write"):
+            resp = supabase.rpc("commit_ranked_result", {
+                "p_user_id": user_id,
+                "p_is_placement": is_placement,
+                "p_delta": delta,
+                "p_mode": match["mode"],
+                "p_num_players": match["num_players"],
+                "p_solved": match["solved"],
+                "p_time_taken": match["time_taken"],
+                "p_placement_required": PLACEMENT_MATCHES_REQUIRED,
+                "p_default_hidden_elo": DEFAULT_HIDDEN_ELO,
+                "p_event_id": event_id,
+            }).execute()
+    except Exception as e:
+        if "ranked_state_changed" in str(e):
+            raise RankedStateChanged(str(e)) from e
+        raise
+    return resp.data
+
+def score_ranked_match(profile, outcome):
+    """
+    Compute the Elo (or hidden Elo) change for a ranked match from the player's profile.
+    
+    Args:
+        outcome: num_players, time_taken, solved, gave_up and abandoned for the match
+    
+    Returns:
+        tuple: (is_placement, mode recorded for the match, delta, message)
+    """
+    num_players = outcome["num_players"]
+    
+    # Check if this is a placement match (user is unranked)
+    is_unranked = profile.get("elo") is None
+    placement_completed = profile.get("placement_matches_completed", 0)
+    is_placement = is_unranked and placement_completed < PLACEMENT_MATCHES_REQUIRED
+    
+    if is_placement:
+        log.debug("🎯 PLACEMENT MATCH %s/%s for unranked user", placement_completed + 1, PLACEMENT_MATCHES_REQUIRED)
+        
+        # Get current hidden ELO
+        current_hidden_elo = profile.get("hidden_elo", DEFAULT_HIDDEN_ELO)
+        
+        # Determine actual mode for hidden ELO calculation
+        actual_mode = "Medium"  # Default for hidden ELO users
+        tier = get_tier(current_hidden_elo)
+    else:
+        # Normal ranked match for ranked users
+        log.debug("📊 Current ELO: %s", profile['elo'])
+        
+        # Determine actual mode for Elo calculation
+        actual_mode = "Easy"  # Default
+        tier = get_tier(profile["elo"])
+    
+    if tier:
+        # Find which mode this puzzle represents based on player count
+        for tier_mode, player_counts in tier["allowed_modes"].items():
+            if num_players in player_counts:
+                actual_mode = tier_mode
+                break
+    
+    log.debug("🎮 Determined puzzle mode: %s with %s players", actual_mode, num_players)
+    
+    args = (actual_mode, num_players, outcome["time_taken"], outcome["solved"], outcome["gave_up"], outcome["abandoned"])
+    if is_placement:
+        log.debug("📊 Current hidden ELO: %s", current_hidden_elo)
+        # Hidden ELO change based on performance
+        _, delta, message = update_hidden_elo(current_hidden_elo, *args)
+        return True, "Placement", delta, message
+    
+    delta, message = compute_elo_change(profile["elo"], *args)
+    return False, actual_mode, delta, message
+
+def predict_ranked_commit(profile, is_placement, delta):
+    """
+    The state commit_ranked_result will return for this profile, computed locally.
+    
+    Mirrors the RPC so a journaled result can be answered before it is committed.
+    """
+    placement_count = profile.get("placement_matches_completed") or 0
+    is_ranked = bool(profile.get("is_ranked"))
+    if not is_placement:
+        new_elo = max(0, profile["elo"] + delta)
+        return {"elo": new_elo, "elo_before": profile["elo"], "elo_delta": delta, "hidden_elo": profile.get("hidden_elo"),
+                "placement_matches_completed": placement_count, "is_ranked": is_ranked, "revealed": False}
+    
+    hidden_elo = profile.get("hidden_elo")
+    hidden_elo = max(0, (DEFAULT_HIDDEN_ELO if hidden_elo is None else hidden_elo) + delta)
+    placement_count += 1
+    if placement_count >= PLACEMENT_MATCHES_REQUIRED:
+        new_elo = max(0, min(2500, hidden_elo))
+        return {"elo": new_elo, "elo_before": None, "elo_delta": new_elo, "hidden_elo": hidden_elo,
+                "placement_matches_completed": placement_count, "is_ranked": True, "revealed": True}
+    return {"elo": None, "elo_before": None, "elo_delta": delta, "hidden_elo": hidden_elo,
+            "placement_matches_completed": placement_count, "is_ranked": is_ranked, "revealed": False}
+
+def recorded_ranked_state(profile):
+    """What commit_ranked_result returns for an event id it already applied: the current state, unchanged."""
+    return {"elo": profile.get("elo"), "elo_before": None, "elo_delta": 0, "hidden_elo": profile.get("hidden_elo"),
+            "placement_matches_completed": profile.get("placement_matches_completed") or 0,
+            "is_ranked": bool(profile.get("is_ranked")), "revealed": False, "duplicate": True}
+
+def ranked_event_id(user_id, puzzle_ref):
+    """The commit_ranked_result event id of a ranked puzzle (its puzzle_id or token nonce), so it counts once."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"mindrank:ranked-puzzle:{user_id}:{puzzle_ref}"))
+
+def with_pending_results(profile, user_id):
+    """
+    The profile with the user's journaled ranked results that haven't reached the database applied on top.
+    
+    Like progress_writer.optimistic_count: back-to-back ranked checks are
+    scored from the Elo, hidden Elo and placement count the player will have,
+    not from the row the replayer hasn't updated yet.
+    """
+    seen = set()
+    for event in match_journal.pending():
+        data = event["data"]
+        if event.get("kind") != "ranked_result" or data.get("user_id") != user_id or event["id"] in seen:
+            continue
+        seen.add(event["id"])
+        committed = predict_ranked_commit(profile, data["is_placement"], data["delta"])
+        profile = {**profile, **{key: committed[key] for key in
+                                 ("elo", "hidden_elo", "placement_matches_completed", "is_ranked")}}
+    return profile
+
+def apply_ranked_commit(user_id, committed, username=None):
+    """Refresh the per-worker caches after a ranked result reached the database."""
+    profile_cache.invalidate(user_id)
+    if committed["is_ranked"] and committed["elo"] is not None:
+        leaderboard_index.update(user_id, committed["elo"], username)
+
+def replay_ranked_event(event):
+    """
+    Commit a journaled ranked result (the match journal's replay handler).
+    
+    The event carries the score computed when the player was answered. If the
+    player's placement state changed before it landed (another worker's result
+    finished placement first), it is rescored against the current profile.
+    """
+    data = event["data"]
+    user_id = data["user_id"]
+    is_placement, mode, delta = data["is_placement"], data["mode"], data["delta"]
+    for _ in range(3):
+        match = {"mode": mode, "num_players": data["outcome"]["num_players"], "solved": data["outcome"]["solved"],
+                 "time_taken": int(round(data["outcome"]["time_taken"]))}
+        try:
+            committed = commit_ranked_result(user_id, is_placement, delta, match, event_id=event["id"])
+            break
+        except RankedStateChanged:
+            resp = supabase.table("profiles").select("*").eq("user_id", user_id).execute()
+            if not resp.data:
+                raise DiscardEvent(f"profile {user_id} no longer exists")
+            is_placement, mode, delta, _ = score_ranked_match(resp.data[0], data["outcome"])
+            log.debug("🔁 Rescored journaled result %s: placement=%s, delta=%s", event['id'], is_placement, delta)
+        except Exception as e:
+            if "profile_not_found" in str(e):
+                raise DiscardEvent(f"profile {user_id} no longer exists") from e
+            raise
+    else:
+        raise RankedStateChanged(f"ranked state kept changing while replaying {event['id']}")
+    apply_ranked_commit(user_id, committed, data.get("username"))
+    log.debug("✅ Journaled ranked result %s committed: %s", event['id'], committed)
+
+JOURNAL_HANDLERS = {"ranked_result": replay_ranked_event}
+
+def replay_journal_event(event):
+    """Dispatch a journaled event to its handler by kind."""
+    handler = JOURNAL_HANDLERS.get(event.get("kind"))
+    if handler is None:
+        raise DiscardEvent(f"unknown event kind {event.get('kind')!r}")
+    handler(event)
+
+# Ranked results are journaled on the request path and committed in the background
+match_journal = MatchJournal(replay_journal_event)
+
+# First-try progress increments, written in the background and merged per user
+progress_writer = ProgressWriter(increment_progress_rpc, on_flushed=profile_cache.invalidate)
+
+# Generation and Z3 checks run in a separate process pool so web workers stay responsive
+solver_pool = SolverPool()
+
+def generate_puzzle_for_mode(mode, players):
+    """Run the generator for a puzzle mode in the solver pool (raises ValueError for unknown modes)."""
+    mode = mode.lower()
+    if mode in ["easy", "medium", "hard"] or (mode == "extreme" and EXTREME_MODE_AVAILABLE):
+        return solver_pool.generate(mode, players)
+    raise ValueError(f"Invalid mode: {mode}")
+
+# Ready-made puzzles per (mode, players), refilled in the background
+puzzle_pool = PuzzlePool(generate_puzzle_for_mode)
+for tier in ELO_TIERS:
+    for tier_mode, player_counts in tier["allowed_modes"].items():
+        if tier_mode != "Extreme" or EXTREME_MODE_AVAILABLE:
+            for count in player_counts:
+                puzzle_pool.register(tier_mode, count)
+
+# Offline, memory-mapped puzzles for practice modes (see build_puzzle_bank.py)
+puzzle_bank = PuzzleBank()
+
+# Generated puzzles and their solutions, so checks only need puzzle_id and the guess
+puzzle_store = PuzzleStore(make_shared_backend())
+
+# Process pool for POST /puzzle/generate/batch
+batch_generator = BatchGenerator()
+
+def load_ranked_profiles(page_size=1000):
+    """Fetch every ranked profile (user_id, username, elo), a page at a time."""
+    rows = []
+    while True:
+        resp = supabase.table('profiles') \
+            .select('user_id, username, elo') \
+            .eq('is_ranked', True) \
+            .order('user_id') \
+            .range(len(rows), len(rows) + page_size - 1) \
+            .execute()
+        page = resp.data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+
+# Every ranked player sorted by Elo, updated on writes and reloaded in the background
+leaderboard_index = LeaderboardIndex(load_ranked_profiles)
+
+# Identical concurrent reads of public routes share one call
+single_flight = SingleFlight()
+LEADERBOARD_RESPONSE_TTL = float(os.getenv("LEADERBOARD_RESPONSE_TTL", "1.0"))
+
+# Retried /puzzle/check requests with the same Idempotency-Key get the stored response
+idempotency = IdempotencyCache(make_shared_backend(IDEMPOTENCY_REDIS_URL, IDEMPOTENCY_KEY_PREFIX))
+
+def request_user_id():
+    """The authenticated caller's user id (from the cached token check), or None."""
+    auth_header = request.headers.get("Authorization", "")
+    if not auth_header.startswith("Bearer "):
+        return None
+    user = verify_jwt(auth_header.split(" ")[1])
+    return user["sub"] if user else None
+
+# Bearer token for the operator routes (/metrics, /debug/generation, /puzzle/pool/stats); they are refused while it is unset
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Threads for database queries GET /bootstrap runs alongside the profile read
+bootstrap_executor = ThreadPoolExecutor(max_workers=int(os.getenv("BOOTSTRAP_QUERY_THREADS", "8")),
+                                        thread_name_prefix="bootstrap")
+
+def get_practice_puzzle(mode, players):
+    """Serve a practice puzzle from the offline bank, falling back to the pool."""
+    return puzzle_bank.get(mode, players) or puzzle_pool.get(mode, players)
+
+def auth_required(f=None, *, fetch_profile=True):
+    """
+    Decorator that requires authentication.
+    
+    Use @auth_required(fetch_profile=False) on routes that read the profile
+    themselves (the route gets profile=None), e.g. to overlap it with other
+    queries.
+    """
+    if f is None:
+        return lambda func: auth_required(func, fetch_profile=fetch_profile)
+    
     @wraps(f)
     def decorated(*args, **kwargs):
         auth_header = request.headers.get("Authorization")
@@ -164,16 +558,28 @@ def auth_required(f):
             return jsonify({"error": "No token provided"}), 401
         
         token = auth_header.split(" ")[1]
-        user = verify_jwt(token)
+        with metrics.phase("auth"):
+            user = verify_jwt(token)
         if not user:
             return jsonify({"error": "Invalid token"}), 401
         
-        profile = get_or_create_user_profile(user["sub"], user.get("email", ""))
+        profile = None
+        if fetch_profile:
+            with metrics.phase("profile_fetch"):
+                profile = get_or_create_user_profile(user["sub"], user.get("email", ""))
         return f(*args, user=user, profile=profile, **kwargs)
     return decorated
 
-def auth_optional(f):
-    """Decorator that allows optional authentication."""
+def auth_optional(f=None, *, fresh_profile=False):
+    """
+    Decorator that allows optional authentication.
+    
+    Use @auth_optional(fresh_profile=True) on routes that write to the
+    profile based on its current values, so they never see a cached copy.
+    """
+    if f is None:
+        return lambda func: auth_optional(func, fresh_profile=fresh_profile)
+    
     @wraps(f)
     def decorated(*args, **kwargs):
         auth_header = request.headers.get("Authorization", "")
@@ -183,11 +589,13 @@ def auth_optional(f):
         if auth_header.startswith("Bearer "):
             try:
                 token = auth_header.split(" ")[1]
-                user = verify_jwt(token)
+                with metrics.phase("auth"):
+                    user = verify_jwt(token)
                 if user:
-                    profile = get_or_create_user_profile(user["sub"], user.get("email", ""))
+                    with metrics.phase("profile_fetch"):
+                        profile = get_or_create_user_profile(user["sub"], user.get("email", ""), use_cache=not fresh_profile)
             except Exception as e:
-                print(f"⚠️  Authentication failed in auth_optional: {e}")
+                log.warning("⚠️  Authentication failed in auth_optional: %s", e)
                 # Continue without authentication - practice mode should still work
                 user = None
                 profile = None
@@ -195,6 +603,20 @@ def auth_optional(f):
         return f(*args, user=user, profile=profile, **kwargs)
     return decorated
 
+def metrics_token_required(f):
+    """Decorator that limits operator routes to callers with the METRICS_TOKEN bearer token."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not METRICS_TOKEN:
+            return jsonify({"error": "Not available: METRICS_TOKEN is not set"}), 403
+        auth_header = request.headers.get("Authorization", "")
+        if not auth_header.startswith("Bearer "):
+            return jsonify({"error": "No token provided"}), 401
+        if not hmac.compare_digest(auth_header[len("Bearer "):].encode(), METRICS_TOKEN.encode()):
+            return jsonify({"error": "Invalid token"}), 401
+        return f(*args, **kwargs)
+    return decorated
+
 @app.route("/puzzle/generate", methods=["GET"])
 def generate_puzzle_get():
     """GET endpoint for generating puzzles (practice mode)."""
@@ -202,45 +624,78 @@ def generate_puzzle_get():
     players = int(request.args.get('players', 4))
     
     try:
-        if mode == "easy":
-            result = easy_mode.api_generate_easy(players)
-        elif mode == "medium":
-            result = medium_mode.api_generate_medium(players)
-        elif mode == "hard":
-            result = hard_mode.api_generate_hard(players)
-        elif mode == "extreme" and EXTREME_MODE_AVAILABLE:
-            result = extreme_mode.api_generate_extreme(players)
+        if mode in ["easy", "medium", "hard"] or (mode == "extreme" and EXTREME_MODE_AVAILABLE):
+            with metrics.phase("generate"):
+                result = get_practice_puzzle(mode, players)
         elif mode == "extreme" and not EXTREME_MODE_AVAILABLE:
             return jsonify({"error": "Extreme mode not available on this server"}), 400
         else:
             return jsonify({"error": "Invalid mode"}), 400
+    except SolverUnavailable as e:
+        log.warning("⏳ Solver unavailable: %s", e)
+        return jsonify({"error": str(e)}), 503
     except RuntimeError as e:
-        print(f"❌ Puzzle generation failed after multiple attempts: {str(e)}")
+        log.error("❌ Puzzle generation failed after multiple attempts: %s", e)
         return jsonify({"error": "Unable to generate a solvable puzzle. Please try again."}), 500
     except Exception as e:
         return jsonify({"error": f"Failed to generate puzzle: {str(e)}"}), 500
     
+    puzzle_store.put(result, mode)
+    result["puzzle_token"] = puzzle_token.issue(result, mode)
     return jsonify(result)
 
+@app.route("/puzzle/generate/batch", methods=["POST"])
+def generate_puzzle_batch():
+    """
+    Generate many practice puzzles at once, streamed back as NDJSON.
+
+    Body: {"specs": [{"mode": "hard", "players": 5, "count": 10}, ...]}
+
+    Each line is one generated puzzle (or its error) in completion order,
+    followed by a final {"done": true, ...} summary line.
+    """
+    data = request.json or {}
+    modes = ["easy", "medium", "hard"] + (["extreme"] if EXTREME_MODE_AVAILABLE else [])
+    try:
+        specs = parse_specs(data.get("specs"), modes)
+    except BatchError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def stream():
+        generated = failed = 0
+        for item in batch_generator.generate(specs):
+            puzzle = item.get("puzzle")
+            if puzzle is not None:
+                puzzle_store.put(puzzle, item["mode"])
+                puzzle["puzzle_token"] = puzzle_token.issue(puzzle, item["mode"])
+                generated += 1
+            else:
+                failed += 1
+            yield json.dumps(item) + "\n"
+        yield json.dumps({"done": True, "generated": generated, "failed": failed}) + "\n"
+
+    return Response(stream_with_context(stream()), mimetype="application/x-ndjson")
+
 @app.route("/puzzle/generate", methods=["POST"])
 @auth_optional
 def generate_puzzle(user, profile):
     """Generate a puzzle with optional authentication for ranked mode."""
-    print(f"🚀 POST /puzzle/generate endpoint reached!")
+    log.debug("🚀 POST /puzzle/generate endpoint reached!")
     
     data = request.json or {}
     mode = data.get("mode", "Easy")
     players = data.get("players")
     
-    print(f"🎯 POST /puzzle/generate - mode: {mode}, players: {players}, user: {user is not None}, profile: {profile is not None}")
-    print(f"🔍 DEBUG - Original mode: '{mode}', Lowercased: '{mode.lower()}'")
-    print(f"🔍 DEBUG - EXTREME_MODE_AVAILABLE: {EXTREME_MODE_AVAILABLE}")
-    print(f"🔍 DEBUG - Full request data: {data}")
+    log.debug("🎯 POST /puzzle/generate - mode: %s, players: %s, user: %s, profile: %s", mode, players, user is not None, profile is not None)
+    log.debug("🔍 DEBUG - Original mode: '%s', Lowercased: '%s'", mode, mode.lower())
+    log.debug("🔍 DEBUG - EXTREME_MODE_AVAILABLE: %s", EXTREME_MODE_AVAILABLE)
+    log.debug("🔍 DEBUG - Full request data: %s", data)
     
     # Handle ranked mode
-    if mode.lower() == "ranked":
+    is_ranked = mode.lower() == "ranked"
+    if is_ranked:
         if not user:
-            print("❌ Ranked mode requires authentication but user is None")
+            log.warning("❌ Ranked mode requires authentication but user is None")
             return jsonify({"error": "Authentication required for ranked mode"}), 401
         
         # Get random puzzle configuration based on user's tier
@@ -250,45 +705,54 @@ def generate_puzzle(user, profile):
         
         mode = tier_mode
         players = tier_players
-        print(f"🎲 Ranked mode puzzle: {mode} with {players} players")
+        log.debug("🎲 Ranked mode puzzle: %s with %s players", mode, players)
+        request_profiler.tag(mode=mode, num_players=players, ranked=True)
     
     # Validate players parameter
     if not players:
         players = 4  # Default
-        print(f"🔢 Using default player count: {players}")
+        log.debug("🔢 Using default player count: %s", players)
     
-    print(f"🚀 Generating {mode} puzzle with {players} players")
+    log.debug("🚀 Generating %s puzzle with %s players", mode, players)
+    
+    # Ranked puzzles are always freshly generated; practice puzzles may come from the offline bank
+    get_puzzle = puzzle_pool.get if is_ranked else get_practice_puzzle
     
     # Generate puzzle based on mode
     try:
-        print(f"🔍 DEBUG - Checking mode: '{mode.lower()}'")
-        if mode.lower() == "easy":
-            print(f"✅ Matched: easy mode")
-            result = easy_mode.api_generate_easy(players)
-        elif mode.lower() == "medium":
-            print(f"✅ Matched: medium mode")
-            result = medium_mode.api_generate_medium(players)
-        elif mode.lower() == "hard":
-            print(f"✅ Matched: hard mode")
-            result = hard_mode.api_generate_hard(players)
+        log.debug("🔍 DEBUG - Checking mode: '%s'", mode.lower())
+        if mode.lower() in ["easy", "medium", "hard"]:
+            log.debug("✅ Matched: %s mode", mode.lower())
+            with metrics.phase("generate"):
+                result = get_puzzle(mode, players)
         elif mode.lower() == "extreme":
-            print(f"✅ Matched: extreme mode")
+            log.debug("✅ Matched: extreme mode")
             if EXTREME_MODE_AVAILABLE:
-                print(f"🌟 Generating extreme mode puzzle")
-                result = extreme_mode.api_generate_extreme(players)
+                log.debug("🌟 Generating extreme mode puzzle")
+                with metrics.phase("generate"):
+                    result = get_puzzle(mode, players)
             else:
-                print(f"❌ Extreme mode requested but not available")
+                log.warning("❌ Extreme mode requested but not available")
                 return jsonify({"error": "Extreme mode not available on this server"}), 400
         else:
-            print(f"❌ No match found for mode: '{mode}' (lowercased: '{mode.lower()}')")
+            log.warning("❌ No match found for mode: '%s' (lowercased: '%s')", mode, mode.lower())
             return jsonify({"error": f"Invalid mode: {mode}"}), 400
         
-        print(f"✅ Puzzle generated successfully for {mode} mode")
+        log.debug("✅ Puzzle generated successfully for %s mode", mode)
+        user_id = user["sub"] if user else None
+        puzzle_id = puzzle_store.put(result, "ranked" if is_ranked else mode, user_id)
+        result["puzzle_token"] = puzzle_token.issue(result, "ranked" if is_ranked else mode, user_id, puzzle_id=puzzle_id)
+        if is_ranked:
+            # Ranked answers are graded from the token or the stored copy, never shown up front
+            result.pop("solution", None)
+    except SolverUnavailable as e:
+        log.warning("⏳ Solver unavailable: %s", e)
+        return jsonify({"error": str(e)}), 503
     except RuntimeError as e:
-        print(f"❌ Puzzle generation failed after multiple attempts: {str(e)}")
+        log.error("❌ Puzzle generation failed after multiple attempts: %s", e)
         return jsonify({"error": "Unable to generate a solvable puzzle. Please try again."}), 500
     except Exception as e:
-        print(f"❌ Failed to generate puzzle: {str(e)}")
+        log.error("❌ Failed to generate puzzle: %s", e)
         return jsonify({"error": f"Failed to generate puzzle: {str(e)}"}), 500
     
     # Add tier-specific information if authenticated
@@ -311,11 +775,11 @@ def generate_puzzle(user, profile):
             if is_unranked:
                 placement_completed = profile.get("placement_matches_completed", 0)
                 result["placement_match_number"] = placement_completed + 1
-                print(f"📊 Added tier info for UNRANKED user - Tier: '{tier['label']}' (Hidden ELO: {effective_elo}) | Mode: {mode.capitalize()} | Players: {players} | Time Limit: {time_limit}s | Placement Match: {placement_completed + 1}/5")
+                log.debug("📊 Added tier info for UNRANKED user - Tier: '%s' (Hidden ELO: %s) | Mode: %s | Players: %s | Time Limit: %ss | Placement Match: %s/5", tier['label'], effective_elo, mode.capitalize(), players, time_limit, placement_completed + 1)
             else:
-                print(f"📊 Added tier info for RANKED user - Tier: '{tier['label']}' (ELO: {effective_elo}) | Mode: {mode.capitalize()} | Players: {players} | Time Limit: {time_limit}s | Difficulty: {difficulty_mult}x")
+                log.debug("📊 Added tier info for RANKED user - Tier: '%s' (ELO: %s) | Mode: %s | Players: %s | Time Limit: %ss | Difficulty: %sx", tier['label'], effective_elo, mode.capitalize(), players, time_limit, difficulty_mult)
         else:
-            print(f"⚠️ Could not determine tier for ELO {effective_elo}")
+            log.warning("⚠️ Could not determine tier for ELO %s", effective_elo)
         
         # Add practice mode progress for non-ranked modes
         if mode.lower() != "ranked":
@@ -329,7 +793,7 @@ def generate_puzzle(user, profile):
                 
                 column_name = mode_column_map.get(mode.lower())
                 if column_name:
-                    current_progress = profile.get(column_name, 0)
+                    current_progress = progress_writer.optimistic_count(profile, column_name)
                     result["practice_progress"] = {
                         "mode": mode.lower(),
                         "solved": current_progress,
@@ -347,29 +811,45 @@ def generate_puzzle(user, profile):
                     
                     result["mode_unlocked"] = unlock_requirements.get(mode.lower(), False)
                     
-                    print(f"📊 Practice Progress: {mode.lower()} {current_progress}/10 - Unlocked: {result['mode_unlocked']}")
+                    log.debug("📊 Practice Progress: %s %s/10 - Unlocked: %s", mode.lower(), current_progress, result['mode_unlocked'])
                     
             except Exception as e:
-                print(f"⚠️ Failed to add practice progress info: {e}")
+                log.warning("⚠️ Failed to add practice progress info: %s", e)
     else:
-        print("ℹ️ No profile found - using default time limits")
+        log.debug("ℹ️ No profile found - using default time limits")
     
-    print(f"🎉 Returning puzzle result for {mode} mode")
+    log.debug("🎉 Returning puzzle result for %s mode", mode)
     return jsonify(result)
 
 @app.route("/puzzle/check", methods=["POST"])
-@auth_optional  
+@idempotency.route(scope=request_user_id)
+@auth_optional(fresh_profile=True)
 def check_solution(user, profile):
     """Check puzzle solution with optional Elo updates for ranked mode."""
     try:
         data = request.json or {}
-        print(f"🔍 /puzzle/check received data: {data}")
+        log.debug("🔍 /puzzle/check received data: %s", data)
+        
+        # A signed puzzle token is graded without storage or solver work;
+        # otherwise puzzles generated by this server are checked against the stored copy
+        token_claims = None
+        stored = None
+        if data.get("puzzle_token"):
+            try:
+                token_claims = puzzle_token.verify(data["puzzle_token"])
+            except puzzle_token.InvalidPuzzleToken as e:
+                return jsonify({"error": str(e)}), 400
+        else:
+            stored = puzzle_store.get(data.get("puzzle_id"))
         
         mode = data.get("mode")
+        if not mode and token_claims:
+            mode = token_claims["m"]
+        elif not mode and stored:
+            mode = stored["mode"]
+        request_profiler.tag(mode=mode, num_players=token_claims["n"] if token_claims else len(stored["people"]) if stored else None)
         # Handle both 'player_assignments' (from React) and 'guess' (legacy) formats
         guess = data.get("player_assignments") or data.get("guess", {})
-        statement_data = data.get("statement_data", {})
-        num_truth_tellers = data.get("num_truth_tellers")
         time_taken = data.get("time_taken", 0)
         gave_up = data.get("gave_up", False)
         abandoned = data.get("abandoned", False)
@@ -377,14 +857,14 @@ def check_solution(user, profile):
         # New field to track if this is the first attempt for this puzzle
         is_first_attempt = data.get("is_first_attempt", True)
         
-        print(f"🔍 Checking solution for mode: {mode} (ranked: {mode.lower() == 'ranked'})")
-        print(f"🎯 First attempt: {is_first_attempt}")
-        print(f"👤 User authenticated: {user is not None}")
-        print(f"📊 Guess: {guess}")
-        print(f"🎪 Abandoned: {abandoned}, Gave up: {gave_up}")
+        log.debug("🔍 Checking solution for mode: %s (ranked: %s)", mode, mode.lower() == 'ranked')
+        log.debug("🎯 First attempt: %s", is_first_attempt)
+        log.debug("👤 User authenticated: %s", user is not None)
+        log.debug("📊 Guess: %s", guess)
+        log.debug("🎪 Abandoned: %s, Gave up: %s", abandoned, gave_up)
         
         if abandoned:
-            print(f"🚪 User abandoned puzzle - no progress tracking")
+            log.debug("🚪 User abandoned puzzle - no progress tracking")
         
         # Check if this is ranked mode
         is_ranked = mode and mode.lower() == "ranked"
@@ -392,23 +872,49 @@ def check_solution(user, profile):
         if is_ranked and not user:
             return jsonify({"error": "Authentication required for ranked mode"}), 401
         
+        # Ranked puzzles are only graded from the server's own copy: the signed
+        # token or the stored puzzle, with the solve time from their issue time
+        if is_ranked and token_claims:
+            if token_claims["m"] != "ranked":
+                return jsonify({"error": "Puzzle token is not for a ranked puzzle"}), 400
+            if token_claims["sub"] != user["sub"]:
+                return jsonify({"error": "Puzzle token was issued to a different user"}), 403
+            # Use the signed issue time rather than the client's timer
+            time_taken = puzzle_token.elapsed_seconds(token_claims)
+            log.debug("⏱️ Time taken from puzzle token: %.1fs (client sent %s)", time_taken, data.get('time_taken'))
+        elif is_ranked and stored is not None and stored["mode"] == "ranked":
+            if stored.get("user_id") != user["sub"]:
+                return jsonify({"error": "Puzzle was issued to a different user"}), 403
+            time_taken = max(0, time.time() - stored["issued_at"])
+            log.debug("⏱️ Time taken from stored puzzle: %.1fs (client sent %s)", time_taken, data.get('time_taken'))
+        elif is_ranked:
+            return jsonify({"error": "Ranked checks need the puzzle_token or puzzle_id from /puzzle/generate"}), 400
+        elif (token_claims is not None and token_claims["m"] == "ranked") or (stored is not None and stored["mode"] == "ranked"):
+            # Grading a live ranked puzzle as practice would answer it without an Elo effect
+            return jsonify({"error": "Ranked puzzles can only be checked in ranked mode"}), 400
+        
         # For non-ranked modes, use the existing check functions
         if not is_ranked:
             try:
-                if mode.lower() == "easy":
-                    result = easy_mode.check_easy_solution(data)
-                elif mode.lower() == "medium":
-                    result = medium_mode.check_medium_solution(data)
-                elif mode.lower() == "hard":
-                    result = hard_mode.check_hard_solution(data)
-                elif mode.lower() == "extreme" and EXTREME_MODE_AVAILABLE:
-                    result = extreme_mode.check_extreme_solution(data)
-                elif mode.lower() == "extreme" and not EXTREME_MODE_AVAILABLE:
-                    return jsonify({"error": "Extreme mode not available on this server"}), 400
-                else:
-                    return jsonify({"error": "Invalid mode"}), 400
+                with metrics.phase("solver_check"):
+                    if token_claims is not None:
+                        result = {"valid": puzzle_token.check(token_claims, guess)}
+                    elif stored is not None:
+                        result = {"valid": puzzle_store.check(stored, guess)}
+                    elif mode.lower() == "easy":
+                        result = solver_pool.check_solution("easy", data)
+                    elif mode.lower() == "medium":
+                        result = solver_pool.check_solution("medium", data)
+                    elif mode.lower() == "hard":
+                        result = solver_pool.check_solution("hard", data)
+                    elif mode.lower() == "extreme" and EXTREME_MODE_AVAILABLE:
+                        result = solver_pool.check_solution("extreme", data)
+                    elif mode.lower() == "extreme" and not EXTREME_MODE_AVAILABLE:
+                        return jsonify({"error": "Extreme mode not available on this server"}), 400
+                    else:
+                        return jsonify({"error": "Invalid mode"}), 400
                 
-                print(f"✅ Check result: {result}")
+                log.debug("✅ Check result: %s", result)
                 
                 # Add first-try success message for all users (authenticated or not)
                 if result.get("valid", False) and is_first_attempt:
@@ -450,22 +956,20 @@ def check_solution(user, profile):
                         
                         column_name = mode_column_map.get(mode.lower())
                         if column_name:
-                            current_count = profile.get(column_name, 0)
+                            # Includes increments still queued in this worker
+                            current_count = progress_writer.optimistic_count(profile, column_name)
                             
                             # Only increment if this is a first-try success
                             if current_count < 10:
                                 new_count = current_count + 1
                                 
                                 mode_type = "Master" if is_master_mode else "Practice"
-                                print(f"📈 {mode_type} Progress (FIRST TRY): {mode.lower()} {current_count} → {new_count}")
+                                log.debug("📈 %s Progress (FIRST TRY): %s %s → %s", mode_type, mode.lower(), current_count, new_count)
                                 
-                                # Update the database
-                                update_result = supabase.table("profiles") \
-                                    .update({column_name: new_count}) \
-                                    .eq("user_id", user["sub"]) \
-                                    .execute()
+                                # Queue an atomic increment; the database applies the 10 cap
+                                progress_writer.increment(user["sub"], column_name)
                                 
-                                print(f"✅ Updated {mode_type.lower()} {mode.lower()} progress: {new_count}/10 puzzles solved on first try")
+                                log.debug("✅ Queued %s %s progress: %s/10 puzzles solved on first try", mode_type.lower(), mode.lower(), new_count)
                                 
                                 # Add progress info to the result
                                 result["practice_progress"] = {
@@ -494,267 +998,120 @@ def check_solution(user, profile):
                                         }
                                     result["unlock_message"] = unlock_messages.get(mode.lower())
                             else:
-                                print(f"📊 Practice Progress: {mode.lower()} already at maximum (10/10) - not tracking further")
+                                log.debug("📊 Practice Progress: %s already at maximum (10/10) - not tracking further", mode.lower())
                         
                     except Exception as e:
-                        print(f"⚠️ Failed to update practice progress: {e}")
+                        log.warning("⚠️ Failed to update practice progress: %s", e)
                         # Don't fail the whole request if progress tracking fails
                 elif user and profile and result.get("valid", False) and not is_first_attempt:
-                    print(f"🔄 Correct solution but NOT first attempt - no progress tracking")
+                    log.debug("🔄 Correct solution but NOT first attempt - no progress tracking")
                 elif user and profile and result.get("valid", False) and gave_up:
-                    print(f"🏳️ Correct solution but user gave up first - no progress tracking")
+                    log.debug("🏳️ Correct solution but user gave up first - no progress tracking")
                 
                 return jsonify(result)
+            except SolverUnavailable as e:
+                log.warning("⏳ Solver unavailable: %s", e)
+                return jsonify({"error": str(e)}), 503
             except Exception as e:
-                print(f"❌ Error in mode check: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                log.exception("❌ Error in mode check: %s", e)
                 return jsonify({"error": f"Failed to check solution: {str(e)}"}), 500
         
-        # For ranked mode, validate solution using Z3 directly
+        # For ranked mode, validate the guess against the token or the stored puzzle
         try:
-            # Get people list from statement_data (more reliable than guess for abandonment)
-            people = list(statement_data.keys()) if statement_data else list(guess.keys())
-            print(f"👥 People from statement_data: {list(statement_data.keys()) if statement_data else 'None'}")
-            print(f"👥 People from guess: {list(guess.keys())}")
-            print(f"👥 Final people list: {people}")
-            
-            if not people:
-                print(f"❌ No people found - cannot process puzzle")
-                return jsonify({"error": "No people data found in puzzle"}), 400
-            
-            z3_vars = {p: Bool(p) for p in people}
-            solver = Solver()
+            # Get people list from the puzzle token or the stored puzzle (more reliable than guess for abandonment)
+            people = token_claims["p"] if token_claims is not None else stored["people"]
+            log.debug("👥 People: %s, guess: %s", people, list(guess.keys()))
             
             # Skip validation if abandoned or gave up - we want to apply penalty regardless
             if abandoned:
-                print(f"🚪 Skipping validation for abandoned puzzle - applying full penalty")
+                log.debug("🚪 Skipping validation for abandoned puzzle - applying full penalty")
                 is_valid = False
             elif gave_up:
-                print(f"🏳️ Skipping validation for gave up puzzle - applying penalty")
+                log.debug("🏳️ Skipping validation for gave up puzzle - applying penalty")
                 is_valid = False
             else:
-                # Build constraints from statement_data
-                print(f"🔍 DEBUG: Building constraints from statement_data: {statement_data}")
-                for speaker, st in statement_data.items():
-                    print(f"🔍 DEBUG: Processing statement for {speaker}: {st}")
-                    mode_type = st.get("mode") if isinstance(st, dict) else None
-                    
-                    if mode_type == "DIRECT":
-                        target = st["target"]
-                        # Handle both formats: 'claim' (ranked) and 'truth_value' (practice)
-                        claim = st.get("claim", st.get("truth_value"))
-                        if claim is None:
-                            print(f"❌ Missing claim/truth_value for DIRECT statement by {speaker}")
-                            return jsonify({"error": f"Missing claim/truth_value for DIRECT statement by {speaker}"}), 400
-                        print(f"✅ Adding DIRECT constraint: {speaker} -> {target} == {claim}")
-                        solver.add(Implies(z3_vars[speaker], z3_vars[target] == claim))
-                        solver.add(Implies(Not(z3_vars[speaker]), z3_vars[target] != claim))
-                        
-                    elif mode_type == "AND":
-                        t1, t2 = st["t1"], st["t2"]
-                        c1, c2 = st["c1"], st["c2"]
-                        print(f"✅ Adding AND constraint: {speaker} -> ({t1}=={c1} AND {t2}=={c2})")
-                        solver.add(Implies(z3_vars[speaker], And(z3_vars[t1] == c1, z3_vars[t2] == c2)))
-                        solver.add(Implies(Not(z3_vars[speaker]), Or(z3_vars[t1] != c1, z3_vars[t2] != c2)))
-                        
-                    elif mode_type == "OR":
-                        t1, t2 = st["t1"], st["t2"]
-                        c1, c2 = st["c1"], st["c2"]
-                        print(f"✅ Adding OR constraint: {speaker} -> ({t1}=={c1} OR {t2}=={c2})")
-                        solver.add(Implies(z3_vars[speaker], Or(z3_vars[t1] == c1, z3_vars[t2] == c2)))
-                        solver.add(Implies(Not(z3_vars[speaker]), And(z3_vars[t1] != c1, z3_vars[t2] != c2)))
-                        
-                    elif mode_type == "IF":
-                        cond = st["cond"]
-                        cond_val = st["cond_val"]
-                        result = st["result"]
-                        result_val = st["result_val"]
-                        implication = Implies(z3_vars[cond] == cond_val, z3_vars[result] == result_val)
-                        print(f"✅ Adding IF constraint: {speaker} -> (IF {cond}=={cond_val} THEN {result}=={result_val})")
-                        solver.add(Implies(z3_vars[speaker], implication))
-                        solver.add(Implies(Not(z3_vars[speaker]), Not(implication)))
-                        
-                    elif mode_type == "XOR":
-                        t1, t2 = st["t1"], st["t2"]
-                        c1, c2 = st["c1"], st["c2"]
-                        print(f"✅ Adding XOR constraint: {speaker} -> ({t1}=={c1} XOR {t2}=={c2})")
-                        solver.add(Implies(z3_vars[speaker], Xor(z3_vars[t1] == c1, z3_vars[t2] == c2)))
-                        solver.add(Implies(Not(z3_vars[speaker]), Not(Xor(z3_vars[t1] == c1, z3_vars[t2] == c2))))
-                        
-                    elif mode_type == "IFF":
-                        t1, t2 = st["t1"], st["t2"]
-                        c1, c2 = st["c1"], st["c2"]
-                        a1 = (z3_vars[t1] == c1)
-                        a2 = (z3_vars[t2] == c2)
-                        biconditional = And(Implies(a1, a2), Implies(a2, a1))
-                        print(f"✅ Adding IFF constraint: {speaker} -> ({t1}=={c1} IFF {t2}=={c2})")
-                        solver.add(Implies(z3_vars[speaker], biconditional))
-                        solver.add(Implies(Not(z3_vars[speaker]), Not(biconditional)))
-                        
-                    elif mode_type == "NESTED_IF":
-                        inner_impl = Implies(z3_vars[st["inner_cond"]] == st["inner_val"], z3_vars[st["inner_result"]] == st["inner_result_val"])
-                        nested_impl = Implies(z3_vars[st["outer_cond"]] == st["outer_val"], inner_impl)
-                        print(f"✅ Adding NESTED_IF constraint: {speaker} -> nested implication")
-                        solver.add(Implies(z3_vars[speaker], nested_impl))
-                        solver.add(Implies(Not(z3_vars[speaker]), Not(nested_impl)))
-                        
-                    elif mode_type == "GROUP":
-                        cnt = Sum([If(z3_vars[m], 1, 0) for m in st["members"]])
-                        print(f"✅ Adding GROUP constraint: {speaker} -> count({st['members']}) == {st['exactly']}")
-                        solver.add(Implies(z3_vars[speaker], cnt == st["exactly"]))
-                        solver.add(Implies(Not(z3_vars[speaker]), cnt != st["exactly"]))
-                        
+                # Only a complete assignment of every player can win a ranked match
+                with metrics.phase("solver_check"):
+                    if token_claims is not None:
+                        is_valid = puzzle_token.check(token_claims, guess)
                     else:
-                        # This is the critical fix - handle statements without 'mode' field
-                        if isinstance(st, dict) and "target" in st:
-                            # Simple statement format: {"target": "G", "truth_value": False}
-                            target = st["target"]
-                            truth_value = st.get("truth_value", st.get("claim"))
-                            if truth_value is not None:
-                                print(f"✅ Adding SIMPLE constraint: {speaker} -> {target} == {truth_value}")
-                                solver.add(Implies(z3_vars[speaker], z3_vars[target] == truth_value))
-                                solver.add(Implies(Not(z3_vars[speaker]), z3_vars[target] != truth_value))
-                            else:
-                                print(f"❌ WARNING: Statement for {speaker} missing truth_value: {st}")
-                        else:
-                            print(f"❌ WARNING: Unrecognized statement format for {speaker}: {st}")
-                            print(f"🚨 This statement will be IGNORED, which may cause incorrect validation!")
-                
-                # Add truth-teller count constraint
-                print(f"🔢 Adding truth-teller count constraint: {num_truth_tellers} out of {len(people)}")
-                solver.add(Sum([If(z3_vars[p], 1, 0) for p in people]) == num_truth_tellers)
-                
-                # Add guess constraints (only if not abandoned)
-                print(f"🎯 Adding user guess constraints: {guess}")
-                for person, value in guess.items():
-                    if person in z3_vars and value is not None:
-                        print(f"  👤 {person} = {value}")
-                        solver.add(z3_vars[person] == value)
-                
-                print(f"🧮 Solving puzzle with Z3...")
-                is_valid = solver.check() == sat
-                print(f"🎯 Z3 solver result: {'SAT (valid)' if is_valid else 'UNSAT (invalid)'}")
+                        is_valid = puzzle_store.check(stored, guess, complete=True)
+                source = "Puzzle token" if token_claims is not None else "Stored puzzle"
+                log.debug("⚡ %s result: %s", source, 'valid' if is_valid else 'invalid')
             
             # Handle Elo changes for ranked mode
             elo_change = None
             if is_ranked and user and profile and supabase:
                 try:
-                    print(f"💰 Processing ELO change for user {user['sub']}")
-                    print(f"👤 User: {user}")
-                    print(f"📊 Profile: {profile}")
+                    log.debug("💰 Processing ELO change for user %s", user['sub'])
+                    log.debug("👤 User: %s", user)
+                    log.debug("📊 Profile: %s", profile)
                     
-                    # Check if this is a placement match (user is unranked)
-                    is_unranked = profile.get("elo") is None
-                    placement_completed = profile.get("placement_matches_completed", 0)
+                    outcome = {
+                        "num_players": len(people),
+                        "time_taken": time_taken,
+                        "solved": bool(is_valid),
+                        "gave_up": gave_up,
+                        "abandoned": abandoned,
+                    }
+                    # Include this host's journaled results the database hasn't seen yet
+                    profile = with_pending_results(profile, user["sub"])
+                    is_placement, match_mode, delta, message = score_ranked_match(profile, outcome)
                     
-                    if is_unranked and placement_completed < PLACEMENT_MATCHES_REQUIRED:
-                        print(f"🎯 PLACEMENT MATCH {placement_completed + 1}/{PLACEMENT_MATCHES_REQUIRED} for unranked user")
-                        
-                        # Get current hidden ELO
-                        current_hidden_elo = profile.get("hidden_elo", DEFAULT_HIDDEN_ELO)
-                        
-                        # Determine actual mode for hidden ELO calculation
-                        actual_mode = "Medium"  # Default for hidden ELO users
-                        tier = get_tier(current_hidden_elo)
-                        if tier:
-                            # Find which mode this puzzle represents based on player count
-                            for tier_mode, player_counts in tier["allowed_modes"].items():
-                                if len(people) in player_counts:
-                                    actual_mode = tier_mode
-                                    break
-                        
-                        print(f"🎮 Determined puzzle mode: {actual_mode} with {len(people)} players")
-                        print(f"📊 Current hidden ELO: {current_hidden_elo}")
-                        
-                        # Update hidden ELO based on performance
-                        new_hidden_elo, hidden_elo_change, hidden_message = update_hidden_elo(
-                            current_hidden_elo, actual_mode, len(people), time_taken, is_valid, gave_up, abandoned
-                        )
-                        
-                        # Increment placement matches completed
-                        new_placement_count = placement_completed + 1
-                        
-                        # Check if this completes placement matches
-                        if new_placement_count >= PLACEMENT_MATCHES_REQUIRED:
-                            # Final placement match - reveal hidden ELO as actual ELO
-                            final_elo = reveal_placement_elo(new_hidden_elo)
-                            print(f"🎉 PLACEMENT COMPLETE! Hidden ELO: {new_hidden_elo} → Revealed ELO: {final_elo}")
-                            
-                            update_data = {
-                                "elo": final_elo,
-                                "hidden_elo": None,  # Clear hidden ELO
-                                "placement_matches_completed": new_placement_count,
-                                "is_ranked": True
-                            }
-                            message = f"🎓 Placement Complete! Your ELO is {final_elo}! | {hidden_message}"
-                            
-                            # For display purposes
-                            old_elo = None  # Don't show old ELO during placement
-                            new_elo = final_elo
-                            actual_change = final_elo  # Full revealed ELO
-                        else:
-                            # Still in placement matches
-                            update_data = {
-                                "hidden_elo": new_hidden_elo,
-                                "placement_matches_completed": new_placement_count
-                            }
-                            message = f"Placement {new_placement_count}/5: {hidden_message}"
-                            
-                            # For display purposes (don't show actual values during placement)
-                            old_elo = None  
-                            new_elo = None
-                            actual_change = hidden_elo_change
-                        
+                    # Journal the result and answer from the profile we read; the replayer commits it.
+                    # If the journal is unavailable, commit on this thread under the same event id.
+                    # The event id comes from the puzzle (its stored puzzle_id, which the token carries,
+                    # or else the token nonce), so resubmitting it by token or puzzle_id, with a new
+                    # Idempotency-Key or none, is applied at most once.
+                    if token_claims is not None:
+                        puzzle_ref = token_claims.get("i") or token_claims["r"]
                     else:
-                        # Normal ranked match for ranked users
-                        old_elo = profile["elo"]
-                        print(f"📊 Current ELO: {old_elo}")
-                        
-                        # Determine actual mode for Elo calculation
-                        actual_mode = "Easy"  # Default
-                        tier = get_tier(old_elo)
-                        if tier:
-                            # Find which mode this puzzle represents based on player count
-                            for tier_mode, player_counts in tier["allowed_modes"].items():
-                                if len(people) in player_counts:
-                                    actual_mode = tier_mode
-                                    break
-                        
-                        print(f"🎮 Determined puzzle mode: {actual_mode} with {len(people)} players")
-                        
-                        gain_loss, message = compute_elo_change(
-                            old_elo, actual_mode, len(people), time_taken, is_valid, gave_up, abandoned
-                        )
-                        new_elo = max(0, old_elo + gain_loss)
-                        actual_change = gain_loss
-                        
-                        update_data = {"elo": new_elo}
-                    
-                    print(f"📈 ELO calculation: {old_elo} + {actual_change} = {new_elo}")
+                        puzzle_ref = data["puzzle_id"]
+                    event_id = ranked_event_id(user["sub"], puzzle_ref)
+                    committed = None
+                    if any(event["id"] == event_id for event in match_journal.pending()):
+                        committed = recorded_ranked_state(profile)  # Already journaled and overlaid above
+                    elif match_journal.enabled:
+                        try:
+                            with metrics.phase("journal_append"):
+                                match_journal.append("ranked_result", {
+                                    "user_id": user["sub"],
+                                    "username": profile.get("username"),
+                                    "is_placement": is_placement,
+                                    "mode": match_mode,
+                                    "delta": delta,
+                                    "outcome": outcome,
+                                }, event_id=event_id)
+                            committed = predict_ranked_commit(profile, is_placement, delta)
+                            log.debug("📝 Ranked result journaled as %s: placement=%s, delta=%s", event_id, is_placement, delta)
+                        except JournalError as e:
+                            log.warning("⚠️ Match journal unavailable, committing directly: %s", e)
+                    if committed is None:
+                        # Apply the change to the current database row and record the match in one transaction
+                        log.debug("💾 Committing ranked result: placement=%s, delta=%s", is_placement, delta)
+                        committed = commit_ranked_result(user["sub"], is_placement, delta, {
+                            "mode": match_mode,
+                            "num_players": len(people),
+                            "solved": is_valid,
+                            "time_taken": int(round(time_taken)),
+                        }, event_id=event_id)
+                        apply_ranked_commit(user["sub"], committed, profile.get("username"))
+                        log.debug("✅ Ranked result committed: %s", committed)
                     
-                    # Update user's profile in database
-                    print(f"💾 Updating profile in database...")
-                    elo_update_result = supabase.table("profiles").update(update_data).eq("user_id", user["sub"]).execute()
-                    print(f"✅ Profile update result: {elo_update_result}")
+                    old_elo = committed["elo_before"]  # None for placement matches
+                    new_elo = committed["elo"]          # None for incomplete placement matches
+                    actual_change = committed["elo_delta"]
                     
-                    # Record match in matches table
-                    is_placement = is_unranked and placement_completed < PLACEMENT_MATCHES_REQUIRED
-                    match_data = {
-                        "user_id": user["sub"],
-                        "mode": "Placement" if is_placement else actual_mode,
-                        "num_players": len(people),
-                        "solved": is_valid,
-                        "time_taken": int(round(time_taken)),
-                        "elo_before": old_elo,  # Will be None for placement matches
-                        "elo_after": new_elo,   # Will be None for incomplete placement matches
-                        "elo_delta": actual_change,
-                        "is_placement_match": is_placement
-                    }
+                    if committed.get("duplicate"):
+                        message = "This ranked puzzle was already recorded"
+                    elif is_placement:
+                        if committed["revealed"]:
+                            log.debug("🎉 PLACEMENT COMPLETE! Hidden ELO: %s → Revealed ELO: %s", committed['hidden_elo'], new_elo)
+                            message = f"🎓 Placement Complete! Your ELO is {new_elo}! | {message}"
+                        else:
+                            message = f"Placement {committed['placement_matches_completed']}/5: {message}"
                     
-                    print(f"📝 Inserting match record: {match_data}")
-                    match_insert_result = supabase.table("matches").insert(match_data).execute()
-                    print(f"✅ Match insert result: {match_insert_result}")
+                    log.debug("📈 ELO calculation: %s + %s = %s", old_elo, actual_change, new_elo)
                     
                     # Customize message for abandonment and giving up
                     if abandoned:
@@ -768,52 +1125,60 @@ def check_solution(user, profile):
                         "change": actual_change,
                         "message": message,
                         "is_placement": is_placement,
-                        "placement_number": placement_completed + 1 if is_placement else None
+                        "placement_number": committed["placement_matches_completed"] if is_placement else None
                     }
                     
-                    print(f"🎉 ELO change successful: {elo_change}")
+                    log.debug("🎉 ELO change successful: %s", elo_change)
                     
+                except RankedStateChanged as e:
+                    log.info("🔁 Ranked state changed while checking: %s", e)
+                    return jsonify({"error": "Your ranked status changed, please submit again"}), 409
                 except Exception as e:
-                    print(f"❌ Error updating Elo: {e}")
-                    print(f"🔥 FULL ERROR DETAILS:")
-                    import traceback
-                    traceback.print_exc()
-                    print(f"🔥 END ERROR DETAILS")
+                    # Not a 2xx, so the Idempotency-Key isn't stored and the client can retry with it
+                    log.exception("❌ Error updating Elo: %s", e)
+                    return jsonify({"error": "Failed to record the ranked result, please submit again"}), 500
             elif is_ranked and user and not supabase:
-                print("⚠️  Ranked mode Elo updates disabled: Supabase not configured")
+                log.warning("⚠️  Ranked mode Elo updates disabled: Supabase not configured")
             elif is_ranked and not user:
-                print("⚠️  No user found for ranked mode ELO update")
+                log.warning("⚠️  No user found for ranked mode ELO update")
             elif not is_ranked:
-                print("ℹ️  Non-ranked mode - no ELO update needed")
+                log.debug("ℹ️  Non-ranked mode - no ELO update needed")
             else:
-                print(f"🚨 ELO UPDATE SKIPPED - is_ranked: {is_ranked}, user: {user is not None}, profile: {profile is not None}, supabase: {supabase is not None}")
+                log.warning("🚨 ELO UPDATE SKIPPED - is_ranked: %s, user: %s, profile: %s, supabase: %s", is_ranked, user is not None, profile is not None, supabase is not None)
             
             return jsonify({"valid": is_valid, "elo_change": elo_change})
         
         except Exception as e:
-            print(f"❌ Error in ranked mode validation: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            log.exception("❌ Error in ranked mode validation: %s", e)
             return jsonify({"error": f"Failed to validate solution: {str(e)}"}), 500
         
     except Exception as e:
-        print(f"❌ Unexpected error in /puzzle/check: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception("❌ Unexpected error in /puzzle/check: %s", e)
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
 @app.route("/puzzle/solution", methods=["POST"])
 def get_puzzle_solution():
     """Get the solution for a practice mode puzzle."""
     data = request.json or {}
-    print(f"🔍 /puzzle/solution received data: {data}")
+    log.debug("🔍 /puzzle/solution received data: %s", data)
+    
+    stored = puzzle_store.get(data.get("puzzle_id"))
+    if stored is not None and stored["mode"] == "ranked":
+        return jsonify({"error": "Solutions to ranked puzzles are not available by puzzle_id"}), 403
+    if stored is not None:
+        solution = puzzle_store.solution(stored)
+        if solution is None:
+            return jsonify({"error": "No solution found for this puzzle"}), 400
+        compiled = statement_compiler.compile_puzzle(stored["statements"], stored["num_truth_tellers"],
+                                                     stored["people"], simple=stored["mode"] == "easy")
+        return jsonify({"solution": solution, "explanation": compiled.explain(solution)})
     
     mode = data.get("mode")
     statement_data = data.get("statement_data", {})
     num_truth_tellers = data.get("num_truth_tellers")
     full_statement_data = data.get("full_statement_data", {})
     
-    print(f"🎯 Mode: {mode}, Statement data keys: {list(statement_data.keys())}, Full statement data keys: {list(full_statement_data.keys())}")
+    log.debug("🎯 Mode: %s, Statement data keys: %s, Full statement data keys: %s", mode, list(statement_data.keys()), list(full_statement_data.keys()))
     
     if not mode:
         return jsonify({"error": "Mode is required"}), 400
@@ -823,109 +1188,81 @@ def get_puzzle_solution():
         return jsonify({"error": "Number of truth tellers is required"}), 400
     
     try:
-        # Use the statement data to solve the puzzle with Z3
+        # Use the statement data to solve the puzzle
         statements = full_statement_data if full_statement_data else statement_data
-        print(f"📊 Using statements: {statements}")
+        log.debug("📊 Using statements: %s", statements)
         
         people = list(statements.keys())
-        print(f"👥 People: {people}")
-        
-        z3_vars = {p: Bool(p) for p in people}
-        solver = Solver()
-        
-        # Add constraints based on mode
-        if mode.lower() == "easy":
-            print(f"🟢 Processing easy mode")
-            for speaker, sdata in statements.items():
-                print(f"  👤 {speaker}: {sdata}")
-                if isinstance(sdata, dict) and "target" in sdata:
-                    target = sdata["target"]
-                    said_truth = sdata.get("truth_value", sdata.get("claim"))
-                    print(f"    ➡️ {speaker} says {target} is {said_truth}")
-                    solver.add(Implies(z3_vars[speaker], z3_vars[target] == said_truth))
-                    solver.add(Implies(Not(z3_vars[speaker]), z3_vars[target] != said_truth))
-        
-        elif mode.lower() in ["medium", "hard", "extreme", "ranked"]:
-            print(f"🔵 Processing {mode} mode")
-            for speaker, d in statements.items():
-                print(f"  👤 {speaker}: {d}")
-                if isinstance(d, dict) and "mode" in d:
-                    print(f"    🔧 Complex statement with mode: {d['mode']}")
-                    # Full statement data format
-                    if d["mode"] == "DIRECT":
-                        # Handle both formats: 'claim' (ranked) and 'truth_value' (practice)
-                        claim = d.get("claim", d.get("truth_value"))
-                        solver.add(Implies(z3_vars[speaker], z3_vars[d["target"]] == claim))
-                        solver.add(Implies(Not(z3_vars[speaker]), z3_vars[d["target"]] != claim))
-                        
-                    elif d["mode"] == "AND":
-                        solver.add(Implies(z3_vars[speaker], And(z3_vars[d["t1"]] == d["c1"], z3_vars[d["t2"]] == d["c2"])))
-                        solver.add(Implies(Not(z3_vars[speaker]), Or(z3_vars[d["t1"]] != d["c1"], z3_vars[d["t2"]] != d["c2"])))
-                        
-                    elif d["mode"] == "OR":
-                        solver.add(Implies(z3_vars[speaker], Or(z3_vars[d["t1"]] == d["c1"], z3_vars[d["t2"]] == d["c2"])))
-                        solver.add(Implies(Not(z3_vars[speaker]), And(z3_vars[d["t1"]] != d["c1"], z3_vars[d["t2"]] != d["c2"])))
-                        
-                    elif d["mode"] == "IF":
-                        implication = Implies(z3_vars[d["cond"]] == d["cond_val"], z3_vars[d["result"]] == d["result_val"])
-                        solver.add(Implies(z3_vars[speaker], implication))
-                        solver.add(Implies(Not(z3_vars[speaker]), Not(implication)))
-                        
-                    elif d["mode"] == "XOR":
-                        solver.add(Implies(z3_vars[speaker], Xor(z3_vars[d["t1"]] == d["c1"], z3_vars[d["t2"]] == d["c2"])))
-                        solver.add(Implies(Not(z3_vars[speaker]), Not(Xor(z3_vars[d["t1"]] == d["c1"], z3_vars[d["t2"]] == d["c2"]))))
-                        
-                    elif d["mode"] == "IFF":
-                        a1 = (z3_vars[d["t1"]] == d["c1"])
-                        a2 = (z3_vars[d["t2"]] == d["c2"])
-                        biconditional = And(Implies(a1, a2), Implies(a2, a1))
-                        solver.add(Implies(z3_vars[speaker], biconditional))
-                        solver.add(Implies(Not(z3_vars[speaker]), Not(biconditional)))
-                        
-                    elif d["mode"] == "NESTED_IF":
-                        inner_impl = Implies(z3_vars[d["inner_cond"]] == d["inner_val"], z3_vars[d["inner_result"]] == d["inner_result_val"])
-                        nested_impl = Implies(z3_vars[d["outer_cond"]] == d["outer_val"], inner_impl)
-                        solver.add(Implies(z3_vars[speaker], nested_impl))
-                        solver.add(Implies(Not(z3_vars[speaker]), Not(nested_impl)))
-                        
-                    elif d["mode"] == "GROUP":
-                        cnt = Sum([If(z3_vars[m], 1, 0) for m in d["members"]])
-                        solver.add(Implies(z3_vars[speaker], cnt == d["exactly"]))
-                        solver.add(Implies(Not(z3_vars[speaker]), cnt != d["exactly"]))
-                else:
-                    # Simple statement data format (fallback)
-                    print(f"    🔄 Using fallback for simple statement data")
-                    target = d.get("target")
-                    truth_value = d.get("truth_value")
-                    print(f"    📝 Target: {target}, Truth value: {truth_value}")
-                    if target and truth_value is not None:
-                        print(f"    ✅ Adding constraint: {speaker} -> {target} == {truth_value}")
-                        solver.add(Implies(z3_vars[speaker], z3_vars[target] == truth_value))
-                        solver.add(Implies(Not(z3_vars[speaker]), z3_vars[target] != truth_value))
-                    else:
-                        print(f"    ❌ Invalid statement data: missing target or truth_value")
-        
-        # Add truth-teller count constraint
-        solver.add(Sum([If(z3_vars[p], 1, 0) for p in people]) == num_truth_tellers)
-        print(f"🔢 Added truth-teller constraint: {num_truth_tellers} out of {len(people)}")
-        
-        # Solve the puzzle
-        print(f"🧮 Solving puzzle...")
-        if solver.check() == sat:
-            model = solver.model()
-            solution = {p: bool(model[z3_vars[p]]) for p in people}
-            print(f"✅ Solution found: {solution}")
-            return jsonify({"solution": solution})
-        else:
-            print(f"❌ No solution found")
+        log.debug("👥 People: %s", people)
+        
+        # Easy mode only ever reads target/truth_value, whatever else is present
+        compiled = statement_compiler.compile_puzzle(statements, num_truth_tellers, people, simple=mode.lower() == "easy")
+        solution = solver_pool.solve(statements, num_truth_tellers, people, simple=mode.lower() == "easy", mode=mode.lower())
+        if solution is None:
+            log.warning("❌ No solution found")
             return jsonify({"error": "No solution found for this puzzle"}), 400
-            
+        log.debug("✅ Solution found: %s", solution)
+        return jsonify({"solution": solution, "explanation": compiled.explain(solution)})
+    
+    except statement_compiler.UnsupportedStatement as e:
+        log.warning("❌ Cannot solve puzzle: %s", e)
+        return jsonify({"error": f"Invalid puzzle statements: {e}"}), 400
+    
+    except SolverUnavailable as e:
+        log.warning("⏳ Solver unavailable: %s", e)
+        return jsonify({"error": str(e)}), 503
+    
     except Exception as e:
-        print(f"❌ Exception in solution endpoint: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception("❌ Exception in solution endpoint: %s", e)
         return jsonify({"error": f"Failed to solve puzzle: {str(e)}"}), 500
 
+def fetch_recent_matches(user_id, limit=20):
+    """Fetch a user's most recent matches, newest first."""
+    return fetch_match_page(supabase, user_id, limit)[0]
+
+def build_elo_payload(profile, recent_matches):
+    """Build the /user/elo response for a profile and its recent matches."""
+    placement_completed = profile.get("placement_matches_completed", 0)
+    
+    # Handle unranked users (in placement matches)
+    if is_placement_match(profile):
+        return {
+            "elo": None,  # Don't show ELO during placement
+            "tier": "Unranked",
+            "placement_matches_completed": placement_completed,
+            "placement_matches_required": PLACEMENT_MATCHES_REQUIRED,
+            "is_in_placement": True,
+            "matches": recent_matches
+        }
+    
+    # Handle ranked users
+    elo = profile["elo"]
+    tier_info = get_tier(elo)
+    tier_label = tier_info["label"] if tier_info else "Unknown"
+    return {
+        "elo": elo,
+        "tier": tier_label,
+        "placement_matches_completed": placement_completed,
+        "placement_matches_required": PLACEMENT_MATCHES_REQUIRED,
+        "is_in_placement": False,
+        "matches": recent_matches
+    }
+
+def build_me_payload(user, profile):
+    """Build the /me response: the user's id, email, username and Elo."""
+    # Get username from profile, fallback to email prefix if not set
+    username = profile.get("username")
+    if not username:
+        username = user["email"].split('@')[0] if user.get("email") else "User"
+    return {
+        "user": {
+            "id": user["sub"],
+            "email": user["email"],
+            "username": username,
+            "elo": profile["elo"]
+        }
+    }
+
 @app.route("/user/elo", methods=["GET"])
 @auth_required
 def get_user_elo(user, profile):
@@ -935,60 +1272,22 @@ def get_user_elo(user, profile):
         
     try:
         user_id = user["sub"]
-        print(f"🔍 DEBUG: Fetching matches for user {user_id}")
-        
-        # Check if user is in placement matches
-        is_placement = is_placement_match(profile)
-        placement_completed = profile.get("placement_matches_completed", 0)
-        
-        # Fetch recent matches
-        matches_resp = supabase.table("matches") \
-            .select("*") \
-            .eq("user_id", user_id) \
-            .order("created_at", desc=True) \
-            .limit(20) \
-            .execute()
+        log.debug("🔍 DEBUG: Fetching matches for user %s", user_id)
         
-        recent_matches = matches_resp.data or []
-        print(f"📊 DEBUG: Found {len(recent_matches)} matches")
+        recent_matches = fetch_recent_matches(user_id)
+        log.debug("📊 DEBUG: Found %s matches", len(recent_matches))
         
         if recent_matches:
             # Log first few matches to see their dates
             for i, match in enumerate(recent_matches[:3]):
-                print(f"  Match {i+1}: created_at={match.get('created_at')}, solved={match.get('solved')}")
-        
-        # Handle unranked users (in placement matches)
-        if is_placement:
-            response_data = {
-                "elo": None,  # Don't show ELO during placement
-                "tier": "Unranked",
-                "placement_matches_completed": placement_completed,
-                "placement_matches_required": PLACEMENT_MATCHES_REQUIRED,
-                "is_in_placement": True,
-                "matches": recent_matches
-            }
-        else:
-            # Handle ranked users
-            elo = profile["elo"]
-            tier_info = get_tier(elo)
-            tier_label = tier_info["label"] if tier_info else "Unknown"
-            
-            response_data = {
-                "elo": elo,
-                "tier": tier_label,
-                "placement_matches_completed": placement_completed,
-                "placement_matches_required": PLACEMENT_MATCHES_REQUIRED,
-                "is_in_placement": False,
-                "matches": recent_matches
-            }
+                log.debug("  Match %s: created_at=%s, solved=%s", i+1, match.get('created_at'), match.get('solved'))
         
-        print(f"✅ DEBUG: Returning {len(recent_matches)} matches to frontend")
+        response_data = build_elo_payload(profile, recent_matches)
+        log.debug("✅ DEBUG: Returning %s matches to frontend", len(recent_matches))
         return jsonify(response_data)
         
     except Exception as e:
-        print(f"❌ Error in /user/elo: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("❌ Error in /user/elo: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route("/user/username", methods=["PATCH"])
@@ -1027,6 +1326,8 @@ def update_username(user, profile):
             .update({"username": new_username}) \
             .eq('user_id', user['sub']) \
             .execute()
+        profile_cache.invalidate(user['sub'])
+        leaderboard_index.rename(user['sub'], new_username)
 
         if hasattr(update_resp, 'error') and update_resp.error:
             return jsonify({"error": update_resp.error.message}), 500
@@ -1034,7 +1335,7 @@ def update_username(user, profile):
         return jsonify({"success": True, "username": new_username}), 200
 
     except Exception as e:
-        print(f"Error updating username: {e}")
+        log.error("Error updating username: %s", e)
         return jsonify({"error": "Server error"}), 500
 
 @app.route("/me")
@@ -1045,102 +1346,79 @@ def get_user_profile(user, profile):
         return jsonify({"error": "Profile not available: Supabase not configured"}), 503
         
     try:
-        # Get username from profile, fallback to email prefix if not set
-        username = profile.get("username")
-        if not username:
-            username = user["email"].split('@')[0] if user.get("email") else "User"
-            
-        return jsonify({
-            "user": {
-                "id": user["sub"],
-                "email": user["email"], 
-                "username": username,
-                "elo": profile["elo"]
-            }
-        })
+        return jsonify(build_me_payload(user, profile))
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route("/leaderboard", methods=["GET"])
+@single_flight.route(ttl=LEADERBOARD_RESPONSE_TTL)
 @auth_optional
 def get_leaderboard(user=None, profile=None):
     """
     Public route returning top-500 RANKED users by ELO (desc). 
     Ties share the same rank. Include username and tier.
     Unranked users (elo = NULL) are excluded.
+    Served from this worker's in-memory leaderboard index (see leaderboard_index.py).
     """
     if not supabase:
         return jsonify({"error": "Leaderboard not available: Supabase not configured"}), 503
         
     try:
-        # 1. Fetch top 500 RANKED users from Supabase "profiles" table
-        # Filter out unranked users (elo IS NULL or is_ranked = false)
-        resp = supabase.table('profiles') \
-            .select('user_id, username, elo') \
-            .eq('is_ranked', True) \
-            .order('elo', desc=True) \
-            .limit(500) \
-            .execute()
-
-        if hasattr(resp, 'error') and resp.error:
-            return jsonify({"error": resp.error.message}), 500
-
-        rows = resp.data or []  # list of { user_id, username, elo }
-        print(f"📊 Leaderboard: Found {len(rows)} ranked users")
-
-        # 2. Build a list with proper "competition ranking"
-        leaderboard = []
-        previous_elo = None
-        previous_rank = 0
-        count_processed = 0
-
-        # Define tier mappings (matching elo_system.py)
-        def compute_tier_label(e):
-            # Add safety check for None values (shouldn't happen after filtering, but just in case)
-            if e is None:
-                return "Unranked"
-            if e >= 2000:         return "Grandmaster Thinker"
-            elif e >= 1500:       return "Critical Thinker"
-            elif e >= 1000:       return "Advanced Thinker"
-            elif e >= 500:        return "Intermediate Thinker"
-            else:                 return "Beginner Thinker"
-
-        for row in rows:
-            count_processed += 1
-            current_elo = row['elo']
-            username = row['username'] or row['user_id']  # Fallback if no username
-            
-            # Skip any rows with NULL elo (extra safety check)
-            if current_elo is None:
-                print(f"⚠️ Skipping user {row['user_id']} with NULL elo")
-                count_processed -= 1  # Don't count this in ranking
-                continue
-
-            # Assign rank: if same as previous ELO, same rank; else rank = count_processed
-            if previous_elo is None or current_elo < previous_elo:
-                rank = count_processed
-                previous_rank = rank
-            else:
-                rank = previous_rank
-
-            previous_elo = current_elo
+        if leaderboard_index.enabled:
+            leaderboard = leaderboard_index.top(LEADERBOARD_SIZE)
+        else:
+            # Fetch the top RANKED users from Supabase "profiles" table
+            # Filter out unranked users (elo IS NULL or is_ranked = false)
+            resp = supabase.table('profiles') \
+                .select('user_id, username, elo') \
+                .eq('is_ranked', True) \
+                .order('elo', desc=True) \
+                .limit(LEADERBOARD_SIZE) \
+                .execute()
 
-            leaderboard.append({
-                "rank":       rank,
-                "user_id":    row['user_id'],
-                "username":   username,
-                "elo":        current_elo,
-                "tier":       compute_tier_label(current_elo)
-            })
+            if hasattr(resp, 'error') and resp.error:
+                return jsonify({"error": resp.error.message}), 500
+            leaderboard = rank_rows(resp.data or [])
 
-        print(f"✅ Leaderboard: Returning {len(leaderboard)} ranked users")
+        log.debug("✅ Leaderboard: Returning %s ranked users", len(leaderboard))
         return jsonify({"leaderboard": leaderboard}), 200
 
     except Exception as e:
-        print(f"❌ Error in /leaderboard: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("❌ Error in /leaderboard: %s", e)
+        return jsonify({"error": "Server error"}), 500
+
+@app.route("/leaderboard/me", methods=["GET"])
+@auth_required
+def get_leaderboard_position(user, profile):
+    """
+    The caller's competition rank and the players around them.
+    
+    ?window=k returns the k players directly above and below (default 10,
+    at most LEADERBOARD_MAX_WINDOW). Works for any ranked player, not just
+    the top 500; each lookup is O(log n) in the leaderboard index.
+    """
+    if not supabase:
+        return jsonify({"error": "Leaderboard not available: Supabase not configured"}), 503
+    if not leaderboard_index.enabled:
+        return jsonify({"error": "Leaderboard position not available: leaderboard index disabled"}), 503
+    
+    window = request.args.get('window', 10, type=int)
+    if window < 0 or window > LEADERBOARD_MAX_WINDOW:
+        window = 10
+    
+    try:
+        # Players ranked by another worker since this worker's last reload
+        if profile.get("is_ranked"):
+            leaderboard_index.add_if_missing(user["sub"], profile.get("elo"), profile.get("username"))
+        
+        position = leaderboard_index.around(user["sub"], window)
+        if position is None:
+            return jsonify({"ranked": False, "rank": None, "player": None, "above": [], "below": []}), 200
+        return jsonify({"ranked": True, **position}), 200
+        
+    except Exception as e:
+        log.exception("❌ Error in /leaderboard/me: %s", e)
         return jsonify({"error": "Server error"}), 500
 
 @app.route("/test/abandon", methods=["POST"])
@@ -1148,17 +1426,17 @@ def test_abandon():
     """Test endpoint to verify abandonment processing works."""
     try:
         data = request.json or {}
-        print(f"🧪 TEST ABANDON: {data}")
+        log.debug("🧪 TEST ABANDON: %s", data)
         
         abandoned = data.get("abandoned", False)
         if abandoned:
-            print(f"✅ TEST: Abandonment flag detected successfully!")
+            log.debug("✅ TEST: Abandonment flag detected successfully!")
             return jsonify({"status": "success", "message": "Abandonment test passed", "abandoned": True})
         else:
             return jsonify({"status": "no_abandon", "message": "No abandonment flag found"})
             
     except Exception as e:
-        print(f"❌ TEST ERROR: {e}")
+        log.error("❌ TEST ERROR: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route("/test/create-sample-matches", methods=["POST"])
@@ -1170,7 +1448,7 @@ def create_sample_matches(user, profile):
         
     try:
         user_id = user["sub"]
-        print(f"🧪 Creating sample matches for user {user_id}")
+        log.debug("🧪 Creating sample matches for user %s", user_id)
         
         # Create sample matches
         sample_matches = []
@@ -1225,7 +1503,7 @@ def create_sample_matches(user, profile):
         # Insert matches
         result = supabase.table("matches").insert(sample_matches).execute()
         
-        print(f"✅ Successfully inserted {len(result.data)} sample matches")
+        log.debug("✅ Successfully inserted %s sample matches", len(result.data))
         
         return jsonify({
             "success": True,
@@ -1234,11 +1512,51 @@ def create_sample_matches(user, profile):
         }), 200
         
     except Exception as e:
-        print(f"❌ Error creating sample matches: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("❌ Error creating sample matches: %s", e)
         return jsonify({"error": str(e)}), 500
 
+@app.route("/puzzle/pool/stats", methods=["GET"])
+@metrics_token_required
+def puzzle_pool_stats():
+    """Per-worker counters: puzzle pool, bank, generation, puzzle store, batch and solver pools, profile and JWT caches, leaderboard, single-flight, progress writes, match journal, idempotency keys, logging, profiling."""
+    return jsonify({
+        "pid": os.getpid(),
+        "pool": puzzle_pool.stats(),
+        "bank": puzzle_bank.stats(),
+        "generation": uniqueness.generation_stats.snapshot(),
+        "store": puzzle_store.stats(),
+        "batch": batch_generator.stats(),
+        "solver": solver_pool.stats(),
+        "profiles": profile_cache.stats(),
+        "jwt": jwt_cache.stats(),
+        "leaderboard": leaderboard_index.stats(),
+        "single_flight": single_flight.stats(),
+        "progress_writes": progress_writer.stats(),
+        "match_journal": match_journal.stats(),
+        "idempotency": idempotency.stats(),
+        "logging": structured_log.stats(),
+        "profiling": request_profiler.stats(),
+    })
+
+@app.route("/metrics", methods=["GET"])
+@metrics_token_required
+def get_metrics():
+    """Request and phase latency histograms of all workers, in the Prometheus text format."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/debug/generation", methods=["GET"])
+@metrics_token_required
+def generation_telemetry():
+    """
+    Per-worker rolling generation and solver telemetry per (mode, num_players).
+
+    For the last TELEMETRY_WINDOW generations, checks and solves of each
+    size: outcomes, latency percentiles, the solver engine with Z3 conflicts
+    and decisions, and for generations the attempts-to-success histogram
+    and rejection rates per reason and statement kind.
+    """
+    return jsonify({"pid": os.getpid(), **solver_telemetry.telemetry.snapshot()})
+
 @app.route("/", methods=["GET"])
 def health_check():
     return jsonify({"status": "MindRank backend is running!"})
@@ -1246,7 +1564,7 @@ def health_check():
 @app.route("/user/matches", methods=["GET"])
 @auth_required
 def get_user_matches(user, profile):
-    """Get user's match history with optional limit and order parameters."""
+    """Get a page of the user's match history (limit, order and the previous page's next_cursor)."""
     if not supabase:
         return jsonify({"error": "Match history not available: Supabase not configured"}), 503
         
@@ -1254,55 +1572,28 @@ def get_user_matches(user, profile):
         user_id = user["sub"]
         
         # Get query parameters
-        limit = request.args.get('limit', '10', type=int)
+        limit = request.args.get('limit', MATCH_PAGE_DEFAULT, type=int)
         order = request.args.get('order', 'desc').lower()
+        cursor = request.args.get('cursor')
         
         # Validate parameters
-        if limit < 1 or limit > 100:
-            limit = 10
+        if limit < 1 or limit > MATCH_PAGE_MAX:
+            limit = MATCH_PAGE_DEFAULT
         if order not in ['asc', 'desc']:
             order = 'desc'
             
-        print(f"🔍 DEBUG: Fetching {limit} matches for user {user_id} in {order} order")
-        
-        # First, let's get ALL matches to see what's in the database
-        all_matches_query = supabase.table("matches") \
-            .select("*") \
-            .eq("user_id", user_id) \
-            .order("created_at", desc=True)
+        log.debug("🔍 DEBUG: Fetching %s matches for user %s in %s order", limit, user_id, order)
         
-        all_matches_resp = all_matches_query.execute()
-        all_matches = all_matches_resp.data or []
+        matches, next_cursor = fetch_match_page(supabase, user_id, limit, order, cursor)
         
-        print(f"📊 DEBUG: Found {len(all_matches)} total matches in database")
+        log.debug("📊 DEBUG: Returning %s matches", len(matches))
         
-        # Log all matches with their timestamps
-        for i, match in enumerate(all_matches):
-            print(f"  All Match {i+1}: created_at={match.get('created_at')}, solved={match.get('solved')}, mode={match.get('mode')}")
-        
-        # Now get the limited matches
-        query = supabase.table("matches") \
-            .select("*") \
-            .eq("user_id", user_id) \
-            .order("created_at", desc=(order == 'desc')) \
-            .limit(limit)
-        
-        matches_resp = query.execute()
-        matches = matches_resp.data or []
-        
-        print(f"📊 DEBUG: Returning {len(matches)} limited matches")
-        
-        if matches:
-            # Log the limited matches to see their dates
-            for i, match in enumerate(matches):
-                print(f"  Limited Match {i+1}: created_at={match.get('created_at')}, solved={match.get('solved')}, mode={match.get('mode')}")
-        
-        return jsonify({"matches": matches}), 200
+        return jsonify({"matches": matches, "next_cursor": next_cursor}), 200
         
+    except CursorError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f"❌ Error in /user/matches: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("❌ Error in /user/matches: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route("/user/practice-progress", methods=["GET"])
@@ -1356,11 +1647,147 @@ def get_practice_progress(user, profile):
         return jsonify({"practice_progress": progress_data}), 200
         
     except Exception as e:
-        print(f"❌ Error in /user/practice-progress: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("❌ Error in /user/practice-progress: %s", e)
         return jsonify({"error": str(e)}), 500
 
+def build_practice_progress_bars(profile):
+    """Build the practice mode progress bars for a profile."""
+    # Get current progress for each mode
+    easy_solved = profile.get("easy_puzzles_solved", 0)
+    medium_solved = profile.get("medium_puzzles_solved", 0)
+    hard_solved = profile.get("hard_puzzles_solved", 0)
+    extreme_solved = profile.get("extreme_puzzles_solved", 0)
+    
+    progress_bars = []
+    
+    # Easy mode - always show progress bar (always unlocked)
+    progress_bars.append({
+        "mode": "easy",
+        "title": "Easy Mode",
+        "description": "Direct truth/lie statements. Perfect for beginners to learn the basics.",
+        "show_progress_bar": True,
+        "solved": easy_solved,
+        "total": 10,
+        "percentage": min((easy_solved / 10) * 100, 100),
+        "completed": easy_solved >= 10,
+        "progress_text": f"{easy_solved}/10"
+    })
+    
+    # Medium mode - show progress bar only if unlocked
+    medium_unlocked = easy_solved >= 10
+    if medium_unlocked:
+        progress_bars.append({
+            "mode": "medium",
+            "title": "Medium Mode", 
+            "description": "AND/OR logic puzzles. Build your logical reasoning skills.",
+            "show_progress_bar": True,
+            "solved": medium_solved,
+            "total": 10,
+            "percentage": min((medium_solved / 10) * 100, 100),
+            "completed": medium_solved >= 10,
+            "progress_text": f"{medium_solved}/10"
+        })
+    
+    # Hard mode - show progress bar only if unlocked
+    hard_unlocked = medium_solved >= 10
+    if hard_unlocked:
+        progress_bars.append({
+            "mode": "hard",
+            "title": "Hard Mode",
+            "description": "Complex conditionals and nested logic. For advanced thinkers.",
+            "show_progress_bar": True,
+            "solved": hard_solved,
+            "total": 10,
+            "percentage": min((hard_solved / 10) * 100, 100),
+            "completed": hard_solved >= 10,
+            "progress_text": f"{hard_solved}/10"
+        })
+    
+    # Extreme mode - show progress bar only if unlocked and available
+    extreme_unlocked = hard_solved >= 10 and EXTREME_MODE_AVAILABLE
+    if extreme_unlocked:
+        progress_bars.append({
+            "mode": "extreme",
+            "title": "Extreme Mode",
+            "description": "Multi-layered logic puzzles. The ultimate challenge.",
+            "show_progress_bar": True,
+            "solved": extreme_solved,
+            "total": 10,
+            "percentage": min((extreme_solved / 10) * 100, 100),
+            "completed": extreme_solved >= 10,
+            "progress_text": f"{extreme_solved}/10"
+        })
+    return progress_bars
+
+def build_master_progress_bars(profile):
+    """Build the master mode progress bars for a profile."""
+    # Get current progress for each master mode
+    easy_solved = profile.get("master_easy_puzzles_solved", 0)
+    medium_solved = profile.get("master_medium_puzzles_solved", 0)
+    hard_solved = profile.get("master_hard_puzzles_solved", 0)
+    extreme_solved = profile.get("master_extreme_puzzles_solved", 0)
+    
+    progress_bars = []
+    
+    # Easy mode - always show progress bar (always unlocked)
+    progress_bars.append({
+        "mode": "easy",
+        "title": "Master Easy",
+        "description": "No takebacks! Permanent selections test your deductive reasoning.",
+        "show_progress_bar": True,
+        "solved": easy_solved,
+        "total": 10,
+        "percentage": min((easy_solved / 10) * 100, 100),
+        "completed": easy_solved >= 10,
+        "progress_text": f"{easy_solved}/10"
+    })
+    
+    # Medium mode - show progress bar only if unlocked
+    medium_unlocked = easy_solved >= 10
+    if medium_unlocked:
+        progress_bars.append({
+            "mode": "medium",
+            "title": "Master Medium", 
+            "description": "AND/OR puzzles with locked choices. Pure logical thinking required.",
+            "show_progress_bar": True,
+            "solved": medium_solved,
+            "total": 10,
+            "percentage": min((medium_solved / 10) * 100, 100),
+            "completed": medium_solved >= 10,
+            "progress_text": f"{medium_solved}/10"
+        })
+    
+    # Hard mode - show progress bar only if unlocked
+    hard_unlocked = medium_solved >= 10
+    if hard_unlocked:
+        progress_bars.append({
+            "mode": "hard",
+            "title": "Master Hard",
+            "description": "IF/THEN conditionals with permanent choices. Working memory mastery.",
+            "show_progress_bar": True,
+            "solved": hard_solved,
+            "total": 10,
+            "percentage": min((hard_solved / 10) * 100, 100),
+            "completed": hard_solved >= 10,
+            "progress_text": f"{hard_solved}/10"
+        })
+    
+    # Extreme mode - show progress bar only if unlocked and available
+    extreme_unlocked = hard_solved >= 10 and EXTREME_MODE_AVAILABLE
+    if extreme_unlocked:
+        progress_bars.append({
+            "mode": "extreme",
+            "title": "Master Extreme",
+            "description": "Ultimate challenge: advanced logic with no safety net.",
+            "show_progress_bar": True,
+            "solved": extreme_solved,
+            "total": 10,
+            "percentage": min((extreme_solved / 10) * 100, 100),
+            "completed": extreme_solved >= 10,
+            "progress_text": f"{extreme_solved}/10"
+        })
+    return progress_bars
+
 @app.route("/practice/progress-bars", methods=["GET"])
 @auth_optional
 def get_practice_progress_bars(user=None, profile=None):
@@ -1371,78 +1798,11 @@ def get_practice_progress_bars(user=None, profile=None):
         return jsonify({"progress_bars": []}), 200
         
     try:
-        # Get current progress for each mode
-        easy_solved = profile.get("easy_puzzles_solved", 0)
-        medium_solved = profile.get("medium_puzzles_solved", 0)
-        hard_solved = profile.get("hard_puzzles_solved", 0)
-        extreme_solved = profile.get("extreme_puzzles_solved", 0)
-        
-        progress_bars = []
-        
-        # Easy mode - always show progress bar (always unlocked)
-        progress_bars.append({
-            "mode": "easy",
-            "title": "Easy Mode",
-            "description": "Direct truth/lie statements. Perfect for beginners to learn the basics.",
-            "show_progress_bar": True,
-            "solved": easy_solved,
-            "total": 10,
-            "percentage": min((easy_solved / 10) * 100, 100),
-            "completed": easy_solved >= 10,
-            "progress_text": f"{easy_solved}/10"
-        })
-        
-        # Medium mode - show progress bar only if unlocked
-        medium_unlocked = easy_solved >= 10
-        if medium_unlocked:
-            progress_bars.append({
-                "mode": "medium",
-                "title": "Medium Mode", 
-                "description": "AND/OR logic puzzles. Build your logical reasoning skills.",
-                "show_progress_bar": True,
-                "solved": medium_solved,
-                "total": 10,
-                "percentage": min((medium_solved / 10) * 100, 100),
-                "completed": medium_solved >= 10,
-                "progress_text": f"{medium_solved}/10"
-            })
-        
-        # Hard mode - show progress bar only if unlocked
-        hard_unlocked = medium_solved >= 10
-        if hard_unlocked:
-            progress_bars.append({
-                "mode": "hard",
-                "title": "Hard Mode",
-                "description": "Complex conditionals and nested logic. For advanced thinkers.",
-                "show_progress_bar": True,
-                "solved": hard_solved,
-                "total": 10,
-                "percentage": min((hard_solved / 10) * 100, 100),
-                "completed": hard_solved >= 10,
-                "progress_text": f"{hard_solved}/10"
-            })
-        
-        # Extreme mode - show progress bar only if unlocked and available
-        extreme_unlocked = hard_solved >= 10 and EXTREME_MODE_AVAILABLE
-        if extreme_unlocked:
-            progress_bars.append({
-                "mode": "extreme",
-                "title": "Extreme Mode",
-                "description": "Multi-layered logic puzzles. The ultimate challenge.",
-                "show_progress_bar": True,
-                "solved": extreme_solved,
-                "total": 10,
-                "percentage": min((extreme_solved / 10) * 100, 100),
-                "completed": extreme_solved >= 10,
-                "progress_text": f"{extreme_solved}/10"
-            })
-        
+        progress_bars = build_practice_progress_bars(profile)
         return jsonify({"progress_bars": progress_bars}), 200
         
     except Exception as e:
-        print(f"❌ Error in /practice/progress-bars: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("❌ Error in /practice/progress-bars: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route("/master/progress-bars", methods=["GET"])
@@ -1455,79 +1815,44 @@ def get_master_progress_bars(user=None, profile=None):
         return jsonify({"progress_bars": []}), 200
         
     try:
-        # Get current progress for each master mode
-        easy_solved = profile.get("master_easy_puzzles_solved", 0)
-        medium_solved = profile.get("master_medium_puzzles_solved", 0)
-        hard_solved = profile.get("master_hard_puzzles_solved", 0)
-        extreme_solved = profile.get("master_extreme_puzzles_solved", 0)
-        
-        progress_bars = []
-        
-        # Easy mode - always show progress bar (always unlocked)
-        progress_bars.append({
-            "mode": "easy",
-            "title": "Master Easy",
-            "description": "No takebacks! Permanent selections test your deductive reasoning.",
-            "show_progress_bar": True,
-            "solved": easy_solved,
-            "total": 10,
-            "percentage": min((easy_solved / 10) * 100, 100),
-            "completed": easy_solved >= 10,
-            "progress_text": f"{easy_solved}/10"
-        })
-        
-        # Medium mode - show progress bar only if unlocked
-        medium_unlocked = easy_solved >= 10
-        if medium_unlocked:
-            progress_bars.append({
-                "mode": "medium",
-                "title": "Master Medium", 
-                "description": "AND/OR puzzles with locked choices. Pure logical thinking required.",
-                "show_progress_bar": True,
-                "solved": medium_solved,
-                "total": 10,
-                "percentage": min((medium_solved / 10) * 100, 100),
-                "completed": medium_solved >= 10,
-                "progress_text": f"{medium_solved}/10"
-            })
-        
-        # Hard mode - show progress bar only if unlocked
-        hard_unlocked = medium_solved >= 10
-        if hard_unlocked:
-            progress_bars.append({
-                "mode": "hard",
-                "title": "Master Hard",
-                "description": "IF/THEN conditionals with permanent choices. Working memory mastery.",
-                "show_progress_bar": True,
-                "solved": hard_solved,
-                "total": 10,
-                "percentage": min((hard_solved / 10) * 100, 100),
-                "completed": hard_solved >= 10,
-                "progress_text": f"{hard_solved}/10"
-            })
-        
-        # Extreme mode - show progress bar only if unlocked and available
-        extreme_unlocked = hard_solved >= 10 and EXTREME_MODE_AVAILABLE
-        if extreme_unlocked:
-            progress_bars.append({
-                "mode": "extreme",
-                "title": "Master Extreme",
-                "description": "Ultimate challenge: advanced logic with no safety net.",
-                "show_progress_bar": True,
-                "solved": extreme_solved,
-                "total": 10,
-                "percentage": min((extreme_solved / 10) * 100, 100),
-                "completed": extreme_solved >= 10,
-                "progress_text": f"{extreme_solved}/10"
-            })
-        
+        progress_bars = build_master_progress_bars(profile)
         return jsonify({"progress_bars": progress_bars}), 200
         
     except Exception as e:
-        print(f"❌ Error in /master/progress-bars: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("❌ Error in /master/progress-bars: %s", e)
         return jsonify({"error": str(e)}), 500
 
+@app.route("/bootstrap", methods=["GET"])
+@auth_required(fetch_profile=False)
+def bootstrap(user, profile):
+    """
+    Everything the dashboard needs on load in one response.
+    
+    Returns the /user/elo, /me, /practice/progress-bars and
+    /master/progress-bars payloads, verifying the token and reading the
+    profile once. The recent-matches query runs concurrently with the
+    profile read.
+    """
+    if not supabase:
+        return jsonify({"error": "Profile not available: Supabase not configured"}), 503
+    
+    # Start the matches query before the (possibly cached) profile read
+    matches_future = bootstrap_executor.submit(fetch_recent_matches, user["sub"])
+    with metrics.phase("profile_fetch"):
+        profile = get_or_create_user_profile(user["sub"], user.get("email", ""))
+    
+    try:
+        elo = build_elo_payload(profile, matches_future.result())
+    except Exception as e:
+        log.error("❌ Error loading matches in /bootstrap: %s", e)
+        elo = {"error": str(e)}
+    
+    return jsonify({
+        "elo": elo,
+        "me": build_me_payload(user, profile),
+        "practice_progress_bars": build_practice_progress_bars(profile),
+        "master_progress_bars": build_master_progress_bars(profile)
+    })
+
 if __name__ == "__main__":
     app.run(debug=True, host="0.0.0.0", port=5000)
\ No newline at end of file
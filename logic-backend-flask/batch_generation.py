@@ -0,0 +1,178 @@
+"""
+Batch puzzle generation across a process pool.
+
+POST /puzzle/generate/batch takes a list of {mode, players, count} specs and
+streams the puzzles back as NDJSON as they complete. Generation runs in a
+ProcessPoolExecutor, so a batch uses several cores instead of a single
+gunicorn worker's thread. Every web worker has its own executor, so by
+default each gets its share of the CPUs, the same as its solver pool
+(cpu_count // WEB_CONCURRENCY, at least one process): about one batch
+process per CPU on the host in total, WEB_CONCURRENCY * BATCH_WORKERS if
+BATCH_WORKERS is set.
+
+Each request is capped at BATCH_MAX_SPECS specs and BATCH_MAX_PUZZLES
+puzzles, and keeps at most BATCH_MAX_IN_FLIGHT tasks in the pool at a time,
+so one caller cannot queue work ahead of everyone else's batches. Each
+puzzle gets the solver pool's per-task deadline (SOLVER_TASK_TIMEOUT).
+
+Like the puzzle pool's refill thread, the executor is created lazily in each
+gunicorn worker: a pool created before the fork would not be usable there.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from solver_pool import (SOLVER_TASK_TIMEOUT, WEB_CONCURRENCY, init_worker, mp_context, run_captured,
+                         unpack_captured)
+
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "0")) or max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY)
+BATCH_MAX_SPECS = int(os.getenv("BATCH_MAX_SPECS", "10"))
+BATCH_MAX_PUZZLES = int(os.getenv("BATCH_MAX_PUZZLES", "100"))
+BATCH_MAX_IN_FLIGHT = int(os.getenv("BATCH_MAX_IN_FLIGHT", "0")) or max(1, BATCH_WORKERS // 2)
+BATCH_MIN_PLAYERS = 3
+BATCH_MAX_PLAYERS = 8
+
+
+class BatchError(ValueError):
+    """Raised when a batch request is malformed or exceeds the caps."""
+
+
+def _int(value, name, index):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise BatchError(f"Spec {index}: '{name}' must be an integer")
+    return value
+
+
+def parse_specs(specs, modes, max_specs=BATCH_MAX_SPECS, max_puzzles=BATCH_MAX_PUZZLES):
+    """
+    Validate a batch request.
+
+    Args:
+        specs: List of {"mode", "players", "count"} dicts (count defaults to 1)
+        modes: Modes the server can generate
+
+    Returns:
+        list: (mode, players, count) tuples
+    """
+    if not isinstance(specs, list) or not specs:
+        raise BatchError("'specs' must be a non-empty list")
+    if len(specs) > max_specs:
+        raise BatchError(f"At most {max_specs} specs per batch")
+
+    parsed = []
+    for i, spec in enumerate(specs):
+        if not isinstance(spec, dict):
+            raise BatchError(f"Spec {i}: expected an object")
+        mode = str(spec.get("mode", "")).lower()
+        if mode not in modes:
+            raise BatchError(f"Spec {i}: invalid mode '{spec.get('mode')}'")
+        players = _int(spec.get("players"), "players", i)
+        if not BATCH_MIN_PLAYERS <= players <= BATCH_MAX_PLAYERS:
+            raise BatchError(f"Spec {i}: players must be between {BATCH_MIN_PLAYERS} and {BATCH_MAX_PLAYERS}")
+        count = _int(spec.get("count", 1), "count", i)
+        if count < 1:
+            raise BatchError(f"Spec {i}: count must be at least 1")
+        parsed.append((mode, players, count))
+
+    total = sum(count for _, _, count in parsed)
+    if total > max_puzzles:
+        raise BatchError(f"At most {max_puzzles} puzzles per batch, requested {total}")
+    return parsed
+
+
+class BatchGenerator:
+    """Per-process executor for batch requests, with a per-request in-flight cap."""
+
+    def __init__(self, max_workers=BATCH_WORKERS, max_in_flight=BATCH_MAX_IN_FLIGHT):
+        self.max_workers = max(1, max_workers)
+        self.max_in_flight = max(1, max_in_flight)
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        self._stats = {"batches": 0, "generated": 0, "failed": 0, "cancelled": 0, "pool_restarts": 0}
+
+    def _get_executor(self):
+        """Create the process pool once per process."""
+        pid = os.getpid()
+        with self._lock:
+            if self._executor is None or self._executor_pid != pid:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=mp_context(),
+                                                     initializer=init_worker)
+                self._executor_pid = pid
+            return self._executor
+
+    def _reset_executor(self, executor):
+        """Drop a broken pool so the next batch starts a fresh one."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self._stats["pool_restarts"] += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def generate(self, specs):
+        """
+        Generate every puzzle in a batch, yielding results as they complete.
+
+        Args:
+            specs: (mode, players, count) tuples from parse_specs()
+
+        Yields:
+            dict: {"spec", "mode", "players", "puzzle"} for each puzzle, or
+            {"spec", "mode", "players", "error"} if its generation failed
+        """
+        tasks = [(i, mode, players) for i, (mode, players, count) in enumerate(specs) for _ in range(count)]
+        tasks.reverse()
+        executor = self._get_executor()
+        pending = {}
+        self._count("batches")
+        try:
+            while tasks or pending:
+                while tasks and len(pending) < self.max_in_flight:
+                    i, mode, players = task = tasks.pop()
+                    try:
+                        deadline = time.time() + SOLVER_TASK_TIMEOUT
+                        pending[executor.submit(run_captured, "generate", deadline, (mode, players))] = task
+                    except BrokenProcessPool:
+                        tasks.append(task)
+                        self._reset_executor(executor)
+                        executor = self._get_executor()
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, mode, players = pending.pop(future)
+                    result = {"spec": i, "mode": mode, "players": players}
+                    try:
+                        result["puzzle"] = unpack_captured(future.result())
+                        self._count("generated")
+                    except BrokenProcessPool:
+                        self._reset_executor(executor)
+                        executor = self._get_executor()
+                        result["error"] = "Puzzle worker crashed"
+                        self._count("failed")
+                    except Exception as e:
+                        result["error"] = str(e)
+                        self._count("failed")
+                    yield result
+        finally:
+            # Stop queued work if the client disconnected mid-stream
+            for future in pending:
+                if future.cancel():
+                    self._count("cancelled")
+            if tasks:
+                self._count("cancelled", len(tasks))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_in_flight": self.max_in_flight,
+                "running": self._executor is not None and self._executor_pid == os.getpid(),
+                **self._stats,
+            }
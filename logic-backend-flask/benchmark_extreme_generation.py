@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Compare the constructive extreme generator with the previous retrying one.
+
+The previous generator drew IF and NESTED_IF values, SELF_REF claims and
+GROUP counts at random, and its XOR statements ignored whether the two
+players shared a role, so most puzzles it drew had no solution at all and
+were thrown away after a solve. It is reproduced here as "retry" (same
+statement plan, same draws, same 30-attempt loop). "constructive" is
+extreme_mode.api_generate_extreme.
+
+For each player count this prints the attempts per generated puzzle, the
+share of attempts rejected as unsolvable or ambiguous, failed generations
+and the latency per call.
+
+Usage:
+    python benchmark_extreme_generation.py
+    python benchmark_extreme_generation.py --players 6 7 8 --runs 500
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import sys
+import time
+
+import extreme_mode
+import puzzle_solver
+import solver_telemetry
+import statement_compiler
+import uniqueness
+
+
+def retry_statement(kind, speaker, others, roles):
+    """Draw a statement the way the previous generator did."""
+    truthful = roles[speaker]
+    if kind == "IF":
+        cond, result = random.sample(others, 2)
+        return {"mode": "IF", "cond": cond, "cond_val": random.choice([True, False]),
+                "result": result, "result_val": random.choice([True, False])}
+    if kind == "NESTED_IF":
+        outer_cond, inner_cond, inner_result = random.sample(others, 3)
+        return {"mode": "NESTED_IF", "outer_cond": outer_cond, "outer_val": random.choice([True, False]),
+                "inner_cond": inner_cond, "inner_val": random.choice([True, False]),
+                "inner_result": inner_result, "inner_result_val": random.choice([True, False])}
+    if kind == "SELF_REF":
+        return {"mode": "DIRECT", "target": speaker, "claim": random.choice([True, False])}
+    if kind == "GROUP":
+        members = random.sample(others, min(len(others), random.randint(2, max(2, len(others)))))
+        return {"mode": "GROUP", "members": members, "exactly": random.randint(1, len(members) - 1)}
+    if kind == "XOR":
+        t1, t2 = random.sample(others, 2)
+        actual1, actual2 = roles[t1], roles[t2]
+        if truthful:
+            c1, c2 = (actual1, actual2) if actual1 != actual2 else (actual1, not actual2)
+        else:
+            c1, c2 = actual1, actual1
+        return {"mode": "XOR", "t1": t1, "c1": c1, "t2": t2, "c2": c2}
+    if kind == "AND" and not truthful:
+        t1, t2 = random.sample(others, 2)
+        flip_first = random.choice([True, False])
+        return {"mode": "AND", "t1": t1, "c1": roles[t1] != flip_first, "t2": t2, "c2": roles[t2] == flip_first}
+    # DIRECT, OR, IFF and truthful AND were already drawn consistently
+    return extreme_mode.build_statement(kind, speaker, others, roles)
+
+
+def retry_generate(num_players, max_attempts=30):
+    """The previous generator: draw a whole puzzle, solve it, retry on no or several solutions."""
+    attempts = solver_telemetry.GenerationAttempts("extreme", num_players)
+    people = [chr(ord('A') + i) for i in range(num_players)]
+    num_truth_tellers = max(2, round(0.6 * num_players))
+    for _ in range(max_attempts):
+        statement_types = extreme_mode.plan_statement_types(num_players)
+        truth_teller_set = set(random.sample(people, num_truth_tellers))
+        roles = {p: p in truth_teller_set for p in people}
+        try:
+            statement_logic = {
+                speaker: retry_statement(kind, speaker, [p for p in people if p != speaker], roles)
+                for speaker, kind in zip(people, statement_types)
+            }
+            compiled = statement_compiler.compile_puzzle(statement_logic, num_truth_tellers, people)
+            solutions = puzzle_solver.find_solutions(compiled, limit=uniqueness.SOLUTION_LIMIT)
+        except ValueError as e:  # Too few players for the drawn kinds
+            attempts.reject("error", e, kinds=statement_types)
+            continue
+        if not solutions:
+            attempts.reject("unsat", kinds=statement_types)
+            continue
+        if not uniqueness.is_unambiguous("extreme", compiled, solutions):
+            attempts.reject("ambiguous", kinds=statement_types)
+            continue
+        compiled.statement_texts()
+        attempts.succeeded(kinds=statement_types)
+        return statement_logic
+    attempts.failed()
+    raise RuntimeError(f"Failed to generate a valid extreme puzzle after {max_attempts} attempts")
+
+
+GENERATORS = {
+    "retry": retry_generate,
+    "constructive": extreme_mode.api_generate_extreme,
+}
+
+
+def run(generate, num_players, runs):
+    """Generate `runs` puzzles and return the telemetry event of each call."""
+    events = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(runs):
+            with solver_telemetry.capture() as captured:
+                try:
+                    generate(num_players)
+                except RuntimeError:
+                    pass
+            events.extend(event for event in captured if event["task"] == "generate")
+    return events
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", nargs="+", type=int, default=[4, 5, 6, 7, 8])
+    parser.add_argument("--runs", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    print(f"{'n':>2} {'generator':<13} {'attempts':>8} {'p90':>4} {'max':>4}  {'unsat':>6} {'ambig':>6} "
+          f"{'failed':>6}  {'ms':>7} {'p50 ms':>7} {'p90 ms':>7}")
+    for num_players in args.players:
+        for name, generate in GENERATORS.items():
+            events = run(generate, num_players, args.runs)
+            attempts = [event["attempts"] for event in events]
+            total = sum(attempts)
+            unsat = sum(event["rejections"].get("unsat", 0) for event in events)
+            ambiguous = sum(event["rejections"].get("ambiguous", 0) for event in events)
+            failed = sum(1 for event in events if event["outcome"] != "generated")
+            ms = [event["seconds"] * 1000 for event in events]
+            print(f"{num_players:>2} {name:<13} {total / len(events):>8.2f} {percentile(attempts, 0.9):>4} "
+                  f"{max(attempts):>4}  {unsat / total * 100:>5.1f}% {ambiguous / total * 100:>5.1f}% {failed:>6}  "
+                  f"{sum(ms) / len(ms):>7.2f} {percentile(ms, 0.5):>7.2f} {percentile(ms, 0.9):>7.2f}")
+    print(f"\n{args.runs} generations per row, Python {sys.version.split()[0]}")
+
+
+if __name__ == "__main__":
+    main()
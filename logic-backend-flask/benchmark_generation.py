@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Measure per-mode rejection rates and the latency cost of requiring a unique solution.
+
+Usage:
+    python benchmark_generation.py
+    python benchmark_generation.py --modes hard extreme --players 5 8 --runs 200
+"""
+
+import argparse
+import contextlib
+import io
+
+import easy_mode
+import medium_mode
+import hard_mode
+import extreme_mode
+import uniqueness
+
+GENERATORS = {
+    "easy": easy_mode.api_generate_easy,
+    "medium": medium_mode.api_generate_medium,
+    "hard": hard_mode.api_generate_hard,
+    "extreme": extreme_mode.api_generate_extreme,
+}
+
+
+def run(mode, num_players, runs, require_unique):
+    """Generate `runs` puzzles and return the generation stats for the mode."""
+    uniqueness.REQUIRE_UNIQUE_SOLUTION = require_unique
+    uniqueness.generation_stats.reset()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(runs):
+            try:
+                GENERATORS[mode](num_players)
+            except RuntimeError:
+                pass
+    return uniqueness.generation_stats.snapshot()["modes"].get(mode, {})
+
+
+def fmt_rate(value):
+    return "-" if value is None else f"{value * 100:5.1f}%"
+
+
+def fmt_ms(value):
+    return "-" if value is None else f"{value:7.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark puzzle generation with and without the uniqueness check.")
+    parser.add_argument("--modes", nargs="+", default=list(GENERATORS), choices=list(GENERATORS))
+    parser.add_argument("--players", nargs="+", type=int, default=[3, 5, 8])
+    parser.add_argument("--runs", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8} {'n':>2}  {'unsat':>6} {'ambig':>6} {'failed':>6}  {'any ms':>7} {'unique ms':>9}  {'overhead':>8}")
+    for mode in args.modes:
+        for num_players in args.players:
+            baseline = run(mode, num_players, args.runs, require_unique=False)
+            unique = run(mode, num_players, args.runs, require_unique=True)
+            overhead = None
+            if baseline.get("avg_ms") and unique.get("avg_ms"):
+                overhead = unique["avg_ms"] / baseline["avg_ms"] - 1
+            print(
+                f"{mode:<8} {num_players:>2}  {fmt_rate(unique.get('unsat_rate'))} "
+                f"{fmt_rate(unique.get('ambiguous_rate'))} {unique.get('failed', 0):>6}  "
+                f"{fmt_ms(baseline.get('avg_ms'))} {fmt_ms(unique.get('avg_ms')):>9}  {fmt_rate(overhead):>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
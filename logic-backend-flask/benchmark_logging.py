@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Measure the per-request cost of request-path logging.
+
+Sends practice /puzzle/check requests (graded from the puzzle token, so no
+solver or database work) through the Flask test client, with log output
+going to a line-buffered file like a worker's stdout, and times:
+
+    off        logging disabled (LOG_LEVEL=CRITICAL), the baseline
+    legacy     every debug line formatted and written synchronously on the
+               request thread, as the old print() calls did
+    debug      the structured logger at LOG_LEVEL=DEBUG
+    sampled    LOG_LEVEL=DEBUG with /puzzle/check sampled at 5%
+    info       the structured logger at the default LOG_LEVEL=INFO
+
+Usage:
+    python benchmark_logging.py
+    python benchmark_logging.py --requests 5000 --players 8
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import structured_log
+
+os.environ.setdefault("PUZZLE_POOL_ENABLED", "false")  # Keep refill threads off the CPU
+with contextlib.redirect_stdout(io.StringIO()):
+    import app
+
+
+def use_legacy(stream):
+    """Emulate print(): format and write each line synchronously, no levels or sampling."""
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    root = logging.getLogger(structured_log.ROOT_LOGGER)
+    root.handlers[:] = [handler]
+    root.setLevel(logging.DEBUG)
+    return handler
+
+
+CONFIGS = {
+    "off": lambda stream: structured_log.configure(stream, level="CRITICAL"),
+    "legacy": use_legacy,
+    "debug": lambda stream: structured_log.configure(stream, level="DEBUG", rates={}),
+    "sampled": lambda stream: structured_log.configure(stream, level="DEBUG", rates={"/puzzle/check": 0.05}),
+    "info": lambda stream: structured_log.configure(stream, level="INFO", rates={}),
+}
+
+
+def run(client, body, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.post("/puzzle/check", json=body)
+        assert response.status_code == 200, response.get_data(as_text=True)
+    return (time.perf_counter() - started) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per config per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--players", type=int, default=5)
+    args = parser.parse_args()
+
+    client = app.app.test_client()
+    puzzle = client.get(f"/puzzle/generate?mode=easy&players={args.players}").get_json()
+    body = {"mode": "easy", "puzzle_token": puzzle["puzzle_token"], "player_assignments": puzzle["solution"]}
+
+    fd, path = tempfile.mkstemp(suffix=".log")
+    os.close(fd)
+    best = {name: float("inf") for name in CONFIGS}
+    lines = {name: 0 for name in CONFIGS}
+    try:
+        with open(path, "w", buffering=1) as stream:
+            # Configs are interleaved and the best round kept, so drift in
+            # machine load doesn't favour whichever config ran first
+            for _ in range(args.rounds):
+                for name, setup in CONFIGS.items():
+                    handler = setup(stream)
+                    run(client, body, min(100, args.requests))  # Warm up
+                    handler.flush()
+                    written = stream.tell()
+                    best[name] = min(best[name], run(client, body, args.requests))
+                    handler.flush()  # Don't let one config's backlog slow the next
+                    with open(path, "rb") as f:
+                        f.seek(written)
+                        lines[name] = f.read().count(b"\n") / args.requests
+    finally:
+        os.remove(path)
+        structured_log.configure()
+
+    baseline = best["off"]
+    print(f"{'config':<10} {'us/request':>12} {'overhead':>12} {'lines/request':>15}")
+    for name, seconds in best.items():
+        print(f"{name:<10} {seconds * 1e6:>12.1f} {(seconds - baseline) * 1e6:>9.1f} us {lines[name]:>15.2f}")
+    print(f"\n{args.requests} practice /puzzle/check requests per config, best of {args.rounds} rounds, "
+          f"Python {sys.version.split()[0]}")
+
+
+if __name__ == "__main__":
+    main()
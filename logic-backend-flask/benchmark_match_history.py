@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Compare /user/matches query plans as a user's match history grows.
+
+Builds an in-memory SQLite copy of the matches table with the index from
+supabase/migrations/20261017_matches_user_created_at_idx.sql and times:
+
+    legacy     the old route: every match the user has played, then the page
+    first      keyset first page (match_history.fetch_match_page)
+    deep       keyset page resumed from a cursor halfway through the history
+
+The keyset columns should stay flat as the history grows; legacy grows linearly.
+
+Usage:
+    python benchmark_match_history.py
+    python benchmark_match_history.py --history 100 10000 200000 --page 20 --runs 50
+"""
+
+import argparse
+import datetime
+import random
+import sqlite3
+import time
+import uuid
+
+from match_history import MATCH_COLUMNS, decode_cursor, encode_cursor
+
+USER_ID = "target-user"
+OTHER_USERS = 50
+
+
+def build_db(history, other_matches):
+    db = sqlite3.connect(":memory:")
+    db.execute("""
+        CREATE TABLE matches (
+            id TEXT PRIMARY KEY, user_id TEXT NOT NULL, mode TEXT, num_players INTEGER, solved INTEGER,
+            time_taken REAL, elo_before INTEGER, elo_after INTEGER, elo_delta INTEGER,
+            is_placement_match INTEGER, notes TEXT, created_at TEXT NOT NULL
+        )""")
+    db.execute("CREATE INDEX matches_user_id_created_at_id_idx ON matches (user_id, created_at DESC, id DESC)")
+
+    start = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    rows = []
+    for i in range(history + other_matches):
+        user_id = USER_ID if i < history else f"user-{i % OTHER_USERS}"
+        created_at = (start + datetime.timedelta(seconds=random.randrange(10 ** 8))).isoformat()
+        rows.append((str(uuid.uuid4()), user_id, "Hard", 5, i % 2, 42.0, 1200, 1210, 10, 0, None, created_at))
+    db.executemany("INSERT INTO matches VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    db.execute("ANALYZE")
+    return db
+
+
+def legacy(db, page):
+    db.execute("SELECT * FROM matches WHERE user_id = ? ORDER BY created_at DESC", (USER_ID,)).fetchall()
+    return db.execute("SELECT * FROM matches WHERE user_id = ? ORDER BY created_at DESC LIMIT ?",
+                      (USER_ID, page)).fetchall()
+
+
+def keyset(db, page, cursor=None):
+    """SQL equivalent of fetch_match_page()'s PostgREST query."""
+    sql = f"SELECT {MATCH_COLUMNS} FROM matches WHERE user_id = ?"
+    params = [USER_ID]
+    if cursor:
+        created_at, match_id = decode_cursor(cursor)
+        sql += " AND created_at <= ? AND (created_at < ? OR (created_at = ? AND id < ?))"
+        params += [created_at, created_at, created_at, match_id]
+    sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+    return db.execute(sql, params + [page + 1]).fetchall()
+
+
+def timed(func, runs):
+    started = time.perf_counter()
+    for _ in range(runs):
+        func()
+    return (time.perf_counter() - started) / runs * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark match history pagination against history length.")
+    parser.add_argument("--history", nargs="+", type=int, default=[100, 1000, 10000, 100000])
+    parser.add_argument("--page", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'history':>8}  {'legacy ms':>10} {'first ms':>9} {'deep ms':>8}")
+    for history in args.history:
+        db = build_db(history, other_matches=history)
+        middle = db.execute("SELECT created_at, id FROM matches WHERE user_id = ? ORDER BY created_at DESC, id DESC "
+                            "LIMIT 1 OFFSET ?", (USER_ID, history // 2)).fetchone()
+        cursor = encode_cursor({"created_at": middle[0], "id": middle[1]})
+        print(f"{history:>8}  {timed(lambda: legacy(db, args.page), args.runs):>10.3f} "
+              f"{timed(lambda: keyset(db, args.page), args.runs):>9.3f} "
+              f"{timed(lambda: keyset(db, args.page, cursor), args.runs):>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
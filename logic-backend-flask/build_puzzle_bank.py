@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Build the offline puzzle bank served by /puzzle/generate for practice modes.
+
+Usage:
+    python build_puzzle_bank.py --count 1000000
+    python build_puzzle_bank.py --modes easy medium --players 4 5 --count 200000 --workers 8
+
+Puzzles are generated with the normal mode generators across a process pool,
+verified with the native truth-table engine, round-tripped through the binary
+encoding and written to <out>/<mode>_<players>.bin (see puzzle_bank.py for the
+format). Each file is written to a temporary name and renamed into place, so
+running servers keep their existing mmap until they restart.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import puzzle_bank
+import puzzle_solver
+import truth_table
+import uniqueness
+
+GENERATORS = {}
+
+
+def _init_worker():
+    """Load the generators in each worker and give it its own random stream."""
+    import easy_mode
+    import medium_mode
+    import hard_mode
+    import extreme_mode
+
+    GENERATORS.update({
+        "easy": easy_mode.api_generate_easy,
+        "medium": medium_mode.api_generate_medium,
+        "hard": hard_mode.api_generate_hard,
+        "extreme": extreme_mode.api_generate_extreme,
+    })
+    # Forked workers inherit the parent's random state; reseed so they differ
+    random.seed(os.urandom(16))
+
+
+def verify(mode, puzzle):
+    """Check a generated puzzle before it is banked."""
+    statements = puzzle.get("full_statement_data") or puzzle["statement_data"]
+    if not puzzle_solver.check_puzzle(statements, puzzle["num_truth_tellers"], puzzle["solution"]):
+        return False
+    # The puzzle must be unambiguous and decode to exactly the same solution
+    people = list(puzzle["solution"].keys())
+    decoded = puzzle_bank.decode_statements(puzzle_bank.encode_puzzle(puzzle), people)
+    original_mask = truth_table.solution_mask(statements, puzzle["num_truth_tellers"], people)[0]
+    min_solutions = uniqueness.min_solutions(mode, len(people), puzzle["num_truth_tellers"])
+    if bin(original_mask).count("1") != min_solutions:
+        return False
+    return truth_table.solution_mask(decoded, puzzle["num_truth_tellers"], people)[0] == original_mask
+
+
+def generate_chunk(args):
+    """Generate up to `count` verified records for one (mode, num_players)."""
+    mode, num_players, count = args
+    generate = GENERATORS[mode]
+    records = []
+    rejected = 0
+    for _ in range(count):
+        try:
+            puzzle = generate(num_players)
+        except RuntimeError:
+            rejected += 1
+            continue
+        if verify(mode, puzzle):
+            records.append(puzzle_bank.encode_puzzle(puzzle))
+        else:
+            rejected += 1
+    return records, rejected
+
+
+def build_file(pool, out_dir, mode, num_players, count, chunk_size):
+    """Generate one bank file and atomically move it into place."""
+    num_truth_tellers = max(2, round(0.6 * num_players))
+    path = os.path.join(out_dir, puzzle_bank.bank_filename(mode, num_players))
+    tmp_path = path + ".tmp"
+
+    written = 0
+    rejected = 0
+    started = time.time()
+    with open(tmp_path, "wb") as f:
+        # Write a provisional header; the final count is patched in at the end
+        f.write(puzzle_bank.HEADER.pack(puzzle_bank.MAGIC, puzzle_bank.VERSION,
+                                        puzzle_bank.MODE_CODES[mode], num_players, num_truth_tellers, 0))
+        while written < count:
+            remaining = count - written
+            chunks = [(mode, num_players, min(chunk_size, remaining - i))
+                      for i in range(0, remaining, chunk_size)]
+            before = written
+            for records, chunk_rejected in pool.imap_unordered(generate_chunk, chunks):
+                rejected += chunk_rejected
+                for record in records[:count - written]:
+                    f.write(record)
+                    written += 1
+            if written == before:
+                raise RuntimeError(f"{mode} generator produced no valid {num_players}-player puzzles")
+            print(f"  {mode} {num_players}p: {written}/{count} written, {rejected} rejected", file=sys.stderr)
+
+        f.seek(0)
+        f.write(puzzle_bank.HEADER.pack(puzzle_bank.MAGIC, puzzle_bank.VERSION,
+                                        puzzle_bank.MODE_CODES[mode], num_players, num_truth_tellers, written))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    elapsed = time.time() - started
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    print(f"✅ {path}: {written} puzzles, {size_mb:.1f} MB, {elapsed:.1f}s ({rejected} rejected)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline puzzle bank.")
+    parser.add_argument("--out", default=puzzle_bank.PUZZLE_BANK_DIR, help="output directory")
+    parser.add_argument("--modes", nargs="+", default=list(puzzle_bank.MODE_CODES), choices=list(puzzle_bank.MODE_CODES))
+    parser.add_argument("--players", nargs="+", type=int,
+                        default=list(range(puzzle_bank.MIN_PLAYERS, puzzle_bank.MAX_PLAYERS + 1)))
+    parser.add_argument("--count", type=int, default=100000, help="puzzles per (mode, players) file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    for num_players in args.players:
+        if not puzzle_bank.MIN_PLAYERS <= num_players <= puzzle_bank.MAX_PLAYERS:
+            parser.error(f"players must be between {puzzle_bank.MIN_PLAYERS} and {puzzle_bank.MAX_PLAYERS}")
+
+    os.makedirs(args.out, exist_ok=True)
+    with multiprocessing.Pool(args.workers, initializer=_init_worker) as pool:
+        for mode in args.modes:
+            for num_players in args.players:
+                build_file(pool, args.out, mode, num_players, args.count, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
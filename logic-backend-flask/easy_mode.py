@@ -1,9 +1,16 @@
 import random
-from z3 import *
+import puzzle_solver
+import solver_telemetry
+import statement_compiler
+import structured_log
+import uniqueness
+
+log = structured_log.get_logger(__name__)
 
 def api_generate_easy(num_players):
     """Generate an easy puzzle with DIRECT statements only."""
-    max_attempts = 10  # Prevent infinite loops
+    max_attempts = 30  # Prevent infinite loops; ambiguous puzzles are rejected too
+    attempts = solver_telemetry.GenerationAttempts("easy", num_players)
     
     for attempt in range(max_attempts):
         try:
@@ -38,27 +45,24 @@ def api_generate_easy(num_players):
                 return statements
 
             statements = generate_statements(roles)
-            z3_vars = {p: Bool(p) for p in people}
-            solver = Solver()
+            compiled = statement_compiler.compile_puzzle(statements, num_truth_tellers, people, simple=True)
+            solutions = puzzle_solver.find_solutions(compiled, limit=uniqueness.SOLUTION_LIMIT)
 
-            for speaker, data in statements.items():
-                target = data["target"]
-                said_truth = data["truth_value"]
-                
-                solver.add(Implies(z3_vars[speaker], z3_vars[target] == said_truth))
-                
-                solver.add(Implies(Not(z3_vars[speaker]), z3_vars[target] != said_truth))
+            if not solutions:
+                log.debug("⚠️ Easy puzzle attempt %s failed - no solution found, retrying...", attempt + 1)
+                attempts.reject("unsat")
+                continue  # Try again instead of returning error
 
-            solver.add(Sum([If(z3_vars[p], 1, 0) for p in people]) == num_truth_tellers)
+            # Reject puzzles with more than one consistent assignment
+            if not uniqueness.is_unambiguous("easy", compiled, solutions):
+                log.debug("⚠️ Easy puzzle attempt %s failed - multiple solutions, retrying...", attempt + 1)
+                attempts.reject("ambiguous")
+                continue
 
-            if solver.check() != sat:
-                print(f"⚠️ Easy puzzle attempt {attempt + 1} failed - no solution found, retrying...")
-                continue  # Try again instead of returning error
-            
-            model = solver.model()
-            solution = {p: bool(model[z3_vars[p]]) for p in people}
+            solution = solutions[0]
 
-            print(f"✅ Easy puzzle generated successfully on attempt {attempt + 1}")
+            log.debug("✅ Easy puzzle generated successfully on attempt %s", attempt + 1)
+            attempts.succeeded()
             return {
                 "puzzle_id": f"easy_{num_players}_{random.randint(1000, 9999)}",
                 "num_players": num_players,
@@ -72,11 +76,13 @@ def api_generate_easy(num_players):
             }
             
         except Exception as e:
-            print(f"⚠️ Easy puzzle attempt {attempt + 1} failed with error: {str(e)}, retrying...")
+            log.debug("⚠️ Easy puzzle attempt %s failed with error: %s, retrying...", attempt + 1, e)
+            attempts.reject("error", e)
             continue
     
     # If we get here, all attempts failed
-    print(f"❌ Failed to generate easy puzzle after {max_attempts} attempts")
+    log.warning("❌ Failed to generate easy puzzle after %s attempts", max_attempts)
+    attempts.failed()
     raise RuntimeError(f"Failed to generate a valid easy puzzle after {max_attempts} attempts")
 
 def check_easy_solution(data):
@@ -91,22 +97,8 @@ def check_easy_solution(data):
     if num_truth_tellers is None:
         return {"valid": False, "error": "Missing num_truth_tellers"}
     
-    people = list(statement_data.keys())
-    z3_vars = {p: Bool(p) for p in people}
-    solver = Solver()
-
-    for speaker, sdata in statement_data.items():
-        target = sdata["target"]
-        said_truth = sdata["truth_value"]
-        
-        solver.add(Implies(z3_vars[speaker], z3_vars[target] == said_truth))
-        
-        solver.add(Implies(Not(z3_vars[speaker]), z3_vars[target] != said_truth))
-
-    solver.add(Sum([If(z3_vars[p], 1, 0) for p in people]) == num_truth_tellers)
-
-    for person, is_truth in player_assignments.items():
-        solver.add(z3_vars[person] == is_truth)
-
-    result = solver.check()
-    return {"valid": result == sat}
+    try:
+        valid = puzzle_solver.check_puzzle(statement_data, num_truth_tellers, player_assignments, simple=True)
+    except statement_compiler.UnsupportedStatement as e:
+        return {"valid": False, "error": str(e)}
+    return {"valid": valid}
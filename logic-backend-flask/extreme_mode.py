@@ -1,367 +1,274 @@
+import itertools
+import os
 import random
-from z3 import Solver, Bool, And, Or, Xor, Implies, Not, Sum, If, sat
+import puzzle_solver
+import solver_telemetry
+import statement_compiler
+import structured_log
+import truth_table
+import uniqueness
+
+log = structured_log.get_logger(__name__)
+
+# Statements drawn per speaker; the one that leaves the fewest consistent assignments is kept
+EXTREME_CANDIDATES = int(os.getenv("EXTREME_CANDIDATES", "4"))
+# Passes that redraw statements while assignments other than the planted one remain
+EXTREME_REPAIR_ROUNDS = int(os.getenv("EXTREME_REPAIR_ROUNDS", "3"))
+
+# How the truth of the parts of a compound statement combine, and the fields naming each part
+_CONNECTIVES = {
+    "AND": (lambda a, b: a and b, (("t1", "c1"), ("t2", "c2"))),
+    "OR": (lambda a, b: a or b, (("t1", "c1"), ("t2", "c2"))),
+    "XOR": (lambda a, b: a != b, (("t1", "c1"), ("t2", "c2"))),
+    "IFF": (lambda a, b: a == b, (("t1", "c1"), ("t2", "c2"))),
+    "IF": (lambda a, b: not a or b, (("cond", "cond_val"), ("result", "result_val"))),
+    "NESTED_IF": (lambda a, b, c: not a or not b or c,
+                  (("outer_cond", "outer_val"), ("inner_cond", "inner_val"), ("inner_result", "inner_result_val"))),
+}
+
+
+def plan_statement_types(num_players: int) -> list:
+    """Pick each speaker's statement kind: the advanced kinds required at this size, then random fillers."""
+    # Calculate max advanced features: at most half (rounded up if odd)
+    max_advanced = (num_players + 1) // 2  # This gives us ceil(num_players / 2)
+
+    # Scale required complexity with player count, but respect max_advanced limit
+    if num_players >= 7:
+        # Large puzzles: Include all advanced features if space allows
+        desired_modes = ["XOR", "SELF_REF", "GROUP", "NESTED_IF"]
+    elif num_players >= 5:
+        # Medium puzzles: Include core advanced features
+        desired_modes = ["XOR", "SELF_REF", "GROUP"]
+    else:
+        # Small puzzles: Include essential advanced features
+        desired_modes = ["XOR", "SELF_REF"]
+
+    # Add required advanced features, limited to max_advanced
+    statement_types = desired_modes[:max_advanced]
+
+    # Fill remaining advanced slots with random advanced features
+    available_advanced = ["XOR", "SELF_REF", "GROUP", "NESTED_IF", "IF"]
+    for _ in range(max_advanced - len(statement_types)):
+        statement_types.append(random.choice(available_advanced))
+
+    # Fill remaining slots with lower-tier statements (easy + medium + hard mode)
+    lower_tier_options = ["DIRECT", "AND", "OR", "IF"]
+    for _ in range(num_players - len(statement_types)):
+        statement_types.append(random.choice(lower_tier_options))
+
+    # Shuffle to randomize assignment
+    random.shuffle(statement_types)
+    return statement_types
+
+
+def build_statement(kind: str, speaker: str, others: list, roles: dict) -> dict:
+    """
+    Build a random statement of the given kind that is true exactly when the speaker is a Truth-Teller.
+
+    Args:
+        kind: DIRECT, AND, OR, XOR, IFF, IF, NESTED_IF, SELF_REF or GROUP
+        speaker: The player making the statement
+        others: The players the statement may talk about
+        roles: The planted {player: is_truth_teller} assignment
+
+    Returns:
+        dict: The statement in full_statement_data format (SELF_REF is stored as
+        DIRECT with target=speaker). Kinds that need more players than there
+        are others fall back to DIRECT.
+    """
+    truthful = roles[speaker]
+
+    if kind == "SELF_REF":
+        # "I am a Truth-Teller" is true from a Truth-Teller and a lie from a Liar;
+        # nobody can consistently say "I am a Liar"
+        return {"mode": "DIRECT", "target": speaker, "claim": True}
+
+    if kind == "GROUP" and len(others) >= 2:
+        members = random.sample(others, random.randint(2, len(others)))
+        actual = sum(1 for m in members if roles[m])
+        if truthful:
+            exactly = actual
+        else:
+            wrong = [k for k in range(1, len(members)) if k != actual]
+            exactly = random.choice(wrong or [k for k in (0, len(members)) if k != actual])
+        return {"mode": "GROUP", "members": members, "exactly": exactly}
+
+    if kind in _CONNECTIVES and len(others) >= len(_CONNECTIVES[kind][1]):
+        connective, fields = _CONNECTIVES[kind]
+        # Truth values of the parts that make the whole statement true for a
+        # Truth-Teller and false for a Liar
+        parts = [values for values in itertools.product((True, False), repeat=len(fields))
+                 if connective(*values) == truthful]
+        statement = {"mode": kind}
+        targets = random.sample(others, len(fields))
+        for (target_field, value_field), target, holds in zip(fields, targets, random.choice(parts)):
+            statement[target_field] = target
+            statement[value_field] = roles[target] if holds else not roles[target]
+        return statement
+
+    target = random.choice(others)
+    actual = roles[target]
+    # If speaker is truth-teller, they tell truth; if liar, they lie
+    return {"mode": "DIRECT", "target": target, "claim": actual if truthful else not actual}
+
+
+def _verified_statement(kind, speaker, others, roles):
+    """Build a statement and check it against the planted roles; returns (statement, parsed claim)."""
+    statement = build_statement(kind, speaker, others, roles)
+    claim = statement_compiler.parse_statement(statement)
+    if statement_compiler.evaluate(claim, roles) != roles[speaker]:
+        raise RuntimeError(f"{kind} statement by {speaker} contradicts the planted roles: {statement}")
+    return statement, claim
+
+
+def _draw(kind, speaker, others, roles, index, masks, full, rest):
+    """
+    Draw EXTREME_CANDIDATES statements for a speaker and keep the most constraining one.
+
+    Returns:
+        tuple: (assignments left, statement, constraint mask), where the count
+        is taken over `rest`, the mask of assignments the other statements allow
+    """
+    best = None
+    for _ in range(max(1, EXTREME_CANDIDATES)):
+        statement, claim = _verified_statement(kind, speaker, others, roles)
+        # Truth-Tellers make true claims, Liars make false ones: speaker <=> claim
+        constraint = full ^ (masks[index[speaker]] ^ statement_compiler.to_mask(claim, index, masks, full))
+        left = bin(rest & constraint).count("1")
+        if best is None or left < best[0]:
+            best = (left, statement, constraint)
+    return best
+
+
+def _simple_statement_data(statement_logic, people):
+    """Convert complex statements to the simple {target, truth_value} format for UI compatibility."""
+    simple_statement_data = {}
+    for speaker, logic in statement_logic.items():
+        if logic["mode"] == "DIRECT":
+            simple_statement_data[speaker] = {
+                "target": logic["target"],
+                "truth_value": logic["claim"]
+            }
+        else:
+            # For complex statements, use first available target as fallback
+            if "t1" in logic:
+                target = logic["t1"]
+                truth_value = logic["c1"]
+            elif "result" in logic:
+                target = logic["result"]
+                truth_value = logic["result_val"]
+            else:
+                # Fallback to first person if no clear target
+                target = people[0] if people else "A"
+                truth_value = True
+
+            simple_statement_data[speaker] = {
+                "target": target,
+                "truth_value": truth_value
+            }
+    return simple_statement_data
+
 
 def api_generate_extreme(num_players: int) -> dict:
-    """Generate an extreme puzzle with all advanced operators."""
-    max_attempts = 10  # Prevent infinite loops
-    
+    """
+    Generate an extreme puzzle with all advanced operators.
+
+    Roles are planted first and every statement is built to be true exactly
+    when its speaker is a Truth-Teller, so the planted assignment always
+    solves the puzzle. Up to the native solver limit, each speaker's statement
+    is the most constraining of EXTREME_CANDIDATES draws, and statements are
+    redrawn until the planted assignment is the only solution left, so one
+    pass is normally enough. Larger puzzles skip the guidance and retry
+    ambiguous draws.
+    """
+    guided = truth_table.should_use_native(num_players)
+    max_attempts = 10 if guided else 30  # Guided attempts only repeat when the redraws can't remove a second solution
+    attempts = solver_telemetry.GenerationAttempts("extreme", num_players)
+
+    # Generic labels ["A", "B", …] with num_truth_tellers = max(2, round(0.6 * num_players))
+    people = [chr(ord('A') + i) for i in range(num_players)]
+    num_truth_tellers = max(2, round(0.6 * num_players))
+    others = {p: [o for o in people if o != p] for p in people}
+    index = {p: i for i, p in enumerate(people)}
+    if guided:
+        masks, full = statement_compiler.player_masks(num_players)
+        count_mask = statement_compiler.count_masks(num_players)[num_truth_tellers]
+        allowed = uniqueness.min_solutions("extreme", num_players, num_truth_tellers)
+
     for attempt in range(max_attempts):
+        statement_types = plan_statement_types(num_players)
         try:
-            # 1) Build generic labels: ["A", "B", …]
-            people = [chr(ord('A') + i) for i in range(num_players)]
-            
-            # 2) Compute num_truth_tellers = max(2, round(0.6 * num_players))
-            num_truth_tellers = max(2, round(0.6 * num_players))
-            
-            # 3) Randomly assign roles to labels
+            # Randomly assign roles to labels
             truth_teller_set = set(random.sample(people, num_truth_tellers))
             roles = {p: p in truth_teller_set for p in people}
-            
-            # Initialize data structures
-            statements = {}
+
             statement_logic = {}
-            
-            # Track which advanced operators we've used (ensure at least one of each)
-            # Calculate max advanced features: at most half (rounded up if odd)
-            max_advanced = (num_players + 1) // 2  # This gives us ceil(num_players / 2)
-            
-            # Scale required complexity with player count, but respect max_advanced limit
-            if num_players >= 7:
-                # Large puzzles: Include all advanced features if space allows
-                desired_modes = ["XOR", "SELF_REF", "GROUP", "NESTED_IF"]
-            elif num_players >= 5:
-                # Medium puzzles: Include core advanced features
-                desired_modes = ["XOR", "SELF_REF", "GROUP"]
+            if guided:
+                constraints = {}
+                mask = count_mask
+                for speaker, kind in zip(people, statement_types):
+                    _, statement_logic[speaker], constraints[speaker] = _draw(
+                        kind, speaker, others[speaker], roles, index, masks, full, mask)
+                    mask &= constraints[speaker]
+
+                # Redraw one speaker at a time, keeping draws that rule out more assignments
+                left = bin(mask).count("1")
+                for _ in range(EXTREME_REPAIR_ROUNDS):
+                    if left <= allowed or not uniqueness.REQUIRE_UNIQUE_SOLUTION:
+                        break
+                    for speaker, kind in random.sample(list(zip(people, statement_types)), num_players):
+                        rest = count_mask
+                        for other, constraint in constraints.items():
+                            if other != speaker:
+                                rest &= constraint
+                        candidate_left, statement, constraint = _draw(
+                            kind, speaker, others[speaker], roles, index, masks, full, rest)
+                        if candidate_left < left:
+                            statement_logic[speaker], constraints[speaker] = statement, constraint
+                            left = candidate_left
+                        if left <= allowed:
+                            break
             else:
-                # Small puzzles: Include essential advanced features
-                desired_modes = ["XOR", "SELF_REF"]
-            
-            # Limit desired modes to max_advanced
-            required_modes = desired_modes[:max_advanced]
-            used_modes = set()
-            
-            # Create statement type assignments
-            statement_types = []
-            
-            # Add required advanced features
-            for mode in required_modes:
-                statement_types.append(mode)
-                used_modes.add(mode)
-            
-            # Fill remaining advanced slots with random advanced features
-            remaining_advanced = max_advanced - len(required_modes)
-            available_advanced = ["XOR", "SELF_REF", "GROUP", "NESTED_IF", "IF"]
-            for _ in range(remaining_advanced):
-                statement_types.append(random.choice(available_advanced))
-            
-            # Fill remaining slots with lower-tier statements (easy + medium + hard mode)
-            remaining_slots = num_players - len(statement_types)
-            lower_tier_options = ["DIRECT", "AND", "OR", "IF"]
-            for _ in range(remaining_slots):
-                statement_types.append(random.choice(lower_tier_options))
-            
-            # Shuffle to randomize assignment
-            random.shuffle(statement_types)
-            
-            # 4) For each speaker, assign the predetermined mode
-            for i, speaker in enumerate(people):
-                others = [p for p in people if p != speaker]
-                mode = statement_types[i]
-                
-                if mode in required_modes:
-                    used_modes.add(mode)
-                
-                if mode == "DIRECT":
-                    target = random.choice(others)
-                    actual = roles[target]
-                    # If speaker is truth-teller, they tell truth; if liar, they lie
-                    claim = actual if roles[speaker] else not actual
-                    
-                    statement_text = f"{target} is a {'Truth-Teller' if claim else 'Liar'}."
-                    statement_logic[speaker] = {
-                        "mode": "DIRECT",
-                        "target": target,
-                        "claim": claim
-                    }
-                    
-                elif mode == "AND":
-                    t1, t2 = random.sample(others, 2)
-                    actual1, actual2 = roles[t1], roles[t2]
-                    
-                    if roles[speaker]:  # Truth-teller makes true AND statement
-                        c1, c2 = actual1, actual2
-                    else:  # Liar makes false AND statement (at least one part false)
-                        if random.choice([True, False]):
-                            c1, c2 = not actual1, actual2  # Make first part false
-                        else:
-                            c1, c2 = actual1, not actual2  # Make second part false
-                    
-                    statement_text = f"{t1} is a {'Truth-Teller' if c1 else 'Liar'} AND {t2} is a {'Truth-Teller' if c2 else 'Liar'}."
-                    statement_logic[speaker] = {
-                        "mode": "AND",
-                        "t1": t1,
-                        "c1": c1,
-                        "t2": t2,
-                        "c2": c2
-                    }
-                    
-                elif mode == "OR":
-                    t1, t2 = random.sample(others, 2)
-                    actual1, actual2 = roles[t1], roles[t2]
-                    
-                    if roles[speaker]:  # Truth-teller makes true OR statement
-                        c1, c2 = actual1, actual2
-                    else:  # Liar makes false OR statement (both parts false)
-                        c1, c2 = not actual1, not actual2
-                    
-                    statement_text = f"{t1} is a {'Truth-Teller' if c1 else 'Liar'} OR {t2} is a {'Truth-Teller' if c2 else 'Liar'}."
-                    statement_logic[speaker] = {
-                        "mode": "OR",
-                        "t1": t1,
-                        "c1": c1,
-                        "t2": t2,
-                        "c2": c2
-                    }
-                    
-                elif mode == "IF":
-                    cond, result = random.sample(others, 2)
-                    cond_val = random.choice([True, False])
-                    result_val = random.choice([True, False])
-                    
-                    statement_text = f"If {cond} is {'True' if cond_val else 'False'}, then {result} is {'True' if result_val else 'False'}."
-                    statement_logic[speaker] = {
-                        "mode": "IF",
-                        "cond": cond,
-                        "cond_val": cond_val,
-                        "result": result,
-                        "result_val": result_val
-                    }
-                    
-                elif mode == "XOR":
-                    t1, t2 = random.sample(others, 2)
-                    actual1, actual2 = roles[t1], roles[t2]
-                    
-                    if roles[speaker]:  # Truth-teller makes true XOR statement
-                        # XOR is true when exactly one is true
-                        if actual1 != actual2:  # One is truth-teller, one is liar
-                            c1, c2 = actual1, actual2  # Make XOR true
-                        else:  # Both same type
-                            # Make them appear different to make XOR true
-                            c1, c2 = actual1, not actual2
-                    else:  # Liar makes false XOR statement
-                        # XOR is false when both parts have same truth value
-                        c1, c2 = actual1, actual1  # Both same to make XOR false
-                    
-                    statement_text = f"Either {t1} is a {'Truth-Teller' if c1 else 'Liar'} OR {t2} is a {'Truth-Teller' if c2 else 'Liar'}, but not both."
-                    statement_logic[speaker] = {
-                        "mode": "XOR",
-                        "t1": t1,
-                        "c1": c1,
-                        "t2": t2,
-                        "c2": c2
-                    }
-                    
-                elif mode == "IFF":
-                    t1, t2 = random.sample(others, 2)
-                    actual1, actual2 = roles[t1], roles[t2]
-                    
-                    if roles[speaker]:  # Truth-teller makes true IFF statement
-                        # IFF is true when both parts have same truth value
-                        c1, c2 = actual1, actual2  # Both same to make IFF true
-                    else:  # Liar makes false IFF statement
-                        # IFF is false when parts have different truth values
-                        c1, c2 = actual1, not actual2  # Make them different to make IFF false
-                    
-                    statement_text = f"{t1} is a {'Truth-Teller' if c1 else 'Liar'} if and only if {t2} is a {'Truth-Teller' if c2 else 'Liar'}."
-                    statement_logic[speaker] = {
-                        "mode": "IFF",
-                        "t1": t1,
-                        "c1": c1,
-                        "t2": t2,
-                        "c2": c2
-                    }
-                    
-                elif mode == "NESTED_IF":
-                    if len(others) >= 3:
-                        outer_cond, inner_cond, inner_result = random.sample(others, 3)
-                    else:
-                        # Not enough others, fall back to simpler mode
-                        outer_cond, inner_result = random.sample(others, 2)
-                        inner_cond = random.choice([p for p in others if p not in [outer_cond, inner_result]])
-                        
-                    outer_val = random.choice([True, False])
-                    inner_val = random.choice([True, False])
-                    inner_result_val = random.choice([True, False])
-                    
-                    statement_text = f"If {outer_cond} is {'True' if outer_val else 'False'}, then if {inner_cond} is {'True' if inner_val else 'False'}, then {inner_result} is {'True' if inner_result_val else 'False'}."
-                    statement_logic[speaker] = {
-                        "mode": "NESTED_IF",
-                        "outer_cond": outer_cond,
-                        "outer_val": outer_val,
-                        "inner_cond": inner_cond,
-                        "inner_val": inner_val,
-                        "inner_result": inner_result,
-                        "inner_result_val": inner_result_val
-                    }
-                    
-                elif mode == "SELF_REF":
-                    c = random.choice([True, False])
-                    
-                    statement_text = f"{speaker} is a {'Truth-Teller' if c else 'Liar'}."
-                    statement_logic[speaker] = {
-                        "mode": "DIRECT",  # Self-reference is handled as DIRECT with target=speaker
-                        "target": speaker,
-                        "claim": c
-                    }
-                    
-                elif mode == "GROUP":
-                    # Pick a subset of others for group logic
-                    group_size = min(len(others), random.randint(2, max(2, len(others))))
-                    members = random.sample(others, group_size)
-                    exactly = random.randint(1, len(members) - 1)
-                    
-                    # Format member list in proper English
-                    if len(members) == 2:
-                        member_text = f"{members[0]} and {members[1]}"
-                    elif len(members) == 3:
-                        member_text = f"{members[0]}, {members[1]}, and {members[2]}"
-                    else:
-                        member_text = ", ".join(members[:-1]) + f", and {members[-1]}"
-                    
-                    statement_text = f"Exactly {exactly} of {member_text} are Truth-Tellers."
-                    statement_logic[speaker] = {
-                        "mode": "GROUP",
-                        "members": members,
-                        "exactly": exactly
-                    }
-                
-                statements[speaker] = statement_text
-            
-            # 5) Create Z3 Solver and add constraints with FIXED logic
-            z3_vars = {p: Bool(p) for p in people}
-            solver = Solver()
-            
-            for speaker in people:
-                logic = statement_logic[speaker]
-                
-                if logic["mode"] == "DIRECT":
-                    target = logic["target"]
-                    claim = logic["claim"]
-                    # FIXED: Correct constraint logic
-                    solver.add(Implies(z3_vars[speaker], z3_vars[target] == claim))
-                    solver.add(Implies(Not(z3_vars[speaker]), z3_vars[target] != claim))
-                    
-                elif logic["mode"] == "AND":
-                    t1, c1, t2, c2 = logic["t1"], logic["c1"], logic["t2"], logic["c2"]
-                    # FIXED: Correct AND constraint logic
-                    solver.add(Implies(z3_vars[speaker], And(z3_vars[t1] == c1, z3_vars[t2] == c2)))
-                    solver.add(Implies(Not(z3_vars[speaker]), Or(z3_vars[t1] != c1, z3_vars[t2] != c2)))
-                    
-                elif logic["mode"] == "OR":
-                    t1, c1, t2, c2 = logic["t1"], logic["c1"], logic["t2"], logic["c2"]
-                    # FIXED: Correct OR constraint logic
-                    solver.add(Implies(z3_vars[speaker], Or(z3_vars[t1] == c1, z3_vars[t2] == c2)))
-                    solver.add(Implies(Not(z3_vars[speaker]), And(z3_vars[t1] != c1, z3_vars[t2] != c2)))
-                    
-                elif logic["mode"] == "IF":
-                    cond = logic["cond"]
-                    cond_val = logic["cond_val"]
-                    result = logic["result"]
-                    result_val = logic["result_val"]
-                    implication = Implies(z3_vars[cond] == cond_val, z3_vars[result] == result_val)
-                    solver.add(Implies(z3_vars[speaker], implication))
-                    solver.add(Implies(Not(z3_vars[speaker]), Not(implication)))
-                    
-                elif logic["mode"] == "XOR":
-                    t1, c1, t2, c2 = logic["t1"], logic["c1"], logic["t2"], logic["c2"]
-                    xor_constraint = Xor(z3_vars[t1] == c1, z3_vars[t2] == c2)
-                    solver.add(Implies(z3_vars[speaker], xor_constraint))
-                    solver.add(Implies(Not(z3_vars[speaker]), Not(xor_constraint)))
-                    
-                elif logic["mode"] == "IFF":
-                    t1, c1, t2, c2 = logic["t1"], logic["c1"], logic["t2"], logic["c2"]
-                    iff_constraint = (z3_vars[t1] == c1) == (z3_vars[t2] == c2)
-                    solver.add(Implies(z3_vars[speaker], iff_constraint))
-                    solver.add(Implies(Not(z3_vars[speaker]), Not(iff_constraint)))
-                    
-                elif logic["mode"] == "NESTED_IF":
-                    outer = logic["outer_cond"]
-                    outer_val = logic["outer_val"]
-                    inner = logic["inner_cond"]
-                    inner_val = logic["inner_val"]
-                    inner_result = logic["inner_result"]
-                    inner_result_val = logic["inner_result_val"]
-                    
-                    nested_implication = Implies(
-                        z3_vars[outer] == outer_val,
-                        Implies(z3_vars[inner] == inner_val, z3_vars[inner_result] == inner_result_val)
-                    )
-                    solver.add(Implies(z3_vars[speaker], nested_implication))
-                    solver.add(Implies(Not(z3_vars[speaker]), Not(nested_implication)))
-                    
-                elif logic["mode"] == "GROUP":
-                    members = logic["members"]
-                    exactly = logic["exactly"]
-                    sum_constraint = Sum([If(z3_vars[m], 1, 0) for m in members]) == exactly
-                    solver.add(Implies(z3_vars[speaker], sum_constraint))
-                    solver.add(Implies(Not(z3_vars[speaker]), Not(sum_constraint)))
-            
-            # Add truth-teller count constraint
-            solver.add(Sum([If(z3_vars[p], 1, 0) for p in people]) == num_truth_tellers)
-            
-            # 6) Verify the puzzle has a solution
-            if solver.check() != sat:
-                print(f"⚠️ Extreme puzzle attempt {attempt + 1} failed - no solution found, retrying...")
-                continue  # Try again instead of failing
-            
-            # Get a model to verify consistency
-            model = solver.model()
-            solution = {p: bool(model[z3_vars[p]]) for p in people}
-            
-            # Convert complex statements to simple format for UI compatibility
-            simple_statement_data = {}
-            for speaker, logic in statement_logic.items():
-                if logic["mode"] == "DIRECT":
-                    simple_statement_data[speaker] = {
-                        "target": logic["target"],
-                        "truth_value": logic["claim"]
-                    }
-                else:
-                    # For complex statements, use first available target as fallback
-                    if "t1" in logic:
-                        target = logic["t1"]
-                        truth_value = logic["c1"]
-                    elif "result" in logic:
-                        target = logic["result"]
-                        truth_value = logic["result_val"]
-                    else:
-                        # Fallback to first person if no clear target
-                        target = people[0] if people else "A"
-                        truth_value = True
-                    
-                    simple_statement_data[speaker] = {
-                        "target": target,
-                        "truth_value": truth_value
-                    }
-            
-            # 7) Success! Package and return the result
-            print(f"✅ Extreme puzzle generated successfully on attempt {attempt + 1}")
+                for speaker, kind in zip(people, statement_types):
+                    statement_logic[speaker], _ = _verified_statement(kind, speaker, others[speaker], roles)
+
+            # Compile the statements and verify the puzzle has exactly one solution
+            compiled = statement_compiler.compile_puzzle(statement_logic, num_truth_tellers, people)
+            solutions = puzzle_solver.find_solutions(compiled, limit=uniqueness.SOLUTION_LIMIT)
+
+            if roles not in solutions and len(solutions) < uniqueness.SOLUTION_LIMIT:
+                # Every statement was checked against the planted roles, so this is a bug
+                log.warning("⚠️ Extreme puzzle attempt %s failed - planted roles don't solve it, retrying...", attempt + 1)
+                attempts.reject("unsat", kinds=statement_types)
+                continue
+
+            # Reject puzzles with more than one consistent assignment
+            if not uniqueness.is_unambiguous("extreme", compiled, solutions):
+                log.debug("⚠️ Extreme puzzle attempt %s failed - multiple solutions, retrying...", attempt + 1)
+                attempts.reject("ambiguous", kinds=statement_types)
+                continue
+
+            # Success! Package and return the result
+            log.debug("✅ Extreme puzzle generated successfully on attempt %s", attempt + 1)
+            attempts.succeeded(kinds=statement_types)
             return {
                 "puzzle_id": f"extreme_{num_players}_{random.randint(1000, 9999)}",
                 "num_players": num_players,
                 "num_truth_tellers": num_truth_tellers,
-                "statements": statements,
-                "statement_data": simple_statement_data,  # UI-compatible format
+                "statements": compiled.statement_texts(),
+                "statement_data": _simple_statement_data(statement_logic, people),  # UI-compatible format
                 "full_statement_data": statement_logic,  # Keep original for validation
-                "solution": solution
+                "solution": roles
             }
-            
+
         except Exception as e:
-            print(f"⚠️ Extreme puzzle attempt {attempt + 1} failed with error: {str(e)}, retrying...")
+            log.debug("⚠️ Extreme puzzle attempt %s failed with error: %s, retrying...", attempt + 1, e)
+            attempts.reject("error", e, kinds=statement_types)
             continue
-    
+
     # If we get here, all attempts failed
-    print(f"❌ Failed to generate extreme puzzle after {max_attempts} attempts")
+    log.warning("❌ Failed to generate extreme puzzle after %s attempts", max_attempts)
+    attempts.failed()
     raise RuntimeError(f"Failed to generate a valid extreme puzzle after {max_attempts} attempts")
 
 # For backward compatibility with the exact function name used in the old system
@@ -385,101 +292,8 @@ def check_extreme_solution(data: dict) -> dict:
         if num_truth_tellers is None:
             return {"valid": False, "error": "Missing num_truth_tellers"}
         
-        people = list(player_assignments.keys())
-        z3_vars = {p: Bool(p) for p in people}
-        solver = Solver()
-        
-        # FIXED: Same constraint logic as generation
-        for speaker, logic in statement_data.items():
-            if isinstance(logic, dict) and "mode" in logic:
-                mode = logic.get("mode")
-                
-                if mode == "DIRECT":
-                    target = logic["target"]
-                    claim = logic["claim"]
-                    solver.add(Implies(z3_vars[speaker], z3_vars[target] == claim))
-                    solver.add(Implies(Not(z3_vars[speaker]), z3_vars[target] != claim))
-                    
-                elif mode == "AND":
-                    t1, c1, t2, c2 = logic["t1"], logic["c1"], logic["t2"], logic["c2"]
-                    solver.add(Implies(z3_vars[speaker], And(z3_vars[t1] == c1, z3_vars[t2] == c2)))
-                    solver.add(Implies(Not(z3_vars[speaker]), Or(z3_vars[t1] != c1, z3_vars[t2] != c2)))
-                    
-                elif mode == "OR":
-                    t1, c1, t2, c2 = logic["t1"], logic["c1"], logic["t2"], logic["c2"]
-                    solver.add(Implies(z3_vars[speaker], Or(z3_vars[t1] == c1, z3_vars[t2] == c2)))
-                    solver.add(Implies(Not(z3_vars[speaker]), And(z3_vars[t1] != c1, z3_vars[t2] != c2)))
-                    
-                elif mode == "IF":
-                    cond = logic["cond"]
-                    cond_val = logic["cond_val"]
-                    result = logic["result"]
-                    result_val = logic["result_val"]
-                    
-                    implication = Implies(z3_vars[cond] == cond_val, z3_vars[result] == result_val)
-                    solver.add(Implies(z3_vars[speaker], implication))
-                    solver.add(Implies(Not(z3_vars[speaker]), Not(implication)))
-                    
-                elif mode == "XOR":
-                    t1, c1, t2, c2 = logic["t1"], logic["c1"], logic["t2"], logic["c2"]
-                    a1 = (z3_vars[t1] == c1)
-                    a2 = (z3_vars[t2] == c2)
-                    
-                    solver.add(Implies(z3_vars[speaker], Xor(a1, a2)))
-                    solver.add(Implies(Not(z3_vars[speaker]), Not(Xor(a1, a2))))
-                    
-                elif mode == "IFF":
-                    t1, c1, t2, c2 = logic["t1"], logic["c1"], logic["t2"], logic["c2"]
-                    a1 = (z3_vars[t1] == c1)
-                    a2 = (z3_vars[t2] == c2)
-                    
-                    # Use Implies both ways for biconditional
-                    biconditional = And(Implies(a1, a2), Implies(a2, a1))
-                    solver.add(Implies(z3_vars[speaker], biconditional))
-                    solver.add(Implies(Not(z3_vars[speaker]), Not(biconditional)))
-                    
-                elif mode == "NESTED_IF":
-                    outer_cond = logic["outer_cond"]
-                    outer_val = logic["outer_val"]
-                    inner_cond = logic["inner_cond"]
-                    inner_val = logic["inner_val"]
-                    inner_result = logic["inner_result"]
-                    inner_result_val = logic["inner_result_val"]
-                    
-                    # Build nested implication
-                    inner_impl = Implies(z3_vars[inner_cond] == inner_val, z3_vars[inner_result] == inner_result_val)
-                    nested_impl = Implies(z3_vars[outer_cond] == outer_val, inner_impl)
-                    
-                    solver.add(Implies(z3_vars[speaker], nested_impl))
-                    solver.add(Implies(Not(z3_vars[speaker]), Not(nested_impl)))
-                    
-                elif mode == "GROUP":
-                    members = logic["members"]
-                    exactly = logic["exactly"]
-                    
-                    # Count how many members are truth-tellers
-                    cnt = Sum([If(z3_vars[m], 1, 0) for m in members])
-                    
-                    solver.add(Implies(z3_vars[speaker], cnt == exactly))
-                    solver.add(Implies(Not(z3_vars[speaker]), cnt != exactly))
-            else:
-                # Simple statement data format (fallback)
-                target = logic.get("target")
-                truth_value = logic.get("truth_value")
-                if target and truth_value is not None:
-                    solver.add(Implies(z3_vars[speaker], z3_vars[target] == truth_value))
-                    solver.add(Implies(Not(z3_vars[speaker]), z3_vars[target] != truth_value))
-        
-        # Add constraint for total number of truth-tellers
-        solver.add(Sum([If(z3_vars[p], 1, 0) for p in people]) == num_truth_tellers)
-        
-        # Add guess constraints
-        for person, value in player_assignments.items():
-            solver.add(z3_vars[person] == value)
-        
-        # Check if solution is valid
-        result = solver.check()
-        return {"valid": result == sat}
+        valid = puzzle_solver.check_puzzle(statement_data, num_truth_tellers, player_assignments)
+        return {"valid": valid}
         
     except Exception as e:
         return {"valid": False, "error": str(e)} 
\ No newline at end of file
@@ -5,8 +5,12 @@ bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
 backlog = 2048
 
 # Worker processes
-workers = 4
-worker_class = "sync"
+# Solver-heavy work runs in each worker's solver pool (see solver_pool.py), so
+# threaded workers stay responsive for I/O-bound routes while it runs. The
+# worker count is exported so each pool is sized to its share of the CPUs.
+workers = int(os.environ.setdefault("WEB_CONCURRENCY", "4"))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
 worker_connections = 1000
 timeout = 30
 keepalive = 2
@@ -31,4 +35,9 @@ group = None
 tmp_upload_dir = None
 
 # Preload app for better performance
-preload_app = True 
\ No newline at end of file
+preload_app = True 
+
+def on_starting(server):
+    # Start /metrics from zero; workers write their snapshots here (see metrics.py)
+    from metrics import clear_directory
+    clear_directory()
@@ -1,9 +1,16 @@
 import random
-from z3 import *
+import puzzle_solver
+import solver_telemetry
+import statement_compiler
+import structured_log
+import uniqueness
+
+log = structured_log.get_logger(__name__)
 
 def api_generate_hard(num_players):
     """Generate a hard puzzle with DIRECT, AND, OR, IF statements (at least one IF required)."""
-    max_attempts = 10  # Prevent infinite loops
+    max_attempts = 30  # Prevent infinite loops; ambiguous puzzles are rejected too
+    attempts = solver_telemetry.GenerationAttempts("hard", num_players)
     
     for attempt in range(max_attempts):
         try:
@@ -16,8 +23,6 @@ def api_generate_hard(num_players):
             truth_teller_set = set(random.sample(people, num_truth_tellers))
             roles = {p: p in truth_teller_set for p in people}
             
-            z3_vars = {p: Bool(p) for p in people}
-            solver = Solver()
             
             # Calculate how many advanced statements (IF) we need
             # For hard mode: require at least 1 IF, but cap at half of players (rounded up)
@@ -158,42 +163,27 @@ def api_generate_hard(num_players):
                         "c2": c2
                     }}
 
-            # Apply the constraints for validation
-            for speaker, content in statements.items():
-                d = content["details"]
-                
-                if d["mode"] == "IF":
-                    implication = Implies(z3_vars[d["cond"]] == d["cond_val"], z3_vars[d["result"]] == d["result_val"])
-                    solver.add(Implies(z3_vars[speaker], implication))
-                    solver.add(Implies(Not(z3_vars[speaker]), Not(implication)))
-                    
-                elif d["mode"] == "DIRECT":
-                    solver.add(Implies(z3_vars[speaker], z3_vars[d["target"]] == d["claim"]))
-                    solver.add(Implies(Not(z3_vars[speaker]), z3_vars[d["target"]] != d["claim"]))
-                    
-                elif d["mode"] == "AND":
-                    solver.add(Implies(z3_vars[speaker], And(z3_vars[d["t1"]] == d["c1"], z3_vars[d["t2"]] == d["c2"])))
-                    solver.add(Implies(Not(z3_vars[speaker]), Or(z3_vars[d["t1"]] != d["c1"], z3_vars[d["t2"]] != d["c2"])))
-                    
-                else:  # OR
-                    solver.add(Implies(z3_vars[speaker], Or(z3_vars[d["t1"]] == d["c1"], z3_vars[d["t2"]] == d["c2"])))
-                    solver.add(Implies(Not(z3_vars[speaker]), And(z3_vars[d["t1"]] != d["c1"], z3_vars[d["t2"]] != d["c2"])))
+            compiled = statement_compiler.compile_puzzle({p: statements[p]["details"] for p in people}, num_truth_tellers, people)
+            solutions = puzzle_solver.find_solutions(compiled, limit=uniqueness.SOLUTION_LIMIT)
 
-            solver.add(Sum([If(z3_vars[p], 1, 0) for p in people]) == num_truth_tellers)
+            if not solutions:
+                log.debug("⚠️ Hard puzzle attempt %s failed - no solution found, retrying...", attempt + 1)
+                attempts.reject("unsat", kinds=statement_types)
+                continue  # Try again instead of returning error
 
-            # Check if puzzle is solvable
-            if solver.check() != sat:
-                print(f"⚠️ Hard puzzle attempt {attempt + 1} failed - no solution found, retrying...")
-                continue  # Try again instead of failing
-            
-            # Get a model to verify consistency
-            model = solver.model()
-            solution = {p: bool(model[z3_vars[p]]) for p in people}
+            # Reject puzzles with more than one consistent assignment
+            if not uniqueness.is_unambiguous("hard", compiled, solutions):
+                log.debug("⚠️ Hard puzzle attempt %s failed - multiple solutions, retrying...", attempt + 1)
+                attempts.reject("ambiguous", kinds=statement_types)
+                continue
+
+            solution = solutions[0]
             
             # Convert complex statements to simple format for UI compatibility
             simple_statement_data = convert_to_simple_format(statements)
 
-            print(f"✅ Hard puzzle generated successfully on attempt {attempt + 1}")
+            log.debug("✅ Hard puzzle generated successfully on attempt %s", attempt + 1)
+            attempts.succeeded(kinds=statement_types)
             return {
                 "puzzle_id": f"hard_{num_players}_{random.randint(1000, 9999)}",
                 "num_players": num_players,
@@ -205,11 +195,13 @@ def api_generate_hard(num_players):
             }
             
         except Exception as e:
-            print(f"⚠️ Hard puzzle attempt {attempt + 1} failed with error: {str(e)}, retrying...")
+            log.debug("⚠️ Hard puzzle attempt %s failed with error: %s, retrying...", attempt + 1, e)
+            attempts.reject("error", e)
             continue
     
     # If we get here, all attempts failed
-    print(f"❌ Failed to generate hard puzzle after {max_attempts} attempts")
+    log.warning("❌ Failed to generate hard puzzle after %s attempts", max_attempts)
+    attempts.failed()
     raise RuntimeError(f"Failed to generate a valid hard puzzle after {max_attempts} attempts")
 
 def check_hard_solution(data):
@@ -227,45 +219,11 @@ def check_hard_solution(data):
     if num_truth_tellers is None:
         return {"valid": False, "error": "Missing num_truth_tellers"}
     
-    people = list(statements.keys())
-    z3_vars = {p: Bool(p) for p in people}
-    solver = Solver()
-
-    # FIXED: Same constraint logic as generation
-    for speaker, d in statements.items():
-        if isinstance(d, dict) and "mode" in d:
-            # Full statement data format
-            if d["mode"] == "IF":
-                implication = Implies(z3_vars[d["cond"]] == d["cond_val"], z3_vars[d["result"]] == d["result_val"])
-                solver.add(Implies(z3_vars[speaker], implication))
-                solver.add(Implies(Not(z3_vars[speaker]), Not(implication)))
-                
-            elif d["mode"] == "DIRECT":
-                solver.add(Implies(z3_vars[speaker], z3_vars[d["target"]] == d["claim"]))
-                solver.add(Implies(Not(z3_vars[speaker]), z3_vars[d["target"]] != d["claim"]))
-                
-            elif d["mode"] == "AND":
-                solver.add(Implies(z3_vars[speaker], And(z3_vars[d["t1"]] == d["c1"], z3_vars[d["t2"]] == d["c2"])))
-                solver.add(Implies(Not(z3_vars[speaker]), Or(z3_vars[d["t1"]] != d["c1"], z3_vars[d["t2"]] != d["c2"])))
-                
-            else:  # OR
-                solver.add(Implies(z3_vars[speaker], Or(z3_vars[d["t1"]] == d["c1"], z3_vars[d["t2"]] == d["c2"])))
-                solver.add(Implies(Not(z3_vars[speaker]), And(z3_vars[d["t1"]] != d["c1"], z3_vars[d["t2"]] != d["c2"])))
-        else:
-            # Simple statement data format (fallback)
-            target = d.get("target")
-            truth_value = d.get("truth_value")
-            if target and truth_value is not None:
-                solver.add(Implies(z3_vars[speaker], z3_vars[target] == truth_value))
-                solver.add(Implies(Not(z3_vars[speaker]), z3_vars[target] != truth_value))
-
-    solver.add(Sum([If(z3_vars[p], 1, 0) for p in people]) == num_truth_tellers)
-
-    for person, is_truth in player_assignments.items():
-        solver.add(z3_vars[person] == is_truth)
-
-    result = solver.check()
-    return {"valid": result == sat}
+    try:
+        valid = puzzle_solver.check_puzzle(statements, num_truth_tellers, player_assignments)
+    except statement_compiler.UnsupportedStatement as e:
+        return {"valid": False, "error": str(e)}
+    return {"valid": valid}
 
 def convert_to_simple_format(statements):
     """Convert complex statements to simple UI-compatible format"""
@@ -0,0 +1,197 @@
+"""
+Idempotency keys for routes with side effects.
+
+A ranked /puzzle/check applies an Elo change and records a match, so a client
+that retries after a timeout used to be charged twice. Clients may now send
+an `Idempotency-Key` header; the first request with a key runs normally and
+its successful (2xx) response is stored for IDEMPOTENCY_TTL seconds. Repeats
+with the same key get the stored response back, marked with an
+`Idempotent-Replayed: true` header, without running the route again: no
+token-to-profile read, no solver work and no database writes.
+
+    idempotency = IdempotencyCache(make_shared_backend(IDEMPOTENCY_REDIS_URL, IDEMPOTENCY_KEY_PREFIX))
+
+    @app.route("/puzzle/check", methods=["POST"])
+    @idempotency.route(scope=request_user_id)
+    @auth_optional(fresh_profile=True)
+    def check_solution(user, profile): ...
+
+Keys are scoped to the route and to whatever `scope()` returns for the
+request (the caller's user id); requests without a scope ignore the header.
+The key names one logical operation. The request body is not compared, so a
+client must not reuse a key for a different operation.
+
+A repeat that arrives while the first request is still running waits for it
+in the same worker. With a shared Redis backend the first request also
+claims the key there, and a repeat reaching another worker meanwhile gets a
+409 so it can retry shortly. Error responses are not stored, so a request
+that failed can be retried with the same key.
+"""
+
+import os
+import threading
+from functools import wraps
+
+from flask import jsonify, make_response, request
+
+import structured_log
+from puzzle_store import PUZZLE_STORE_REDIS_URL, MemoryBackend
+
+IDEMPOTENCY_ENABLED = os.getenv("IDEMPOTENCY_ENABLED", "true").lower() == "true"
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "7200"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+IDEMPOTENCY_PENDING_TTL = int(os.getenv("IDEMPOTENCY_PENDING_TTL", "60"))
+IDEMPOTENCY_REDIS_URL = os.getenv("IDEMPOTENCY_REDIS_URL", PUZZLE_STORE_REDIS_URL)
+IDEMPOTENCY_KEY_PREFIX = "mindrank:idempotency:"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+log = structured_log.get_logger(__name__)
+
+
+class IdempotencyCache:
+    """Stored responses per idempotency key, local LRU in front of an optional shared backend."""
+
+    def __init__(self, shared=None, ttl=IDEMPOTENCY_TTL, max_entries=IDEMPOTENCY_MAX_ENTRIES,
+                 pending_ttl=IDEMPOTENCY_PENDING_TTL, enabled=IDEMPOTENCY_ENABLED):
+        self.ttl = ttl
+        self.pending_ttl = pending_ttl
+        self.enabled = enabled
+        self.local = MemoryBackend(max_entries)
+        self.shared = shared
+        self._in_flight = {}  # key -> Event set when the first request finishes
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "executed": 0, "stored": 0, "replayed": 0, "waited": 0,
+                       "conflicts": 0, "shared_errors": 0}
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _lookup(self, key):
+        """The stored response for a key, "pending" if another worker holds it, or None."""
+        stored = self.local.get(key)
+        if stored is not None or self.shared is None:
+            return stored
+        try:
+            stored = self.shared.get(key)
+        except Exception as e:
+            log.warning("⚠️ Failed to read idempotency key from shared store: %s", e)
+            self._count("shared_errors")
+            return None
+        if stored is None or stored.get("pending"):
+            return "pending" if stored else None
+        self.local.set(key, stored, self.ttl)
+        return stored
+
+    def _claim(self, key):
+        """Claim a key in the shared store; False if another worker holds it."""
+        if self.shared is None:
+            return True
+        try:
+            return self.shared.add(key, {"pending": True}, self.pending_ttl)
+        except Exception as e:
+            log.warning("⚠️ Failed to claim idempotency key in shared store: %s", e)
+            self._count("shared_errors")
+            return True
+
+    def _finish(self, key, stored):
+        if stored is not None:
+            self.local.set(key, stored, self.ttl)
+            self._count("stored")
+        if self.shared is None:
+            return
+        try:
+            if stored is not None:
+                self.shared.set(key, stored, self.ttl)
+            else:
+                self.shared.delete(key)
+        except Exception as e:
+            log.warning("⚠️ Failed to write idempotency key to shared store: %s", e)
+            self._count("shared_errors")
+
+    def run(self, key, func):
+        """
+        Return the stored response for key, or run func() (a Flask response) and store it if it succeeded.
+
+        Returns:
+            tuple: (response, replayed)
+        """
+        while True:
+            stored = self._lookup(key)
+            if stored == "pending":
+                self._count("conflicts")
+                return make_response(jsonify({"error": "A request with this Idempotency-Key is still in progress"}),
+                                     409), False
+            if stored is not None:
+                self._count("replayed")
+                return make_response(stored["body"], stored["status"], stored["headers"]), True
+
+            with self._lock:
+                done = self._in_flight.get(key)
+                if done is None:
+                    done = self._in_flight[key] = threading.Event()
+                    break
+                self._stats["waited"] += 1
+            done.wait()  # Then serve what it stored, or take over if it failed
+
+        stored = None
+        try:
+            if not self._claim(key):
+                self._count("conflicts")
+                return make_response(jsonify({"error": "A request with this Idempotency-Key is still in progress"}),
+                                     409), False
+            self._count("executed")
+            response = make_response(func())
+            if 200 <= response.status_code < 300:
+                stored = {"body": response.get_data(as_text=True), "status": response.status_code,
+                          "headers": [(k, v) for k, v in response.headers.items() if k.lower() != "content-length"]}
+            self._finish(key, stored)
+            return response, False
+        except BaseException:
+            self._finish(key, None)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            done.set()
+
+    def route(self, scope):
+        """
+        Decorator honouring the Idempotency-Key header on a Flask route.
+
+        Args:
+            scope: Called per request; returns the id keys are scoped to (the
+                caller's user id), or None to ignore the header
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                key = request.headers.get(HEADER)
+                if not self.enabled or not key:
+                    return f(*args, **kwargs)
+                if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+                    return jsonify({"error": f"{HEADER} must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters"}), 400
+                owner = scope()
+                if owner is None:
+                    return f(*args, **kwargs)
+                self._count("requests")
+                response, replayed = self.run(f"{request.endpoint}:{owner}:{key}", lambda: f(*args, **kwargs))
+                if replayed:
+                    response.headers[REPLAYED_HEADER] = "true"
+                return response
+            return decorated
+        return decorator
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                **self._stats,
+                "local_entries": len(self.local),
+                "in_flight": len(self._in_flight),
+                "shared": type(self.shared).__name__ if self.shared is not None else None,
+                "ttl": self.ttl,
+            }
@@ -0,0 +1,104 @@
+"""
+Per-worker cache of verified and rejected access tokens.
+
+verify_jwt() decodes the Supabase access token on every authenticated
+request, and falls back to a network call (supabase.auth.get_user) when the
+local HS256 check fails. Entries are keyed by a SHA-256 of the token, so raw
+tokens are never kept in memory:
+
+    - verified tokens map to their claims until the token's own `exp`
+      (JWT_CACHE_FALLBACK_TTL when the token has none)
+    - rejected tokens are remembered for JWT_NEGATIVE_CACHE_TTL seconds, so
+      a client retrying a bad token cannot turn each retry into another
+      Supabase auth call
+
+Both share one LRU bounded by JWT_CACHE_MAX_ENTRIES.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+JWT_CACHE_ENABLED = os.getenv("JWT_CACHE_ENABLED", "true").lower() == "true"
+JWT_CACHE_MAX_ENTRIES = int(os.getenv("JWT_CACHE_MAX_ENTRIES", "10000"))
+JWT_NEGATIVE_CACHE_TTL = float(os.getenv("JWT_NEGATIVE_CACHE_TTL", "30"))
+JWT_CACHE_FALLBACK_TTL = float(os.getenv("JWT_CACHE_FALLBACK_TTL", "300"))
+
+MISS = object()
+
+
+def token_key(token):
+    return hashlib.sha256(token.encode()).digest()
+
+
+class JWTCache:
+    """Thread-safe LRU of token hash -> claims (or None for a rejected token) with per-entry expiry."""
+
+    def __init__(self, max_entries=JWT_CACHE_MAX_ENTRIES, negative_ttl=JWT_NEGATIVE_CACHE_TTL,
+                 fallback_ttl=JWT_CACHE_FALLBACK_TTL, enabled=JWT_CACHE_ENABLED):
+        self.max_entries = max(1, max_entries)
+        self.negative_ttl = negative_ttl
+        self.fallback_ttl = fallback_ttl
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "negative_hits": 0, "misses": 0, "expirations": 0, "evictions": 0}
+
+    def get(self, token):
+        """
+        Look a token up.
+
+        Returns:
+            The cached claims dict, None for a token cached as rejected, or
+            MISS if the token is not cached
+        """
+        if not self.enabled:
+            return MISS
+        key = token_key(token)
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[0] <= time.time():
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                item = None
+            if item is None:
+                self._stats["misses"] += 1
+                return MISS
+            self._entries.move_to_end(key)
+            claims = item[1]
+            self._stats["hits" if claims is not None else "negative_hits"] += 1
+            return dict(claims) if claims is not None else None
+
+    def _put(self, token, value, expires_at):
+        key = token_key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def set_valid(self, token, claims, exp=None):
+        """Cache verified claims until the token's exp (a Unix timestamp)."""
+        if not self.enabled:
+            return
+        expires_at = exp if isinstance(exp, (int, float)) else time.time() + self.fallback_ttl
+        if expires_at > time.time():
+            self._put(token, dict(claims), expires_at)
+
+    def set_invalid(self, token):
+        """Remember a rejected token for the negative TTL."""
+        if self.enabled and self.negative_ttl > 0:
+            self._put(token, None, time.time() + self.negative_ttl)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["negative_hits"] + self._stats["misses"]
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                **self._stats,
+                "hit_rate": (self._stats["hits"] + self._stats["negative_hits"]) / lookups if lookups else None,
+            }
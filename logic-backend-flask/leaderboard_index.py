@@ -0,0 +1,285 @@
+"""
+Per-worker in-memory leaderboard.
+
+/leaderboard used to query the top 500 ranked profiles on every hit and
+rank them in Python. LeaderboardIndex keeps every ranked player in a list
+sorted by (-elo, user_id) instead, so the endpoint is served from memory:
+
+    - check_solution() and the username route update the index as they
+      write the profile, so this worker sees its own writes immediately
+    - a background thread reloads all ranked profiles every
+      LEADERBOARD_RECONCILE_INTERVAL seconds, picking up writes made by other
+      workers (and anything the incremental updates missed)
+
+Lookups use bisect on the sorted key list, so they are O(log n): a
+player's position is a bisect on their (-elo, user_id) key, and their
+competition rank is a bisect for the first key with their Elo. An update is
+a bisect plus a list insert/delete (a memmove, fast at this size).
+Updates made while a reload is in flight are replayed onto the loaded
+snapshot, so a slow reload cannot roll a newer Elo back.
+
+Like the puzzle pool's refill thread, the reconcile thread is started lazily
+on first use in every process, because threads started before the fork do
+not survive into the gunicorn workers.
+"""
+
+import bisect
+import os
+import threading
+import time
+
+import structured_log
+
+log = structured_log.get_logger(__name__)
+
+LEADERBOARD_INDEX_ENABLED = os.getenv("LEADERBOARD_INDEX_ENABLED", "true").lower() == "true"
+LEADERBOARD_RECONCILE_INTERVAL = float(os.getenv("LEADERBOARD_RECONCILE_INTERVAL", "60"))
+LEADERBOARD_SIZE = 500
+LEADERBOARD_MAX_WINDOW = int(os.getenv("LEADERBOARD_MAX_WINDOW", "50"))
+
+
+def tier_label(elo):
+    """Tier label shown on the leaderboard (matches elo_system.ELO_TIERS)."""
+    if elo is None:
+        return "Unranked"
+    if elo >= 2000:         return "Grandmaster Thinker"
+    elif elo >= 1500:       return "Critical Thinker"
+    elif elo >= 1000:       return "Advanced Thinker"
+    elif elo >= 500:        return "Intermediate Thinker"
+    else:                   return "Beginner Thinker"
+
+
+def rank_rows(rows):
+    """
+    Build leaderboard entries from profiles sorted by Elo, highest first.
+
+    Ties share a rank ("competition ranking": 1, 2, 2, 4). Rows with a NULL
+    Elo are skipped.
+    """
+    entries = []
+    previous_elo = None
+    rank = 0
+    for position, row in enumerate((r for r in rows if r.get("elo") is not None), start=1):
+        if previous_elo is None or row["elo"] < previous_elo:
+            rank = position
+        previous_elo = row["elo"]
+        entries.append({
+            "rank": rank,
+            "user_id": row["user_id"],
+            "username": row.get("username") or row["user_id"],  # Fallback if no username
+            "elo": row["elo"],
+            "tier": tier_label(row["elo"]),
+        })
+    return entries
+
+
+class LeaderboardIndex:
+    """Ranked players sorted by (elo desc, user_id), with competition ranks."""
+
+    def __init__(self, loader, reconcile_interval=LEADERBOARD_RECONCILE_INTERVAL, enabled=LEADERBOARD_INDEX_ENABLED):
+        """
+        Args:
+            loader: Callable returning every ranked profile as {"user_id", "username", "elo"} dicts
+            reconcile_interval: Seconds between full reloads
+            enabled: When False callers should read the database instead
+        """
+        self.loader = loader
+        self.reconcile_interval = reconcile_interval
+        self.enabled = enabled
+
+        self._keys = []       # sorted (-elo, user_id)
+        self._players = {}    # user_id -> {"elo", "username"}
+        self._version = 0
+        self._top_cache = (None, None, None)  # (version, limit, entries)
+        self._pending = None  # updates made during a reload, replayed onto its snapshot
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._worker_pid = None
+        self._stats = {"updates": 0, "reconciles": 0, "reconcile_errors": 0, "drift": 0}
+
+    # -- writes ---------------------------------------------------------
+
+    def _set(self, user_id, elo, username):
+        """Insert, move or remove a player. Caller holds the lock."""
+        current = self._players.get(user_id)
+        if current is not None:
+            if elo is not None and current["elo"] == elo:
+                current["username"] = username
+                return
+            i = bisect.bisect_left(self._keys, (-current["elo"], user_id))
+            del self._keys[i]
+            del self._players[user_id]
+        if elo is not None:
+            bisect.insort(self._keys, (-elo, user_id))
+            self._players[user_id] = {"elo": elo, "username": username}
+
+    def update(self, user_id, elo, username=None):
+        """
+        Record a ranked player's new Elo (None removes them).
+
+        Args:
+            username: New display name; keeps the current one when None
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            current = self._players.get(user_id)
+            if username is None and current is not None:
+                username = current["username"]
+            self._set(user_id, elo, username)
+            self._version += 1
+            self._stats["updates"] += 1
+            if self._pending is not None:
+                self._pending[user_id] = (elo, username)
+
+    def add_if_missing(self, user_id, elo, username=None):
+        """Add a ranked player this worker has not seen yet (e.g. ranked by another worker since the last reload)."""
+        if not self.enabled or elo is None:
+            return
+        with self._lock:
+            if user_id in self._players:
+                return
+        self.update(user_id, elo, username)
+
+    def rename(self, user_id, username):
+        """Update a ranked player's display name."""
+        if not self.enabled:
+            return
+        with self._lock:
+            current = self._players.get(user_id)
+            if current is None:
+                return
+            current["username"] = username
+            self._version += 1
+            if self._pending is not None:
+                self._pending[user_id] = (current["elo"], username)
+
+    # -- reconciliation -------------------------------------------------
+
+    def reconcile(self):
+        """Reload every ranked profile and swap the index in atomically."""
+        with self._load_lock:
+            self._reload()
+
+    def _reload(self):
+        """Load a snapshot, replaying updates made while it loaded. Caller holds the load lock."""
+        with self._lock:
+            self._pending = {}
+        try:
+            rows = self.loader()
+        except Exception:
+            with self._lock:
+                self._pending = None
+                self._stats["reconcile_errors"] += 1
+            raise
+
+        players = {row["user_id"]: {"elo": row["elo"], "username": row.get("username")}
+                   for row in rows if row.get("elo") is not None}
+        keys = sorted((-p["elo"], user_id) for user_id, p in players.items())
+        with self._lock:
+            old, self._players, self._keys = self._players, players, keys
+            for user_id, (elo, username) in self._pending.items():
+                self._set(user_id, elo, username)
+            self._pending = None
+            if self._loaded_at is not None:
+                self._stats["drift"] += sum(1 for user_id, p in self._players.items()
+                                            if old.get(user_id, {}).get("elo") != p["elo"])
+            self._loaded_at = time.monotonic()
+            self._version += 1
+            self._stats["reconciles"] += 1
+
+    def _ensure_loaded(self):
+        """Start the reconcile thread once per process and block until the first load has succeeded."""
+        pid = os.getpid()
+        if self._worker_pid != pid:
+            with self._lock:
+                start = self._worker_pid != pid
+                if start:
+                    self._worker_pid = pid
+                    # A copy inherited across a fork is reloaded before it is served
+                    self._loaded_at = None
+            if start:
+                thread = threading.Thread(target=self._reconcile_loop, name="leaderboard-reconcile", daemon=True)
+                thread.start()
+
+        if self._loaded_at is None:
+            with self._load_lock:
+                if self._loaded_at is None:
+                    self._reload()
+
+    def _reconcile_loop(self):
+        while True:
+            time.sleep(self.reconcile_interval)
+            try:
+                self.reconcile()
+            except Exception as e:
+                log.warning("⚠️ Leaderboard reconcile failed: %s", e)
+
+    # -- reads ----------------------------------------------------------
+
+    def top(self, limit=LEADERBOARD_SIZE):
+        """
+        The top `limit` players with competition ranks (ties share a rank).
+
+        Raises:
+            Exception: Whatever the loader raised if the first load fails
+        """
+        self._ensure_loaded()
+        with self._lock:
+            version, cached_limit, entries = self._top_cache
+            if version == self._version and cached_limit == limit:
+                return entries
+            rows = [{"user_id": user_id, "username": self._players[user_id]["username"], "elo": -neg_elo}
+                    for neg_elo, user_id in self._keys[:limit]]
+            entries = rank_rows(rows)
+            self._top_cache = (self._version, limit, entries)
+            return entries
+
+    def _rank_of_elo(self, elo):
+        """Competition rank for an Elo: 1 + players with a higher Elo. Caller holds the lock."""
+        return bisect.bisect_left(self._keys, (-elo, "")) + 1
+
+    def _entry_at(self, i):
+        neg_elo, user_id = self._keys[i]
+        return {
+            "rank": self._rank_of_elo(-neg_elo),
+            "user_id": user_id,
+            "username": self._players[user_id]["username"] or user_id,  # Fallback if no username
+            "elo": -neg_elo,
+            "tier": tier_label(-neg_elo),
+        }
+
+    def around(self, user_id, window=10):
+        """
+        A player's rank and the `window` players directly above and below them.
+
+        Returns:
+            dict: {"rank", "total", "player", "above", "below"}, or None if
+            the player is not ranked
+        """
+        self._ensure_loaded()
+        window = max(0, min(window, LEADERBOARD_MAX_WINDOW))
+        with self._lock:
+            player = self._players.get(user_id)
+            if player is None:
+                return None
+            i = bisect.bisect_left(self._keys, (-player["elo"], user_id))
+            me = self._entry_at(i)
+            return {
+                "rank": me["rank"],
+                "total": len(self._keys),
+                "player": me,
+                "above": [self._entry_at(j) for j in range(max(0, i - window), i)],
+                "below": [self._entry_at(j) for j in range(i + 1, min(len(self._keys), i + 1 + window))],
+            }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "players": len(self._keys),
+                "reconcile_interval": self.reconcile_interval,
+                "age": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at is not None else None,
+                **self._stats,
+            }
@@ -0,0 +1,95 @@
+"""
+Keyset-paginated match history.
+
+/user/matches used to select every match a user had ever played (to log
+them) before running the limited query, so its cost grew with the user's
+lifetime match count. Pages are now read with a keyset on
+(created_at, id): the cursor holds the last row of the previous page and the
+next page starts strictly after it, so every page is an index range scan on
+matches(user_id, created_at desc, id desc) (see
+supabase/migrations/20261017_matches_user_created_at_idx.sql) no matter how
+deep it is. `id` breaks ties between matches recorded in the same
+microsecond.
+
+Only the columns the match history UI shows are selected.
+"""
+
+import base64
+import json
+
+MATCH_COLUMNS = "id, created_at, mode, num_players, solved, time_taken, elo_before, elo_after, elo_delta, is_placement_match, notes"
+MATCH_PAGE_DEFAULT = 10
+MATCH_PAGE_MAX = 100
+
+
+class CursorError(ValueError):
+    """Raised when a pagination cursor is malformed."""
+
+
+def encode_cursor(match):
+    """Build the cursor that resumes after `match`."""
+    raw = json.dumps([match["created_at"], str(match["id"])], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Read a cursor from encode_cursor().
+
+    Returns:
+        tuple: (created_at, id) of the last match on the previous page
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, match_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise CursorError("Invalid cursor") from None
+    if not isinstance(created_at, str) or not isinstance(match_id, str):
+        raise CursorError("Invalid cursor")
+    return created_at, match_id
+
+
+def _quote(value):
+    """Quote a value for a PostgREST logic filter (timestamps contain ':' and '+')."""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def keyset_filter(created_at, match_id, order="desc"):
+    """PostgREST or-filter for rows after (created_at, id) in the given order."""
+    op = "lt" if order == "desc" else "gt"
+    ts = _quote(created_at)
+    return f"created_at.{op}.{ts},and(created_at.eq.{ts},id.{op}.{_quote(match_id)})"
+
+
+def fetch_match_page(supabase, user_id, limit=MATCH_PAGE_DEFAULT, order="desc", cursor=None):
+    """
+    Fetch one page of a user's matches.
+
+    Args:
+        limit: Page size
+        order: "desc" for newest first, "asc" for oldest first
+        cursor: next_cursor from the previous page, or None for the first page
+
+    Returns:
+        tuple: (matches, next_cursor), next_cursor is None on the last page
+
+    Raises:
+        CursorError: If the cursor is malformed
+    """
+    after = decode_cursor(cursor) if cursor else None
+    desc = order == "desc"
+
+    query = supabase.table("matches").select(MATCH_COLUMNS).eq("user_id", user_id)
+    if after:
+        # The redundant bound gives the planner an index range to start from;
+        # the or-filter alone is not used as one
+        bound = query.lte if desc else query.gte
+        query = bound("created_at", after[0]).or_(keyset_filter(*after, order))
+    # One extra row tells us whether there is a next page without a count query
+    resp = query.order("created_at", desc=desc).order("id", desc=desc).limit(limit + 1).execute()
+
+    matches = resp.data or []
+    if len(matches) > limit:
+        matches = matches[:limit]
+        return matches, encode_cursor(matches[-1])
+    return matches, None
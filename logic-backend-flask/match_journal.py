@@ -0,0 +1,407 @@
+"""
+Write-behind journal for ranked match results.
+
+check_solution() used to commit a ranked result to Supabase before answering,
+so a slow database made the player wait and a failed write lost the match.
+Ranked results are now appended to a local append-only journal instead and
+the response is built from the profile the request already read. A
+background replayer drains the journal to Supabase through the
+commit_ranked_result RPC, and the request path only pays for the local
+append.
+
+Each process appends to its own file, MATCH_JOURNAL_DIR/journal-<pid>-<ts>.jsonl,
+and holds an exclusive flock on it while it runs. Lines are JSON, either an
+event:
+
+    {"id": "<uuid>", "kind": "ranked_result", "ts": 1760000000.0, "data": {...}}
+
+or the acknowledgement written once the event is in the database:
+
+    {"ack": "<uuid>"}
+
+Appends are group-committed: a writer thread writes everything queued since
+its last fsync in one write() and one fsync(), and append() returns once its
+line is durable (or raises JournalError after MATCH_JOURNAL_APPEND_TIMEOUT).
+Concurrent ranked checks therefore share fsyncs instead of paying one each.
+
+The replayer delivers events in append order and stops at the first failure,
+retrying with exponential backoff (MATCH_JOURNAL_BACKOFF_BASE doubling up to
+MATCH_JOURNAL_BACKOFF_MAX seconds, with jitter). Delivery is at least once:
+the event id is stored with the match row, so the RPC ignores a second
+delivery. A handler raises DiscardEvent for events that can never be
+applied; they are acknowledged and logged instead of blocking the queue.
+Once every event in the file is acknowledged and the file is larger than
+MATCH_JOURNAL_COMPACT_BYTES it is truncated.
+
+Files left behind by a worker that died (its flock is released with it) are
+adopted by the next replayer scan, replayed and deleted. To look at or drain
+the journal by hand:
+
+    python match_journal.py inspect [--verbose]
+    python match_journal.py replay
+
+Like the puzzle pool's refill thread, the writer and replayer threads are
+started lazily in every process. Set MATCH_JOURNAL_ENABLED=false to commit
+ranked results on the request thread instead.
+"""
+
+import argparse
+import fcntl
+import glob
+import json
+import os
+import random
+import threading
+import time
+import uuid
+
+import structured_log
+
+log = structured_log.get_logger(__name__)
+
+MATCH_JOURNAL_ENABLED = os.getenv("MATCH_JOURNAL_ENABLED", "true").lower() == "true"
+MATCH_JOURNAL_DIR = os.getenv("MATCH_JOURNAL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "match_journal"))
+MATCH_JOURNAL_APPEND_TIMEOUT = float(os.getenv("MATCH_JOURNAL_APPEND_TIMEOUT", "2.0"))
+MATCH_JOURNAL_BACKOFF_BASE = float(os.getenv("MATCH_JOURNAL_BACKOFF_BASE", "0.5"))
+MATCH_JOURNAL_BACKOFF_MAX = float(os.getenv("MATCH_JOURNAL_BACKOFF_MAX", "60"))
+MATCH_JOURNAL_SCAN_INTERVAL = float(os.getenv("MATCH_JOURNAL_SCAN_INTERVAL", "30"))
+MATCH_JOURNAL_COMPACT_BYTES = int(os.getenv("MATCH_JOURNAL_COMPACT_BYTES", str(1024 * 1024)))
+
+FILE_PATTERN = "journal-*.jsonl"
+
+
+class JournalError(Exception):
+    """Raised when an event could not be made durable in the journal."""
+
+
+class DiscardEvent(Exception):
+    """Raised by a replay handler for an event that can never be applied."""
+
+
+def _encode(record):
+    return json.dumps(record, separators=(",", ":")) + "\n"
+
+
+def read_journal(path):
+    """
+    Parse a journal file.
+
+    Returns:
+        tuple: (pending events in append order, number of acknowledged events,
+        number of unreadable lines such as a write torn by a crash)
+    """
+    events, acked, corrupt = {}, 0, 0
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                corrupt += 1
+                continue
+            if "ack" in record:
+                if events.pop(record["ack"], None) is not None:
+                    acked += 1
+            elif "id" in record:
+                events[record["id"]] = record
+    return list(events.values()), acked, corrupt
+
+
+def _try_lock(fd):
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+
+class _Append:
+    __slots__ = ("line", "record", "done", "error")
+
+    def __init__(self, line, record=None):
+        self.line = line
+        self.record = record
+        self.done = threading.Event()
+        self.error = None
+
+
+class MatchJournal:
+    """Per-process append-only event journal, drained in the background by a handler."""
+
+    def __init__(self, handler=None, directory=MATCH_JOURNAL_DIR, append_timeout=MATCH_JOURNAL_APPEND_TIMEOUT,
+                 backoff_base=MATCH_JOURNAL_BACKOFF_BASE, backoff_max=MATCH_JOURNAL_BACKOFF_MAX,
+                 scan_interval=MATCH_JOURNAL_SCAN_INTERVAL, compact_bytes=MATCH_JOURNAL_COMPACT_BYTES,
+                 enabled=MATCH_JOURNAL_ENABLED):
+        """
+        Args:
+            handler: Callable (event) that applies an event to the database; raises
+                to retry later, or DiscardEvent to drop the event
+            directory: Where journal files live (shared by every worker on the host)
+        """
+        self.handler = handler
+        self.directory = directory
+        self.append_timeout = append_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.scan_interval = scan_interval
+        self.compact_bytes = compact_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._has_work = threading.Condition(self._lock)
+        self._buffer = []      # _Append entries waiting for the writer thread
+        self._unacked = {}     # event id -> event, durable but not yet in the database
+        self._fd = None
+        self._path = None
+        self._size = 0
+        self._pid = None
+        self._wake = threading.Event()
+        self._failures = 0
+        self._last_error = None
+        self._stats = {"appended": 0, "append_errors": 0, "fsyncs": 0, "replayed": 0, "discarded": 0,
+                       "replay_errors": 0, "adopted_files": 0, "compactions": 0}
+
+    def append(self, kind, data, event_id=None):
+        """
+        Durably record an event for the replayer.
+
+        Args:
+            event_id: Idempotency key for the event; a new UUID by default
+
+        Returns:
+            str: The event id
+
+        Raises:
+            JournalError: If the journal is disabled, or the event was not fsynced
+                within the append timeout. It may still be written later, so a
+                caller that applies the event itself must use the same event id.
+        """
+        if not self.enabled:
+            raise JournalError("Match journal is disabled")
+        self._ensure_open()
+        record = {"id": event_id or str(uuid.uuid4()), "kind": kind, "ts": time.time(), "data": data}
+        entry = _Append(_encode(record), record)
+        with self._has_work:
+            self._buffer.append(entry)
+            self._has_work.notify()
+        if not entry.done.wait(self.append_timeout):
+            with self._lock:
+                self._stats["append_errors"] += 1
+            raise JournalError(f"Journal append timed out after {self.append_timeout}s")
+        if entry.error is not None:
+            with self._lock:
+                self._stats["append_errors"] += 1
+            raise JournalError(f"Journal write failed: {entry.error}") from entry.error
+        return record["id"]
+
+    def pending(self):
+        """Durable events not yet acknowledged, oldest first."""
+        with self._lock:
+            return list(self._unacked.values())
+
+    def _ensure_open(self):
+        """Open this process's journal file and start its threads, once per process."""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"journal-{pid}-{int(time.time() * 1000)}.jsonl")
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            # Anything inherited from a parent process belongs to the parent
+            self._fd, self._path, self._size = fd, path, 0
+            self._buffer, self._unacked = [], {}
+            self._pid = pid
+        threading.Thread(target=self._write_loop, name="match-journal-writer", daemon=True).start()
+        threading.Thread(target=self._replay_loop, name="match-journal-replayer", daemon=True).start()
+
+    def _write_loop(self):
+        while True:
+            with self._has_work:
+                while not self._buffer:
+                    self._has_work.wait()
+                batch, self._buffer = self._buffer, []
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        """Write and fsync a batch of lines, then release the appends waiting on it."""
+        data = "".join(entry.line for entry in batch).encode("utf-8")
+        error = None
+        try:
+            written = 0
+            while written < len(data):
+                written += os.write(self._fd, data[written:])
+            os.fsync(self._fd)
+        except OSError as e:
+            error = e
+            log.error("❌ Match journal write failed: %s", e)
+            try:
+                os.ftruncate(self._fd, self._size)  # Drop a partial line so later records stay parseable
+            except OSError:
+                pass
+
+        with self._lock:
+            self._stats["fsyncs"] += 1
+            if error is None:
+                self._size += len(data)
+                for entry in batch:
+                    if entry.record is not None:
+                        self._unacked[entry.record["id"]] = entry.record
+                        self._stats["appended"] += 1
+            for entry in batch:
+                entry.error = error
+                entry.done.set()
+            compact = error is None and not self._buffer and not self._unacked and self._size > self.compact_bytes
+            if compact:
+                try:
+                    os.ftruncate(self._fd, 0)
+                    os.fsync(self._fd)
+                    self._size = 0
+                    self._stats["compactions"] += 1
+                except OSError as e:
+                    log.warning("⚠️ Match journal compaction failed: %s", e)
+        if error is None and any(entry.record is not None for entry in batch):
+            self._wake.set()
+
+    def _ack(self, event_id):
+        """Acknowledge an event; the ack line needs no fsync since replays are idempotent."""
+        with self._has_work:
+            self._unacked.pop(event_id, None)
+            self._buffer.append(_Append(_encode({"ack": event_id})))
+            self._has_work.notify()
+
+    def _deliver(self, event):
+        """Apply one event through the handler. Returns False if it was discarded."""
+        try:
+            self.handler(event)
+            return True
+        except DiscardEvent as e:
+            log.error("❌ Discarding journaled %s event %s: %s", event.get("kind"), event["id"], e)
+            with self._lock:
+                self._stats["discarded"] += 1
+            return False
+
+    def replay(self):
+        """Deliver this process's pending events in order, stopping at the first failure."""
+        while True:
+            with self._lock:
+                event = next(iter(self._unacked.values()), None)
+            if event is None:
+                return
+            if self._deliver(event):
+                with self._lock:
+                    self._stats["replayed"] += 1
+            self._ack(event["id"])
+
+    def adopt_orphans(self):
+        """Replay and delete journal files whose process has exited."""
+        adopted = 0
+        for path in sorted(glob.glob(os.path.join(self.directory, FILE_PATTERN))):
+            if path == self._path:
+                continue
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+            except FileNotFoundError:
+                continue  # Adopted and deleted by another process meanwhile
+            try:
+                if not _try_lock(fd) or not os.path.exists(path):
+                    continue
+                events, _, _ = read_journal(path)
+                for event in events:
+                    if self._deliver(event):
+                        with self._lock:
+                            self._stats["replayed"] += 1
+                    os.write(fd, _encode({"ack": event["id"]}).encode("utf-8"))
+                os.unlink(path)
+                adopted += 1
+                with self._lock:
+                    self._stats["adopted_files"] += 1
+                log.info("📥 Replayed %s journaled events from orphaned %s", len(events), os.path.basename(path))
+            finally:
+                os.close(fd)
+        return adopted
+
+    def _replay_loop(self):
+        next_scan = 0
+        while True:
+            self._wake.wait(self.scan_interval)
+            self._wake.clear()
+            try:
+                self.replay()
+                if time.monotonic() >= next_scan:
+                    self.adopt_orphans()
+                    next_scan = time.monotonic() + self.scan_interval
+                with self._lock:
+                    self._failures, self._last_error = 0, None
+            except Exception as e:
+                with self._lock:
+                    self._failures += 1
+                    self._stats["replay_errors"] += 1
+                    self._last_error = str(e)
+                    failures = self._failures
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (failures - 1)) * random.uniform(0.5, 1.0)
+                log.warning("⚠️ Match journal replay failed (attempt %s), retrying in %.1fs: %s", failures, delay, e)
+                time.sleep(delay)
+                self._wake.set()
+
+    def stats(self):
+        with self._lock:
+            oldest = next(iter(self._unacked.values()), None)
+            return {
+                "enabled": self.enabled,
+                "path": self._path,
+                "pending": len(self._unacked),
+                "oldest_pending_age": round(time.time() - oldest["ts"], 3) if oldest else None,
+                "consecutive_failures": self._failures,
+                "last_error": self._last_error,
+                **self._stats,
+            }
+
+
+def _inspect(directory, verbose):
+    paths = sorted(glob.glob(os.path.join(directory, FILE_PATTERN)))
+    if not paths:
+        print(f"No journal files in {directory}")
+        return
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            owner = "orphaned" if _try_lock(fd) else "live"
+        finally:
+            os.close(fd)
+        events, acked, corrupt = read_journal(path)
+        oldest = f", oldest {time.time() - events[0]['ts']:.0f}s ago" if events else ""
+        print(f"{os.path.basename(path)} [{owner}]: {len(events)} pending, {acked} acknowledged, "
+              f"{corrupt} unreadable lines{oldest}")
+        if verbose:
+            for event in events:
+                print(f"  {json.dumps(event)}")
+
+
+def _replay(directory):
+    from app import replay_journal_event  # Needs the Supabase client configured by app.py
+
+    journal = MatchJournal(handler=replay_journal_event, directory=directory)
+    adopted = journal.adopt_orphans()
+    stats = journal.stats()
+    print(f"Replayed {stats['replayed']} events ({stats['discarded']} discarded) from {adopted} orphaned files")
+    remaining = len(glob.glob(os.path.join(directory, FILE_PATTERN)))
+    if remaining:
+        print(f"{remaining} journal files remain; files of running workers are replayed by those workers")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or replay the ranked match journal")
+    parser.add_argument("command", choices=["inspect", "replay"])
+    parser.add_argument("--dir", default=MATCH_JOURNAL_DIR, help="Journal directory")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Print every pending event")
+    args = parser.parse_args()
+    if args.command == "inspect":
+        _inspect(args.dir, args.verbose)
+    else:
+        _replay(args.dir)
+
+
+if __name__ == "__main__":
+    main()
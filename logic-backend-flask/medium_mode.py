@@ -1,12 +1,19 @@
 import random
-from z3 import *
+import puzzle_solver
+import solver_telemetry
+import statement_compiler
+import structured_log
+import uniqueness
+
+log = structured_log.get_logger(__name__)
 
 # API for generating medium puzzles
 # Returns JSON-serializable data without raw Z3 objects
 
 def api_generate_medium(num_players):
     """Generate a medium puzzle with DIRECT, AND, OR statements."""
-    max_attempts = 10  # Prevent infinite loops
+    max_attempts = 30  # Prevent infinite loops; ambiguous puzzles are rejected too
+    attempts = solver_telemetry.GenerationAttempts("medium", num_players)
     
     for attempt in range(max_attempts):
         try:
@@ -15,8 +22,6 @@ def api_generate_medium(num_players):
             truth_teller_set = set(random.sample(people, num_truth_tellers))
             roles = {p: p in truth_teller_set for p in people}
 
-            z3_vars = {p: Bool(p) for p in people}
-            solver = Solver()
 
             def generate_statements():
                 statements = {}
@@ -140,41 +145,27 @@ def api_generate_medium(num_players):
 
             statements = generate_statements()
             
-            # Apply Z3 constraint logic
-            for speaker, entry in statements.items():
-                d = entry["details"]
-                
-                if d["mode"] == "DIRECT":
-                    # If speaker is truth-teller, their claim about target must be accurate
-                    solver.add(Implies(z3_vars[speaker], z3_vars[d["target"]] == d["claim"]))
-                    # If speaker is liar, their claim about target must be false
-                    solver.add(Implies(Not(z3_vars[speaker]), z3_vars[d["target"]] != d["claim"]))
-                    
-                elif d["mode"] == "AND":
-                    # If speaker is truth-teller, both parts of AND must be true
-                    solver.add(Implies(z3_vars[speaker], And(z3_vars[d["t1"]] == d["c1"], z3_vars[d["t2"]] == d["c2"])))
-                    # If speaker is liar, at least one part of AND must be false
-                    solver.add(Implies(Not(z3_vars[speaker]), Or(z3_vars[d["t1"]] != d["c1"], z3_vars[d["t2"]] != d["c2"])))
-                    
-                else:  # OR
-                    # If speaker is truth-teller, at least one part of OR must be true
-                    solver.add(Implies(z3_vars[speaker], Or(z3_vars[d["t1"]] == d["c1"], z3_vars[d["t2"]] == d["c2"])))
-                    # If speaker is liar, both parts of OR must be false
-                    solver.add(Implies(Not(z3_vars[speaker]), And(z3_vars[d["t1"]] != d["c1"], z3_vars[d["t2"]] != d["c2"])))
+            compiled = statement_compiler.compile_puzzle({p: statements[p]["details"] for p in people}, num_truth_tellers, people)
+            solutions = puzzle_solver.find_solutions(compiled, limit=uniqueness.SOLUTION_LIMIT)
 
-            solver.add(Sum([If(z3_vars[p], 1, 0) for p in people]) == num_truth_tellers)
-
-            if solver.check() != sat:
-                print(f"⚠️ Medium puzzle attempt {attempt + 1} failed - no solution found, retrying...")
+            if not solutions:
+                log.debug("⚠️ Medium puzzle attempt %s failed - no solution found, retrying...", attempt + 1)
+                attempts.reject("unsat")
                 continue  # Try again instead of returning error
-            
-            model = solver.model()
-            solution = {p: bool(model[z3_vars[p]]) for p in people}
+
+            # Reject puzzles with more than one consistent assignment
+            if not uniqueness.is_unambiguous("medium", compiled, solutions):
+                log.debug("⚠️ Medium puzzle attempt %s failed - multiple solutions, retrying...", attempt + 1)
+                attempts.reject("ambiguous")
+                continue
+
+            solution = solutions[0]
             
             # Convert complex statements to simple format for UI compatibility
             simple_statement_data = convert_to_simple_format(statements)
             
-            print(f"✅ Medium puzzle generated successfully on attempt {attempt + 1}")
+            log.debug("✅ Medium puzzle generated successfully on attempt %s", attempt + 1)
+            attempts.succeeded()
             return {
                 "puzzle_id": f"medium_{num_players}_{random.randint(1000, 9999)}",
                 "num_players": num_players,
@@ -186,11 +177,13 @@ def api_generate_medium(num_players):
             }
             
         except Exception as e:
-            print(f"⚠️ Medium puzzle attempt {attempt + 1} failed with error: {str(e)}, retrying...")
+            log.debug("⚠️ Medium puzzle attempt %s failed with error: %s, retrying...", attempt + 1, e)
+            attempts.reject("error", e)
             continue
     
     # If we get here, all attempts failed
-    print(f"❌ Failed to generate medium puzzle after {max_attempts} attempts")
+    log.warning("❌ Failed to generate medium puzzle after %s attempts", max_attempts)
+    attempts.failed()
     raise RuntimeError(f"Failed to generate a valid medium puzzle after {max_attempts} attempts")
 
 def check_medium_solution(data):
@@ -208,37 +201,8 @@ def check_medium_solution(data):
     if num_truth_tellers is None:
         return {"valid": False, "error": "Missing num_truth_tellers"}
     
-    people = list(statements.keys())
-    z3_vars = {p: Bool(p) for p in people}
-    solver = Solver()
-
-    # FIXED: Same constraint logic as generation
-    for speaker, d in statements.items():
-        if isinstance(d, dict) and "mode" in d:
-            # Full statement data format
-            if d["mode"] == "DIRECT":
-                solver.add(Implies(z3_vars[speaker], z3_vars[d["target"]] == d["claim"]))
-                solver.add(Implies(Not(z3_vars[speaker]), z3_vars[d["target"]] != d["claim"]))
-                
-            elif d["mode"] == "AND":
-                solver.add(Implies(z3_vars[speaker], And(z3_vars[d["t1"]] == d["c1"], z3_vars[d["t2"]] == d["c2"])))
-                solver.add(Implies(Not(z3_vars[speaker]), Or(z3_vars[d["t1"]] != d["c1"], z3_vars[d["t2"]] != d["c2"])))
-                
-            else:  # OR
-                solver.add(Implies(z3_vars[speaker], Or(z3_vars[d["t1"]] == d["c1"], z3_vars[d["t2"]] == d["c2"])))
-                solver.add(Implies(Not(z3_vars[speaker]), And(z3_vars[d["t1"]] != d["c1"], z3_vars[d["t2"]] != d["c2"])))
-        else:
-            # Simple statement data format (fallback)
-            target = d.get("target")
-            truth_value = d.get("truth_value")
-            if target and truth_value is not None:
-                solver.add(Implies(z3_vars[speaker], z3_vars[target] == truth_value))
-                solver.add(Implies(Not(z3_vars[speaker]), z3_vars[target] != truth_value))
-
-    solver.add(Sum([If(z3_vars[p], 1, 0) for p in people]) == num_truth_tellers)
-    
-    for person, is_truth in player_assignments.items():
-        solver.add(z3_vars[person] == is_truth)
-    
-    result = solver.check()
-    return {"valid": result == sat}
+    try:
+        valid = puzzle_solver.check_puzzle(statements, num_truth_tellers, player_assignments)
+    except statement_compiler.UnsupportedStatement as e:
+        return {"valid": False, "error": str(e)}
+    return {"valid": valid}
@@ -0,0 +1,284 @@
+"""
+Prometheus-style request and phase latency metrics.
+
+Every request is counted and timed per route template, method and status,
+and the named phases of a request (auth, profile_fetch, generate,
+solver_check, db_write, ...) are timed per route with:
+
+    with metrics.phase("solver_check"):
+        result = solver_pool.check_solution(mode, data)
+
+Phases timed outside a request (background threads) are labelled with
+route="background". GET /metrics (bearer METRICS_TOKEN, see app.py) returns
+everything in the Prometheus text exposition format:
+
+    mindrank_http_requests_total{method,route,status}
+    mindrank_http_request_duration_seconds{method,route,status}   (histogram)
+    mindrank_phase_duration_seconds{phase,route}                  (histogram)
+
+plus generation and solver telemetry fed by solver_telemetry.py:
+
+    mindrank_generation_attempts{mode,num_players,outcome}        (histogram)
+    mindrank_generation_duration_seconds{mode,num_players,outcome} (histogram)
+    mindrank_generation_rejections_total{mode,num_players,reason}
+    mindrank_solver_duration_seconds{task,mode,num_players,engine} (histogram)
+    mindrank_z3_conflicts{task,mode,num_players}                  (histogram)
+    mindrank_z3_decisions{task,mode,num_players}                  (histogram)
+
+Recording is a dict lookup, a bisect and a few additions under a lock, cheap
+enough to leave on in production.
+
+Gunicorn runs several workers and a scrape reaches only one of them, so each
+worker also writes a snapshot of its counts to METRICS_DIR every
+METRICS_FLUSH_INTERVAL seconds (and at exit). The worker answering
+/metrics adds everyone's latest snapshot to its own live counts. Snapshots of
+workers that have exited stay in the sum so counters never go backwards.
+The directory is cleared when gunicorn starts (see gunicorn.conf.py).
+Numbers from other workers can be up to one flush interval old. Set
+METRICS_DIR to an empty string to report per-worker counts only, or
+METRICS_ENABLED=false to turn recording off.
+"""
+
+import atexit
+import bisect
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from flask import has_request_context, request
+
+import structured_log
+
+log = structured_log.get_logger(__name__)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "mindrank-metrics"))
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUESTS_TOTAL = "mindrank_http_requests_total"
+REQUEST_DURATION = "mindrank_http_request_duration_seconds"
+PHASE_DURATION = "mindrank_phase_duration_seconds"
+GENERATION_ATTEMPTS = "mindrank_generation_attempts"
+GENERATION_DURATION = "mindrank_generation_duration_seconds"
+GENERATION_REJECTIONS = "mindrank_generation_rejections_total"
+SOLVER_DURATION = "mindrank_solver_duration_seconds"
+Z3_CONFLICTS = "mindrank_z3_conflicts"
+Z3_DECISIONS = "mindrank_z3_decisions"
+
+ATTEMPT_BUCKETS = (1, 2, 3, 5, 10, 20, 30)
+Z3_COUNT_BUCKETS = (0, 10, 100, 1000, 10000, 100000, 1000000)
+
+_HELP = {
+    REQUESTS_TOTAL: ("counter", "HTTP requests by route template, method and status"),
+    REQUEST_DURATION: ("histogram", "HTTP request latency in seconds"),
+    PHASE_DURATION: ("histogram", "Latency of named request phases in seconds"),
+    GENERATION_ATTEMPTS: ("histogram", "Attempts per puzzle generation, by outcome"),
+    GENERATION_DURATION: ("histogram", "Wall time of puzzle generation in seconds, all attempts included"),
+    GENERATION_REJECTIONS: ("counter", "Rejected generation attempts by reason (unsat, ambiguous, error:<type>)"),
+    SOLVER_DURATION: ("histogram", "Solver time per generation, check or solve in seconds, by engine"),
+    Z3_CONFLICTS: ("histogram", "Z3 conflicts per generation, check or solve"),
+    Z3_DECISIONS: ("histogram", "Z3 decisions per generation, check or solve"),
+}
+_LABELS = {
+    REQUESTS_TOTAL: ("method", "route", "status"),
+    REQUEST_DURATION: ("method", "route", "status"),
+    PHASE_DURATION: ("phase", "route"),
+    GENERATION_ATTEMPTS: ("mode", "num_players", "outcome"),
+    GENERATION_DURATION: ("mode", "num_players", "outcome"),
+    GENERATION_REJECTIONS: ("mode", "num_players", "reason"),
+    SOLVER_DURATION: ("task", "mode", "num_players", "engine"),
+    Z3_CONFLICTS: ("task", "mode", "num_players"),
+    Z3_DECISIONS: ("task", "mode", "num_players"),
+}
+_BUCKETS = {
+    GENERATION_ATTEMPTS: ATTEMPT_BUCKETS,
+    Z3_CONFLICTS: Z3_COUNT_BUCKETS,
+    Z3_DECISIONS: Z3_COUNT_BUCKETS,
+}
+
+FILE_PATTERN = "metrics-*.json"
+
+
+def route_label():
+    """The current request's route template ("unmatched" for 404s), or "background" outside a request."""
+    if not has_request_context():
+        return "background"
+    rule = request.url_rule
+    return rule.rule if rule is not None else "unmatched"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metrics:
+    """Per-process counters and latency histograms, merged across workers on read."""
+
+    def __init__(self, directory=METRICS_DIR, flush_interval=METRICS_FLUSH_INTERVAL, enabled=METRICS_ENABLED):
+        self.directory = directory or None
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self._counters = {}    # (name, label values) -> count
+        self._histograms = {}  # (name, label values) -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        self._pid = None
+        self._path = None
+
+    def inc(self, name, labels, amount=1):
+        if not self.enabled:
+            return
+        self._ensure_flusher()
+        with self._lock:
+            self._counters[(name, labels)] = self._counters.get((name, labels), 0) + amount
+
+    def observe(self, name, labels, value):
+        if not self.enabled:
+            return
+        self._ensure_flusher()
+        buckets = _BUCKETS.get(name, LATENCY_BUCKETS)
+        index = bisect.bisect_left(buckets, value)
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[(name, labels)] = [0] * (len(buckets) + 2)
+            histogram[index] += 1
+            histogram[-1] += value
+
+    def observe_request(self, route, method, status, seconds):
+        """Count and time one HTTP request."""
+        labels = (method, route, str(status))
+        self.inc(REQUESTS_TOTAL, labels)
+        self.observe(REQUEST_DURATION, labels, seconds)
+
+    @contextmanager
+    def phase(self, name):
+        """Time a named phase of the current request (exceptions are timed too)."""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(PHASE_DURATION, (name, route_label()), time.perf_counter() - started)
+
+    def snapshot(self):
+        """This process's counts as JSON-serialisable data."""
+        with self._lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                "histograms": [[name, list(labels), list(values)] for (name, labels), values in self._histograms.items()],
+            }
+
+    def _ensure_flusher(self):
+        """Start the snapshot thread once per process when metrics are shared."""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            if self.directory is None:
+                return
+            # A process that forked after recording starts from zero
+            self._counters, self._histograms = {}, {}
+            self._path = os.path.join(self.directory, f"metrics-{pid}-{uuid.uuid4().hex[:12]}.json")
+        threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True).start()
+        atexit.register(self.flush)
+
+    def flush(self):
+        """Write this process's snapshot for the other workers to read."""
+        if self._path is None:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{self._path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.snapshot(), f, separators=(",", ":"))
+            os.replace(tmp, self._path)
+        except OSError as e:
+            log.warning("⚠️ Failed to write metrics snapshot: %s", e)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def _collect(self):
+        """Live counts of this process plus the latest snapshot of every other worker."""
+        snapshots = [self.snapshot()]
+        if self.directory is not None:
+            for path in glob.glob(os.path.join(self.directory, FILE_PATTERN)):
+                if path == self._path:
+                    continue
+                try:
+                    with open(path) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue  # Replaced or removed while reading
+        counters, histograms = {}, {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot["counters"]:
+                key = (name, tuple(labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, values in snapshot["histograms"]:
+                key = (name, tuple(labels))
+                merged = histograms.setdefault(key, [0] * len(values))
+                for i, value in enumerate(values):
+                    merged[i] += value
+        return counters, histograms
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        counters, histograms = self._collect()
+        lines = []
+        for name, (kind, help_text) in _HELP.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            names = _LABELS[name]
+            if kind == "counter":
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_format_labels(names, labels)} {_format_number(value)}")
+                continue
+            for (metric, labels), values in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(_BUCKETS.get(name, LATENCY_BUCKETS) + ("+Inf",), values):
+                    cumulative += count
+                    le = 'le="%s"' % (bound if bound == "+Inf" else _format_number(bound))
+                    lines.append(f"{name}_bucket{_format_labels(names, labels, le)} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(names, labels)} {_format_number(values[-1])}")
+                lines.append(f"{name}_count{_format_labels(names, labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def clear_directory(directory=METRICS_DIR):
+    """Remove every worker's snapshot (called when gunicorn starts)."""
+    if not directory:
+        return
+    for path in glob.glob(os.path.join(directory, FILE_PATTERN)):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,102 @@
+"""
+Per-worker TTL + LRU cache of user profiles, keyed by user id.
+
+The auth decorators load the caller's profile on every authenticated
+request, and a page load fires several of those back to back (/user/elo,
+/me, /practice/progress-bars, /master/progress-bars). Caching the profile
+for a short time turns all but the first of those into a dict lookup.
+
+Every profile write in app.py (Elo updates, progress increments, username
+changes) invalidates the user's entry in this worker. Other workers keep
+serving their copy until it expires, so PROFILE_CACHE_TTL bounds how stale
+a profile can be; routes that write based on the profile read it fresh.
+
+A fetch that started before an invalidation is not cached, so a slow read
+cannot put the pre-write profile back into the cache.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+PROFILE_CACHE_ENABLED = os.getenv("PROFILE_CACHE_ENABLED", "true").lower() == "true"
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "30"))
+PROFILE_CACHE_MAX_ENTRIES = int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "10000"))
+
+
+class ProfileCache:
+    """Thread-safe TTL + LRU cache of profile dicts."""
+
+    def __init__(self, ttl=PROFILE_CACHE_TTL, max_entries=PROFILE_CACHE_MAX_ENTRIES, enabled=PROFILE_CACHE_ENABLED):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.enabled = enabled and ttl > 0
+        self._entries = OrderedDict()
+        self._invalidated_at = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "stale_stores": 0,
+                       "invalidations": 0, "expirations": 0, "evictions": 0}
+
+    def get(self, user_id):
+        """Return a copy of the cached profile, or None on a miss."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            item = self._entries.get(user_id)
+            if item is not None and item[0] <= time.monotonic():
+                del self._entries[user_id]
+                self._stats["expirations"] += 1
+                item = None
+            if item is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self._stats["hits"] += 1
+            return dict(item[1])
+
+    def set(self, user_id, profile, fetched_at):
+        """
+        Cache a profile read from the database.
+
+        Args:
+            fetched_at: time.monotonic() taken before the read started; the
+                profile is dropped if the user was invalidated since then
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._invalidated_at.get(user_id, float("-inf")) >= fetched_at:
+                self._stats["stale_stores"] += 1
+                return
+            self._entries[user_id] = (time.monotonic() + self.ttl, dict(profile))
+            self._entries.move_to_end(user_id)
+            self._stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, user_id):
+        """Drop a user's profile after it has been written."""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._invalidated_at[user_id] = now
+            self._stats["invalidations"] += 1
+            # Only reads that started within the last TTL can still be in flight
+            if len(self._invalidated_at) > self.max_entries:
+                cutoff = now - self.ttl
+                self._invalidated_at = {u: t for u, t in self._invalidated_at.items() if t > cutoff}
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "enabled": self.enabled,
+                "ttl": self.ttl,
+                "entries": len(self._entries),
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else None,
+            }
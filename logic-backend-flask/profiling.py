@@ -0,0 +1,409 @@
+"""
+Opt-in per-request profiling, spooled as flamegraph-ready collapsed stacks.
+
+A request is profiled when it carries the admin token, or when its route is
+picked by PROFILE_SAMPLE_RATES (same syntax as LOG_SAMPLE_RATES, off by
+default):
+
+    curl -H "X-Profile: $PROFILE_ADMIN_TOKEN" "$API/puzzle/generate?mode=extreme&players=8"
+
+Two profilers are available (PROFILE_MODE, or X-Profile-Mode on an admin
+request):
+
+    sample   a thread samples the request thread's stack every
+             PROFILE_INTERVAL seconds. Wall-clock: time spent waiting on
+             Supabase or the solver pool shows up too. Cheap; the default.
+    trace    every Python call and return on the request thread is timed
+             with sys.setprofile. Exact, but slows the request several
+             times over. (cProfile only keeps caller/callee pairs, so it
+             cannot produce whole stacks.)
+
+Each profiled request writes one file to PROFILE_SPOOL_DIR in the collapsed
+("folded") format read by flamegraph.pl and speedscope: one
+"frame;frame;frame weight" line per stack, weights in samples or
+microseconds. The first line is a "# mindrank-profile {...}" JSON header
+with the route, method, mode, num_players, status and timing; flamegraph
+tools skip it. The file name is returned in the X-Profile-Id response
+header. Only the newest PROFILE_SPOOL_MAX_FILES files are kept.
+
+Handlers add tags the request itself doesn't show (a ranked puzzle's mode,
+for example) with profiler.tag(mode=..., num_players=...). Work done in
+solver pool processes appears as time waiting for the pool.
+
+Merge spooled profiles into one flamegraph input with the CLI:
+
+    python profiling.py list --mode extreme
+    python profiling.py merge --route /puzzle/generate --players 8 | flamegraph.pl > generate.svg
+    python profiling.py merge --group-by mode,num_players > all.folded
+"""
+
+import argparse
+import glob
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+from flask import g, request
+
+import structured_log
+
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+PROFILE_SAMPLE_RATES = os.getenv("PROFILE_SAMPLE_RATES", "")
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sample").lower()
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
+PROFILE_SPOOL_DIR = os.getenv("PROFILE_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "mindrank-profiles"))
+PROFILE_SPOOL_MAX_FILES = int(os.getenv("PROFILE_SPOOL_MAX_FILES", "1000"))
+PROFILE_MAX_CONCURRENT = int(os.getenv("PROFILE_MAX_CONCURRENT", "2"))
+
+HEADER = "X-Profile"
+MODE_HEADER = "X-Profile-Mode"
+ID_HEADER = "X-Profile-Id"
+HEADER_PREFIX = "# mindrank-profile "
+FILE_PATTERN = "*.folded"
+TAGS = ("route", "method", "mode", "num_players")
+
+log = structured_log.get_logger(__name__)
+
+
+def _frame_label(code, labels):
+    label = labels.get(code)
+    if label is None:
+        label = labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return label
+
+
+class _Sampler:
+    """Samples one thread's stack from a helper thread; weights are sample counts."""
+
+    unit = "samples"
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self.counts = {}
+        self._labels = {}
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self):
+        target = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, args=(target,), name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def _run(self, target):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(target)
+            if frame is None:
+                return
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code, self._labels))
+                frame = frame.f_back
+            key = ";".join(reversed(stack))
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def stop(self):
+        self._done.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+
+class _Tracer:
+    """Times every Python call on the calling thread; weights are microseconds of self time."""
+
+    unit = "us"
+
+    def __init__(self):
+        self.interval = None
+        self._ns = {}
+        self._labels = {}
+        self._stack = []
+        self._last = 0
+
+    @property
+    def counts(self):
+        return {stack: round(ns / 1000) for stack, ns in self._ns.items() if ns >= 500}
+
+    def start(self):
+        # Seed the stack with the frames already running, so their returns pop it
+        frames = []
+        frame = sys._getframe()
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        for frame in reversed(frames):
+            label = _frame_label(frame.f_code, self._labels)
+            self._stack.append(f"{self._stack[-1]};{label}" if self._stack else label)
+        self._last = time.perf_counter_ns()
+        sys.setprofile(self._event)
+
+    def _event(self, frame, event, arg):
+        # C calls are left out: their time counts as the calling function's
+        if event != "call" and event != "return":
+            return
+        now = time.perf_counter_ns()
+        if self._stack:
+            top = self._stack[-1]
+            self._ns[top] = self._ns.get(top, 0) + now - self._last
+        if event == "call":
+            label = _frame_label(frame.f_code, self._labels)
+            self._stack.append(f"{self._stack[-1]};{label}" if self._stack else label)
+        elif self._stack:
+            self._stack.pop()
+        self._last = now
+
+    def stop(self):
+        sys.setprofile(None)
+        if self._stack:
+            top = self._stack[-1]
+            self._ns[top] = self._ns.get(top, 0) + time.perf_counter_ns() - self._last
+
+
+PROFILERS = {"sample": _Sampler, "trace": _Tracer}
+
+
+def _slug(value):
+    return re.sub(r"[^A-Za-z0-9]+", "_", str(value)).strip("_").lower() or "none"
+
+
+class RequestProfiler:
+    """Profiles admin-requested or sampled requests and spools collapsed stacks."""
+
+    def __init__(self, directory=PROFILE_SPOOL_DIR, admin_token=PROFILE_ADMIN_TOKEN, rates=None,
+                 mode=PROFILE_MODE, max_files=PROFILE_SPOOL_MAX_FILES, max_concurrent=PROFILE_MAX_CONCURRENT):
+        self.directory = directory
+        self.admin_token = admin_token
+        self.rates = structured_log.parse_sample_rates(PROFILE_SAMPLE_RATES) if rates is None else rates
+        self.default_rate = self.rates.get("*", 0.0)
+        self.mode = mode if mode in PROFILERS else "sample"
+        self.max_files = max_files
+        self.max_concurrent = max_concurrent
+        self.enabled = bool(admin_token or self.rates)
+        self._active = 0
+        self._lock = threading.Lock()
+        self._stats = {"requested": 0, "sampled": 0, "rejected": 0, "skipped_busy": 0, "written": 0, "errors": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _reason(self):
+        """Why the current request should be profiled: "header", "sampled" or None."""
+        token = request.headers.get(HEADER)
+        if token:
+            if self.admin_token and hmac.compare_digest(token.encode(), self.admin_token.encode()):
+                return "header"
+            self._count("rejected")
+            log.warning("⚠️ Ignoring %s header with an invalid admin token", HEADER)
+        rule = request.url_rule
+        rate = self.rates.get(rule.rule if rule is not None else "unmatched", self.default_rate)
+        if rate > 0 and random.random() < rate:
+            with self._lock:
+                # Header requests are always profiled; sampled ones only while few others are
+                if self._active >= self.max_concurrent:
+                    self._stats["skipped_busy"] += 1
+                    return None
+            return "sampled"
+        return None
+
+    def start(self):
+        """Start profiling the current request if it asks for it or is sampled (before_request)."""
+        if not self.enabled:
+            return
+        reason = self._reason()
+        if reason is None:
+            return
+        mode = self.mode
+        if reason == "header":
+            mode = request.headers.get(MODE_HEADER, mode).lower()
+            mode = mode if mode in PROFILERS else self.mode
+        body = request.get_json(silent=True) if request.is_json else None
+        body = body if isinstance(body, dict) else {}
+        rule = request.url_rule
+        tags = {
+            "route": rule.rule if rule is not None else "unmatched",
+            "method": request.method,
+            "mode": request.args.get("mode") or body.get("mode"),
+            "num_players": request.args.get("players") or body.get("num_players") or body.get("players"),
+        }
+        collector = PROFILERS[mode]()
+        with self._lock:
+            self._active += 1
+            self._stats["requested" if reason == "header" else "sampled"] += 1
+        g.profile = {"collector": collector, "profiler": mode, "reason": reason, "tags": tags,
+                     "started": time.time(), "perf_started": time.perf_counter()}
+        collector.start()
+
+    def tag(self, **tags):
+        """Set tags on the current request's profile (no-op when it isn't profiled)."""
+        current = g.get("profile")
+        if current is not None:
+            current["tags"].update((key, value) for key, value in tags.items() if value is not None)
+
+    def _stop(self):
+        current = g.pop("profile", None)
+        if current is None:
+            return None
+        current["collector"].stop()
+        current["duration"] = time.perf_counter() - current["perf_started"]
+        with self._lock:
+            self._active -= 1
+        return current
+
+    def finish(self, response):
+        """Stop profiling and write the spool file (after_request)."""
+        current = self._stop()
+        if current is None:
+            return response
+        try:
+            response.headers[ID_HEADER] = self._write(current, response.status_code)
+            self._count("written")
+        except OSError as e:
+            self._count("errors")
+            log.warning("⚠️ Failed to write request profile: %s", e)
+        return response
+
+    def abort(self, exc=None):
+        """Stop a profile that after_request never finished (teardown_request)."""
+        self._stop()
+
+    def _write(self, current, status):
+        collector = current["collector"]
+        tags = current["tags"]
+        header = {
+            **{key: tags.get(key) for key in TAGS},
+            **{key: value for key, value in tags.items() if key not in TAGS},
+            "status": status,
+            "pid": os.getpid(),
+            "started": round(current["started"], 3),
+            "duration": round(current["duration"], 6),
+            "profiler": current["profiler"],
+            "reason": current["reason"],
+            "unit": collector.unit,
+            "interval": collector.interval,
+        }
+        name = "-".join([
+            str(int(current["started"] * 1000)), str(os.getpid()), _slug(tags["route"]),
+            _slug(tags.get("mode")), _slug(tags.get("num_players")), uuid.uuid4().hex[:8],
+        ]) + ".folded"
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        with open(f"{path}.tmp", "w") as f:
+            f.write(HEADER_PREFIX + json.dumps(header, default=str) + "\n")
+            for stack, weight in sorted(collector.counts.items()):
+                f.write(f"{stack} {weight}\n")
+        os.replace(f"{path}.tmp", path)
+        self._prune()
+        return name
+
+    def _prune(self):
+        # Names start with the start time in ms, so sorting them sorts by age
+        paths = sorted(glob.glob(os.path.join(self.directory, FILE_PATTERN)), key=os.path.basename)
+        for path in paths[:max(0, len(paths) - self.max_files)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {"enabled": self.enabled, "mode": self.mode, "active": self._active, **self._stats}
+
+
+def read_profile(path):
+    """Return (header, {stack: weight}) for a spool file."""
+    header, counts = {}, {}
+    with open(path) as f:
+        for line in f:
+            if line.startswith(HEADER_PREFIX):
+                header = json.loads(line[len(HEADER_PREFIX):])
+                continue
+            stack, _, weight = line.rstrip("\n").rpartition(" ")
+            if stack:
+                counts[stack] = counts.get(stack, 0) + float(weight)
+    return header, counts
+
+
+def _matches(header, route=None, mode=None, players=None, since=None):
+    if route is not None and header.get("route") != route:
+        return False
+    if mode is not None and str(header.get("mode") or "").lower() != mode.lower():
+        return False
+    if players is not None and str(header.get("num_players")) != str(players):
+        return False
+    return since is None or header.get("started", 0) >= since
+
+
+def iter_profiles(directory=PROFILE_SPOOL_DIR, **filters):
+    """Yield (path, header, counts) for every spool file matching the filters."""
+    for path in sorted(glob.glob(os.path.join(directory, FILE_PATTERN)), key=os.path.basename):
+        try:
+            header, counts = read_profile(path)
+        except (OSError, ValueError):
+            continue  # Pruned or unreadable
+        if _matches(header, **filters):
+            yield path, header, counts
+
+
+def merge_profiles(profiles, group_by=()):
+    """
+    Sum stacks across profiles, in microseconds.
+
+    Sampled weights are converted with each file's interval so sampled and
+    traced profiles can be merged. group_by tags (e.g. ("mode", "num_players"))
+    become root frames, one flamegraph tower per group.
+    """
+    merged = {}
+    for _, header, counts in profiles:
+        scale = header["interval"] * 1e6 if header.get("unit") == "samples" else 1.0
+        prefix = "".join(f"{tag}={header.get(tag)};" for tag in group_by)
+        for stack, weight in counts.items():
+            key = prefix + stack
+            merged[key] = merged.get(key, 0.0) + weight * scale
+    return {stack: round(weight) for stack, weight in merged.items() if round(weight) > 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List or merge spooled request profiles")
+    parser.add_argument("command", choices=["list", "merge"])
+    parser.add_argument("--dir", default=PROFILE_SPOOL_DIR, help="Spool directory")
+    parser.add_argument("--route", help="Only profiles of this route template, e.g. /puzzle/generate")
+    parser.add_argument("--mode", help="Only profiles of this puzzle mode")
+    parser.add_argument("--players", help="Only profiles with this num_players")
+    parser.add_argument("--since", type=float, help="Only profiles started in the last N seconds")
+    parser.add_argument("--group-by", default="", help="Comma-separated tags to add as root frames (merge)")
+    parser.add_argument("--output", "-o", help="Write merged stacks here instead of stdout (merge)")
+    args = parser.parse_args()
+
+    since = time.time() - args.since if args.since is not None else None
+    profiles = list(iter_profiles(args.dir, route=args.route, mode=args.mode, players=args.players, since=since))
+    if args.command == "list":
+        if not profiles:
+            print(f"No matching profiles in {args.dir}")
+        for path, header, counts in profiles:
+            print(f"{os.path.basename(path)}: {header.get('method')} {header.get('route')} "
+                  f"mode={header.get('mode')} num_players={header.get('num_players')} "
+                  f"status={header.get('status')} {header.get('duration', 0) * 1000:.1f}ms "
+                  f"{header.get('profiler')} ({len(counts)} stacks)")
+        return
+
+    group_by = [tag.strip() for tag in args.group_by.split(",") if tag.strip()]
+    merged = merge_profiles(profiles, group_by)
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for stack, weight in sorted(merged.items()):
+            out.write(f"{stack} {weight}\n")
+    finally:
+        if args.output:
+            out.close()
+    print(f"Merged {len(profiles)} profiles ({len(merged)} stacks, microseconds)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Background queue for practice/master progress increments.
+
+check_solution() used to bump a progress counter with a read-modify-write
+(read the profile, add one, update) on the response path: two concurrent
+first-try solves could both write the same value, and every solve paid a
+database round trip before responding.
+
+ProgressWriter queues the increment instead and answers immediately with an
+optimistic count (the profile's value plus this worker's queued increments).
+A background thread flushes the queue every PROGRESS_FLUSH_INTERVAL seconds,
+merging everything queued for a user into one call to the
+increment_puzzle_progress RPC (supabase/migrations/
+20261017_increment_puzzle_progress.sql), which adds the amounts and applies
+the 10-puzzle cap atomically in the database.
+
+A failed flush is re-queued up to PROGRESS_FLUSH_RETRIES times. The queue is
+flushed once more at interpreter exit, so a graceful worker restart does not
+drop increments; a crash can lose at most one interval's worth.
+
+Like the puzzle pool's refill thread, the flush thread is started lazily in
+every process. Set PROGRESS_WRITE_QUEUE_ENABLED=false to call the RPC on the
+request thread instead.
+"""
+
+import atexit
+import os
+import threading
+import time
+from collections import Counter
+
+import structured_log
+
+log = structured_log.get_logger(__name__)
+
+PROGRESS_WRITE_QUEUE_ENABLED = os.getenv("PROGRESS_WRITE_QUEUE_ENABLED", "true").lower() == "true"
+PROGRESS_FLUSH_INTERVAL = float(os.getenv("PROGRESS_FLUSH_INTERVAL", "0.5"))
+PROGRESS_FLUSH_RETRIES = int(os.getenv("PROGRESS_FLUSH_RETRIES", "3"))
+PROGRESS_CAP = 10
+
+PROGRESS_COLUMNS = {
+    "easy_puzzles_solved", "medium_puzzles_solved", "hard_puzzles_solved", "extreme_puzzles_solved",
+    "master_easy_puzzles_solved", "master_medium_puzzles_solved",
+    "master_hard_puzzles_solved", "master_extreme_puzzles_solved",
+}
+
+
+class ProgressWriter:
+    """Per-process queue of progress increments, flushed per user through one RPC call."""
+
+    def __init__(self, rpc, on_flushed=None, interval=PROGRESS_FLUSH_INTERVAL,
+                 retries=PROGRESS_FLUSH_RETRIES, enabled=PROGRESS_WRITE_QUEUE_ENABLED):
+        """
+        Args:
+            rpc: Callable (user_id, {column: amount}) that applies the increments
+            on_flushed: Called with the user_id after their increments are written
+                (used to invalidate the profile cache)
+        """
+        self.rpc = rpc
+        self.on_flushed = on_flushed
+        self.interval = interval
+        self.retries = retries
+        self.enabled = enabled
+        self._pending = {}   # user_id -> Counter(column -> amount)
+        self._in_flight = {}  # user_id -> increments being written by the current flush
+        self._attempts = {}  # user_id -> failed flushes so far
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._worker_pid = None
+        self._stats = {"queued": 0, "flushes": 0, "rpc_calls": 0, "coalesced": 0, "retries": 0, "dropped": 0}
+
+    def pending(self, user_id, column):
+        """Increments queued (or being written) for a user's column."""
+        with self._lock:
+            return self._pending.get(user_id, {}).get(column, 0) + self._in_flight.get(user_id, {}).get(column, 0)
+
+    def optimistic_count(self, profile, column):
+        """The count a user will have once their queued increments land (capped)."""
+        return min(PROGRESS_CAP, (profile.get(column) or 0) + self.pending(profile.get("user_id"), column))
+
+    def increment(self, user_id, column, amount=1):
+        """Queue an increment (or apply it now when the queue is disabled)."""
+        if column not in PROGRESS_COLUMNS:
+            raise ValueError(f"Unknown progress column: {column}")
+        if not self.enabled:
+            self._write(user_id, {column: amount})
+            return
+        with self._lock:
+            counts = self._pending.setdefault(user_id, Counter())
+            if counts:
+                self._stats["coalesced"] += 1
+            counts[column] += amount
+            self._stats["queued"] += 1
+        self._ensure_worker()
+
+    def _write(self, user_id, increments):
+        with self._lock:
+            self._stats["rpc_calls"] += 1
+        self.rpc(user_id, dict(increments))
+        if self.on_flushed:
+            self.on_flushed(user_id)
+
+    def flush(self):
+        """Write everything queued so far, one RPC call per user."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._in_flight = dict(batch)
+                if batch:
+                    self._stats["flushes"] += 1
+            for user_id, increments in batch.items():
+                try:
+                    self._write(user_id, increments)
+                    with self._lock:
+                        self._attempts.pop(user_id, None)
+                except Exception as e:
+                    self._requeue(user_id, increments, e)
+                finally:
+                    with self._lock:
+                        self._in_flight.pop(user_id, None)
+
+    def _requeue(self, user_id, increments, error):
+        with self._lock:
+            attempts = self._attempts.get(user_id, 0) + 1
+            if attempts > self.retries:
+                self._attempts.pop(user_id, None)
+                self._stats["dropped"] += sum(increments.values())
+                log.error("❌ Dropping progress increments for %s after %s attempts: %s", user_id, attempts, error)
+                return
+            self._attempts[user_id] = attempts
+            self._pending.setdefault(user_id, Counter()).update(increments)
+            self._stats["retries"] += 1
+        log.warning("⚠️ Progress flush failed for %s (attempt %s), will retry: %s", user_id, attempts, error)
+
+    def _ensure_worker(self):
+        """Start the flush thread once per process."""
+        pid = os.getpid()
+        if self._worker_pid == pid:
+            return
+        with self._lock:
+            if self._worker_pid == pid:
+                return
+            self._worker_pid = pid
+        thread = threading.Thread(target=self._flush_loop, name="progress-writer", daemon=True)
+        thread.start()
+        atexit.register(self.flush)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "interval": self.interval,
+                "pending_users": len(self._pending),
+                "pending_increments": sum(sum(c.values()) for c in self._pending.values()),
+                **self._stats,
+            }
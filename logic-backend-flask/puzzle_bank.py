@@ -0,0 +1,228 @@
+"""
+Offline puzzle bank: compact fixed-width binary puzzle files served via mmap.
+
+Practice puzzles for 3-8 players can be generated ahead of time with
+build_puzzle_bank.py. Each (mode, num_players) gets its own file:
+
+    header (16 bytes): magic "MRPB", version, mode code, num_players,
+                       num_truth_tellers, record count (uint32), padding
+    records:           1 byte solution bitmask (bit i = i-th player is a
+                       Truth-Teller) followed by 4 bytes per statement
+
+Each statement is encoded as
+    byte 0:    opcode (low 4 bits) | claim bits (bits 4-6)
+    bytes 1-3: operand player indices; GROUP stores a member bitmask in
+               byte 1 and the 'exactly' count in byte 2
+
+Files are opened read-only and memory-mapped, so all gunicorn workers share
+the same pages and serving a puzzle is a random index plus a decode, with no
+solver call.
+"""
+
+import mmap
+import os
+import random
+import struct
+
+import statement_compiler
+import structured_log
+
+log = structured_log.get_logger(__name__)
+
+PUZZLE_BANK_DIR = os.getenv("PUZZLE_BANK_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "puzzle_bank"))
+
+MAGIC = b"MRPB"
+VERSION = 2  # v2: every banked puzzle has exactly one solution
+HEADER = struct.Struct("<4sBBBBI4x")
+STATEMENT_SIZE = 4
+MIN_PLAYERS = 3
+MAX_PLAYERS = 8  # GROUP members are stored as an 8-bit mask
+
+MODE_CODES = {"easy": 0, "medium": 1, "hard": 2, "extreme": 3}
+OPCODES = {"DIRECT": 1, "AND": 2, "OR": 3, "IF": 4, "XOR": 5, "IFF": 6, "NESTED_IF": 7, "GROUP": 8}
+OPCODE_MODES = {code: mode for mode, code in OPCODES.items()}
+
+# Field names for the (operands, claims) of each statement mode
+OPERAND_FIELDS = {
+    "DIRECT": (("target",), ("claim",)),
+    "AND": (("t1", "t2"), ("c1", "c2")),
+    "OR": (("t1", "t2"), ("c1", "c2")),
+    "XOR": (("t1", "t2"), ("c1", "c2")),
+    "IFF": (("t1", "t2"), ("c1", "c2")),
+    "IF": (("cond", "result"), ("cond_val", "result_val")),
+    "NESTED_IF": (("outer_cond", "inner_cond", "inner_result"), ("outer_val", "inner_val", "inner_result_val")),
+}
+
+
+def bank_filename(mode, num_players):
+    return f"{mode.lower()}_{num_players}.bin"
+
+
+def record_size(num_players):
+    return 1 + STATEMENT_SIZE * num_players
+
+
+def player_labels(num_players):
+    return [chr(ord('A') + i) for i in range(num_players)]
+
+
+def encode_statement(st, index):
+    """Encode one full statement dict into 4 bytes."""
+    mode = st.get("mode", "DIRECT")
+    if mode == "GROUP":
+        members = 0
+        for m in st["members"]:
+            members |= 1 << index[m]
+        return bytes([OPCODES["GROUP"], members, st["exactly"], 0])
+
+    operand_fields, claim_fields = OPERAND_FIELDS[mode]
+    claim_bits = 0
+    for i, field in enumerate(claim_fields):
+        # Easy mode statements carry 'truth_value' instead of 'claim'
+        value = st.get(field, st.get("truth_value")) if field == "claim" else st[field]
+        claim_bits |= bool(value) << i
+    operands = [index[st[field]] for field in operand_fields]
+    operands += [0] * (3 - len(operands))
+    return bytes([OPCODES[mode] | claim_bits << 4] + operands)
+
+
+def decode_statement(raw, people):
+    """Decode 4 bytes back into a full statement dict."""
+    opcode = raw[0] & 0x0F
+    mode = OPCODE_MODES[opcode]
+    if mode == "GROUP":
+        members = [p for i, p in enumerate(people) if raw[1] >> i & 1]
+        return {"mode": "GROUP", "members": members, "exactly": raw[2]}
+
+    operand_fields, claim_fields = OPERAND_FIELDS[mode]
+    st = {"mode": mode}
+    for i, field in enumerate(operand_fields):
+        st[field] = people[raw[1 + i]]
+    for i, field in enumerate(claim_fields):
+        st[field] = bool(raw[0] >> (4 + i) & 1)
+    return st
+
+
+def encode_puzzle(puzzle):
+    """Encode a generated puzzle dict into one fixed-width record."""
+    people = list(puzzle["solution"].keys())
+    index = {p: i for i, p in enumerate(people)}
+    statements = puzzle.get("full_statement_data") or puzzle["statement_data"]
+
+    solution_bits = 0
+    for p, is_truth in puzzle["solution"].items():
+        solution_bits |= bool(is_truth) << index[p]
+
+    record = bytearray([solution_bits])
+    for p in people:
+        record += encode_statement(statements[p], index)
+    return bytes(record)
+
+
+def statement_text(st):
+    """Render a full statement dict with the same wording as the generators."""
+    return statement_compiler.statement_text(st)
+
+
+def simple_statement(st, people):
+    """Convert a full statement to the UI-compatible {target, truth_value} format."""
+    if st["mode"] == "DIRECT":
+        return {"target": st["target"], "truth_value": st["claim"]}
+    if "t1" in st:
+        return {"target": st["t1"], "truth_value": st["c1"]}
+    if "result" in st:
+        return {"target": st["result"], "truth_value": st["result_val"]}
+    return {"target": people[0], "truth_value": True}
+
+
+def decode_statements(record, people):
+    """Decode every statement of a record into full statement dicts."""
+    full = {}
+    for i, p in enumerate(people):
+        offset = 1 + STATEMENT_SIZE * i
+        full[p] = decode_statement(record[offset:offset + STATEMENT_SIZE], people)
+    return full
+
+
+def decode_puzzle(record, mode, num_players, num_truth_tellers, puzzle_index):
+    """Decode a record into the same dict shape the mode generators return."""
+    people = player_labels(num_players)
+    full = decode_statements(record, people)
+
+    puzzle = {
+        "puzzle_id": f"{mode}_{num_players}_bank{puzzle_index}",
+        "num_players": num_players,
+        "num_truth_tellers": num_truth_tellers,
+        "statements": {p: statement_text(full[p]) for p in people},
+        "statement_data": {p: simple_statement(full[p], people) for p in people},
+        "solution": {p: bool(record[0] >> i & 1) for i, p in enumerate(people)},
+    }
+    if mode != "easy":
+        # Easy puzzles only ever expose the simple format
+        puzzle["full_statement_data"] = full
+    return puzzle
+
+
+class BankFile:
+    """A single memory-mapped bank file for one (mode, num_players)."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, mode_code, num_players, num_truth_tellers, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} puzzle bank file")
+        self.mode = {code: mode for mode, code in MODE_CODES.items()}[mode_code]
+        self.num_players = num_players
+        self.num_truth_tellers = num_truth_tellers
+        self.record_size = record_size(num_players)
+        # Trust the file size over the header if a build was cut short
+        self.count = min(count, (len(self._mmap) - HEADER.size) // self.record_size)
+
+    def record(self, i):
+        offset = HEADER.size + i * self.record_size
+        return self._mmap[offset:offset + self.record_size]
+
+    def puzzle(self, i):
+        return decode_puzzle(self.record(i), self.mode, self.num_players, self.num_truth_tellers, i)
+
+    def random_puzzle(self):
+        return self.puzzle(random.randrange(self.count))
+
+
+class PuzzleBank:
+    """All bank files in a directory, loaded lazily on first use."""
+
+    def __init__(self, directory=PUZZLE_BANK_DIR):
+        self.directory = directory
+        self._files = None
+
+    def _load(self):
+        files = {}
+        if os.path.isdir(self.directory):
+            for name in sorted(os.listdir(self.directory)):
+                if not name.endswith(".bin"):
+                    continue
+                try:
+                    bank_file = BankFile(os.path.join(self.directory, name))
+                except (OSError, ValueError, struct.error) as e:
+                    log.warning("⚠️ Skipping puzzle bank file %s: %s", name, e)
+                    continue
+                if bank_file.count:
+                    files[(bank_file.mode, bank_file.num_players)] = bank_file
+        self._files = files
+
+    def get(self, mode, num_players):
+        """Return a random banked puzzle, or None if the bank has none for this size."""
+        if self._files is None:
+            self._load()
+        try:
+            bank_file = self._files.get((mode.lower(), int(num_players)))
+        except (TypeError, ValueError):
+            return None
+        return bank_file.random_puzzle() if bank_file else None
+
+    def stats(self):
+        if self._files is None:
+            self._load()
+        return {f"{mode}:{players}": f.count for (mode, players), f in sorted(self._files.items())}
@@ -0,0 +1,169 @@
+"""
+In-process pool of pre-generated puzzles.
+
+Puzzles are kept in a queue per (mode, num_players). A background thread tops
+every queue up to the high watermark whenever one drops below the low
+watermark, so request handlers can usually pop a ready puzzle instead of
+running the generator (and its Z3 retries) on the request thread. When a
+queue is empty the pool falls back to generating synchronously. Only the
+combinations passed to register() are pooled; any other request is
+generated synchronously, so clients cannot make the pool keep puzzles of
+arbitrary sizes.
+
+Each gunicorn worker gets its own pool: the refill thread is started lazily
+on first use in every process, because threads started before the fork (with
+preload_app) do not survive into the workers.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+import structured_log
+
+log = structured_log.get_logger(__name__)
+
+PUZZLE_POOL_ENABLED = os.getenv("PUZZLE_POOL_ENABLED", "true").lower() == "true"
+PUZZLE_POOL_LOW_WATERMARK = int(os.getenv("PUZZLE_POOL_LOW_WATERMARK", "2"))
+PUZZLE_POOL_HIGH_WATERMARK = int(os.getenv("PUZZLE_POOL_HIGH_WATERMARK", "6"))
+
+
+class PuzzlePool:
+    """Per-process pool of ready puzzles keyed by (mode, num_players)."""
+
+    def __init__(self, generate, low_watermark=PUZZLE_POOL_LOW_WATERMARK,
+                 high_watermark=PUZZLE_POOL_HIGH_WATERMARK, enabled=PUZZLE_POOL_ENABLED):
+        """
+        Args:
+            generate: Callable (mode, num_players) -> puzzle dict
+            low_watermark: Refill a queue once it holds fewer puzzles than this
+            high_watermark: Refill a queue up to this many puzzles
+            enabled: When False every request is generated synchronously
+        """
+        self.generate = generate
+        self.low_watermark = max(0, low_watermark)
+        self.high_watermark = max(self.low_watermark, high_watermark)
+        self.enabled = enabled and self.high_watermark > 0
+
+        self._queues = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._filling = set()
+        self._worker_pid = None
+        self._stats = {"hits": 0, "misses": 0, "unpooled": 0, "refills": 0, "refill_errors": 0}
+
+    @staticmethod
+    def _key(mode, num_players):
+        return (mode.lower(), int(num_players))
+
+    def register(self, mode, num_players):
+        """
+        Keep puzzles for a (mode, num_players) combination from the start.
+
+        Safe to call at import time: nothing is generated until the refill
+        thread starts on the first get() in each process.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._queues.setdefault(self._key(mode, num_players), deque())
+        self._wakeup.set()
+
+    def get(self, mode, num_players):
+        """
+        Pop a ready puzzle, or generate one synchronously if none is available
+        or the combination isn't registered.
+
+        Generation errors from the synchronous fallback propagate to the caller
+        exactly as if the generator had been called directly.
+        """
+        if not self.enabled:
+            return self.generate(mode, num_players)
+
+        key = self._key(mode, num_players)
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue is None:
+                self._stats["unpooled"] += 1
+            else:
+                puzzle = queue.popleft() if queue else None
+                self._stats["hits" if puzzle is not None else "misses"] += 1
+                needs_refill = len(queue) < self.low_watermark
+        if queue is None:
+            return self.generate(mode, num_players)
+
+        self._ensure_worker()
+        if needs_refill:
+            self._wakeup.set()
+
+        if puzzle is None:
+            puzzle = self.generate(mode, num_players)
+        return puzzle
+
+    def stats(self):
+        """Return hit/miss/refill counters and the current queue sizes."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "enabled": self.enabled,
+                "low_watermark": self.low_watermark,
+                "high_watermark": self.high_watermark,
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else None,
+                "sizes": {f"{mode}:{players}": len(q) for (mode, players), q in sorted(self._queues.items())},
+            }
+
+    def _ensure_worker(self):
+        """Start the refill thread once per process."""
+        pid = os.getpid()
+        if self._worker_pid == pid:
+            return
+        with self._lock:
+            if self._worker_pid == pid:
+                return
+            self._worker_pid = pid
+        thread = threading.Thread(target=self._refill_loop, name="puzzle-pool-refill", daemon=True)
+        thread.start()
+
+    def _next_key_to_fill(self):
+        """
+        Pick the emptiest queue that needs puzzles, or None if all are full.
+
+        A queue starts refilling once it drops below the low watermark and
+        keeps refilling until it reaches the high watermark.
+        """
+        with self._lock:
+            for key, queue in self._queues.items():
+                if len(queue) < self.low_watermark:
+                    self._filling.add(key)
+                elif len(queue) >= self.high_watermark:
+                    self._filling.discard(key)
+            if not self._filling:
+                return None
+            return min(self._filling, key=lambda k: len(self._queues[k]))
+
+    def _refill_loop(self):
+        while True:
+            key = self._next_key_to_fill()
+            if key is None:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            mode, num_players = key
+            try:
+                puzzle = self.generate(mode, num_players)
+            except Exception as e:
+                log.warning("⚠️ Puzzle pool refill failed for %s (%s players): %s", mode, num_players, e)
+                with self._lock:
+                    self._stats["refill_errors"] += 1
+                    # Stop refilling this key until it is requested again, so a
+                    # failing generator cannot keep the thread busy forever
+                    self._filling.discard(key)
+                time.sleep(1.0)
+                continue
+
+            with self._lock:
+                self._queues[key].append(puzzle)
+                self._stats["refills"] += 1
@@ -0,0 +1,115 @@
+"""
+Check and solve compiled puzzles with the fastest available engine.
+
+Puzzles up to NATIVE_SOLVER_MAX_PLAYERS use the native truth-table mask from
+statement_compiler; larger ones use the compiler's Z3 constraints. Callers
+get the same answers either way, so the mode modules, the generators and
+app.py all go through these helpers instead of building solvers themselves.
+Each solve and check reports its engine, time and Z3 statistics to
+solver_telemetry.
+"""
+
+import itertools
+import time
+
+from z3 import Or, Solver, sat
+
+import solver_telemetry
+import statement_compiler
+import truth_table
+
+
+def z3_solutions(solver, z3_vars, limit=2):
+    """
+    Find up to `limit` models of a Z3 solver using blocking clauses.
+
+    The solver's constraints are left unchanged: blocking clauses are added
+    inside a push/pop scope, and the solver is re-checked afterwards so
+    callers can still read solver.model().
+
+    Returns:
+        list: Solutions as {player: bool} dicts
+    """
+    solutions = []
+    solver.push()
+    try:
+        while len(solutions) < limit and solver.check() == sat:
+            model = solver.model()
+            values = {p: model.eval(v, model_completion=True) for p, v in z3_vars.items()}
+            solutions.append({p: bool(value) for p, value in values.items()})
+            solver.add(Or([v != values[p] for p, v in z3_vars.items()]))
+    finally:
+        solver.pop()
+    if solutions:
+        solver.check()
+    return solutions
+
+
+def count_z3_models(solver, variables, limit=2):
+    """Count models of a Z3 solver up to `limit` using blocking clauses."""
+    return len(z3_solutions(solver, {str(v): v for v in variables}, limit))
+
+
+def _z3_solver(compiled):
+    solver = Solver()
+    solver.add(compiled.z3_constraints())
+    return solver
+
+
+def find_solutions(compiled, limit=2):
+    """Find up to `limit` solutions of a compiled puzzle as {player: bool} dicts."""
+    started = time.perf_counter()
+    if truth_table.should_use_native(len(compiled.people)):
+        assignments = itertools.islice(truth_table.iter_assignments(compiled.mask), limit)
+        solutions = [truth_table.decode_assignment(a, compiled.people) for a in assignments]
+        solver_telemetry.solver_call("native", time.perf_counter() - started)
+        return solutions
+    solver = _z3_solver(compiled)
+    solutions = z3_solutions(solver, compiled.z3_vars(), limit)
+    solver_telemetry.solver_call("z3", time.perf_counter() - started, solver)
+    return solutions
+
+
+def solve(compiled):
+    """Return one solution as a {player: bool} dict, or None if unsolvable."""
+    solutions = find_solutions(compiled, limit=1)
+    return solutions[0] if solutions else None
+
+
+def check_guess(compiled, guess):
+    """
+    Check whether a (possibly partial) guess is consistent with the puzzle.
+
+    The guess is valid if at least one solution agrees with every player it
+    assigns. Raises UnsupportedStatement for unknown players or non-boolean
+    values.
+    """
+    for person, value in guess.items():
+        if person not in compiled.index:
+            raise statement_compiler.UnsupportedStatement(f"Unknown player '{person}'")
+        if not isinstance(value, bool):
+            raise statement_compiler.UnsupportedStatement(f"Expected a boolean guess for '{person}', got {value!r}")
+
+    started = time.perf_counter()
+    if truth_table.should_use_native(len(compiled.people)):
+        mask = compiled.mask
+        masks, full = statement_compiler.player_masks(len(compiled.people))
+        for person, value in guess.items():
+            var = masks[compiled.index[person]]
+            mask &= var if value else full ^ var
+        solver_telemetry.solver_call("native", time.perf_counter() - started)
+        return mask != 0
+
+    solver = _z3_solver(compiled)
+    z3_vars = compiled.z3_vars()
+    for person, value in guess.items():
+        solver.add(z3_vars[person] == value)
+    valid = solver.check() == sat
+    solver_telemetry.solver_call("z3", time.perf_counter() - started, solver)
+    return valid
+
+
+def check_puzzle(statements, num_truth_tellers, guess, people=None, simple=False):
+    """Compile a puzzle and check a guess against it (see check_guess)."""
+    compiled = statement_compiler.compile_puzzle(statements, num_truth_tellers, people, simple)
+    return check_guess(compiled, guess)
@@ -0,0 +1,211 @@
+"""
+Server-side store of generated puzzles, keyed by puzzle_id.
+
+Every puzzle handed out by /puzzle/generate is stored with its solution set,
+precomputed once with the native truth-table engine. /puzzle/check and
+/puzzle/solution can then be called with just the puzzle_id and the guess:
+a full guess is a set-membership test on the stored assignments, and ranked
+validation uses the server's copy of the puzzle instead of the constraints
+the client sent back. Ranked checks need a complete guess, and
+/puzzle/solution does not reveal ranked solutions by puzzle_id.
+
+Entries expire after PUZZLE_STORE_TTL seconds. Each worker keeps an
+in-process LRU; set PUZZLE_STORE_REDIS_URL (and install redis) to share
+entries between gunicorn workers and instances. Requests for puzzles that
+are not in the store (expired, or generated before the store existed) fall
+back to the puzzle data sent by the client.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import structured_log
+import truth_table
+
+PUZZLE_STORE_TTL = int(os.getenv("PUZZLE_STORE_TTL", "7200"))
+PUZZLE_STORE_MAX_ENTRIES = int(os.getenv("PUZZLE_STORE_MAX_ENTRIES", "20000"))
+PUZZLE_STORE_REDIS_URL = os.getenv("PUZZLE_STORE_REDIS_URL")
+PUZZLE_STORE_KEY_PREFIX = "mindrank:puzzle:"
+
+log = structured_log.get_logger(__name__)
+
+
+class MemoryBackend:
+    """Per-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries=PUZZLE_STORE_MAX_ENTRIES):
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Shared backend storing entries as JSON with a Redis expiry."""
+
+    def __init__(self, url, prefix=PUZZLE_STORE_KEY_PREFIX):
+        import redis  # Optional dependency, only needed for a shared store
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self._client.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    def set(self, key, value, ttl):
+        self._client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    def add(self, key, value, ttl):
+        """Set the key only if it does not exist yet; returns whether it was set."""
+        return bool(self._client.set(self.prefix + key, json.dumps(value), ex=ttl, nx=True))
+
+    def delete(self, key):
+        self._client.delete(self.prefix + key)
+
+
+def make_shared_backend(url=PUZZLE_STORE_REDIS_URL, prefix=PUZZLE_STORE_KEY_PREFIX):
+    """Create the configured shared backend, or None to keep the store per-process."""
+    if not url:
+        return None
+    try:
+        return RedisBackend(url, prefix)
+    except ImportError:
+        log.warning("⚠️ A Redis URL is set for %s but redis is not installed - using per-worker storage", prefix)
+        return None
+
+
+class PuzzleStore:
+    """Stored puzzles with their precomputed solutions, local LRU in front of an optional shared backend."""
+
+    def __init__(self, shared=None, ttl=PUZZLE_STORE_TTL, max_entries=PUZZLE_STORE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.local = MemoryBackend(max_entries)
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._stats = {"stored": 0, "hits": 0, "misses": 0, "shared_errors": 0}
+
+    def put(self, puzzle, mode, user_id=None):
+        """
+        Store a generated puzzle and give it a fresh, unguessable puzzle_id.
+
+        The puzzle dict is updated in place. Puzzles the native engine cannot
+        solve are left unstored and keep their original puzzle_id. The entry
+        records who it was issued to and when, so ranked checks take the
+        solve time from the server's clock.
+
+        Returns:
+            str or None: The new puzzle_id, or None if the puzzle was not stored
+        """
+        statements = puzzle.get("full_statement_data") or puzzle.get("statement_data") or {}
+        people = list(statements.keys())
+        try:
+            mask, _, _ = truth_table.solution_mask(statements, puzzle["num_truth_tellers"], people)
+        except truth_table.UnsupportedStatement as e:
+            log.warning("⚠️ Not storing puzzle %s: %s", puzzle.get("puzzle_id"), e)
+            return None
+
+        puzzle_id = f"{mode.lower()}_{len(people)}_{uuid.uuid4().hex[:16]}"
+        entry = {
+            "mode": mode.lower(),
+            "people": people,
+            "num_truth_tellers": puzzle["num_truth_tellers"],
+            "statements": statements,
+            "solutions": list(truth_table.iter_assignments(mask)),
+            "user_id": user_id,
+            "issued_at": time.time(),
+        }
+        self.local.set(puzzle_id, entry, self.ttl)
+        if self.shared is not None:
+            try:
+                self.shared.set(puzzle_id, entry, self.ttl)
+            except Exception as e:
+                log.warning("⚠️ Failed to write puzzle %s to shared store: %s", puzzle_id, e)
+                self._count("shared_errors")
+        self._count("stored")
+        puzzle["puzzle_id"] = puzzle_id
+        return puzzle_id
+
+    def get(self, puzzle_id):
+        """Return the stored entry for a puzzle_id, or None if unknown or expired."""
+        if not puzzle_id or not isinstance(puzzle_id, str):
+            return None
+        entry = self.local.get(puzzle_id)
+        if entry is None and self.shared is not None:
+            try:
+                entry = self.shared.get(puzzle_id)
+            except Exception as e:
+                log.warning("⚠️ Failed to read puzzle %s from shared store: %s", puzzle_id, e)
+                self._count("shared_errors")
+            if entry is not None:
+                self.local.set(puzzle_id, entry, self.ttl)
+        self._count("hits" if entry is not None else "misses")
+        return entry
+
+    @staticmethod
+    def check(entry, guess, complete=False):
+        """
+        Check a guess against a stored puzzle.
+
+        Same semantics as the check functions: the guess is valid if at least
+        one solution agrees with every player it assigns. Players without a
+        value (None) and unknown players are ignored. With complete=True (ranked
+        checks, like puzzle_token.check) every player needs a boolean value.
+        """
+        index = {p: i for i, p in enumerate(entry["people"])}
+        if complete and not all(isinstance(guess.get(p), bool) for p in index):
+            return False
+        assigned = {p: v for p, v in guess.items() if p in index and v is not None}
+        assignment = 0
+        care = 0
+        for person, value in assigned.items():
+            care |= 1 << index[person]
+            if value:
+                assignment |= 1 << index[person]
+        if care == (1 << len(index)) - 1:
+            return assignment in entry["solutions"]
+        return any(solution & care == assignment for solution in entry["solutions"])
+
+    @staticmethod
+    def solution(entry):
+        """Return the first stored solution as a {player: bool} dict, or None if unsolvable."""
+        if not entry["solutions"]:
+            return None
+        return truth_table.decode_assignment(entry["solutions"][0], entry["people"])
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                "local_entries": len(self.local),
+                "shared": type(self.shared).__name__ if self.shared is not None else None,
+                "ttl": self.ttl,
+            }
@@ -0,0 +1,157 @@
+"""
+Stateless signed puzzle tokens.
+
+/puzzle/generate returns a compact HS256 token alongside each puzzle. It
+carries everything /puzzle/check needs to grade a guess without storage,
+DB reads or solver work:
+
+    m    mode the puzzle was generated for ("ranked" for ranked puzzles)
+    n    number of players
+    p    player labels in order, e.g. "ABCDE"
+    k    number of Truth-Tellers
+    sub  user id the puzzle was issued to (null for anonymous practice)
+    iat  issue time; ranked checks derive time_taken from it
+    exp  expiry (iat + PUZZLE_TOKEN_TTL)
+    r    random nonce
+    i    puzzle_id in the puzzle store, when the puzzle was stored there
+    s    keyed hashes of every solution
+    aud  PUZZLE_TOKEN_AUDIENCE, so a puzzle token is never accepted as a
+         login token (see is_puzzle_token) even when both share a secret
+
+Solutions are hashed with an HMAC over the nonce and the assignment, so the
+token does not reveal the answer even though its payload is readable: with
+at most 2^8 assignments an unkeyed hash could simply be brute forced.
+
+Tokens are signed with PUZZLE_TOKEN_SECRET, falling back to the Supabase
+JWT secret. Every gunicorn worker must share the secret.
+"""
+
+import hashlib
+import hmac
+import os
+import secrets
+import time
+
+import jwt
+
+import structured_log
+import truth_table
+
+PUZZLE_TOKEN_TTL = int(os.getenv("PUZZLE_TOKEN_TTL", "7200"))
+PUZZLE_TOKEN_HASH_LENGTH = 16  # hex characters kept from each solution hash
+PUZZLE_TOKEN_AUDIENCE = "mindrank:puzzle"
+
+log = structured_log.get_logger(__name__)
+
+
+class InvalidPuzzleToken(ValueError):
+    """Raised when a puzzle token is malformed, tampered with or expired."""
+
+
+def _load_secret():
+    secret = os.getenv("PUZZLE_TOKEN_SECRET") or os.getenv("SUPABASE_JWT_SECRET")
+    if secret:
+        return secret
+    log.warning("⚠️ PUZZLE_TOKEN_SECRET is not set - puzzle tokens are only valid in this process")
+    return secrets.token_hex(32)
+
+
+PUZZLE_TOKEN_SECRET = _load_secret()
+
+
+def _solution_hash(nonce, assignment, secret):
+    digest = hmac.new(secret.encode(), f"{nonce}:{assignment}".encode(), hashlib.sha256).hexdigest()
+    return digest[:PUZZLE_TOKEN_HASH_LENGTH]
+
+
+def issue(puzzle, mode, user_id=None, secret=None, now=None, puzzle_id=None):
+    """
+    Create a signed token for a generated puzzle.
+
+    Args:
+        puzzle_id: The puzzle's id in the puzzle store, if it was stored
+
+    Returns:
+        str or None: The token, or None if the native engine cannot solve the puzzle
+    """
+    secret = secret or PUZZLE_TOKEN_SECRET
+    statements = puzzle.get("full_statement_data") or puzzle.get("statement_data") or {}
+    people = list(statements.keys())
+    try:
+        mask, _, _ = truth_table.solution_mask(statements, puzzle["num_truth_tellers"], people)
+    except truth_table.UnsupportedStatement as e:
+        log.warning("⚠️ Not issuing a token for puzzle %s: %s", puzzle.get("puzzle_id"), e)
+        return None
+
+    issued_at = int(now if now is not None else time.time())
+    nonce = secrets.token_hex(8)
+    claims = {
+        "m": mode.lower(),
+        "n": len(people),
+        "p": "".join(people) if all(len(p) == 1 for p in people) else people,
+        "k": puzzle["num_truth_tellers"],
+        "sub": user_id,
+        "iat": issued_at,
+        "exp": issued_at + PUZZLE_TOKEN_TTL,
+        "r": nonce,
+        "aud": PUZZLE_TOKEN_AUDIENCE,
+        "s": [_solution_hash(nonce, a, secret) for a in truth_table.iter_assignments(mask)],
+    }
+    if puzzle_id:
+        claims["i"] = puzzle_id
+    return jwt.encode(claims, secret, algorithm="HS256")
+
+
+def verify(token, secret=None):
+    """
+    Verify a token's signature and expiry.
+
+    Returns:
+        dict: The token claims, with "p" normalised to a list of player labels
+
+    Raises:
+        InvalidPuzzleToken: If the token cannot be trusted
+    """
+    if not token or not isinstance(token, str):
+        raise InvalidPuzzleToken("Missing puzzle token")
+    try:
+        claims = jwt.decode(token, secret or PUZZLE_TOKEN_SECRET, algorithms=["HS256"],
+                            audience=PUZZLE_TOKEN_AUDIENCE, options={"require": ["exp", "iat", "aud"]})
+    except jwt.ExpiredSignatureError:
+        raise InvalidPuzzleToken("Puzzle token has expired")
+    except jwt.InvalidTokenError as e:
+        raise InvalidPuzzleToken(f"Invalid puzzle token: {e}")
+    claims["p"] = list(claims.get("p") or [])
+    return claims
+
+
+def is_puzzle_token(token):
+    """Whether a token claims to be a puzzle token (unverified; for refusing it as a login token)."""
+    try:
+        audience = jwt.decode(token, options={"verify_signature": False}).get("aud")
+    except jwt.InvalidTokenError:
+        return False
+    return audience == PUZZLE_TOKEN_AUDIENCE or (isinstance(audience, list) and PUZZLE_TOKEN_AUDIENCE in audience)
+
+
+def check(claims, guess, secret=None):
+    """
+    Check a guess against a verified token.
+
+    Only complete guesses can be hashed, so a guess that leaves any player
+    unassigned is invalid.
+    """
+    assignment = 0
+    for i, person in enumerate(claims["p"]):
+        value = guess.get(person)
+        if not isinstance(value, bool):
+            return False
+        if value:
+            assignment |= 1 << i
+    expected = _solution_hash(claims["r"], assignment, secret or PUZZLE_TOKEN_SECRET)
+    return any(hmac.compare_digest(expected, h) for h in claims["s"])
+
+
+def elapsed_seconds(claims, now=None):
+    """Seconds since the token was issued, never negative."""
+    return max(0, (now if now is not None else time.time()) - claims["iat"])
@@ -0,0 +1,139 @@
+"""
+Single-flight coalescing of identical concurrent reads.
+
+When a leaderboard link goes viral, dozens of identical /leaderboard
+requests arrive in the same few milliseconds and each runs the same query.
+SingleFlight lets the first caller for a key run the call while every
+concurrent caller with the same key waits for, and shares, its result (or
+its exception). Optionally the result is also reused for `ttl` seconds after
+the call finishes, which absorbs bursts that arrive just after it.
+
+    flights = SingleFlight()
+
+    @app.route("/leaderboard")
+    @flights.route(ttl=1.0)
+    def get_leaderboard(): ...
+
+Routes are keyed by endpoint and query string ("query shape"), never by
+the Authorization header, so only use route() on responses that are the same
+for every caller, and put it above the auth decorators so coalesced
+requests skip the token check and profile read as well. Each waiting request
+gets its own copy of the shared response; 5xx responses are shared with the
+requests already waiting but not reused afterwards.
+
+State is per process, like the other caches here.
+"""
+
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import make_response, request
+
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Per-process group of in-flight calls keyed by an arbitrary hashable key."""
+
+    def __init__(self, enabled=SINGLE_FLIGHT_ENABLED):
+        self.enabled = enabled
+        self._calls = {}
+        self._recent = {}  # key -> (expires_at, result)
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "executed": 0, "coalesced": 0, "reused": 0, "errors": 0}
+
+    def do(self, key, func, ttl=0, reusable=lambda result: True):
+        """
+        Run func() once for all concurrent callers with the same key.
+
+        Args:
+            ttl: Seconds to keep serving the result after the call finishes
+            reusable: Predicate deciding whether a result may be reused for ttl
+
+        Returns:
+            func()'s result; exceptions it raises propagate to every waiting caller
+        """
+        if not self.enabled:
+            return func()
+
+        with self._lock:
+            self._stats["calls"] += 1
+            recent = self._recent.get(key)
+            if recent is not None:
+                if recent[0] > time.monotonic():
+                    self._stats["reused"] += 1
+                    return recent[1]
+                del self._recent[key]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                self._stats["executed"] += 1
+                if call.error is not None:
+                    self._stats["errors"] += 1
+                elif ttl > 0 and reusable(call.result):
+                    self._recent[key] = (time.monotonic() + ttl, call.result)
+                    # Drop expired results so one-off keys cannot pile up
+                    if len(self._recent) > 1024:
+                        now = time.monotonic()
+                        self._recent = {k: v for k, v in self._recent.items() if v[0] > now}
+            call.done.set()
+        return call.result
+
+    def route(self, ttl=0):
+        """
+        Decorator coalescing identical concurrent requests to a Flask route.
+
+        Requests are keyed by endpoint, method and query string.
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                key = (request.endpoint, request.method, tuple(sorted(request.args.items(multi=True))))
+
+                def call():
+                    response = make_response(f(*args, **kwargs))
+                    return response.get_data(), response.status_code, list(response.headers.items())
+
+                body, status, headers = self.do(key, call, ttl, reusable=lambda result: result[1] < 500)
+                return make_response(body, status, headers)
+            return decorated
+        return decorator
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "in_flight": len(self._calls),
+                **self._stats,
+                "coalesce_rate": (self._stats["coalesced"] + self._stats["reused"]) / self._stats["calls"]
+                if self._stats["calls"] else None,
+            }
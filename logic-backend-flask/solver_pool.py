@@ -0,0 +1,312 @@
+"""
+Dedicated process pool for solver-heavy work.
+
+Puzzle generation (with its retries) and Z3-backed checks can take seconds.
+Run on a gunicorn worker thread they hold the GIL and the worker, so cheap
+I/O-bound routes like /me or /leaderboard queue behind them. SolverPool runs
+that work in a separate ProcessPoolExecutor instead:
+
+    - at most SOLVER_POOL_MAX_CONCURRENCY tasks per web worker are queued or
+      running at once; callers wait for a slot until their deadline
+    - every task has a deadline of SOLVER_TASK_TIMEOUT seconds, enforced in
+      the solver process with SIGALRM and in the caller with a result timeout
+    - a crashed solver process only fails the tasks it was running; the pool
+      is replaced on the next call
+
+Checks the native truth-table engine can answer (see truth_table.py) take
+microseconds, less than a round trip to another process, so they run inline.
+Everything else goes through the pool.
+
+Like the puzzle pool's refill thread, the executor is created lazily in each
+gunicorn worker: a pool created before the fork would not be usable there.
+Every web worker has its own pool, so by default each gets its share of the
+CPUs (cpu_count // WEB_CONCURRENCY, at least one process): about one solver
+process per CPU on the host in total, WEB_CONCURRENCY * SOLVER_POOL_WORKERS
+if SOLVER_POOL_WORKERS is set. gunicorn.conf.py exports WEB_CONCURRENCY.
+Set SOLVER_POOL_ENABLED=false to run every task inline (no deadlines).
+
+Tasks run through run_captured(), which returns the solver_telemetry events
+a task recorded along with its result, so the web worker's generation and
+solver telemetry include work done in solver processes.
+"""
+
+import multiprocessing
+import os
+import random
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+import puzzle_solver
+import solver_telemetry
+import statement_compiler
+import truth_table
+
+SOLVER_POOL_ENABLED = os.getenv("SOLVER_POOL_ENABLED", "true").lower() == "true"
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))  # gunicorn workers, each with its own pools
+SOLVER_POOL_WORKERS = int(os.getenv("SOLVER_POOL_WORKERS", "0")) or max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY)
+SOLVER_POOL_MAX_CONCURRENCY = int(os.getenv("SOLVER_POOL_MAX_CONCURRENCY", "0")) or SOLVER_POOL_WORKERS * 2
+SOLVER_TASK_TIMEOUT = float(os.getenv("SOLVER_TASK_TIMEOUT", "20"))
+
+GENERATORS = {}
+
+
+class SolverUnavailable(Exception):
+    """Raised when a task cannot get a solver slot or its solver process crashed."""
+
+
+class SolverTimeout(SolverUnavailable):
+    """Raised when a task runs past its deadline."""
+
+
+def mp_context():
+    """
+    Start solver processes from a fork server where available.
+
+    Forking a threaded web worker directly can copy locks held by its other
+    threads into the child.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else methods[0])
+
+
+def _load_generators():
+    import easy_mode
+    import medium_mode
+    import hard_mode
+    import extreme_mode
+
+    GENERATORS.update({
+        "easy": easy_mode.api_generate_easy,
+        "medium": medium_mode.api_generate_medium,
+        "hard": hard_mode.api_generate_hard,
+        "extreme": extreme_mode.api_generate_extreme,
+    })
+
+
+def _load_checkers():
+    import easy_mode
+    import medium_mode
+    import hard_mode
+    import extreme_mode
+
+    return {
+        "easy": easy_mode.check_easy_solution,
+        "medium": medium_mode.check_medium_solution,
+        "hard": hard_mode.check_hard_solution,
+        "extreme": extreme_mode.check_extreme_solution,
+    }
+
+
+def init_worker():
+    """Load the generators in each solver process and give it its own random stream."""
+    _load_generators()
+    # Forked workers inherit the parent's random state; reseed so they differ
+    random.seed(os.urandom(16))
+
+
+def _generate(mode, num_players):
+    if not GENERATORS:
+        _load_generators()
+    return GENERATORS[mode](num_players)
+
+
+def _check_solution(mode, data):
+    statements = data.get("full_statement_data") or data.get("statement_data")
+    with solver_telemetry.track("check", mode, _num_players(statements)):
+        return _load_checkers()[mode](data)
+
+
+def _check_puzzle(statements, num_truth_tellers, guess, people=None, mode=None):
+    with solver_telemetry.track("check", mode, _num_players(statements, people)):
+        return puzzle_solver.check_puzzle(statements, num_truth_tellers, guess, people)
+
+
+def _solve(statements, num_truth_tellers, people, simple, mode=None):
+    with solver_telemetry.track("solve", mode, _num_players(statements, people)):
+        compiled = statement_compiler.compile_puzzle(statements, num_truth_tellers, people, simple)
+        return puzzle_solver.solve(compiled)
+
+
+TASKS = {
+    "generate": _generate,
+    "check_solution": _check_solution,
+    "check_puzzle": _check_puzzle,
+    "solve": _solve,
+}
+
+
+class _DeadlineReached(BaseException):
+    """Raised by SIGALRM inside a solver process; a BaseException so the generators' retry loops cannot swallow it."""
+
+
+def _on_deadline(signum, frame):
+    raise _DeadlineReached()
+
+
+def run_task(name, deadline, args):
+    """Run a task in a solver process, interrupting it at the deadline where SIGALRM exists."""
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise SolverTimeout("Solver task expired before it started")
+    if not hasattr(signal, "setitimer"):
+        return TASKS[name](*args)
+    previous = signal.signal(signal.SIGALRM, _on_deadline)
+    signal.setitimer(signal.ITIMER_REAL, remaining)
+    try:
+        return TASKS[name](*args)
+    except _DeadlineReached:
+        solver_telemetry.interrupted()
+        raise SolverTimeout(f"Solver task '{name}' ran past its deadline") from None
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def run_captured(name, deadline, args):
+    """run_task in a solver process, returning (ok, result or exception, telemetry events)."""
+    with solver_telemetry.capture() as events:
+        try:
+            return True, run_task(name, deadline, args), events
+        except Exception as e:
+            return False, e, events
+
+
+def unpack_captured(captured):
+    """Add a run_captured() result's telemetry to this process and return its result (or raise its exception)."""
+    ok, value, events = captured
+    solver_telemetry.ingest(events)
+    if not ok:
+        raise value
+    return value
+
+
+def _num_players(statements, people=None):
+    if people is not None:
+        return len(people)
+    return len(statements) if isinstance(statements, dict) else 0
+
+
+class SolverPool:
+    """Per-process solver executor with a concurrency limit and per-task deadlines."""
+
+    def __init__(self, max_workers=SOLVER_POOL_WORKERS, max_concurrency=SOLVER_POOL_MAX_CONCURRENCY,
+                 timeout=SOLVER_TASK_TIMEOUT, enabled=SOLVER_POOL_ENABLED):
+        self.max_workers = max(1, max_workers)
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.enabled = enabled
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "completed": 0, "inline": 0, "timeouts": 0, "busy": 0, "crashes": 0}
+
+    def _get_executor(self):
+        """Create the process pool once per process."""
+        pid = os.getpid()
+        with self._lock:
+            if self._executor is None or self._executor_pid != pid:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=mp_context(),
+                                                     initializer=init_worker)
+                self._executor_pid = pid
+            return self._executor
+
+    def _reset_executor(self, executor):
+        """Drop a broken pool so the next task starts a fresh one."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def run(self, name, *args, timeout=None):
+        """
+        Run a task in the solver pool and wait for its result.
+
+        Exceptions raised by the task propagate to the caller unchanged.
+
+        Raises:
+            SolverTimeout: If no slot frees up or the task does not finish before the deadline
+            SolverUnavailable: If the solver process crashed
+        """
+        if not self.enabled:
+            self._count("inline")
+            return TASKS[name](*args)
+
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.time() + timeout
+        if not self._slots.acquire(timeout=timeout):
+            self._count("busy")
+            raise SolverTimeout("Solver pool is busy, please try again")
+        try:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(run_captured, name, deadline, args)
+            except BrokenProcessPool:
+                self._reset_executor(executor)
+                executor = self._get_executor()
+                future = executor.submit(run_captured, name, deadline, args)
+            self._count("submitted")
+            try:
+                result = unpack_captured(future.result(timeout=max(0.0, deadline - time.time())))
+            except FutureTimeout:
+                future.cancel()
+                self._count("timeouts")
+                raise SolverTimeout(f"Solver task '{name}' did not finish within {timeout:g}s")
+            except SolverTimeout:
+                self._count("timeouts")
+                raise
+            except BrokenProcessPool:
+                self._count("crashes")
+                self._reset_executor(executor)
+                raise SolverUnavailable("Solver process crashed, please try again")
+            self._count("completed")
+            return result
+        finally:
+            self._slots.release()
+
+    def _run_inline(self, func, *args):
+        self._count("inline")
+        return func(*args)
+
+    def generate(self, mode, num_players):
+        """Generate a puzzle in the pool."""
+        return self.run("generate", mode, num_players)
+
+    def check_solution(self, mode, data):
+        """Run a mode's check_*_solution, inline when the native engine can answer it."""
+        statements = data.get("full_statement_data") or data.get("statement_data")
+        if truth_table.should_use_native(_num_players(statements)):
+            return self._run_inline(_check_solution, mode, data)
+        return self.run("check_solution", mode, data)
+
+    def check_puzzle(self, statements, num_truth_tellers, guess, people=None, mode=None):
+        """puzzle_solver.check_puzzle, inline when the native engine can answer it (mode only labels telemetry)."""
+        if truth_table.should_use_native(_num_players(statements, people)):
+            return self._run_inline(_check_puzzle, statements, num_truth_tellers, guess, people, mode)
+        return self.run("check_puzzle", statements, num_truth_tellers, guess, people, mode)
+
+    def solve(self, statements, num_truth_tellers, people=None, simple=False, mode=None):
+        """Solve a puzzle, inline when the native engine can answer it (mode only labels telemetry)."""
+        if truth_table.should_use_native(_num_players(statements, people)):
+            return self._run_inline(_solve, statements, num_truth_tellers, people, simple, mode)
+        return self.run("solve", statements, num_truth_tellers, people, simple, mode)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "workers": self.max_workers,
+                "web_workers": WEB_CONCURRENCY,
+                "max_concurrency": self.max_concurrency,
+                "timeout": self.timeout,
+                "running": self._executor is not None and self._executor_pid == os.getpid(),
+                **self._stats,
+            }
@@ -0,0 +1,307 @@
+"""
+Generation and solver telemetry per (mode, num_players).
+
+The generators retry up to max_attempts times on unsolvable (unsat) or
+ambiguous puzzles and on exceptions, and only the final puzzle was visible.
+They now report every attempt:
+
+    attempts = solver_telemetry.GenerationAttempts("extreme", num_players)
+    for attempt in range(max_attempts):
+        ...
+        attempts.reject("unsat", kinds=statement_types)   # or "ambiguous", or "error" with error=e
+        ...
+        attempts.succeeded(kinds=statement_types)
+    attempts.failed()
+
+and puzzle_solver reports the engine behind every solve and check (the
+native truth table, or Z3 above NATIVE_SOLVER_MAX_PLAYERS with the
+conflicts and decisions from solver.statistics()). Checks and solves run by
+the solver pool are wrapped in track("check" | "solve", mode, num_players).
+
+Each finished generation, check or solve becomes one event. Most of them run
+in solver pool processes, so solver_pool.run_captured() collects the events
+a task recorded and returns them with its result; the web worker passes them
+to ingest(). Work run inline records straight into the worker's telemetry.
+
+In the web worker every event
+- updates uniqueness.generation_stats (the per-mode counters in
+  /puzzle/pool/stats),
+- is added to a rolling window of the last TELEMETRY_WINDOW events per
+  (task, mode, num_players), summarised with percentiles and an
+  attempts-to-success histogram by GET /debug/generation,
+- and, once export_to(metrics) is called, to the generation and solver
+  histograms in /metrics.
+"""
+
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+import uniqueness
+
+TELEMETRY_WINDOW = int(os.getenv("TELEMETRY_WINDOW", "500"))
+
+_local = threading.local()
+
+
+def _new_work():
+    return {"native_calls": 0, "z3_calls": 0, "seconds": 0.0, "conflicts": 0, "decisions": 0, "z3_seconds": 0.0}
+
+
+def solver_call(engine, seconds, z3_solver=None):
+    """Add one solve or check (engine "native" or "z3") to the generation or check running on this thread."""
+    work = getattr(_local, "work", None)
+    if work is None:
+        return
+    work[f"{engine}_calls"] += 1
+    work["seconds"] += seconds
+    if z3_solver is not None:
+        statistics = z3_solver.statistics()
+        values = {key: statistics.get_key_value(key) for key in statistics.keys()}
+        work["conflicts"] += values.get("conflicts", 0)
+        work["decisions"] += values.get("decisions", 0)
+        work["z3_seconds"] += values.get("time", 0.0)
+
+
+def _solver_summary(work):
+    return {**work, "engine": "z3" if work["z3_calls"] else "native", "seconds": round(work["seconds"], 6)}
+
+
+class GenerationAttempts:
+    """Tracks one call of a generator across its attempts and records it when it ends."""
+
+    def __init__(self, mode, num_players):
+        self.mode = mode
+        self.num_players = num_players
+        self.started = time.perf_counter()
+        self.attempts = 0
+        self.rejections = Counter()
+        self.kind_attempts = Counter()
+        self.kind_rejections = Counter()
+        self.work = _new_work()
+        _local.work = self.work
+        _local.generation = self
+
+    def _attempt(self, kinds):
+        self.attempts += 1
+        kinds = set(kinds)
+        self.kind_attempts.update(kinds)
+        return kinds
+
+    def reject(self, reason, error=None, kinds=()):
+        """Record a failed attempt: reason is "unsat", "ambiguous" or "error" (with the exception)."""
+        kinds = self._attempt(kinds)
+        if reason == "error" and error is not None:
+            reason = f"error:{type(error).__name__}"
+        self.rejections[reason] += 1
+        self.kind_rejections.update(f"{reason}:{kind}" for kind in kinds)
+
+    def succeeded(self, kinds=()):
+        self._attempt(kinds)
+        self.finish("generated")
+
+    def failed(self):
+        self.finish("failed")
+
+    def finish(self, outcome):
+        """Record the generation once ("generated", "failed" or "timeout")."""
+        if getattr(_local, "generation", None) is self:
+            _local.work = _local.generation = None
+        record({
+            "task": "generate",
+            "mode": self.mode,
+            "num_players": self.num_players,
+            "outcome": outcome,
+            "attempts": self.attempts,
+            "seconds": round(time.perf_counter() - self.started, 6),
+            "rejections": dict(self.rejections),
+            "kind_attempts": dict(self.kind_attempts),
+            "kind_rejections": dict(self.kind_rejections),
+            "solver": _solver_summary(self.work),
+        })
+
+
+def interrupted():
+    """Record the generation running on this thread as timed out (its task ran past the deadline)."""
+    current = getattr(_local, "generation", None)
+    if current is not None:
+        current.finish("timeout")
+
+
+@contextmanager
+def track(task, mode, num_players):
+    """Record a check or solve, with its solver work, when the block exits."""
+    work = _local.work = _new_work()
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        _local.work = None
+        record({
+            "task": task,
+            "mode": mode or "unknown",
+            "num_players": num_players,
+            "outcome": outcome,
+            "seconds": round(time.perf_counter() - started, 6),
+            "solver": _solver_summary(work),
+        })
+
+
+@contextmanager
+def capture():
+    """Collect the events recorded on this thread instead of adding them here (used in solver processes)."""
+    previous = getattr(_local, "captured", None)
+    events = _local.captured = []
+    try:
+        yield events
+    finally:
+        _local.captured = previous
+
+
+def record(event):
+    captured = getattr(_local, "captured", None)
+    if captured is not None:
+        captured.append(event)
+    else:
+        telemetry.add(event)
+
+
+def ingest(events):
+    """Add events shipped back from a solver process."""
+    for event in events or ():
+        telemetry.add(event)
+
+
+def _percentiles(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99), "max": ordered[-1]}
+
+
+class SolverTelemetry:
+    """Rolling windows of generation, check and solve events per (task, mode, num_players)."""
+
+    def __init__(self, window=TELEMETRY_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._windows = {}
+        self._totals = Counter()
+        self._metrics = None
+
+    def export_to(self, metrics):
+        """Also feed every event to a metrics.Metrics instance."""
+        self._metrics = metrics
+
+    def add(self, event):
+        if event["task"] == "generate":
+            self._update_generation_stats(event)
+        key = (event["task"], event["mode"], event["num_players"])
+        with self._lock:
+            events = self._windows.get(key)
+            if events is None:
+                events = self._windows[key] = deque(maxlen=self.window)
+            events.append(event)
+            self._totals[(event["task"], event["outcome"])] += 1
+        if self._metrics is not None:
+            self._export(event)
+
+    @staticmethod
+    def _update_generation_stats(event):
+        stats = uniqueness.generation_stats
+        for reason in ("unsat", "ambiguous"):
+            for _ in range(event["rejections"].get(reason, 0)):
+                stats.record_rejection(event["mode"], reason)
+        if event["outcome"] == "generated":
+            stats.record_generated(event["mode"], event["seconds"])
+        elif event["outcome"] == "failed":
+            stats.record_failed(event["mode"])
+
+    def _export(self, event):
+        from metrics import (GENERATION_ATTEMPTS, GENERATION_DURATION, GENERATION_REJECTIONS, SOLVER_DURATION,
+                             Z3_CONFLICTS, Z3_DECISIONS)
+
+        metrics = self._metrics
+        task, mode, players, solver = event["task"], event["mode"], str(event["num_players"]), event["solver"]
+        if task == "generate":
+            labels = (mode, players, event["outcome"])
+            metrics.observe(GENERATION_ATTEMPTS, labels, event["attempts"])
+            metrics.observe(GENERATION_DURATION, labels, event["seconds"])
+            for reason, count in event["rejections"].items():
+                metrics.inc(GENERATION_REJECTIONS, (mode, players, reason), count)
+        if solver["native_calls"] or solver["z3_calls"]:
+            metrics.observe(SOLVER_DURATION, (task, mode, players, solver["engine"]), solver["seconds"])
+        if solver["z3_calls"]:
+            metrics.observe(Z3_CONFLICTS, (task, mode, players), solver["conflicts"])
+            metrics.observe(Z3_DECISIONS, (task, mode, players), solver["decisions"])
+
+    @staticmethod
+    def _summarise(events):
+        solvers = [event["solver"] for event in events]
+        z3 = [solver for solver in solvers if solver["z3_calls"]]
+        summary = {
+            "events": len(events),
+            "outcomes": dict(Counter(event["outcome"] for event in events)),
+            "seconds": _percentiles([event["seconds"] for event in events]),
+            "solver": {
+                "native_calls": sum(solver["native_calls"] for solver in solvers),
+                "z3_calls": sum(solver["z3_calls"] for solver in solvers),
+                "seconds": _percentiles([solver["seconds"] for solver in solvers]),
+                "z3_conflicts": _percentiles([solver["conflicts"] for solver in z3]),
+                "z3_decisions": _percentiles([solver["decisions"] for solver in z3]),
+                "z3_seconds": _percentiles([solver["z3_seconds"] for solver in z3]),
+            },
+        }
+        if events[0]["task"] != "generate":
+            return summary
+
+        attempts = sum(event["attempts"] for event in events)
+        rejections, kind_attempts, kind_rejections = Counter(), Counter(), Counter()
+        for event in events:
+            rejections.update(event["rejections"])
+            kind_attempts.update(event["kind_attempts"])
+            kind_rejections.update(event["kind_rejections"])
+        generated = [event["attempts"] for event in events if event["outcome"] == "generated"]
+        summary.update({
+            "attempts": attempts,
+            "attempts_to_success": {
+                "histogram": {str(k): v for k, v in sorted(Counter(generated).items())},
+                **(_percentiles(generated) or {}),
+            },
+            "rejections": dict(rejections),
+            "rejection_rates": {reason: round(count / attempts, 4) for reason, count in rejections.items()},
+            # Share of the attempts that used a statement kind which were rejected for each reason
+            "rejection_rates_by_kind": {
+                key: round(count / kind_attempts[key.rsplit(":", 1)[1]], 4)
+                for key, count in sorted(kind_rejections.items())
+            },
+        })
+        return summary
+
+    def snapshot(self):
+        """Per-task summaries of the rolling windows, keyed by "mode/num_players"."""
+        with self._lock:
+            windows = {key: list(events) for key, events in self._windows.items()}
+            totals = dict(self._totals)
+        result = {"window": self.window, "totals": {}}
+        for (task, outcome), count in sorted(totals.items()):
+            result["totals"].setdefault(task, {})[outcome] = count
+        for (task, mode, players), events in sorted(windows.items(), key=lambda item: (item[0][0], item[0][1], str(item[0][2]))):
+            result.setdefault(task, {})[f"{mode}/{players}"] = self._summarise(events)
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._windows.clear()
+            self._totals.clear()
+
+
+telemetry = SolverTelemetry()
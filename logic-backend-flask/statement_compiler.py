@@ -0,0 +1,363 @@
+"""
+Statement IR and compiler shared by every puzzle mode and app.py.
+
+Statements arrive in several dict formats (statement_data, full_statement_data,
+ranked statement_logic, the modeless {target, truth_value} UI format). They are
+parsed once into a small expression IR made of nested tuples:
+
+    ("lit", person, value)        person is a Truth-Teller == value
+    ("and" | "or" | "xor" | "iff" | "implies", left, right)
+    ("exactly", (members...), k)  exactly k of the members are Truth-Tellers
+
+    DIRECT     -> lit
+    AND/OR/XOR -> and/or/xor of two lits
+    IFF        -> iff of two lits
+    IF         -> implies(cond, result)
+    NESTED_IF  -> implies(outer, implies(inner, result))
+    GROUP      -> exactly(members, k)
+
+Every speaker's constraint is "speaker is a Truth-Teller <=> claim", so liars
+always make exactly the negation of their claim. The IR compiles to four
+targets:
+
+    to_mask  - bitset over all 2^n assignments (see truth_table.py)
+    to_z3    - Z3 expressions, for puzzles above the native size limit
+    evaluate - the claim's truth under one assignment
+    explain  - the human-readable sentence the generators use
+
+compile_puzzle() memoizes the compiled form of a whole puzzle, so repeated
+checks of the same puzzle skip parsing and compilation entirely. Anything the
+parser does not recognise raises UnsupportedStatement.
+"""
+
+from functools import lru_cache
+
+from z3 import And, Bool, If, Implies, Not, Or, Sum, Xor
+
+COMPILE_CACHE_SIZE = 4096
+
+BINARY_MODES = {"AND": "and", "OR": "or", "XOR": "xor", "IFF": "iff"}
+
+
+class UnsupportedStatement(ValueError):
+    """Raised when a statement or puzzle cannot be compiled."""
+
+
+def _lit(person, value):
+    if not isinstance(person, str):
+        raise UnsupportedStatement(f"Expected a player label, got {person!r}")
+    if not isinstance(value, bool):
+        raise UnsupportedStatement(f"Expected a boolean claim about '{person}', got {value!r}")
+    return ("lit", person, value)
+
+
+def parse_statement(st, simple=False):
+    """
+    Parse one statement dict into the IR.
+
+    Args:
+        st: Statement dict in any of the formats produced by the mode modules
+        simple: Only read target/truth_value (easy mode), ignoring any mode
+
+    Returns:
+        tuple: The claim as an IR node
+    """
+    if not isinstance(st, dict):
+        raise UnsupportedStatement(f"Unrecognized statement format: {st!r}")
+
+    mode = st.get("mode")
+
+    if simple:
+        return _lit(st.get("target"), st.get("truth_value", st.get("claim")))
+
+    if mode == "DIRECT" or (mode is None and "target" in st):
+        # Handle both formats: 'claim' (full data) and 'truth_value' (UI data)
+        return _lit(st.get("target"), st.get("claim", st.get("truth_value")))
+
+    if mode in BINARY_MODES:
+        return (BINARY_MODES[mode], _lit(st.get("t1"), st.get("c1")), _lit(st.get("t2"), st.get("c2")))
+
+    if mode == "IF":
+        return ("implies", _lit(st.get("cond"), st.get("cond_val")), _lit(st.get("result"), st.get("result_val")))
+
+    if mode == "NESTED_IF":
+        inner = ("implies", _lit(st.get("inner_cond"), st.get("inner_val")),
+                 _lit(st.get("inner_result"), st.get("inner_result_val")))
+        return ("implies", _lit(st.get("outer_cond"), st.get("outer_val")), inner)
+
+    if mode == "GROUP":
+        members = st.get("members") or []
+        exactly = st.get("exactly")
+        if isinstance(exactly, bool) or not isinstance(exactly, int):
+            raise UnsupportedStatement(f"GROUP statement needs an integer 'exactly', got {exactly!r}")
+        if not all(isinstance(m, str) for m in members):
+            raise UnsupportedStatement(f"GROUP members must be player labels, got {members!r}")
+        return ("exactly", tuple(members), exactly)
+
+    raise UnsupportedStatement(f"Unsupported statement mode: {mode!r}")
+
+
+def parse_puzzle(statements, simple=False):
+    """Parse a {speaker: statement} dict into a hashable tuple of (speaker, claim) pairs."""
+    if not isinstance(statements, dict):
+        raise UnsupportedStatement(f"Expected a dict of statements, got {type(statements).__name__}")
+    return tuple((speaker, parse_statement(st, simple)) for speaker, st in statements.items())
+
+
+@lru_cache(maxsize=None)
+def player_masks(num_players):
+    """
+    Get the per-player bitmasks for a puzzle size.
+
+    Returns:
+        tuple: (masks, full) where masks[i] has bit a set when player i is a
+        Truth-Teller in assignment a, and full has all 2^n bits set.
+    """
+    size = 1 << num_players
+    full = (1 << size) - 1
+    masks = []
+    for i in range(num_players):
+        run = 1 << i
+        # One period is 2^i assignments with player i a Liar, then 2^i with
+        # player i a Truth-Teller; double it until it covers every assignment.
+        mask = ((1 << run) - 1) << run
+        width = run * 2
+        while width < size:
+            mask |= mask << width
+            width *= 2
+        masks.append(mask)
+    return tuple(masks), full
+
+
+@lru_cache(maxsize=None)
+def count_masks(num_players):
+    """Get masks of assignments with exactly k Truth-Tellers, indexed by k."""
+    masks, full = player_masks(num_players)
+    return tuple(exactly_mask(masks, full, k) for k in range(num_players + 1))
+
+
+def exactly_mask(var_masks, full, k):
+    """Mask of assignments where exactly k of the given variables are true."""
+    if k < 0 or k > len(var_masks):
+        return 0
+    # counts[j] = assignments where exactly j of the variables seen so far are true
+    counts = [full]
+    for var in var_masks:
+        not_var = full ^ var
+        nxt = [counts[0] & not_var]
+        for j in range(1, len(counts)):
+            nxt.append((counts[j] & not_var) | (counts[j - 1] & var))
+        nxt.append(counts[-1] & var)
+        counts = nxt
+    return counts[k]
+
+
+def _player(index, person):
+    if person not in index:
+        raise UnsupportedStatement(f"Unknown player '{person}'")
+    return index[person]
+
+
+def to_mask(node, index, masks, full):
+    """Compile an IR node into the mask of assignments under which it holds."""
+    kind = node[0]
+    if kind == "lit":
+        var = masks[_player(index, node[1])]
+        return var if node[2] else full ^ var
+    if kind == "exactly":
+        return exactly_mask([masks[_player(index, m)] for m in node[1]], full, node[2])
+
+    left = to_mask(node[1], index, masks, full)
+    right = to_mask(node[2], index, masks, full)
+    if kind == "and":
+        return left & right
+    if kind == "or":
+        return left | right
+    if kind == "xor":
+        return left ^ right
+    if kind == "iff":
+        return full ^ (left ^ right)
+    return (full ^ left) | right  # implies
+
+
+def to_z3(node, z3_vars):
+    """Compile an IR node into a Z3 boolean expression over z3_vars."""
+    kind = node[0]
+    if kind == "lit":
+        if node[1] not in z3_vars:
+            raise UnsupportedStatement(f"Unknown player '{node[1]}'")
+        var = z3_vars[node[1]]
+        return var if node[2] else Not(var)
+    if kind == "exactly":
+        for m in node[1]:
+            if m not in z3_vars:
+                raise UnsupportedStatement(f"Unknown player '{m}'")
+        return Sum([If(z3_vars[m], 1, 0) for m in node[1]]) == node[2]
+
+    left = to_z3(node[1], z3_vars)
+    right = to_z3(node[2], z3_vars)
+    if kind == "and":
+        return And(left, right)
+    if kind == "or":
+        return Or(left, right)
+    if kind == "xor":
+        return Xor(left, right)
+    if kind == "iff":
+        return left == right
+    return Implies(left, right)
+
+
+def evaluate(node, assignment):
+    """Evaluate an IR node under one {player: bool} assignment."""
+    kind = node[0]
+    if kind == "lit":
+        if node[1] not in assignment:
+            raise UnsupportedStatement(f"Unknown player '{node[1]}'")
+        return bool(assignment[node[1]]) == node[2]
+    if kind == "exactly":
+        for m in node[1]:
+            if m not in assignment:
+                raise UnsupportedStatement(f"Unknown player '{m}'")
+        return sum(1 for m in node[1] if assignment[m]) == node[2]
+
+    left = evaluate(node[1], assignment)
+    right = evaluate(node[2], assignment)
+    if kind == "and":
+        return left and right
+    if kind == "or":
+        return left or right
+    if kind == "xor":
+        return left != right
+    if kind == "iff":
+        return left == right
+    return not left or right
+
+def explain(node, conditional=False):
+    """
+    Render an IR node as the sentence the generators use (without the final period).
+
+    Players inside IF / NESTED_IF read "is True/False"; everywhere else they
+    read "is a Truth-Teller/Liar".
+    """
+    kind = node[0]
+    if kind == "lit":
+        if conditional:
+            return f"{node[1]} is {'True' if node[2] else 'False'}"
+        return f"{node[1]} is a {'Truth-Teller' if node[2] else 'Liar'}"
+    if kind == "exactly":
+        members = list(node[1])
+        if len(members) == 1:
+            member_text = members[0]
+        elif len(members) == 2:
+            member_text = f"{members[0]} and {members[1]}"
+        else:
+            member_text = ", ".join(members[:-1]) + f", and {members[-1]}"
+        return f"Exactly {node[2]} of {member_text} are Truth-Tellers"
+    if kind == "and":
+        return f"{explain(node[1])} AND {explain(node[2])}"
+    if kind == "or":
+        return f"{explain(node[1])} OR {explain(node[2])}"
+    if kind == "xor":
+        return f"Either {explain(node[1])} OR {explain(node[2])}, but not both"
+    if kind == "iff":
+        return f"{explain(node[1])} if and only if {explain(node[2])}"
+    text = f"if {explain(node[1], True)}, then {explain(node[2], True)}"
+    return text if conditional else text[0].upper() + text[1:]
+
+
+def statement_text(st, simple=False):
+    """Render a single statement dict as a sentence."""
+    return explain(parse_statement(st, simple)) + "."
+
+
+class CompiledPuzzle:
+    """
+    A parsed puzzle with lazily compiled native and Z3 forms.
+
+    Instances are shared through compile_puzzle()'s cache, so treat them as
+    read-only.
+    """
+
+    def __init__(self, parsed, num_truth_tellers, people):
+        self.parsed = parsed
+        self.num_truth_tellers = num_truth_tellers
+        self.people = people
+        self.index = {p: i for i, p in enumerate(people)}
+        for speaker, _ in parsed:
+            if speaker not in self.index:
+                raise UnsupportedStatement(f"Unknown speaker '{speaker}'")
+        self._mask = None
+        self._z3_constraints = None
+
+    @property
+    def mask(self):
+        """Mask of every assignment that satisfies the puzzle (2^n bits, so keep n small)."""
+        if self._mask is None:
+            n = len(self.people)
+            masks, full = player_masks(n)
+            k = self.num_truth_tellers
+            mask = count_masks(n)[k] if 0 <= k <= n else 0
+            for speaker, claim in self.parsed:
+                if not mask:
+                    break
+                # Truth-Tellers make true claims, Liars make false ones: speaker <=> claim
+                mask &= full ^ (masks[self.index[speaker]] ^ to_mask(claim, self.index, masks, full))
+            self._mask = mask
+        return self._mask
+
+    def z3_vars(self):
+        """Fresh {player: Bool} mapping matching the names used in z3_constraints()."""
+        return {p: Bool(p) for p in self.people}
+
+    def z3_constraints(self):
+        """Z3 constraints for the whole puzzle, including the Truth-Teller count."""
+        if self._z3_constraints is None:
+            z3_vars = self.z3_vars()
+            constraints = [z3_vars[speaker] == to_z3(claim, z3_vars) for speaker, claim in self.parsed]
+            constraints.append(Sum([If(z3_vars[p], 1, 0) for p in self.people]) == self.num_truth_tellers)
+            self._z3_constraints = constraints
+        return self._z3_constraints
+
+    def statement_texts(self):
+        """{speaker: sentence} for every statement."""
+        return {speaker: explain(claim) + "." for speaker, claim in self.parsed}
+
+    def explain(self, solution):
+        """
+        Explain why an assignment works, one line per speaker.
+
+        Example: 'A is a Truth-Teller, so "B is a Liar." is true.'
+        """
+        lines = {}
+        for speaker, claim in self.parsed:
+            is_truth = bool(solution.get(speaker))
+            role = "Truth-Teller" if is_truth else "Liar"
+            lines[speaker] = f'{speaker} is a {role}, so "{explain(claim)}." is {"true" if is_truth else "false"}.'
+        return lines
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def _compile(parsed, num_truth_tellers, people):
+    return CompiledPuzzle(parsed, num_truth_tellers, people)
+
+
+def compile_puzzle(statements, num_truth_tellers, people=None, simple=False):
+    """
+    Parse and compile a puzzle, reusing the cached form for identical puzzles.
+
+    Args:
+        statements: Dict of speaker -> statement dict
+        num_truth_tellers: Required number of Truth-Tellers
+        people: Player labels (defaults to the statement speakers, in order)
+        simple: Only read target/truth_value from each statement (easy mode)
+
+    Returns:
+        CompiledPuzzle
+    """
+    if isinstance(num_truth_tellers, bool) or not isinstance(num_truth_tellers, int):
+        raise UnsupportedStatement(f"Invalid num_truth_tellers: {num_truth_tellers!r}")
+    parsed = parse_puzzle(statements, simple)
+    people = tuple(people) if people is not None else tuple(speaker for speaker, _ in parsed)
+    if not all(isinstance(p, str) for p in people):
+        raise UnsupportedStatement(f"Player labels must be strings, got {people!r}")
+    return _compile(parsed, num_truth_tellers, people)
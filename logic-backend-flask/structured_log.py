@@ -0,0 +1,245 @@
+"""
+Leveled, sampled, structured logging for the request path.
+
+The request handlers used to print() 20-40 lines per request, including
+whole request payloads and profile dicts, formatted and written to stdout
+synchronously on the request thread. They now log through the "mindrank"
+logger:
+
+    log = get_logger(__name__)
+    log.debug("Checking solution for mode: %s", mode)
+
+- Levels: records below LOG_LEVEL (default INFO) cost one level check. The
+  message is never formatted, so pass values as arguments, not f-strings.
+  The old debug output is at DEBUG.
+- Sampling: LOG_SAMPLE_RATES sets the fraction of requests per route
+  template whose DEBUG and INFO records are kept, e.g.
+  "/puzzle/check=0.05,/puzzle/generate=0.05,*=1". The decision is made once
+  per request, so a sampled request keeps all of its lines, and is checked
+  along with the level, so other requests don't build records at all.
+  Warnings and errors are always kept.
+- Non-blocking: records that pass are formatted on the calling thread and
+  put on a bounded queue. A listener thread, started lazily in every
+  process like the puzzle pool's refill thread, writes them to stdout. When
+  the queue is full, records are dropped and counted instead of blocking
+  the request.
+- Structured: each line is a JSON object with ts, level, logger, msg,
+  route, method and pid, plus exc for exceptions and any fields passed as
+  extra={"fields": {...}}. Set LOG_FORMAT=text for plain lines when
+  working locally.
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import traceback
+
+from flask import g, has_request_context, request
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+ROOT_LOGGER = "mindrank"
+
+
+def parse_sample_rates(spec):
+    """Parse "route=rate,..." into a dict; "*" sets the default rate."""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        route, _, rate = item.rpartition("=")
+        if not route:
+            raise ValueError(f"Invalid LOG_SAMPLE_RATES entry: {item!r}")
+        rates[route.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+def _request_fields():
+    if not has_request_context():
+        return {"route": "background", "method": None}
+    rule = request.url_rule
+    return {"route": rule.rule if rule is not None else "unmatched", "method": request.method}
+
+
+class RouteSampler:
+    """Decides once per request, from its route template, whether its DEBUG/INFO records are kept."""
+
+    def __init__(self, rates=None):
+        self.rates = parse_sample_rates(LOG_SAMPLE_RATES) if rates is None else rates
+        self.default_rate = self.rates.get("*", 1.0)
+
+    def sampled(self):
+        if not has_request_context():
+            return True
+        sampled = g.get("log_sampled")
+        if sampled is None:
+            rate = self.rates.get(_request_fields()["route"], self.default_rate)
+            sampled = g.log_sampled = rate >= 1.0 or random.random() < rate
+        return sampled
+
+
+class RequestFieldsFilter(logging.Filter):
+    """Tags records with the current route template and method."""
+
+    def filter(self, record):
+        fields = _request_fields()
+        record.route, record.method = fields["route"], fields["method"]
+        return True
+
+
+class SampledLogger(logging.Logger):
+    """Checks sampling along with the level, so a sampled-out call never builds a record."""
+
+    def isEnabledFor(self, level):
+        # Not cached like logging.Logger's: the logging manager clears that
+        # cache on level changes only for loggers made by logging.getLogger()
+        if self.manager.disable >= level or level < self.getEffectiveLevel():
+            return False
+        return level >= logging.WARNING or _sampler is None or _sampler.sampled()
+
+    def findCaller(self, stack_info=False, stacklevel=1):
+        # Neither format prints the caller, and walking the stack for it is a
+        # fifth of the cost of a record
+        return "(unknown file)", 0, "(unknown function)", None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "route": getattr(record, "route", None),
+            "method": getattr(record, "method", None),
+            "pid": record.process,
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        exc = record.exc_text or (self.formatException(record.exc_info) if record.exc_info else None)
+        if exc:
+            entry["exc"] = exc
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(route)s] %(message)s")
+
+    def formatException(self, ei):
+        return "".join(traceback.format_exception(*ei)).rstrip()
+
+
+class NonBlockingQueueHandler(logging.Handler):
+    """Formats on the calling thread, writes on a per-process listener thread, drops when full."""
+
+    def __init__(self, target, maxsize=LOG_QUEUE_SIZE):
+        super().__init__()
+        self.target = target
+        self.maxsize = maxsize
+        self.queue = None
+        self.dropped = 0
+        self._pid = None
+        self._lock_start = threading.Lock()
+
+    def _ensure_listener(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock_start:
+            if self._pid == pid:
+                return
+            # A queue inherited from the parent may hold a lock taken mid-fork
+            self.queue = queue.Queue(self.maxsize)
+            self._pid = pid
+        threading.Thread(target=self._listen, args=(self.queue,), name="log-writer", daemon=True).start()
+
+    def emit(self, record):
+        self._ensure_listener()
+        try:
+            line = self.target.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        try:
+            self.queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+
+    def _listen(self, lines):
+        stream = self.target.stream
+        while True:
+            line = lines.get()
+            batch = [line]
+            # Write whatever else is queued in the same call
+            while len(batch) < 256:
+                try:
+                    batch.append(lines.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                stream.write("\n".join(batch) + "\n")
+                stream.flush()
+            except Exception:
+                pass
+
+    def flush(self, timeout=1.0):
+        """Wait (briefly) until the listener has written everything queued."""
+        deadline = time.monotonic() + timeout
+        while self.queue is not None and not self.queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+
+_handler = None
+_sampler = None
+_loggers = {}
+_loggers_lock = threading.Lock()
+
+
+def configure(stream=None, level=LOG_LEVEL, fmt=LOG_FORMAT, rates=None):
+    """(Re)configure the mindrank logger; called on first use with the environment settings."""
+    global _handler, _sampler
+    target = logging.StreamHandler(stream or sys.stdout)
+    target.setFormatter(TextFormatter() if fmt == "text" else JsonFormatter())
+    handler = NonBlockingQueueHandler(target)
+    handler.addFilter(RequestFieldsFilter())
+    root = logging.getLogger(ROOT_LOGGER)
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level)
+    root.propagate = False
+    _handler, _sampler = handler, RouteSampler(rates)
+    return handler
+
+
+def get_logger(name):
+    """A logger under "mindrank" (configured from the environment on first call)."""
+    if _handler is None:
+        configure()
+    short = name.rsplit(".", 1)[-1] if name != "__main__" else "main"
+    # Created directly rather than through logging.setLoggerClass(), which would
+    # change the class of every library's logger too
+    with _loggers_lock:
+        logger = _loggers.get(short)
+        if logger is None:
+            logger = _loggers[short] = SampledLogger(f"{ROOT_LOGGER}.{short}")
+            logger.parent = logging.getLogger(ROOT_LOGGER)
+        return logger
+
+
+def stats():
+    return {
+        "level": logging.getLevelName(logging.getLogger(ROOT_LOGGER).level),
+        "queued": _handler.queue.qsize() if _handler and _handler.queue else 0,
+        "dropped": _handler.dropped if _handler else 0,
+    }
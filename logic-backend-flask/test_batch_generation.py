@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Test batch puzzle generation across the process pool."""
+
+from collections import Counter
+
+import puzzle_solver
+from batch_generation import BatchError, BatchGenerator, parse_specs
+
+MODES = ["easy", "medium", "hard", "extreme"]
+
+
+def test_parse_specs_enforces_caps():
+    """Malformed specs and oversized batches are rejected."""
+    assert parse_specs([{"mode": "Hard", "players": 5, "count": 3}], MODES) == [("hard", 5, 3)]
+    assert parse_specs([{"mode": "easy", "players": 4}], MODES) == [("easy", 4, 1)]
+
+    bad_requests = [
+        None,
+        [],
+        [{"mode": "ranked", "players": 5}],
+        [{"mode": "hard", "players": 12}],
+        [{"mode": "hard", "players": "5"}],
+        [{"mode": "hard", "players": 5, "count": 0}],
+        [{"mode": "hard", "players": 5, "count": 60}, {"mode": "easy", "players": 4, "count": 60}],
+        [{"mode": "easy", "players": 4}] * 11,
+    ]
+    for specs in bad_requests:
+        try:
+            parse_specs(specs, MODES, max_specs=10, max_puzzles=100)
+        except BatchError:
+            continue
+        raise AssertionError(f"expected BatchError for {specs!r}")
+    print("✅ Batch specs are validated and capped")
+
+
+def test_batch_generates_every_puzzle():
+    """Every requested puzzle is generated in a worker process and is solvable."""
+    generator = BatchGenerator(max_workers=2, max_in_flight=2)
+    specs = parse_specs([
+        {"mode": "medium", "players": 4, "count": 3},
+        {"mode": "extreme", "players": 6, "count": 2},
+    ], MODES)
+    results = list(generator.generate(specs))
+
+    assert Counter(r["spec"] for r in results) == {0: 3, 1: 2}
+    for result in results:
+        puzzle = result["puzzle"]
+        assert puzzle["num_players"] == result["players"]
+        statements = puzzle.get("full_statement_data", puzzle["statement_data"])
+        assert puzzle_solver.check_puzzle(statements, puzzle["num_truth_tellers"], puzzle["solution"])
+    assert generator.stats()["generated"] == 5
+    print("✅ Batch generation returns every requested puzzle")
+
+
+if __name__ == "__main__":
+    test_parse_specs_enforces_caps()
+    test_batch_generates_every_puzzle()
+    print("🎉 All batch generation tests passed!")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Test that GET /bootstrap returns the four dashboard payloads behind the usual token check."""
+
+import contextlib
+import io
+import os
+
+os.environ.setdefault("PUZZLE_POOL_ENABLED", "false")
+os.environ.setdefault("SOLVER_POOL_ENABLED", "false")
+with contextlib.redirect_stdout(io.StringIO()):
+    import app
+
+PROFILES = {
+    "ranked-user": {"elo": 1350, "hidden_elo": None, "placement_matches_completed": 5, "is_ranked": True,
+                    "username": "ranked", "easy_puzzles_solved": 10, "medium_puzzles_solved": 4,
+                    "master_easy_puzzles_solved": 2},
+    "new-user": {"elo": None, "hidden_elo": 1000, "placement_matches_completed": 2, "is_ranked": False,
+                 "username": None, "easy_puzzles_solved": 3},
+}
+MATCHES = [{"id": 2, "solved": True, "created_at": "2026-10-16T12:00:00"},
+           {"id": 1, "solved": False, "created_at": "2026-10-15T12:00:00"}]
+
+
+@contextlib.contextmanager
+def dashboard_backend():
+    """Known users by bearer token, and Supabase reads answered from PROFILES and MATCHES."""
+    saved = app.verify_jwt, app.supabase, app.get_or_create_user_profile, app.fetch_recent_matches
+    app.verify_jwt = lambda token: {"sub": token, "email": f"{token}@example.com"} if token in PROFILES else None
+    app.supabase = object()
+    app.get_or_create_user_profile = lambda user_id, email, use_cache=True: dict(PROFILES[user_id], user_id=user_id)
+    app.fetch_recent_matches = lambda user_id, limit=20: list(MATCHES)
+    try:
+        yield
+    finally:
+        app.verify_jwt, app.supabase, app.get_or_create_user_profile, app.fetch_recent_matches = saved
+
+
+def test_bootstrap_matches_the_four_endpoints():
+    """The payload is exactly what /user/elo, /me and both progress-bar routes return."""
+    client = app.app.test_client()
+    with dashboard_backend():
+        for token in PROFILES:
+            headers = {"Authorization": f"Bearer {token}"}
+            response = client.get("/bootstrap", headers=headers)
+            assert response.status_code == 200, response.get_json()
+            assert response.get_json() == {
+                "elo": client.get("/user/elo", headers=headers).get_json(),
+                "me": client.get("/me", headers=headers).get_json(),
+                "practice_progress_bars": client.get("/practice/progress-bars", headers=headers).get_json()["progress_bars"],
+                "master_progress_bars": client.get("/master/progress-bars", headers=headers).get_json()["progress_bars"],
+            }, token
+    print("✅ /bootstrap returns the same payloads as the four endpoints")
+
+
+def test_bootstrap_rejects_bad_tokens():
+    """Missing and invalid tokens get the same 401s as the routes it replaces."""
+    client = app.app.test_client()
+    with dashboard_backend():
+        for headers in [{}, {"Authorization": "Basic ranked-user"}, {"Authorization": "Bearer forged"}]:
+            for route in ["/bootstrap", "/me"]:
+                response = client.get(route, headers=headers)
+                assert response.status_code == 401, (route, headers)
+            assert client.get("/bootstrap", headers=headers).get_json() == client.get("/me", headers=headers).get_json()
+    print("✅ /bootstrap rejects missing and invalid tokens")
+
+
+if __name__ == "__main__":
+    test_bootstrap_matches_the_four_endpoints()
+    test_bootstrap_rejects_bad_tokens()
+    print("🎉 All bootstrap tests passed!")
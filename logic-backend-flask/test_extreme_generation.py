@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Test the constructive extreme-mode generator."""
+
+import contextlib
+import io
+import random
+
+import extreme_mode
+import puzzle_solver
+import statement_compiler
+import truth_table
+from solver_telemetry import capture
+
+KINDS = ["DIRECT", "AND", "OR", "XOR", "IFF", "IF", "NESTED_IF", "SELF_REF", "GROUP"]
+
+
+def test_statements_match_planted_roles():
+    """Every statement kind is true exactly when its speaker is a Truth-Teller."""
+    people = ["A", "B", "C", "D", "E", "F"]
+    for _ in range(300):
+        roles = {p: random.choice([True, False]) for p in people}
+        for kind in KINDS:
+            for speaker in people:
+                others = [p for p in people if p != speaker]
+                statement = extreme_mode.build_statement(kind, speaker, others, roles)
+                claim = statement_compiler.parse_statement(statement)
+                assert statement_compiler.evaluate(claim, roles) == roles[speaker], (kind, speaker, roles, statement)
+                if kind == "SELF_REF":
+                    assert statement == {"mode": "DIRECT", "target": speaker, "claim": True}
+                elif kind != "DIRECT":
+                    assert statement["mode"] == kind
+    # Kinds that need more players than there are others fall back to DIRECT
+    assert extreme_mode.build_statement("NESTED_IF", "A", ["B", "C"], {"A": True, "B": False, "C": True})["mode"] == "DIRECT"
+    print("✅ Every statement kind is consistent with the planted roles")
+
+
+def test_one_pass_unique_puzzles():
+    """Puzzles are never unsolvable, rarely need a second attempt, have a unique solution and keep the format."""
+    for num_players in [4, 5, 6, 7, 8]:
+        attempts = 0
+        for _ in range(20):
+            with capture() as events, contextlib.redirect_stdout(io.StringIO()):
+                puzzle = extreme_mode.api_generate_extreme(num_players)
+            assert "unsat" not in events[0]["rejections"], events
+            attempts += events[0]["attempts"]
+
+            compiled = statement_compiler.compile_puzzle(puzzle["full_statement_data"], puzzle["num_truth_tellers"])
+            assert puzzle_solver.find_solutions(compiled) == [puzzle["solution"]]
+            assert compiled.statement_texts() == puzzle["statements"]
+            assert set(puzzle["statement_data"]) == set(puzzle["solution"]) == set(puzzle["statements"])
+            assert extreme_mode.check_extreme_solution({**puzzle, "player_assignments": puzzle["solution"]})["valid"]
+        # An ambiguous first attempt is possible but rare (about 1 in 1000 at 5 players)
+        assert attempts <= 25, (num_players, attempts)
+    print("✅ Extreme puzzles are unique, almost always on the first attempt")
+
+
+def test_above_native_limit():
+    """Without the native masks, constructed puzzles are still never unsolvable."""
+    native_limit = truth_table.NATIVE_SOLVER_MAX_PLAYERS
+    truth_table.NATIVE_SOLVER_MAX_PLAYERS = 3
+    try:
+        for _ in range(5):
+            with capture() as events, contextlib.redirect_stdout(io.StringIO()):
+                puzzle = extreme_mode.api_generate_extreme(5)
+            assert "unsat" not in events[0]["rejections"] and events[0]["solver"]["engine"] == "z3", events
+            assert extreme_mode.check_extreme_solution({**puzzle, "player_assignments": puzzle["solution"]})["valid"]
+    finally:
+        truth_table.NATIVE_SOLVER_MAX_PLAYERS = native_limit
+    print("✅ Puzzles above the native limit are consistent too")
+
+
+if __name__ == "__main__":
+    test_statements_match_planted_roles()
+    test_one_pass_unique_puzzles()
+    test_above_native_limit()
+    print("🎉 All extreme generation tests passed!")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Test Idempotency-Key handling."""
+
+import threading
+import time
+
+from flask import Flask, jsonify, request
+
+from idempotency import IdempotencyCache
+from puzzle_store import MemoryBackend
+
+
+class FakeSharedBackend(MemoryBackend):
+    """MemoryBackend with the SET NX / DELETE calls RedisBackend provides."""
+
+    def add(self, key, value, ttl):
+        with self._lock:
+            if key in self._entries and self._entries[key][0] > time.time():
+                return False
+        self.set(key, value, ttl)
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+def _make_app(cache, delay=0):
+    app = Flask(__name__)
+    calls = []
+
+    @app.route("/check", methods=["POST"])
+    @cache.route(scope=lambda: request.headers.get("X-User"))
+    def check():
+        calls.append(request.json)
+        time.sleep(delay)
+        if request.json.get("fail"):
+            return jsonify({"error": "Server error"}), 500
+        return jsonify({"elo_change": {"change": 25}, "call": len(calls)})
+
+    return app, calls
+
+
+def test_repeats_return_the_stored_response():
+    """The same key replays the stored response; other keys and users run the route."""
+    app, calls = _make_app(IdempotencyCache())
+    client = app.test_client()
+    headers = {"Idempotency-Key": "k1", "X-User": "u1"}
+
+    first = client.post("/check", json={"n": 1}, headers=headers)
+    again = client.post("/check", json={"n": 1}, headers=headers)
+    assert first.get_json() == again.get_json() == {"elo_change": {"change": 25}, "call": 1}
+    assert "Idempotent-Replayed" not in first.headers and again.headers["Idempotent-Replayed"] == "true"
+    assert again.headers["Content-Type"] == "application/json"
+
+    assert client.post("/check", json={"n": 1}, headers={"Idempotency-Key": "k1", "X-User": "u2"}).get_json()["call"] == 2
+    assert client.post("/check", json={"n": 1}, headers={"Idempotency-Key": "k2", "X-User": "u1"}).get_json()["call"] == 3
+    assert client.post("/check", json={"n": 1}, headers={"X-User": "u1"}).get_json()["call"] == 4  # No key
+    assert client.post("/check", json={"n": 1}, headers={"Idempotency-Key": "k1"}).get_json()["call"] == 5  # No user
+    assert client.post("/check", json={}, headers={"Idempotency-Key": "k" * 300, "X-User": "u1"}).status_code == 400
+    assert len(calls) == 5
+    print("✅ Repeated keys replay the stored response")
+
+
+def test_errors_are_not_stored():
+    """A failed request can be retried with the same key."""
+    app, calls = _make_app(IdempotencyCache())
+    client = app.test_client()
+    headers = {"Idempotency-Key": "k1", "X-User": "u1"}
+    assert client.post("/check", json={"fail": True}, headers=headers).status_code == 500
+    assert client.post("/check", json={}, headers=headers).status_code == 200
+    assert client.post("/check", json={}, headers=headers).get_json()["call"] == 2
+    print("✅ Error responses are not stored")
+
+
+def test_concurrent_repeats_run_once():
+    """A repeat that arrives while the first request runs waits for its response."""
+    cache = IdempotencyCache()
+    app, calls = _make_app(cache, delay=0.2)
+    results = []
+
+    def post():
+        with app.test_client() as client:
+            results.append(client.post("/check", json={}, headers={"Idempotency-Key": "k1", "X-User": "u1"}).get_json())
+
+    threads = [threading.Thread(target=post) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and results == [results[0]] * 5
+    assert cache.stats()["replayed"] == 4 and cache.stats()["executed"] == 1
+    print("✅ Concurrent repeats run the route once")
+
+
+def test_shared_store_across_workers():
+    """Workers sharing a store replay each other's responses and refuse a key another worker holds."""
+    shared = FakeSharedBackend()
+    first, first_calls = _make_app(IdempotencyCache(shared), delay=0.2)
+    second, second_calls = _make_app(IdempotencyCache(shared))
+    headers = {"Idempotency-Key": "k1", "X-User": "u1"}
+
+    thread = threading.Thread(target=lambda: first.test_client().post("/check", json={}, headers=headers))
+    thread.start()
+    time.sleep(0.05)
+    assert second.test_client().post("/check", json={}, headers=headers).status_code == 409
+    thread.join()
+
+    replay = second.test_client().post("/check", json={}, headers=headers)
+    assert replay.headers["Idempotent-Replayed"] == "true" and replay.get_json()["call"] == 1
+    assert len(first_calls) == 1 and second_calls == []
+    print("✅ Shared store works across workers")
+
+
+if __name__ == "__main__":
+    test_repeats_return_the_stored_response()
+    test_errors_are_not_stored()
+    test_concurrent_repeats_run_once()
+    test_shared_store_across_workers()
+    print("🎉 All idempotency tests passed!")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Test the verified/rejected access token cache."""
+
+import time
+
+from jwt_cache import MISS, JWTCache
+
+
+def test_valid_tokens_cached_until_exp():
+    """Verified claims are served from the cache until the token expires."""
+    cache = JWTCache()
+    assert cache.get("token-a") is MISS
+    cache.set_valid("token-a", {"sub": "u1", "email": "a@example.com"}, exp=time.time() + 60)
+    claims = cache.get("token-a")
+    assert claims == {"sub": "u1", "email": "a@example.com"}
+    claims["sub"] = "someone-else"  # Callers get a copy
+    assert cache.get("token-a")["sub"] == "u1"
+
+    cache.set_valid("token-b", {"sub": "u2"}, exp=time.time() + 0.01)
+    time.sleep(0.02)
+    assert cache.get("token-b") is MISS
+
+    cache.set_valid("token-c", {"sub": "u3"}, exp=time.time() - 1)  # Already expired
+    assert cache.get("token-c") is MISS
+    print("✅ Verified tokens are cached until exp")
+
+
+def test_rejected_tokens_negatively_cached():
+    """Rejected tokens are remembered for the negative TTL only."""
+    cache = JWTCache(negative_ttl=0.05)
+    cache.set_invalid("bad-token")
+    assert cache.get("bad-token") is None
+    assert cache.stats()["negative_hits"] == 1
+    time.sleep(0.06)
+    assert cache.get("bad-token") is MISS
+    print("✅ Rejected tokens are cached for a short window")
+
+
+def test_bounded_and_keyed_by_hash():
+    """The cache is an LRU of token hashes."""
+    cache = JWTCache(max_entries=2)
+    for token in ["t1", "t2", "t3"]:
+        cache.set_valid(token, {"sub": token}, exp=time.time() + 60)
+    assert cache.get("t1") is MISS and cache.get("t3") == {"sub": "t3"}
+    assert all(isinstance(key, bytes) and len(key) == 32 for key in cache._entries)
+    assert cache.stats()["evictions"] == 1
+    print("✅ Token cache is bounded and never stores raw tokens")
+
+
+if __name__ == "__main__":
+    test_valid_tokens_cached_until_exp()
+    test_rejected_tokens_negatively_cached()
+    test_bounded_and_keyed_by_hash()
+    print("🎉 All JWT cache tests passed!")
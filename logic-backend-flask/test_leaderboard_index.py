@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Test the in-memory leaderboard index."""
+
+import threading
+
+from leaderboard_index import LeaderboardIndex, rank_rows
+
+PROFILES = [
+    {"user_id": "a", "username": "alice", "elo": 1600},
+    {"user_id": "b", "username": "bob", "elo": 1200},
+    {"user_id": "c", "username": None, "elo": 1200},
+    {"user_id": "d", "username": "dana", "elo": 900},
+    {"user_id": "e", "username": "eve", "elo": None},
+]
+
+
+def test_competition_ranks():
+    """Ties share a rank, the next rank skips, NULL Elo rows are dropped."""
+    entries = rank_rows(sorted((p for p in PROFILES if p["elo"] is not None), key=lambda p: -p["elo"]))
+    assert [(e["rank"], e["user_id"]) for e in entries] == [(1, "a"), (2, "b"), (2, "c"), (4, "d")]
+    assert entries[2]["username"] == "c" and entries[0]["tier"] == "Critical Thinker"
+
+    index = LeaderboardIndex(lambda: list(PROFILES), reconcile_interval=3600)
+    assert index.top() == entries
+    assert [e["user_id"] for e in index.top(2)] == ["a", "b"]
+    print("✅ Leaderboard uses competition ranking")
+
+
+def test_incremental_updates():
+    """Elo changes move players without a reload; renames and removals apply in place."""
+    index = LeaderboardIndex(lambda: list(PROFILES), reconcile_interval=3600)
+    index.top()
+    index.update("d", 1700)
+    index.update("f", 1200, "frank")
+    index.rename("b", "bobby")
+    index.update("a", None)
+    top = index.top()
+    assert [(e["rank"], e["user_id"]) for e in top] == [(1, "d"), (2, "b"), (2, "c"), (2, "f")]
+    assert top[0]["username"] == "dana" and top[1]["username"] == "bobby"
+    assert index.stats()["reconciles"] == 1
+    print("✅ Leaderboard updates are applied incrementally")
+
+
+def test_updates_during_reload_are_kept():
+    """A reload that started before an update cannot roll it back."""
+    loading, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_loader():
+        calls.append(1)
+        if len(calls) > 1:
+            loading.set()
+            release.wait(5)
+        return list(PROFILES)
+
+    index = LeaderboardIndex(slow_loader, reconcile_interval=3600)
+    index.top()
+    thread = threading.Thread(target=index.reconcile)
+    thread.start()
+    loading.wait(5)
+    index.update("d", 2100)  # Written after the snapshot was read
+    release.set()
+    thread.join()
+    assert index.top()[0] == {"rank": 1, "user_id": "d", "username": "dana", "elo": 2100, "tier": "Grandmaster Thinker"}
+    assert index.stats()["drift"] == 0
+    print("✅ Updates made during a reload survive it")
+
+
+def test_failed_first_load_is_retried():
+    """A failed first load surfaces to the caller and is retried on the next read."""
+    attempts = []
+
+    def flaky_loader():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("database unavailable")
+        return list(PROFILES)
+
+    index = LeaderboardIndex(flaky_loader, reconcile_interval=3600)
+    try:
+        index.top()
+    except ConnectionError:
+        pass
+    else:
+        raise AssertionError("expected ConnectionError")
+    assert len(index.top()) == 4
+    assert index.stats()["reconcile_errors"] == 1
+    print("✅ A failed first load is retried")
+
+
+def test_rank_and_window():
+    """/leaderboard/me: competition rank and the players around the caller, clipped at both ends."""
+    index = LeaderboardIndex(lambda: list(PROFILES), reconcile_interval=3600)
+    around = index.around("c", window=1)
+    assert around["rank"] == 2 and around["total"] == 4
+    assert [e["user_id"] for e in around["above"]] == ["b"] and [e["user_id"] for e in around["below"]] == ["d"]
+    assert around["above"][0]["rank"] == 2 and around["below"][0]["rank"] == 4
+
+    top = index.around("a", window=10)
+    assert top["rank"] == 1 and top["above"] == [] and len(top["below"]) == 3
+    assert index.around("e") is None  # Unranked
+
+    index.add_if_missing("g", 800, "gina")
+    index.add_if_missing("a", 100)  # Already indexed: left alone
+    assert index.around("g", window=0) == {
+        "rank": 5, "total": 5, "above": [], "below": [],
+        "player": {"rank": 5, "user_id": "g", "username": "gina", "elo": 800, "tier": "Intermediate Thinker"}}
+    assert index.around("a")["player"]["elo"] == 1600
+    print("✅ Rank and window lookups work for any ranked player")
+
+
+if __name__ == "__main__":
+    test_competition_ranks()
+    test_incremental_updates()
+    test_updates_during_reload_are_kept()
+    test_failed_first_load_is_retried()
+    test_rank_and_window()
+    print("🎉 All leaderboard index tests passed!")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Test the write-behind ranked match journal."""
+
+import glob
+import os
+import tempfile
+import threading
+import time
+
+from match_journal import DiscardEvent, JournalError, MatchJournal, read_journal
+
+
+class FakeDatabase:
+    """Applies events once per id, like commit_ranked_result with p_event_id."""
+
+    def __init__(self, fail_times=0):
+        self.applied = {}
+        self.calls = 0
+        self.fail_times = fail_times
+
+    def __call__(self, event):
+        self.calls += 1
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("database unavailable")
+        if event["data"].get("poison"):
+            raise DiscardEvent("profile no longer exists")
+        self.applied.setdefault(event["id"], event["data"])
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for the journal")
+        time.sleep(0.005)
+
+
+def test_appends_are_durable_and_replayed():
+    """append() returns once the event is on disk; the replayer commits and acknowledges it."""
+    with tempfile.TemporaryDirectory() as directory:
+        database = FakeDatabase()
+        journal = MatchJournal(database, directory=directory, scan_interval=3600)
+        threads = [threading.Thread(target=journal.append, args=("ranked_result", {"n": i})) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        _wait_for(lambda: len(database.applied) == 20 and journal.stats()["pending"] == 0)
+        stats = journal.stats()
+        assert stats["appended"] == 20 and stats["replayed"] == 20
+        assert stats["fsyncs"] < 40  # Concurrent appends share fsyncs (events plus acks)
+
+        _wait_for(lambda: read_journal(journal.stats()["path"])[1] == 20)  # Acks land on disk too
+        assert read_journal(journal.stats()["path"])[0] == []
+        assert journal.append("ranked_result", {"n": 20}, event_id="fixed-id") == "fixed-id"
+    print("✅ Appends are durable, replayed and acknowledged")
+
+
+def test_failed_replays_back_off_in_order():
+    """A database outage keeps events on disk; they are retried in order with backoff."""
+    with tempfile.TemporaryDirectory() as directory:
+        database = FakeDatabase(fail_times=3)
+        journal = MatchJournal(database, directory=directory, backoff_base=0.01, backoff_max=0.05, scan_interval=3600)
+        first = journal.append("ranked_result", {"n": 1})
+        second = journal.append("ranked_result", {"n": 2})
+        poison = journal.append("ranked_result", {"poison": True})
+
+        _wait_for(lambda: journal.stats()["pending"] == 0 and journal.stats()["consecutive_failures"] == 0)
+        assert list(database.applied) == [first, second]
+        stats = journal.stats()
+        assert stats["replay_errors"] == 3 and stats["discarded"] == 1 and stats["consecutive_failures"] == 0
+        assert poison not in database.applied
+    print("✅ Failed replays back off and keep order; poison events are discarded")
+
+
+def test_orphaned_files_are_adopted():
+    """Events left by a dead worker are replayed by another process and the file is removed."""
+    with tempfile.TemporaryDirectory() as directory:
+        orphan = os.path.join(directory, "journal-1-0.jsonl")
+        with open(orphan, "w") as f:
+            f.write('{"id":"a","kind":"ranked_result","ts":0,"data":{"n":1}}\n')
+            f.write('{"id":"b","kind":"ranked_result","ts":0,"data":{"n":2}}\n')
+            f.write('{"ack":"a"}\n')
+            f.write('{"id":"c","kind":"ranked_res')  # Torn by the crash
+        assert [e["id"] for e in read_journal(orphan)[0]] == ["b"] and read_journal(orphan)[2] == 1
+
+        database = FakeDatabase()
+        journal = MatchJournal(database, directory=directory)
+        assert journal.adopt_orphans() == 1
+        assert list(database.applied) == ["b"] and not os.path.exists(orphan)
+
+        # A file still locked by a live worker is left alone
+        live = MatchJournal(FakeDatabase(fail_times=10**6), directory=directory, backoff_base=60, scan_interval=3600)
+        live.append("ranked_result", {"n": 3})
+        assert journal.adopt_orphans() == 0 and glob.glob(os.path.join(directory, "journal-*.jsonl"))
+    print("✅ Orphaned journal files are adopted")
+
+
+def test_compaction_and_disabled_journal():
+    """Fully acknowledged files are truncated; a disabled journal refuses appends."""
+    with tempfile.TemporaryDirectory() as directory:
+        journal = MatchJournal(FakeDatabase(), directory=directory, compact_bytes=0, scan_interval=3600)
+        for i in range(5):
+            journal.append("ranked_result", {"n": i})
+        _wait_for(lambda: journal.stats()["compactions"] > 0 and os.path.getsize(journal.stats()["path"]) == 0)
+
+    try:
+        MatchJournal(FakeDatabase(), enabled=False).append("ranked_result", {})
+    except JournalError:
+        pass
+    else:
+        raise AssertionError("expected JournalError from a disabled journal")
+    print("✅ Acknowledged journals are compacted; disabled journals refuse appends")
+
+
+if __name__ == "__main__":
+    test_appends_are_durable_and_replayed()
+    test_failed_replays_back_off_in_order()
+    test_orphaned_files_are_adopted()
+    test_compaction_and_disabled_journal()
+    print("🎉 All match journal tests passed!")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Test keyset pagination of the match history."""
+
+import re
+
+from match_history import MATCH_COLUMNS, CursorError, decode_cursor, encode_cursor, fetch_match_page, keyset_filter
+
+
+class FakeMatches:
+    """Minimal stand-in for supabase.table("matches") that applies the keyset like PostgREST would (desc only)."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+        self.bound = self.after_id = None
+
+    def table(self, name):
+        self.calls.append(("table", name))
+        self.bound = self.after_id = None
+        return self
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.calls.append((name, args))
+            if name == "lte":
+                self.bound = args[1]
+            elif name == "or_":
+                self.after_id = re.search(r'id\.lt\."([^"]+)"', args[0]).group(1)
+            elif name == "limit":
+                self.page_size = args[0]
+            return self
+        return record
+
+    def execute(self):
+        rows = sorted(self.rows, key=lambda r: (r["created_at"], r["id"]), reverse=True)
+        if self.bound is not None:
+            rows = [r for r in rows if (r["created_at"], r["id"]) < (self.bound, self.after_id)]
+
+        class Resp:
+            data = rows[:self.page_size]
+        return Resp()
+
+
+def test_cursor_round_trip():
+    """Cursors encode (created_at, id) and reject anything else."""
+    match = {"created_at": "2024-03-20T12:00:00.123456+00:00", "id": "6f1c"}
+    assert decode_cursor(encode_cursor(match)) == (match["created_at"], "6f1c")
+    for bad in ["", "not-base64!", encode_cursor({"created_at": 1, "id": "x"})]:
+        try:
+            decode_cursor(bad)
+        except CursorError:
+            continue
+        raise AssertionError(f"expected CursorError for {bad!r}")
+
+    # Timestamps are quoted so their ':' and '+' survive PostgREST's filter syntax
+    assert keyset_filter(match["created_at"], "6f1c") == (
+        'created_at.lt."2024-03-20T12:00:00.123456+00:00",'
+        'and(created_at.eq."2024-03-20T12:00:00.123456+00:00",id.lt."6f1c")')
+    print("✅ Cursors round-trip and malformed ones are rejected")
+
+
+def test_pages_cover_history_once():
+    """Walking the cursors returns every match exactly once, including ties on created_at."""
+    rows = [{"id": f"{i:04d}", "created_at": f"2024-01-{1 + i // 3:02d}T00:00:00+00:00"} for i in range(25)]
+    db = FakeMatches(rows)
+    seen, cursor = [], None
+    while True:
+        page, cursor = fetch_match_page(db, "u1", limit=4, cursor=cursor)
+        assert len(page) <= 4
+        seen.extend(page)
+        if cursor is None:
+            break
+    assert [r["id"] for r in seen] == [r["id"] for r in sorted(rows, key=lambda r: (r["created_at"], r["id"]), reverse=True)]
+    assert ("select", (MATCH_COLUMNS,)) in db.calls and ("select", ("*",)) not in db.calls
+    assert ("limit", (5,)) in db.calls
+    print("✅ Keyset pages cover the history exactly once")
+
+
+if __name__ == "__main__":
+    test_cursor_round_trip()
+    test_pages_cover_history_once()
+    print("🎉 All match pagination tests passed!")
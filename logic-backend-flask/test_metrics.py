@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Test the Prometheus-style request and phase metrics."""
+
+import tempfile
+
+from flask import Flask
+
+from metrics import Metrics, route_label
+
+
+def _sample(text, line_start):
+    """Value of the first exposition line starting with line_start."""
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"no sample {line_start!r} in:\n{text}")
+
+
+def test_requests_and_phases_render_as_prometheus_text():
+    """Requests are counted per route template and status; phases are timed per route."""
+    metrics = Metrics(directory="")
+    app = Flask(__name__)
+
+    @app.route("/puzzle/<mode>")
+    def puzzle(mode):
+        with metrics.phase("solver_check"):
+            pass
+        metrics.observe_request(route_label(), "GET", 200, 0.003)
+        return "ok"
+
+    client = app.test_client()
+    client.get("/puzzle/easy")
+    client.get("/puzzle/hard")
+    metrics.observe_request("/puzzle/<mode>", "GET", 500, 0.75)
+    with metrics.phase("db_write"):
+        pass  # Outside a request
+
+    text = metrics.render()
+    assert "# TYPE mindrank_http_requests_total counter" in text
+    assert "# TYPE mindrank_http_request_duration_seconds histogram" in text
+    labels = 'method="GET",route="/puzzle/<mode>",status="200"'
+    assert _sample(text, f"mindrank_http_requests_total{{{labels}}}") == 2
+    assert _sample(text, f'mindrank_http_request_duration_seconds_bucket{{{labels},le="0.0025"}}') == 0
+    assert _sample(text, f'mindrank_http_request_duration_seconds_bucket{{{labels},le="0.005"}}') == 2
+    assert _sample(text, f'mindrank_http_request_duration_seconds_bucket{{{labels},le="+Inf"}}') == 2
+    assert _sample(text, f"mindrank_http_request_duration_seconds_sum{{{labels}}}") == 0.006
+    errors = 'method="GET",route="/puzzle/<mode>",status="500"'
+    assert _sample(text, f'mindrank_http_request_duration_seconds_bucket{{{errors},le="0.5"}}') == 0
+    assert _sample(text, f'mindrank_http_request_duration_seconds_bucket{{{errors},le="1"}}') == 1
+    assert _sample(text, 'mindrank_phase_duration_seconds_count{phase="solver_check",route="/puzzle/<mode>"}') == 2
+    assert _sample(text, 'mindrank_phase_duration_seconds_count{phase="db_write",route="background"}') == 1
+    print("✅ Requests and phases render as Prometheus text")
+
+
+def test_workers_are_merged():
+    """The worker answering a scrape adds the other workers' snapshots to its own counts."""
+    with tempfile.TemporaryDirectory() as directory:
+        first, second = Metrics(directory=directory), Metrics(directory=directory)
+        first.observe_request("/leaderboard", "GET", 200, 0.01)
+        first.flush()
+        second.observe_request("/leaderboard", "GET", 200, 0.02)
+        second.observe_request("/leaderboard", "GET", 200, 0.02)
+        sample = 'mindrank_http_requests_total{method="GET",route="/leaderboard",status="200"}'
+        assert _sample(second.render(), sample) == 3
+        assert _sample(first.render(), sample) == 1  # second has not flushed yet
+        second.flush()
+        assert _sample(first.render(), sample) == 3
+    print("✅ Metrics are merged across workers")
+
+
+def test_disabled_metrics_record_nothing():
+    """METRICS_ENABLED=false turns recording off."""
+    metrics = Metrics(directory="", enabled=False)
+    metrics.observe_request("/", "GET", 200, 0.1)
+    with metrics.phase("auth"):
+        pass
+    assert "mindrank_http_requests_total{" not in metrics.render()
+    print("✅ Disabled metrics record nothing")
+
+
+if __name__ == "__main__":
+    test_requests_and_phases_render_as_prometheus_text()
+    test_workers_are_merged()
+    test_disabled_metrics_record_nothing()
+    print("🎉 All metrics tests passed!")
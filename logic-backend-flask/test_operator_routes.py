@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Test that the operator routes need the METRICS_TOKEN bearer token."""
+
+import contextlib
+import io
+import os
+
+os.environ.setdefault("PUZZLE_POOL_ENABLED", "false")
+os.environ.setdefault("SOLVER_POOL_ENABLED", "false")
+os.environ.setdefault("MATCH_JOURNAL_ENABLED", "false")
+with contextlib.redirect_stdout(io.StringIO()):
+    import app
+
+OPERATOR_ROUTES = ["/metrics", "/debug/generation", "/puzzle/pool/stats"]
+
+
+@contextlib.contextmanager
+def metrics_token(token):
+    saved = app.METRICS_TOKEN
+    app.METRICS_TOKEN = token
+    try:
+        yield
+    finally:
+        app.METRICS_TOKEN = saved
+
+
+def test_operator_routes_need_token():
+    """Refused while METRICS_TOKEN is unset, and without the right bearer token once it is set."""
+    client = app.app.test_client()
+    for route in OPERATOR_ROUTES:
+        with metrics_token(""):
+            assert client.get(route, headers={"Authorization": "Bearer "}).status_code == 403, route
+        with metrics_token("scrape-secret"):
+            assert client.get(route).status_code == 401, route
+            assert client.get(route, headers={"Authorization": "Bearer wrong"}).status_code == 401, route
+            assert client.get(route, headers={"Authorization": "Bearer scrape-secret"}).status_code == 200, route
+    print("✅ Operator routes need the METRICS_TOKEN bearer token")
+
+
+if __name__ == "__main__":
+    test_operator_routes_need_token()
+    print("🎉 All operator route tests passed!")
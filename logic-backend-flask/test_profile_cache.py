@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Test the per-worker profile cache."""
+
+import time
+
+from profile_cache import ProfileCache
+
+
+def test_hits_copies_and_hit_rate():
+    """Cached profiles are returned as copies and counted as hits."""
+    cache = ProfileCache(ttl=60)
+    assert cache.get("u1") is None
+    cache.set("u1", {"user_id": "u1", "elo": 1200}, time.monotonic())
+
+    profile = cache.get("u1")
+    profile["elo"] = 0  # Handlers may modify their copy
+    assert cache.get("u1")["elo"] == 1200
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 1 and abs(stats["hit_rate"] - 2 / 3) < 1e-9
+    print("✅ Cache hits return copies and are counted")
+
+
+def test_ttl_and_lru():
+    """Entries expire after the TTL and the least recently used entry is evicted."""
+    cache = ProfileCache(ttl=60, max_entries=2)
+    for user_id in ["a", "b"]:
+        cache.set(user_id, {"user_id": user_id}, time.monotonic())
+    assert cache.get("a") is not None  # 'a' is now the most recently used
+    cache.set("c", {"user_id": "c"}, time.monotonic())
+    assert cache.get("b") is None and cache.get("a") is not None
+
+    short = ProfileCache(ttl=0.01)
+    short.set("a", {"user_id": "a"}, time.monotonic())
+    time.sleep(0.02)
+    assert short.get("a") is None and short.stats()["expirations"] == 1
+    print("✅ Cache honours TTL and LRU order")
+
+
+def test_invalidation_beats_in_flight_reads():
+    """A read that started before a write cannot re-cache the old profile."""
+    cache = ProfileCache(ttl=60)
+    cache.set("u1", {"elo": 1200}, time.monotonic())
+
+    fetched_at = time.monotonic()  # Slow read starts...
+    cache.invalidate("u1")         # ...a write lands...
+    cache.set("u1", {"elo": 1200}, fetched_at)  # ...and the read finishes with the old value
+    assert cache.get("u1") is None and cache.stats()["stale_stores"] == 1
+
+    cache.set("u1", {"elo": 1216}, time.monotonic())
+    assert cache.get("u1") == {"elo": 1216}
+    print("✅ Writes invalidate cached and in-flight profiles")
+
+
+if __name__ == "__main__":
+    test_hits_copies_and_hit_rate()
+    test_ttl_and_lru()
+    test_invalidation_beats_in_flight_reads()
+    print("🎉 All profile cache tests passed!")
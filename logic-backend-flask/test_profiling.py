@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Test opt-in request profiling and the spool merge."""
+
+import json
+import os
+import tempfile
+import time
+
+from flask import Flask, jsonify, request
+
+import profiling
+from profiling import RequestProfiler, iter_profiles, merge_profiles, read_profile
+
+
+def slow_step():
+    deadline = time.perf_counter() + 0.02
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _make_app(profiler):
+    app = Flask(__name__)
+    app.before_request(profiler.start)
+    app.after_request(profiler.finish)
+    app.teardown_request(profiler.abort)
+
+    @app.route("/puzzle/generate", methods=["GET", "POST"])
+    def generate():
+        slow_step()
+        if request.method == "POST":
+            profiler.tag(mode="hard", num_players=6)
+        return jsonify({"ok": True})
+
+    @app.route("/leaderboard")
+    def leaderboard():
+        return jsonify([])
+
+    return app
+
+
+def test_admin_header():
+    """Only the admin token turns profiling on; the profile is tagged and named in the response."""
+    spool = tempfile.mkdtemp()
+    profiler = RequestProfiler(directory=spool, admin_token="secret", rates={})
+    client = _make_app(profiler).test_client()
+
+    assert profiling.ID_HEADER not in client.get("/puzzle/generate?mode=easy&players=4").headers
+    assert profiling.ID_HEADER not in client.get("/puzzle/generate", headers={"X-Profile": "wrong"}).headers
+    response = client.get("/puzzle/generate?mode=extreme&players=8", headers={"X-Profile": "secret"})
+
+    name = response.headers[profiling.ID_HEADER]
+    assert os.listdir(spool) == [name] and "-puzzle_generate-extreme-8-" in name
+    header, counts = read_profile(os.path.join(spool, name))
+    assert (header["route"], header["method"], header["mode"], header["num_players"], header["status"]) == \
+        ("/puzzle/generate", "GET", "extreme", "8", 200)
+    assert header["unit"] == "samples" and any("slow_step" in stack for stack in counts)
+    assert profiler.stats()["requested"] == 1 and profiler.stats()["rejected"] == 1
+    print("✅ The admin header profiles a request with its tags")
+
+
+def test_trace_mode_and_tags():
+    """The tracing profiler records exact stacks; handler tags override the request's."""
+    spool = tempfile.mkdtemp()
+    profiler = RequestProfiler(directory=spool, admin_token="secret", rates={})
+    client = _make_app(profiler).test_client()
+    client.post("/puzzle/generate", json={"mode": "ranked"}, headers={"X-Profile": "secret", "X-Profile-Mode": "trace"})
+
+    [(path, header, counts)] = list(iter_profiles(spool))
+    assert header["profiler"] == "trace" and header["unit"] == "us"
+    assert header["mode"] == "hard" and header["num_players"] == 6
+    slow = sum(weight for stack, weight in counts.items() if stack.split(";")[-1].startswith("slow_step"))
+    assert slow >= 15000  # ~20ms of busy loop, in microseconds
+    assert any("generate (test_profiling.py" in stack.split(";")[-2] for stack in counts if "slow_step" in stack)
+    print("✅ Trace mode records exact stacks and handler tags")
+
+
+def test_sampling_and_pruning():
+    """Sampled routes are profiled without the header, and the spool keeps the newest files."""
+    spool = tempfile.mkdtemp()
+    profiler = RequestProfiler(directory=spool, rates={"/puzzle/generate": 1.0}, max_files=3)
+    client = _make_app(profiler).test_client()
+    for _ in range(5):
+        client.get("/puzzle/generate?mode=easy&players=4")
+        time.sleep(0.002)
+    client.get("/leaderboard")
+    names = sorted(os.listdir(spool))
+    assert len(names) == 3 and all("puzzle_generate" in name for name in names)
+    assert profiler.stats()["sampled"] == 5 and profiler.stats()["active"] == 0
+    assert not RequestProfiler(directory=spool, admin_token="", rates={}).enabled
+    print("✅ Sampled routes are profiled and the spool is pruned")
+
+
+def test_merge():
+    """Merging filters by tag, converts samples to microseconds and can group by tags."""
+    spool = tempfile.mkdtemp()
+    files = {
+        "1-1-a-hard-6-x.folded": ({"route": "/puzzle/generate", "mode": "hard", "num_players": 6,
+                                   "unit": "samples", "interval": 0.001}, "main;generate;solve 3\nmain;generate 1\n"),
+        "2-1-a-hard-6-y.folded": ({"route": "/puzzle/generate", "mode": "hard", "num_players": 6,
+                                   "unit": "us", "interval": None}, "main;generate;solve 500\n"),
+        "3-1-a-easy-4-z.folded": ({"route": "/puzzle/generate", "mode": "easy", "num_players": 4,
+                                   "unit": "us", "interval": None}, "main;generate 100\n"),
+    }
+    for name, (header, body) in files.items():
+        with open(os.path.join(spool, name), "w") as f:
+            f.write(profiling.HEADER_PREFIX + json.dumps(header) + "\n" + body)
+
+    assert merge_profiles(iter_profiles(spool, mode="hard", players=6)) == {
+        "main;generate;solve": 3500, "main;generate": 1000}
+    grouped = merge_profiles(iter_profiles(spool, route="/puzzle/generate"), group_by=("mode",))
+    assert grouped["mode=easy;main;generate"] == 100 and grouped["mode=hard;main;generate;solve"] == 3500
+    print("✅ Spools merge into one flamegraph input")
+
+
+if __name__ == "__main__":
+    test_admin_header()
+    test_trace_mode_and_tags()
+    test_sampling_and_pruning()
+    test_merge()
+    print("🎉 All profiling tests passed!")
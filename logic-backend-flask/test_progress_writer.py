@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Test the background progress increment queue."""
+
+import threading
+
+from progress_writer import ProgressWriter
+
+
+class FakeRPC:
+    """Applies increments like increment_puzzle_progress: add, then cap at 10."""
+
+    def __init__(self, fail_times=0):
+        self.rows = {}
+        self.calls = []
+        self.fail_times = fail_times
+
+    def __call__(self, user_id, increments):
+        self.calls.append((user_id, increments))
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("database unavailable")
+        row = self.rows.setdefault(user_id, {})
+        for column, amount in increments.items():
+            row[column] = min(10, row.get(column, 0) + amount)
+
+
+def test_increments_are_merged_per_user():
+    """Everything queued for a user between flushes becomes one RPC call."""
+    rpc, flushed = FakeRPC(), []
+    writer = ProgressWriter(rpc, on_flushed=flushed.append, interval=3600)
+    writer.increment("u1", "easy_puzzles_solved")
+    writer.increment("u1", "easy_puzzles_solved")
+    writer.increment("u1", "master_hard_puzzles_solved")
+    writer.increment("u2", "medium_puzzles_solved")
+
+    profile = {"user_id": "u1", "easy_puzzles_solved": 9}
+    assert writer.pending("u1", "easy_puzzles_solved") == 2
+    assert writer.optimistic_count(profile, "easy_puzzles_solved") == 10  # Capped like the database
+
+    writer.flush()
+    assert sorted(rpc.calls) == [("u1", {"easy_puzzles_solved": 2, "master_hard_puzzles_solved": 1}),
+                                 ("u2", {"medium_puzzles_solved": 1})]
+    assert sorted(flushed) == ["u1", "u2"] and writer.pending("u1", "easy_puzzles_solved") == 0
+    assert writer.stats()["coalesced"] == 2
+
+    try:
+        writer.increment("u1", "elo")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError for a non-progress column")
+    print("✅ Progress increments are merged into one RPC per user")
+
+
+def test_concurrent_increments_are_not_lost():
+    """Concurrent solves each count, unlike the old read-modify-write."""
+    rpc = FakeRPC()
+    writer = ProgressWriter(rpc, interval=3600)
+    threads = [threading.Thread(target=writer.increment, args=("u1", "hard_puzzles_solved")) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.flush()
+    assert rpc.rows["u1"]["hard_puzzles_solved"] == 8 and len(rpc.calls) == 1
+    print("✅ Concurrent increments are all applied")
+
+
+def test_failed_flush_is_retried_then_dropped():
+    """Failed writes are re-queued up to the retry limit."""
+    rpc = FakeRPC(fail_times=1)
+    writer = ProgressWriter(rpc, interval=3600, retries=1)
+    writer.increment("u1", "easy_puzzles_solved")
+    writer.flush()
+    assert writer.pending("u1", "easy_puzzles_solved") == 1
+    writer.flush()
+    assert rpc.rows["u1"]["easy_puzzles_solved"] == 1
+
+    rpc.fail_times = 2
+    writer.increment("u1", "easy_puzzles_solved")
+    writer.flush()
+    writer.flush()
+    assert writer.pending("u1", "easy_puzzles_solved") == 0
+    assert writer.stats()["dropped"] == 1 and writer.stats()["retries"] == 2
+    print("✅ Failed flushes are retried, then dropped")
+
+
+def test_disabled_queue_writes_inline():
+    """With the queue disabled the RPC runs on the caller's thread."""
+    rpc = FakeRPC()
+    writer = ProgressWriter(rpc, enabled=False)
+    writer.increment("u1", "extreme_puzzles_solved")
+    assert rpc.calls == [("u1", {"extreme_puzzles_solved": 1})]
+    print("✅ Disabled queue writes inline")
+
+
+if __name__ == "__main__":
+    test_increments_are_merged_per_user()
+    test_concurrent_increments_are_not_lost()
+    test_failed_flush_is_retried_then_dropped()
+    test_disabled_queue_writes_inline()
+    print("🎉 All progress writer tests passed!")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Test the offline puzzle bank encoding, its files and the build script."""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+
+import build_puzzle_bank
+import puzzle_bank
+import puzzle_solver
+import statement_compiler
+
+build_puzzle_bank._init_worker()
+
+
+class InlinePool:
+    """Runs build_puzzle_bank chunks in this process instead of a multiprocessing.Pool."""
+
+    def imap_unordered(self, func, iterable):
+        return map(func, iterable)
+
+
+def _generate(mode, num_players):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return build_puzzle_bank.GENERATORS[mode](num_players)
+
+
+def _canonical(statement):
+    """GROUP members are stored as a bitmask, so only their set survives the round trip."""
+    if statement["mode"] == "GROUP":
+        return {**statement, "members": sorted(statement["members"])}
+    return statement
+
+
+def _build(directory, mode, num_players, count):
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        build_puzzle_bank.build_file(InlinePool(), directory, mode, num_players, count, chunk_size=2)
+    return os.path.join(directory, puzzle_bank.bank_filename(mode, num_players))
+
+
+def test_round_trip_per_mode_and_size():
+    """Every mode and size decodes to the generated puzzle, with the same unique solution."""
+    for mode in puzzle_bank.MODE_CODES:
+        for num_players in range(puzzle_bank.MIN_PLAYERS, puzzle_bank.MAX_PLAYERS + 1):
+            for _ in range(3):
+                puzzle = _generate(mode, num_players)
+                assert build_puzzle_bank.verify(mode, puzzle), (mode, num_players)
+                record = puzzle_bank.encode_puzzle(puzzle)
+                assert len(record) == puzzle_bank.record_size(num_players)
+
+                decoded = puzzle_bank.decode_puzzle(record, mode, num_players, puzzle["num_truth_tellers"], 7)
+                assert decoded["puzzle_id"] == f"{mode}_{num_players}_bank7"
+                assert decoded["solution"] == puzzle["solution"]
+                assert decoded["statement_data"] == puzzle["statement_data"]
+                full = puzzle.get("full_statement_data") or puzzle["statement_data"]
+                if mode == "easy":
+                    assert "full_statement_data" not in decoded
+                else:
+                    assert decoded["full_statement_data"] == {p: _canonical(st) for p, st in full.items()}
+                    for p, st in full.items():
+                        if st["mode"] != "GROUP":
+                            assert decoded["statements"][p] == puzzle["statements"][p]
+                statements = decoded.get("full_statement_data") or decoded["statement_data"]
+                assert puzzle_solver.solve(statement_compiler.compile_puzzle(statements, decoded["num_truth_tellers"])) == puzzle["solution"]
+    print("✅ Puzzles of every mode and size round-trip through the bank encoding")
+
+
+def test_bank_file_header_and_truncation():
+    """The build writes a header with the final count; a file cut short serves only its whole records."""
+    directory = tempfile.mkdtemp()
+    try:
+        path = _build(directory, "medium", 5, 5)
+        assert not os.path.exists(path + ".tmp")
+        bank_file = puzzle_bank.BankFile(path)
+        assert (bank_file.mode, bank_file.num_players, bank_file.num_truth_tellers) == ("medium", 5, 3)
+        assert bank_file.count == 5 and bank_file.record_size == puzzle_bank.record_size(5)
+        assert os.path.getsize(path) == puzzle_bank.HEADER.size + 5 * bank_file.record_size
+        puzzles = [bank_file.puzzle(i) for i in range(5)]
+        for puzzle in puzzles:
+            assert puzzle_solver.solve(statement_compiler.compile_puzzle(puzzle["full_statement_data"], 3)) == puzzle["solution"]
+
+        # The header still says 5, but only 3 whole records are left
+        with open(path, "r+b") as f:
+            f.truncate(puzzle_bank.HEADER.size + 3 * bank_file.record_size + 4)
+        truncated = puzzle_bank.BankFile(path)
+        assert truncated.count == 3 and truncated.puzzle(2) == puzzles[2]
+        assert truncated.random_puzzle() in puzzles[:3]
+    finally:
+        shutil.rmtree(directory)
+    print("✅ Bank files carry their header and survive truncation")
+
+
+def test_missing_or_corrupt_bank_falls_back():
+    """A missing directory, a corrupt file or an empty file leaves those sizes to the generators."""
+    assert puzzle_bank.PuzzleBank(os.path.join(tempfile.gettempdir(), "no-such-bank")).get("easy", 4) is None
+
+    directory = tempfile.mkdtemp()
+    try:
+        _build(directory, "easy", 4, 3)
+        _build(directory, "hard", 6, 2)
+        with open(os.path.join(directory, puzzle_bank.bank_filename("hard", 6)), "r+b") as f:
+            f.write(b"JUNK")  # Bad magic
+        with open(os.path.join(directory, puzzle_bank.bank_filename("medium", 5)), "wb") as f:
+            f.write(b"MRPB")  # Shorter than a header
+        with open(os.path.join(directory, puzzle_bank.bank_filename("extreme", 7)), "wb") as f:
+            f.write(puzzle_bank.HEADER.pack(puzzle_bank.MAGIC, puzzle_bank.VERSION, 3, 7, 4, 0))
+
+        bank = puzzle_bank.PuzzleBank(directory)
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert bank.stats() == {"easy:4": 3}
+        assert bank.get("EASY", "4")["puzzle_id"].startswith("easy_4_bank")
+        for mode, players in [("hard", 6), ("medium", 5), ("extreme", 7), ("easy", 5), ("easy", "four")]:
+            assert bank.get(mode, players) is None, (mode, players)
+    finally:
+        shutil.rmtree(directory)
+    print("✅ Missing and corrupt bank files fall back to generation")
+
+
+if __name__ == "__main__":
+    test_round_trip_per_mode_and_size()
+    test_bank_file_header_and_truncation()
+    test_missing_or_corrupt_bank_falls_back()
+    print("🎉 All puzzle bank tests passed!")
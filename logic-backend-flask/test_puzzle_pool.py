@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Test the per-process pool of pre-generated puzzles."""
+
+import itertools
+import threading
+import time
+
+from puzzle_pool import PuzzlePool
+
+
+class FakeGenerator:
+    """Numbered puzzles per (mode, num_players); the refill thread waits while `paused` is clear."""
+
+    def __init__(self):
+        self.counter = itertools.count()
+        self.calls = []
+        self.paused = threading.Event()
+        self.paused.set()
+
+    def __call__(self, mode, num_players):
+        refill = threading.current_thread().name == "puzzle-pool-refill"
+        if refill:
+            self.paused.wait()
+        if num_players > 8:
+            raise ValueError(f"Unsupported player count: {num_players}")
+        self.calls.append((mode, num_players, "refill" if refill else "sync"))
+        return {"mode": mode, "num_players": num_players, "n": next(self.counter), "refill": refill}
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.005)
+
+
+def _size(pool, key):
+    return pool.stats()["sizes"].get(key, 0)
+
+
+def test_refill_between_watermarks():
+    """A queue is topped up to the high watermark only once it drops below the low one."""
+    generate = FakeGenerator()
+    pool = PuzzlePool(generate, low_watermark=2, high_watermark=4, enabled=True)
+    pool.register("easy", 4)
+
+    pool.get("easy", 4)  # Empty: generated synchronously, and starts the refill thread
+    _wait_for(lambda: _size(pool, "easy:4") == 4)
+    refills = pool.stats()["refills"]
+    assert refills == 4
+
+    # Down to the low watermark: no refill yet
+    assert pool.get("easy", 4)["refill"] and pool.get("easy", 4)["refill"]
+    time.sleep(0.05)
+    assert _size(pool, "easy:4") == 2 and pool.stats()["refills"] == refills
+
+    # Below it: refilled all the way up again
+    pool.get("easy", 4)
+    _wait_for(lambda: _size(pool, "easy:4") == 4)
+    stats = pool.stats()
+    assert stats["refills"] == refills + 3 and stats["hits"] == 3 and stats["misses"] == 1
+    print("✅ Queues refill from below the low watermark up to the high watermark")
+
+
+def test_drained_queue_falls_back_to_generation():
+    """An empty queue is a miss served synchronously, and generator errors reach the caller."""
+    generate = FakeGenerator()
+    generate.paused.clear()  # The refill thread never gets a puzzle in
+    pool = PuzzlePool(generate, low_watermark=2, high_watermark=4, enabled=True)
+    pool.register("medium", 5)
+    for _ in range(3):
+        puzzle = pool.get("medium", 5)
+        assert not puzzle["refill"] and (puzzle["mode"], puzzle["num_players"]) == ("medium", 5)
+    stats = pool.stats()
+    assert stats["hits"] == 0 and stats["misses"] == 3 and stats["hit_rate"] == 0
+
+    try:
+        pool.get("medium", 9)
+        raise AssertionError("expected the generator's error")
+    except ValueError as e:
+        assert "9" in str(e)
+
+    disabled = PuzzlePool(generate, enabled=False)
+    disabled.register("easy", 4)
+    assert not disabled.get("easy", 4)["refill"] and disabled.stats()["sizes"] == {}
+    generate.paused.set()
+    print("✅ Drained queues fall back to synchronous generation")
+
+
+def test_queues_per_mode_and_size():
+    """Each (mode, num_players) has its own queue; mode case and player count type don't matter."""
+    generate = FakeGenerator()
+    pool = PuzzlePool(generate, low_watermark=1, high_watermark=2, enabled=True)
+    pool.register("easy", 4)
+    pool.register("hard", 6)
+    pool.get("easy", 4)
+    _wait_for(lambda: _size(pool, "easy:4") == 2 and _size(pool, "hard:6") == 2)
+    assert set(pool.stats()["sizes"]) == {"easy:4", "hard:6"}
+
+    for mode, players in [("easy", 4), ("Easy", "4"), ("hard", 6)]:
+        puzzle = pool.get(mode, players)
+        assert puzzle["refill"] and (puzzle["mode"], puzzle["num_players"]) == (mode.lower(), int(players))
+    assert set(call[:2] for call in generate.calls) == {("easy", 4), ("hard", 6)}
+    print("✅ Puzzles are pooled per mode and size")
+
+
+def test_unregistered_sizes_are_not_pooled():
+    """A (mode, num_players) that wasn't registered is generated synchronously and never queued."""
+    generate = FakeGenerator()
+    pool = PuzzlePool(generate, low_watermark=1, high_watermark=2, enabled=True)
+    pool.register("easy", 4)
+    pool.get("easy", 4)
+    _wait_for(lambda: _size(pool, "easy:4") == 2)
+    sizes = pool.stats()["sizes"]
+
+    for mode, players in [("easy", 7), ("medium", 4), ("easy", 12)]:
+        if players > 8:
+            try:
+                pool.get(mode, players)
+                raise AssertionError("expected the generator's error")
+            except ValueError:
+                pass
+        else:
+            assert not pool.get(mode, players)["refill"]
+    time.sleep(0.05)
+    stats = pool.stats()
+    assert stats["sizes"] == sizes and stats["unpooled"] == 3 and stats["misses"] == 1
+    assert all(call[:2] == ("easy", 4) for call in generate.calls if call[2] == "refill")
+    print("✅ Unregistered sizes are generated without a queue")
+
+
+if __name__ == "__main__":
+    test_refill_between_watermarks()
+    test_drained_queue_falls_back_to_generation()
+    test_queues_per_mode_and_size()
+    test_unregistered_sizes_are_not_pooled()
+    print("🎉 All puzzle pool tests passed!")
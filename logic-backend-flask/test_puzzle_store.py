@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Test the server-side puzzle store."""
+
+import itertools
+import time
+
+import hard_mode
+import puzzle_solver
+from puzzle_store import MemoryBackend, PuzzleStore
+
+
+def generate_hard(num_players, tries=5):
+    """Generate a hard puzzle, retrying the occasional generator RuntimeError."""
+    for _ in range(tries - 1):
+        try:
+            return hard_mode.api_generate_hard(num_players)
+        except RuntimeError:
+            continue
+    return hard_mode.api_generate_hard(num_players)
+
+
+def test_check_matches_truth_table():
+    """Stored checks agree with the truth-table engine for full and partial guesses."""
+    store = PuzzleStore()
+    puzzle = generate_hard(5)
+    original_id = puzzle["puzzle_id"]
+    puzzle_id = store.put(puzzle, "hard")
+    assert puzzle_id and puzzle["puzzle_id"] == puzzle_id != original_id
+
+    entry = store.get(puzzle_id)
+    people = entry["people"]
+    for values in itertools.product([True, False, None], repeat=len(people)):
+        guess = dict(zip(people, values))
+        known = {p: v for p, v in guess.items() if v is not None}
+        expected = puzzle_solver.check_puzzle(puzzle["full_statement_data"], puzzle["num_truth_tellers"], known)
+        assert store.check(entry, guess) == expected, guess
+    assert store.solution(entry) == puzzle["solution"]
+    print("✅ Stored checks match the truth-table engine")
+
+
+def test_complete_checks():
+    """Ranked (complete) checks need a boolean for every player; partial guesses never match."""
+    store = PuzzleStore()
+    puzzle = generate_hard(5)
+    entry = store.get(store.put(puzzle, "ranked", user_id="user-1"))
+    assert entry["user_id"] == "user-1" and entry["issued_at"] <= time.time()
+
+    assert store.check(entry, puzzle["solution"], complete=True)
+    partial = dict(puzzle["solution"])
+    partial.pop(entry["people"][0])
+    for guess in [{}, partial, {**puzzle["solution"], entry["people"][0]: None}, {p: 1 for p in entry["people"]}]:
+        assert store.check(entry, {}) and not store.check(entry, guess, complete=True), guess
+    print("✅ Complete checks reject partial guesses")
+
+
+def test_memory_backend_ttl_and_lru():
+    """Entries expire after their TTL and the least recently used entry is evicted."""
+    backend = MemoryBackend(max_entries=2)
+    backend.set("a", 1, ttl=60)
+    backend.set("b", 2, ttl=60)
+    assert backend.get("a") == 1  # 'a' is now the most recently used
+    backend.set("c", 3, ttl=60)
+    assert backend.get("b") is None
+    assert backend.get("a") == 1 and backend.get("c") == 3
+
+    backend.set("short", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert backend.get("short") is None
+    print("✅ Memory backend honours TTL and LRU order")
+
+
+def test_shared_backend_is_used_across_stores():
+    """A puzzle stored by one worker can be checked by another through the shared backend."""
+    shared = MemoryBackend()
+    worker_a = PuzzleStore(shared=shared)
+    worker_b = PuzzleStore(shared=shared)
+    puzzle = generate_hard(4)
+    puzzle_id = worker_a.put(puzzle, "hard")
+
+    entry = worker_b.get(puzzle_id)
+    assert entry is not None
+    assert worker_b.check(entry, puzzle["solution"])
+    assert worker_b.get("hard_4_unknown") is None
+    print("✅ Shared backend makes puzzles visible to every worker")
+
+
+if __name__ == "__main__":
+    test_check_matches_truth_table()
+    test_complete_checks()
+    test_memory_backend_ttl_and_lru()
+    test_shared_backend_is_used_across_stores()
+    print("🎉 All puzzle store tests passed!")
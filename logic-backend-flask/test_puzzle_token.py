@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Test signed puzzle tokens."""
+
+import itertools
+
+import jwt
+
+import medium_mode
+import puzzle_solver
+import puzzle_token
+
+SECRET = "test-secret"
+
+
+def generate_medium(num_players, tries=5):
+    """Generate a medium puzzle, retrying the occasional generator RuntimeError."""
+    for _ in range(tries - 1):
+        try:
+            return medium_mode.api_generate_medium(num_players)
+        except RuntimeError:
+            continue
+    return medium_mode.api_generate_medium(num_players)
+
+
+def test_token_grades_every_guess():
+    """Only complete guesses that solve the puzzle are accepted."""
+    puzzle = generate_medium(5)
+    token = puzzle_token.issue(puzzle, "medium", user_id="user-1", secret=SECRET)
+    claims = puzzle_token.verify(token, secret=SECRET)
+    assert claims["m"] == "medium" and claims["n"] == 5 and claims["sub"] == "user-1"
+
+    people = claims["p"]
+    for values in itertools.product([True, False], repeat=len(people)):
+        guess = dict(zip(people, values))
+        expected = puzzle_solver.check_puzzle(puzzle["full_statement_data"], puzzle["num_truth_tellers"], guess)
+        assert puzzle_token.check(claims, guess, secret=SECRET) == expected, guess
+
+    partial = dict(puzzle["solution"])
+    partial["A"] = None
+    assert not puzzle_token.check(claims, partial, secret=SECRET)
+    print("✅ Token checks match the truth-table engine")
+
+
+def test_token_does_not_reveal_solution():
+    """The payload only holds keyed hashes, not the assignment."""
+    puzzle = generate_medium(4)
+    token = puzzle_token.issue(puzzle, "medium", secret=SECRET)
+    payload = jwt.decode(token, options={"verify_signature": False})
+    assert "solution" not in payload
+    assert all(len(h) == puzzle_token.PUZZLE_TOKEN_HASH_LENGTH for h in payload["s"])
+    print("✅ Token payload hides the solution")
+
+
+def test_tampered_and_expired_tokens_are_rejected():
+    """Changing the payload, the secret or the audience, or letting the token expire, invalidates it."""
+    puzzle = generate_medium(4)
+    token = puzzle_token.issue(puzzle, "medium", secret=SECRET)
+
+    forged_claims = jwt.decode(token, options={"verify_signature": False})
+    forged_claims["m"] = "ranked"
+    forged = jwt.encode(forged_claims, "wrong-secret", algorithm="HS256")
+    expired = puzzle_token.issue(puzzle, "medium", secret=SECRET, now=0)
+    login = jwt.encode({**forged_claims, "aud": "authenticated"}, SECRET, algorithm="HS256")
+    no_audience = jwt.encode({k: v for k, v in forged_claims.items() if k != "aud"}, SECRET, algorithm="HS256")
+
+    for bad in [forged, expired, login, no_audience, token + "x", "", None]:
+        try:
+            puzzle_token.verify(bad, secret=SECRET)
+        except puzzle_token.InvalidPuzzleToken:
+            continue
+        raise AssertionError(f"token should have been rejected: {bad!r}")
+    assert puzzle_token.is_puzzle_token(token) and not puzzle_token.is_puzzle_token(login)
+    print("✅ Tampered and expired tokens are rejected")
+
+
+def test_elapsed_seconds_uses_issue_time():
+    """time_taken comes from the signed issue time."""
+    puzzle = generate_medium(4)
+    token = puzzle_token.issue(puzzle, "ranked", secret=SECRET, now=1000)
+    claims = jwt.decode(token, SECRET, algorithms=["HS256"], audience=puzzle_token.PUZZLE_TOKEN_AUDIENCE,
+                        options={"verify_exp": False})
+    assert puzzle_token.elapsed_seconds(claims, now=1042) == 42
+    assert puzzle_token.elapsed_seconds(claims, now=900) == 0
+    print("✅ Elapsed time is taken from the token")
+
+
+if __name__ == "__main__":
+    test_token_grades_every_guess()
+    test_token_does_not_reveal_solution()
+    test_tampered_and_expired_tokens_are_rejected()
+    test_elapsed_seconds_uses_issue_time()
+    print("🎉 All puzzle token tests passed!")
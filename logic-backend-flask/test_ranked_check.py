@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""Test that ranked /puzzle/check only grades the server's copy of a puzzle."""
+
+import contextlib
+import io
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+import jwt
+
+os.environ.setdefault("PUZZLE_POOL_ENABLED", "false")
+os.environ.setdefault("SOLVER_POOL_ENABLED", "false")
+os.environ.setdefault("MATCH_JOURNAL_ENABLED", "false")
+with contextlib.redirect_stdout(io.StringIO()):
+    import app
+import puzzle_token
+from match_journal import MatchJournal
+
+
+@contextlib.contextmanager
+def signed_in():
+    """Accept any bearer token as the user id it names."""
+    verify_jwt = app.verify_jwt
+    app.verify_jwt = lambda token: {"sub": token, "email": f"{token}@example.com"}
+    try:
+        yield
+    finally:
+        app.verify_jwt = verify_jwt
+
+
+@contextlib.contextmanager
+def ranked_backend(profile, commit, journal=None):
+    """
+    Stand in for Supabase: every profile read returns `profile` and ranked commits go to `commit`.
+
+    Results are committed on the request thread unless a journal is given.
+    """
+    saved = app.supabase, app.get_or_create_user_profile, app.commit_ranked_result, app.match_journal
+    app.supabase = object()
+    app.get_or_create_user_profile = lambda user_id, email, use_cache=True: dict(profile, user_id=user_id)
+    app.commit_ranked_result = commit
+    app.match_journal = journal or MatchJournal(enabled=False)
+    try:
+        yield
+    finally:
+        app.supabase, app.get_or_create_user_profile, app.commit_ranked_result, app.match_journal = saved
+
+
+RANKED_PROFILE = {"elo": 1200, "hidden_elo": None, "placement_matches_completed": 5, "is_ranked": True,
+                  "username": "player"}
+
+
+def _committed(profile, is_placement, delta):
+    return {**app.predict_ranked_commit(profile, is_placement, delta), "match_id": 1, "duplicate": False}
+
+
+def _ranked_puzzle(client, user="user-1"):
+    response = client.post("/puzzle/generate", json={"mode": "ranked"}, headers={"Authorization": f"Bearer {user}"})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    puzzle = response.get_json()
+    entry = app.puzzle_store.get(puzzle["puzzle_id"])
+    return puzzle, app.puzzle_store.solution(entry)
+
+
+def _check(client, body, user="user-1"):
+    return client.post("/puzzle/check", json={"mode": "ranked", **body}, headers={"Authorization": f"Bearer {user}"})
+
+
+def test_ranked_generate_hides_solution():
+    """Ranked puzzles come with a token and a puzzle_id but no plaintext solution."""
+    with signed_in():
+        puzzle, solution = _ranked_puzzle(app.app.test_client())
+    assert "solution" not in puzzle and puzzle["puzzle_token"] and puzzle["puzzle_id"].startswith("ranked_")
+    assert solution is not None
+    print("✅ Ranked puzzles don't include their solution")
+
+
+def test_ranked_check_needs_server_copy():
+    """Checks without a token or stored puzzle are refused; the token and the stored copy are graded."""
+    client = app.app.test_client()
+    with signed_in():
+        puzzle, solution = _ranked_puzzle(client)
+        untrusted = _check(client, {"player_assignments": solution, "statement_data": puzzle["statement_data"],
+                                    "num_truth_tellers": puzzle["num_truth_tellers"], "time_taken": 1})
+        assert untrusted.status_code == 400, untrusted.get_json()
+
+        assert _check(client, {"puzzle_token": puzzle["puzzle_token"], "player_assignments": solution}, "user-2").status_code == 403
+        assert _check(client, {"puzzle_token": "forged", "player_assignments": solution}).status_code == 400
+
+        response = _check(client, {"puzzle_token": puzzle["puzzle_token"], "player_assignments": solution})
+        assert response.status_code == 200 and response.get_json()["valid"] is True
+        wrong = {p: not v for p, v in solution.items()}
+        assert _check(client, {"puzzle_token": puzzle["puzzle_token"], "player_assignments": wrong}).get_json()["valid"] is False
+
+        practice = client.get("/puzzle/generate?mode=easy&players=4").get_json()
+        assert _check(client, {"puzzle_token": practice["puzzle_token"], "player_assignments": practice["solution"]}).status_code == 400
+
+        # Not as practice either, which would answer a live ranked puzzle without an Elo effect
+        for reference in [{"puzzle_token": puzzle["puzzle_token"]}, {"puzzle_id": puzzle["puzzle_id"]}]:
+            for mode in ["easy", "hard"]:
+                response = _check(client, {**reference, "mode": mode, "player_assignments": solution})
+                assert response.status_code == 400 and "valid" not in response.get_json(), (reference, mode)
+    print("✅ Ranked checks are graded from the token or the stored puzzle only")
+
+
+def test_ranked_check_by_puzzle_id():
+    """A stored ranked puzzle is graded by puzzle_id alone, only for complete guesses, and its solution stays hidden."""
+    client = app.app.test_client()
+    with signed_in():
+        puzzle, solution = _ranked_puzzle(client)
+        assert _check(client, {"puzzle_id": puzzle["puzzle_id"], "player_assignments": {}}).get_json()["valid"] is False
+        partial = dict(list(solution.items())[:-1])
+        assert _check(client, {"puzzle_id": puzzle["puzzle_id"], "player_assignments": partial}).get_json()["valid"] is False
+        assert _check(client, {"puzzle_id": puzzle["puzzle_id"], "player_assignments": solution}, "user-2").status_code == 403
+        response = _check(client, {"puzzle_id": puzzle["puzzle_id"], "player_assignments": solution})
+        assert response.status_code == 200 and response.get_json()["valid"] is True
+
+    assert client.post("/puzzle/solution", json={"puzzle_id": puzzle["puzzle_id"]}).status_code == 403
+    practice = client.get("/puzzle/generate?mode=easy&players=4").get_json()
+    assert client.post("/puzzle/solution", json={"puzzle_id": practice["puzzle_id"]}).get_json()["solution"]
+    print("✅ Stored ranked puzzles are graded by puzzle_id and their solutions stay hidden")
+
+
+def test_failed_commit_can_be_retried():
+    """A commit that fails returns a 5xx, so a retry with the same Idempotency-Key applies the result."""
+    client = app.app.test_client()
+    commits = []
+
+    def commit(user_id, is_placement, delta, match, event_id=None):
+        commits.append(event_id)
+        if len(commits) == 1:
+            raise RuntimeError("database unavailable")
+        return _committed(RANKED_PROFILE, is_placement, delta)
+
+    with signed_in():
+        puzzle, solution = _ranked_puzzle(client)
+        body = {"puzzle_token": puzzle["puzzle_token"], "player_assignments": solution}
+        headers = {"Authorization": "Bearer user-1", "Idempotency-Key": "retry-key"}
+        with ranked_backend(RANKED_PROFILE, commit):
+            failed = client.post("/puzzle/check", json={"mode": "ranked", **body}, headers=headers)
+            assert failed.status_code == 500, failed.get_json()
+            retried = client.post("/puzzle/check", json={"mode": "ranked", **body}, headers=headers)
+            assert retried.status_code == 200 and retried.get_json()["elo_change"]["old_elo"] == 1200
+            replayed = client.post("/puzzle/check", json={"mode": "ranked", **body}, headers=headers)
+    assert replayed.headers.get("Idempotent-Replayed") == "true" and replayed.get_json() == retried.get_json()
+    assert len(commits) == 2 and commits[0] == commits[1]  # Same event id, so the database applies it once
+    print("✅ A failed ranked commit is retried with the same Idempotency-Key")
+
+
+def test_resubmitted_puzzle_commits_once():
+    """The same ranked puzzle sent again under another Idempotency-Key (or none) changes the Elo once."""
+    client = app.app.test_client()
+    applied = {}
+
+    def commit(user_id, is_placement, delta, match, event_id=None):
+        if event_id in applied:
+            return {**app.recorded_ranked_state(applied[event_id]), "match_id": 1}
+        applied[event_id] = app.predict_ranked_commit(RANKED_PROFILE, is_placement, delta)
+        return {**applied[event_id], "match_id": 1, "duplicate": False}
+
+    with signed_in():
+        puzzle, solution = _ranked_puzzle(client)
+        with ranked_backend(RANKED_PROFILE, commit):
+            changes = []
+            for reference in [{"puzzle_token": puzzle["puzzle_token"]}, {"puzzle_id": puzzle["puzzle_id"]}]:
+                for key in [f"first-key-{len(changes)}", f"second-key-{len(changes)}", None]:
+                    headers = {"Authorization": "Bearer user-1", **({"Idempotency-Key": key} if key else {})}
+                    response = client.post("/puzzle/check", json={"mode": "ranked", **reference, "player_assignments": solution},
+                                           headers=headers)
+                    assert response.status_code == 200, response.get_json()
+                    changes.append(response.get_json()["elo_change"]["change"])
+    assert changes[0] > 0 and changes[1:] == [0] * 5 and len(applied) == 1
+
+    # Journaled and not yet replayed: the second check answers from the pending result
+    def unreachable_database(event):
+        raise ConnectionError("database unavailable")
+
+    journal = MatchJournal(unreachable_database, directory=tempfile.mkdtemp(), backoff_base=60, enabled=True)
+    with signed_in():
+        puzzle, solution = _ranked_puzzle(client, "user-6")
+        with ranked_backend(RANKED_PROFILE, commit, journal):
+            first, again = [_check(client, {"puzzle_token": puzzle["puzzle_token"], "player_assignments": solution},
+                                   "user-6").get_json()["elo_change"] for _ in range(2)]
+    assert first["change"] > 0 and again["change"] == 0 and again["new_elo"] == first["new_elo"]
+    assert len(journal.pending()) == 1
+    print("✅ A ranked puzzle is committed at most once")
+
+
+def test_back_to_back_journaled_matches():
+    """A second ranked check is scored on top of the first one's journaled, uncommitted result."""
+    def unreachable_database(event):
+        raise ConnectionError("database unavailable")
+
+    def no_direct_commit(*args, **kwargs):
+        raise AssertionError("results should be journaled")
+
+    journal = MatchJournal(unreachable_database, directory=tempfile.mkdtemp(), backoff_base=60, enabled=True)
+    client = app.app.test_client()
+    with signed_in():
+        puzzles = [_ranked_puzzle(client, user) for user in ["user-3", "user-3", "user-4", "user-4"]]
+
+        def play(user, puzzle, solution):
+            response = _check(client, {"puzzle_token": puzzle["puzzle_token"], "player_assignments": solution}, user)
+            assert response.status_code == 200, response.get_json()
+            return response.get_json()["elo_change"]
+
+        with ranked_backend(RANKED_PROFILE, no_direct_commit, journal):
+            first, second = play("user-3", *puzzles[0]), play("user-3", *puzzles[1])
+        assert first["old_elo"] == 1200 and second["old_elo"] == first["new_elo"] > 1200
+
+        # The fifth placement match reveals an Elo; the next match is a ranked one from that Elo
+        unranked = {"elo": None, "hidden_elo": 900, "placement_matches_completed": 4, "is_ranked": False,
+                    "username": "newcomer"}
+        with ranked_backend(unranked, no_direct_commit, journal):
+            last_placement, first_ranked = play("user-4", *puzzles[2]), play("user-4", *puzzles[3])
+        assert last_placement["is_placement"] and last_placement["placement_number"] == 5
+        assert not first_ranked["is_placement"] and first_ranked["old_elo"] == last_placement["new_elo"]
+    assert len(journal.pending()) == 4
+    print("✅ Back-to-back journaled matches are scored from the pending results")
+
+
+def test_puzzle_tokens_are_not_login_tokens():
+    """A puzzle token signed with the Supabase JWT secret still gets 401 on authenticated routes."""
+    def get_user(token):
+        # Supabase's own check, which only looks at the signature here
+        claims = jwt.decode(token, app.supabase_jwt_secret, algorithms=["HS256"], options={"verify_aud": False})
+        return SimpleNamespace(user=SimpleNamespace(id=claims["sub"], email=None))
+
+    saved = app.supabase, app.supabase_jwt_secret, app.get_or_create_user_profile
+    app.supabase = SimpleNamespace(auth=SimpleNamespace(get_user=get_user))
+    app.supabase_jwt_secret = puzzle_token.PUZZLE_TOKEN_SECRET
+    app.get_or_create_user_profile = lambda user_id, email, use_cache=True: dict(RANKED_PROFILE, user_id=user_id)
+    client = app.app.test_client()
+    try:
+        practice = client.get("/puzzle/generate?mode=easy&players=4").get_json()["puzzle_token"]
+        login = jwt.encode({"sub": "user-5", "email": "user-5@example.com", "exp": int(time.time()) + 60},
+                           app.supabase_jwt_secret, algorithm="HS256")
+        ranked = client.post("/puzzle/generate", json={"mode": "ranked"},
+                             headers={"Authorization": f"Bearer {login}"}).get_json()["puzzle_token"]
+        for token in [practice, ranked]:
+            assert client.get("/me", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+        assert client.get("/me", headers={"Authorization": f"Bearer {login}"}).get_json()["user"]["id"] == "user-5"
+    finally:
+        app.supabase, app.supabase_jwt_secret, app.get_or_create_user_profile = saved
+    print("✅ Puzzle tokens are refused as login tokens")
+
+
+if __name__ == "__main__":
+    test_ranked_generate_hides_solution()
+    test_ranked_check_needs_server_copy()
+    test_ranked_check_by_puzzle_id()
+    test_failed_commit_can_be_retried()
+    test_resubmitted_puzzle_commits_once()
+    test_back_to_back_journaled_matches()
+    test_puzzle_tokens_are_not_login_tokens()
+    print("🎉 All ranked check tests passed!")
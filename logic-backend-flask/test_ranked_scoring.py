@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""Test ranked scoring against the original inline Elo code, and commit_ranked_result error handling."""
+
+import contextlib
+import io
+import itertools
+import os
+from types import SimpleNamespace
+
+os.environ.setdefault("PUZZLE_POOL_ENABLED", "false")
+os.environ.setdefault("SOLVER_POOL_ENABLED", "false")
+with contextlib.redirect_stdout(io.StringIO()):
+    import app
+from elo_system import compute_elo_change, get_tier, reveal_placement_elo, update_hidden_elo
+from match_journal import DiscardEvent
+
+OUTCOMES = [
+    {"solved": True, "gave_up": False, "abandoned": False, "time_taken": 25},
+    {"solved": True, "gave_up": False, "abandoned": False, "time_taken": 400},
+    {"solved": False, "gave_up": False, "abandoned": False, "time_taken": 90},
+    {"solved": False, "gave_up": True, "abandoned": False, "time_taken": 60},
+    {"solved": False, "gave_up": False, "abandoned": True, "time_taken": 5},
+]
+
+
+def _tier_mode(elo, num_players, default):
+    """How the original check_solution picked the mode the Elo change was computed for."""
+    tier = get_tier(elo)
+    for tier_mode, player_counts in (tier["allowed_modes"].items() if tier else []):
+        if num_players in player_counts:
+            return tier_mode
+    return default
+
+
+def baseline_placement(hidden_elo, placement_completed, num_players, outcome):
+    """The original inline placement update: (hidden Elo, revealed Elo or None, shown change)."""
+    mode = _tier_mode(hidden_elo, num_players, "Medium")
+    new_hidden_elo, change, _ = update_hidden_elo(hidden_elo, mode, num_players, outcome["time_taken"],
+                                                  outcome["solved"], outcome["gave_up"], outcome["abandoned"])
+    if placement_completed + 1 >= app.PLACEMENT_MATCHES_REQUIRED:
+        final_elo = reveal_placement_elo(new_hidden_elo)
+        return new_hidden_elo, final_elo, final_elo
+    return new_hidden_elo, None, change
+
+
+def baseline_ranked(elo, num_players, outcome):
+    """The original inline ranked update: (mode, new Elo, change)."""
+    mode = _tier_mode(elo, num_players, "Easy")
+    change, _ = compute_elo_change(elo, mode, num_players, outcome["time_taken"],
+                                   outcome["solved"], outcome["gave_up"], outcome["abandoned"])
+    return mode, max(0, elo + change), change
+
+
+def test_placement_matches_baseline():
+    """Placement scoring and the predicted commit match the original code, including the reveal clamp."""
+    # 2490 and 4 put the revealed Elo against reveal_placement_elo's 2500 and 0 bounds
+    for hidden_elo, placement_completed, num_players, outcome in itertools.product(
+            [4, 300, 750, 1400, 2490], range(app.PLACEMENT_MATCHES_REQUIRED), range(3, 9), OUTCOMES):
+        profile = {"elo": None, "hidden_elo": hidden_elo, "placement_matches_completed": placement_completed,
+                   "is_ranked": False}
+        is_placement, mode, delta, _ = app.score_ranked_match(profile, {"num_players": num_players, **outcome})
+        committed = app.predict_ranked_commit(profile, is_placement, delta)
+
+        new_hidden_elo, revealed_elo, change = baseline_placement(hidden_elo, placement_completed, num_players, outcome)
+        assert is_placement and mode == "Placement"
+        assert committed["hidden_elo"] == new_hidden_elo, (profile, outcome)
+        assert committed["elo"] == revealed_elo and committed["elo_delta"] == change, (profile, outcome, committed)
+        assert committed["placement_matches_completed"] == placement_completed + 1
+        assert committed["revealed"] == committed["is_ranked"] == (revealed_elo is not None)
+        assert committed["elo_before"] is None
+
+    # Hidden Elo above the scale is revealed at the cap
+    profile = {"elo": None, "hidden_elo": 2600, "placement_matches_completed": 4, "is_ranked": False}
+    assert app.predict_ranked_commit(profile, True, 30)["elo"] == reveal_placement_elo(2630) == 2500
+    print("✅ Placement matches score like the original code")
+
+
+def test_ranked_matches_baseline():
+    """After placement, scoring and the predicted commit match the original code, floored at 0."""
+    for elo, num_players, outcome in itertools.product([0, 10, 600, 1200, 1900, 2600], range(3, 9), OUTCOMES):
+        profile = {"elo": elo, "hidden_elo": None, "placement_matches_completed": 5, "is_ranked": True}
+        is_placement, mode, delta, _ = app.score_ranked_match(profile, {"num_players": num_players, **outcome})
+        committed = app.predict_ranked_commit(profile, is_placement, delta)
+
+        expected_mode, new_elo, change = baseline_ranked(elo, num_players, outcome)
+        assert not is_placement and mode == expected_mode and delta == change, (profile, outcome)
+        assert committed["elo"] == new_elo and committed["elo_before"] == elo and committed["elo_delta"] == change
+        assert committed["placement_matches_completed"] == 5 and committed["is_ranked"] and not committed["revealed"]
+    print("✅ Ranked matches score like the original code")
+
+
+class FakeRankedDatabase:
+    """
+    Stand-in for Supabase's commit_ranked_result RPC and profiles table.
+
+    Applies results like 20261017_ranked_event_journal.sql: the placement
+    state must match, and an event id that was already applied returns the
+    current state with duplicate=True.
+    """
+
+    def __init__(self, profile, error=None):
+        self.profile = dict(profile)
+        self.error = error
+        self.matches = {}
+        self.calls = []
+
+    def rpc(self, name, params):
+        assert name == "commit_ranked_result"
+        self.calls.append(params)
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=self._commit(params)))
+
+    def table(self, name):
+        assert name == "profiles"
+        query = SimpleNamespace(execute=lambda: SimpleNamespace(data=[dict(self.profile)]))
+        query.select = query.eq = lambda *args: query
+        return query
+
+    def _commit(self, params):
+        if self.error:
+            raise Exception(self.error)
+        event_id = params["p_event_id"]
+        if event_id is not None and event_id in self.matches:
+            return {"elo": self.profile["elo"], "elo_before": None, "elo_delta": 0,
+                    "hidden_elo": self.profile["hidden_elo"], "is_ranked": self.profile["is_ranked"],
+                    "placement_matches_completed": self.profile["placement_matches_completed"],
+                    "revealed": False, "match_id": self.matches[event_id], "duplicate": True}
+        is_placement = (self.profile["elo"] is None
+                        and self.profile["placement_matches_completed"] < params["p_placement_required"])
+        if is_placement != params["p_is_placement"]:
+            raise Exception("ranked_state_changed (40001)")
+        committed = app.predict_ranked_commit(self.profile, is_placement, params["p_delta"])
+        self.profile.update({key: committed[key] for key in ("elo", "placement_matches_completed", "is_ranked")})
+        self.profile["hidden_elo"] = None if committed["revealed"] else committed["hidden_elo"]
+        match_id = len(self.matches) + 1
+        self.matches[event_id or f"match-{match_id}"] = match_id
+        return {**committed, "match_id": match_id, "duplicate": False}
+
+
+@contextlib.contextmanager
+def database(fake):
+    saved = app.supabase
+    app.supabase = fake
+    try:
+        yield fake
+    finally:
+        app.supabase = saved
+
+
+MATCH = {"mode": "Medium", "num_players": 5, "solved": True, "time_taken": 42}
+RANKED = {"elo": 1200, "hidden_elo": None, "placement_matches_completed": 5, "is_ranked": True}
+
+
+def _event(event_id, profile, outcome):
+    is_placement, mode, delta, _ = app.score_ranked_match(profile, outcome)
+    return {"id": event_id, "kind": "ranked_result",
+            "data": {"user_id": "user-1", "username": "player", "is_placement": is_placement, "mode": mode,
+                     "delta": delta, "outcome": outcome}}
+
+
+def test_rpc_errors_are_mapped():
+    """ranked_state_changed becomes RankedStateChanged; replays rescore it, or discard a deleted profile."""
+    with database(FakeRankedDatabase(RANKED, error='{"code": "40001", "message": "ranked_state_changed"}')):
+        try:
+            app.commit_ranked_result("user-1", False, 10, MATCH, event_id="e1")
+            raise AssertionError("expected RankedStateChanged")
+        except app.RankedStateChanged:
+            pass
+    with database(FakeRankedDatabase(RANKED, error="connection reset")) as fake:
+        try:
+            app.commit_ranked_result("user-1", False, 10, MATCH)
+            raise AssertionError("expected the original error")
+        except app.RankedStateChanged:
+            raise AssertionError("only ranked_state_changed means the state changed")
+        except Exception as e:
+            assert str(e) == "connection reset"
+        assert fake.calls[0]["p_event_id"] is None and fake.calls[0]["p_time_taken"] == 42
+
+    # Scored as a placement match, but placement finished before the replay: rescored as a ranked match
+    outcome = {"num_players": 5, **OUTCOMES[0]}
+    event = _event("e2", {"elo": None, "hidden_elo": 750, "placement_matches_completed": 4, "is_ranked": False}, outcome)
+    with database(FakeRankedDatabase(RANKED)) as fake:
+        app.replay_ranked_event(event)
+        _, expected_elo, _ = baseline_ranked(1200, 5, OUTCOMES[0])
+        assert [call["p_is_placement"] for call in fake.calls] == [True, False]
+        assert fake.profile["elo"] == expected_elo and fake.matches == {"e2": 1}
+
+    with database(FakeRankedDatabase(RANKED, error="profile_not_found (P0002)")):
+        try:
+            app.replay_ranked_event(_event("e3", RANKED, outcome))
+            raise AssertionError("expected DiscardEvent")
+        except DiscardEvent:
+            pass
+    print("✅ commit_ranked_result errors are mapped for the request path and the replayer")
+
+
+def test_duplicate_event_ids_apply_once():
+    """Delivering the same journaled event twice changes the profile once; the second commit is a duplicate."""
+    outcome = {"num_players": 6, **OUTCOMES[1]}
+    event = _event("e4", RANKED, outcome)
+    with database(FakeRankedDatabase(RANKED)) as fake:
+        app.replay_ranked_event(event)
+        after_first = dict(fake.profile)
+        app.replay_ranked_event(event)
+        assert fake.profile == after_first and fake.matches == {"e4": 1}
+        assert after_first["elo"] == baseline_ranked(1200, 6, OUTCOMES[1])[1]
+
+        duplicate = app.commit_ranked_result("user-1", False, event["data"]["delta"], MATCH, event_id="e4")
+        assert duplicate["duplicate"] and duplicate["elo_delta"] == 0 and duplicate["elo"] == after_first["elo"]
+        assert [call["p_event_id"] for call in fake.calls] == ["e4", "e4", "e4"]
+    print("✅ A replayed event id is applied once")
+
+
+if __name__ == "__main__":
+    test_placement_matches_baseline()
+    test_ranked_matches_baseline()
+    test_rpc_errors_are_mapped()
+    test_duplicate_event_ids_apply_once()
+    print("🎉 All ranked scoring tests passed!")
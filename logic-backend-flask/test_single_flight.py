@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Test single-flight coalescing of identical reads."""
+
+import threading
+import time
+
+from flask import Flask, jsonify
+
+from single_flight import SingleFlight
+
+
+def _run_concurrently(target, count):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def test_concurrent_calls_share_one_execution():
+    """Callers that arrive while a call is in flight get its result without running it again."""
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    executions, results = [], []
+
+    def query():
+        executions.append(1)
+        started.set()
+        release.wait(5)
+        return {"rows": 500}
+
+    leader = _run_concurrently(lambda: results.append(flights.do("top", query)), 1)
+    started.wait(5)
+    followers = _run_concurrently(lambda: results.append(flights.do("top", query)), 9)
+    while flights.stats()["coalesced"] < 9:
+        time.sleep(0.001)
+    release.set()
+    for thread in leader + followers:
+        thread.join()
+
+    assert len(executions) == 1 and results == [{"rows": 500}] * 10
+    stats = flights.stats()
+    assert stats["executed"] == 1 and stats["coalesced"] == 9 and stats["in_flight"] == 0
+
+    # Other keys and later calls run on their own
+    assert flights.do("other", lambda: 1) == 1
+    flights.do("top", query)
+    assert len(executions) == 2
+    print("✅ Concurrent identical calls share one execution")
+
+
+def test_errors_and_reuse():
+    """Exceptions reach every waiter and are never reused; results are reused for the ttl."""
+    flights = SingleFlight()
+
+    def fail():
+        raise ConnectionError("database unavailable")
+
+    for _ in range(2):
+        try:
+            flights.do("top", fail, ttl=10)
+        except ConnectionError:
+            pass
+        else:
+            raise AssertionError("expected ConnectionError")
+    assert flights.stats()["errors"] == 2
+
+    calls = []
+    assert flights.do("top", lambda: calls.append(1) or len(calls), ttl=0.05) == 1
+    assert flights.do("top", lambda: calls.append(1) or len(calls), ttl=0.05) == 1
+    time.sleep(0.06)
+    assert flights.do("top", lambda: calls.append(1) or len(calls), ttl=0.05) == 2
+    assert flights.stats()["reused"] == 1
+    print("✅ Errors propagate, results are reused for the ttl")
+
+
+def test_route_decorator():
+    """Routes are keyed by query string; each request gets its own response, 5xx is not reused."""
+    app = Flask(__name__)
+    flights = SingleFlight()
+    hits = []
+
+    @app.route("/board")
+    @flights.route(ttl=10)
+    def board():
+        hits.append(1)
+        return jsonify({"hits": len(hits)}), 200
+
+    @app.route("/broken")
+    @flights.route(ttl=10)
+    def broken():
+        hits.append(1)
+        return jsonify({"error": "Server error"}), 500
+
+    client = app.test_client()
+    assert client.get("/board").get_json() == {"hits": 1}
+    second = client.get("/board")
+    assert second.get_json() == {"hits": 1} and second.headers["Content-Type"] == "application/json"
+    assert client.get("/board?page=2").get_json() == {"hits": 2}
+    assert client.get("/broken").status_code == 500 and client.get("/broken").status_code == 500
+    assert len(hits) == 4
+    print("✅ Route decorator coalesces by query shape")
+
+
+if __name__ == "__main__":
+    test_concurrent_calls_share_one_execution()
+    test_errors_and_reuse()
+    test_route_decorator()
+    print("🎉 All single-flight tests passed!")
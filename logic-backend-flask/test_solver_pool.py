@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Test the solver process pool's limits and deadlines."""
+
+import time
+
+import puzzle_solver
+import solver_pool
+from solver_pool import SolverPool, SolverTimeout
+
+
+def test_generate_runs_in_pool():
+    """Generation runs in a solver process and returns a solvable puzzle."""
+    pool = SolverPool(max_workers=1)
+    puzzle = pool.generate("hard", 5)
+    assert puzzle_solver.check_puzzle(puzzle["full_statement_data"], puzzle["num_truth_tellers"], puzzle["solution"])
+    stats = pool.stats()
+    assert stats["submitted"] == stats["completed"] == 1 and stats["running"]
+
+    # Native-sized checks skip the round trip to the pool
+    data = {"full_statement_data": puzzle["full_statement_data"], "num_truth_tellers": puzzle["num_truth_tellers"],
+            "guess": puzzle["solution"]}
+    assert pool.check_solution("hard", data) == {"valid": True}
+    assert pool.stats()["inline"] == 1 and pool.stats()["submitted"] == 1
+    print("✅ Generation runs in the solver pool, small checks inline")
+
+
+def test_deadline_interrupts_retry_loops():
+    """The in-process deadline cannot be swallowed by a generator's `except Exception` retry loop."""
+    def stubborn():
+        while True:
+            try:
+                time.sleep(0.01)
+            except Exception:
+                continue
+
+    solver_pool.TASKS["stubborn"] = stubborn
+    try:
+        started = time.time()
+        try:
+            solver_pool.run_task("stubborn", time.time() + 0.1, ())
+        except SolverTimeout:
+            pass
+        else:
+            raise AssertionError("expected SolverTimeout")
+        assert time.time() - started < 1
+    finally:
+        del solver_pool.TASKS["stubborn"]
+    print("✅ Deadlines interrupt tasks that catch Exception")
+
+
+def test_busy_pool_times_out():
+    """Callers that cannot get a slot before their deadline get SolverTimeout."""
+    pool = SolverPool(max_workers=1, max_concurrency=1)
+    assert pool._slots.acquire(timeout=0)
+    try:
+        pool.run("generate", "easy", 4, timeout=0.05)
+    except SolverTimeout:
+        assert pool.stats()["busy"] == 1
+    else:
+        raise AssertionError("expected SolverTimeout")
+    finally:
+        pool._slots.release()
+    print("✅ A saturated pool rejects work at the deadline")
+
+
+if __name__ == "__main__":
+    test_generate_runs_in_pool()
+    test_deadline_interrupts_retry_loops()
+    test_busy_pool_times_out()
+    print("🎉 All solver pool tests passed!")
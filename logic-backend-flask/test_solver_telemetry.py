@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Test generation and solver telemetry."""
+
+import contextlib
+import io
+
+import easy_mode
+import hard_mode
+import solver_telemetry
+import truth_table
+import uniqueness
+from metrics import Metrics
+from solver_pool import SolverPool
+from solver_telemetry import GenerationAttempts, telemetry
+
+
+def _reset():
+    telemetry.reset()
+    uniqueness.generation_stats.reset()
+
+
+def test_attempts_and_rejections():
+    """Each generation records its attempts, rejection reasons and statement kinds."""
+    _reset()
+    attempts = GenerationAttempts("extreme", 6)
+    attempts.reject("unsat", kinds=["IF", "DIRECT", "IF"])
+    attempts.reject("error", KeyError("A"), kinds=["NESTED_IF"])
+    attempts.reject("ambiguous", kinds=["DIRECT"])
+    attempts.succeeded(kinds=["DIRECT", "XOR"])
+    solver_telemetry.GenerationAttempts("extreme", 6).failed()
+
+    summary = telemetry.snapshot()["generate"]["extreme/6"]
+    assert summary["outcomes"] == {"generated": 1, "failed": 1} and summary["attempts"] == 4
+    assert summary["attempts_to_success"]["histogram"] == {"4": 1}
+    assert summary["rejections"] == {"unsat": 1, "error:KeyError": 1, "ambiguous": 1}
+    assert summary["rejection_rates_by_kind"]["unsat:IF"] == 1.0
+    assert summary["rejection_rates_by_kind"]["ambiguous:DIRECT"] == round(1 / 3, 4)
+
+    # The per-mode counters in /puzzle/pool/stats keep their meaning (errors aren't attempts there)
+    stats = uniqueness.generation_stats.snapshot()["modes"]["extreme"]
+    assert (stats["attempts"], stats["rejected_unsat"], stats["rejected_ambiguous"], stats["generated"], stats["failed"]) == \
+        (3, 1, 1, 1, 1)
+    print("✅ Attempts, rejection reasons and statement kinds are recorded")
+
+
+def test_z3_statistics():
+    """Generations and checks above the native limit record Z3 conflicts and decisions."""
+    _reset()
+    native_limit = truth_table.NATIVE_SOLVER_MAX_PLAYERS
+    truth_table.NATIVE_SOLVER_MAX_PLAYERS = 3
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            puzzle = hard_mode.api_generate_hard(6)
+        with solver_telemetry.track("check", "hard", 6):
+            assert hard_mode.check_hard_solution({**puzzle, "player_assignments": puzzle["solution"]})["valid"]
+    finally:
+        truth_table.NATIVE_SOLVER_MAX_PLAYERS = native_limit
+
+    snapshot = telemetry.snapshot()
+    generate = snapshot["generate"]["hard/6"]["solver"]
+    check = snapshot["check"]["hard/6"]["solver"]
+    assert generate["native_calls"] == 0 and generate["z3_calls"] == snapshot["generate"]["hard/6"]["attempts"]
+    assert generate["z3_decisions"]["max"] > 0
+    assert check["z3_calls"] == 1 and snapshot["check"]["hard/6"]["outcomes"] == {"ok": 1}
+    print("✅ Z3 statistics are recorded for generations and checks")
+
+
+def test_capture_and_metrics():
+    """Captured events are only added when ingested, and ingested events reach the metrics."""
+    _reset()
+    metrics = Metrics(directory="")
+    telemetry.export_to(metrics)
+    try:
+        with solver_telemetry.capture() as events:
+            with contextlib.redirect_stdout(io.StringIO()):
+                easy_mode.api_generate_easy(4)
+        assert len(events) == 1 and "generate" not in telemetry.snapshot()
+        solver_telemetry.ingest(events)
+    finally:
+        telemetry.export_to(None)
+
+    assert telemetry.snapshot()["generate"]["easy/4"]["solver"]["native_calls"] >= 1
+    rendered = metrics.render()
+    attempts = events[0]["attempts"]
+    assert f'mindrank_generation_attempts_count{{mode="easy",num_players="4",outcome="generated"}} 1' in rendered
+    assert f'mindrank_generation_attempts_sum{{mode="easy",num_players="4",outcome="generated"}} {attempts}' in rendered
+    assert 'mindrank_generation_attempts_bucket{mode="easy",num_players="4",outcome="generated",le="30"} 1' in rendered
+    assert 'mindrank_solver_duration_seconds_count{task="generate",mode="easy",num_players="4",engine="native"} 1' in rendered
+    print("✅ Captured events are ingested and exported as metrics")
+
+
+def test_solver_process_events_reach_the_worker():
+    """Work done in a solver process shows up in the web worker's telemetry."""
+    _reset()
+    pool = SolverPool(max_workers=1)
+    assert pool.generate("medium", 5)["num_players"] == 5
+    assert telemetry.snapshot()["generate"]["medium/5"]["outcomes"] == {"generated": 1}
+    assert uniqueness.generation_stats.snapshot()["modes"]["medium"]["generated"] == 1
+    print("✅ Solver process telemetry reaches the web worker")
+
+
+if __name__ == "__main__":
+    test_attempts_and_rejections()
+    test_z3_statistics()
+    test_capture_and_metrics()
+    test_solver_process_events_reach_the_worker()
+    print("🎉 All solver telemetry tests passed!")
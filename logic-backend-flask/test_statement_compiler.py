@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Test the shared statement compiler's native, Z3 and text targets."""
+
+import itertools
+
+from z3 import Solver, sat
+
+import extreme_mode
+import hard_mode
+import puzzle_solver
+import statement_compiler
+import truth_table
+
+ALL_MODES = {
+    "A": {"mode": "GROUP", "members": ["B", "C", "D"], "exactly": 2},
+    "B": {"mode": "NESTED_IF", "outer_cond": "A", "outer_val": True,
+          "inner_cond": "C", "inner_val": False, "inner_result": "D", "inner_result_val": True},
+    "C": {"mode": "XOR", "t1": "A", "c1": True, "t2": "E", "c2": False},
+    "D": {"mode": "IFF", "t1": "B", "c1": False, "t2": "C", "c2": True},
+    "E": {"mode": "IF", "cond": "D", "cond_val": True, "result": "A", "result_val": False},
+    "F": {"mode": "AND", "t1": "E", "c1": True, "t2": "A", "c2": True},
+    "G": {"mode": "OR", "t1": "F", "c1": False, "t2": "B", "c2": True},
+    "H": {"mode": "DIRECT", "target": "G", "claim": False},
+}
+
+
+def generate(generate_func, num_players, tries=5):
+    """Generate a puzzle, retrying the occasional generator RuntimeError."""
+    for _ in range(tries - 1):
+        try:
+            return generate_func(num_players)
+        except RuntimeError:
+            continue
+    return generate_func(num_players)
+
+
+def test_mask_matches_z3():
+    """The bitset and Z3 targets accept exactly the same assignments."""
+    for k in range(len(ALL_MODES) + 1):
+        compiled = statement_compiler.compile_puzzle(ALL_MODES, k)
+        z3_vars = compiled.z3_vars()
+        for values in itertools.product([True, False], repeat=len(ALL_MODES)):
+            guess = dict(zip(compiled.people, values))
+            solver = Solver()
+            solver.add(compiled.z3_constraints())
+            solver.add([z3_vars[p] == v for p, v in guess.items()])
+            expected = solver.check() == sat
+            assert puzzle_solver.check_puzzle(ALL_MODES, k, guess) == expected, (k, guess)
+    print("✅ Native masks match Z3 for every statement mode")
+
+
+def test_evaluate_matches_mask():
+    """Evaluating a claim under one assignment agrees with its mask."""
+    compiled = statement_compiler.compile_puzzle(ALL_MODES, 4)
+    masks, full = statement_compiler.player_masks(len(compiled.people))
+    for speaker, claim in compiled.parsed:
+        mask = statement_compiler.to_mask(claim, compiled.index, masks, full)
+        for assignment in range(1 << len(compiled.people)):
+            guess = truth_table.decode_assignment(assignment, compiled.people)
+            assert statement_compiler.evaluate(claim, guess) == bool(mask >> assignment & 1), (speaker, guess)
+    print("✅ Single-assignment evaluation matches the masks")
+
+
+def test_text_matches_generators():
+    """Explanations reproduce the sentences the generators show players."""
+    for generate_func in [hard_mode.api_generate_hard, extreme_mode.api_generate_extreme]:
+        for num_players in [4, 6, 8]:
+            puzzle = generate(generate_func, num_players)
+            compiled = statement_compiler.compile_puzzle(puzzle["full_statement_data"], puzzle["num_truth_tellers"])
+            assert compiled.statement_texts() == puzzle["statements"], puzzle
+            lines = compiled.explain(puzzle["solution"])
+            assert set(lines) == set(puzzle["statements"])
+    print("✅ Compiled statement texts match the generators")
+
+
+def test_compile_is_memoized():
+    """Identical puzzles share one compiled object, whatever dict they arrive in."""
+    first = statement_compiler.compile_puzzle(ALL_MODES, 4)
+    copy = {speaker: dict(st) for speaker, st in ALL_MODES.items()}
+    assert statement_compiler.compile_puzzle(copy, 4) is first
+    assert statement_compiler.compile_puzzle(ALL_MODES, 5) is not first
+    print("✅ Compiled puzzles are cached")
+
+
+def test_bad_statements_are_rejected():
+    """Unknown modes, players and malformed values raise UnsupportedStatement."""
+    bad_puzzles = [
+        {"A": {"mode": "BOGUS"}},
+        {"A": {"mode": "DIRECT", "target": "Z", "claim": True}},
+        {"A": {"mode": "AND", "t1": "A", "c1": "yes", "t2": "A", "c2": True}},
+        {"A": {"mode": "GROUP", "members": ["A"], "exactly": "1"}},
+        ["A"],
+    ]
+    for statements in bad_puzzles:
+        try:
+            statement_compiler.compile_puzzle(statements, 1).mask
+        except statement_compiler.UnsupportedStatement:
+            continue
+        raise AssertionError(f"expected UnsupportedStatement for {statements!r}")
+    print("✅ Malformed statements are rejected")
+
+
+if __name__ == "__main__":
+    test_mask_matches_z3()
+    test_evaluate_matches_mask()
+    test_text_matches_generators()
+    test_compile_is_memoized()
+    test_bad_statements_are_rejected()
+    print("🎉 All statement compiler tests passed!")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Test the leveled, sampled JSON logger."""
+
+import io
+import json
+
+from flask import Flask
+
+import structured_log
+
+
+def _lines(stream, handler):
+    handler.flush()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_levels_and_json_fields():
+    """Records below the level are skipped without formatting; the rest are JSON with request fields."""
+    stream = io.StringIO()
+    handler = structured_log.configure(stream, level="INFO")
+    log = structured_log.get_logger("app")
+    app = Flask(__name__)
+
+    class Expensive:
+        def __str__(self):
+            raise AssertionError("a DEBUG argument was formatted at INFO")
+
+    @app.route("/puzzle/check", methods=["POST"])
+    def check():
+        log.debug("Full request data: %s", Expensive())
+        log.info("Checked %s", "easy", extra={"fields": {"valid": True}})
+        try:
+            raise ValueError("boom")
+        except ValueError as e:
+            log.exception("Error in mode check: %s", e)
+        return "ok"
+
+    app.test_client().post("/puzzle/check")
+    log.warning("Background warning")
+
+    info, error, background = _lines(stream, handler)
+    assert info["level"] == "INFO" and info["msg"] == "Checked easy" and info["valid"] is True
+    assert info["route"] == "/puzzle/check" and info["method"] == "POST" and info["logger"] == "mindrank.app"
+    assert error["level"] == "ERROR" and "ValueError: boom" in error["exc"]
+    assert background["route"] == "background"
+    print("✅ Levels filter early and records are JSON with request fields")
+
+
+def test_per_route_sampling():
+    """A sampled-out request drops its DEBUG/INFO records but never its warnings."""
+    stream = io.StringIO()
+    handler = structured_log.configure(stream, level="DEBUG", rates={"/puzzle/check": 0.0, "*": 1.0})
+    log = structured_log.get_logger("app")
+    app = Flask(__name__)
+
+    @app.route("/puzzle/check")
+    def check():
+        log.debug("sampled out")
+        log.warning("kept")
+        return "ok"
+
+    @app.route("/leaderboard")
+    def leaderboard():
+        log.debug("kept")
+        return "ok"
+
+    client = app.test_client()
+    client.get("/puzzle/check")
+    client.get("/leaderboard")
+    assert [(line["route"], line["msg"]) for line in _lines(stream, handler)] == [
+        ("/puzzle/check", "kept"), ("/leaderboard", "kept")]
+
+    assert structured_log.parse_sample_rates("/puzzle/check=0.05, *=2") == {"/puzzle/check": 0.05, "*": 1.0}
+    print("✅ Sampling is per route and keeps warnings")
+
+
+def test_full_queue_drops_instead_of_blocking():
+    """When the writer falls behind, records are dropped and counted."""
+
+    class StuckStream(io.StringIO):
+        def write(self, text):
+            import time
+            time.sleep(3600)
+
+    handler = structured_log.configure(StuckStream(), level="INFO")
+    handler.maxsize = 5
+    handler._pid = None  # Recreate the queue with the smaller size
+    log = structured_log.get_logger("app")
+    for i in range(20):
+        log.info("line %s", i)
+    assert handler.dropped >= 14 and structured_log.stats()["dropped"] == handler.dropped
+    structured_log.configure()  # Back to the environment settings for later tests
+    print("✅ A full queue drops records instead of blocking")
+
+
+if __name__ == "__main__":
+    test_levels_and_json_fields()
+    test_per_route_sampling()
+    test_full_queue_drops_instead_of_blocking()
+    print("🎉 All structured logging tests passed!")
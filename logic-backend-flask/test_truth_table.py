@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Test that the native truth-table engine agrees with the Z3 checks."""
+
+import itertools
+
+import easy_mode
+import medium_mode
+import hard_mode
+import extreme_mode
+import puzzle_solver
+import statement_compiler
+import truth_table
+
+MODES = [
+    ("Easy", easy_mode.api_generate_easy, easy_mode.check_easy_solution),
+    ("Medium", medium_mode.api_generate_medium, medium_mode.check_medium_solution),
+    ("Hard", hard_mode.api_generate_hard, hard_mode.check_hard_solution),
+    ("Extreme", extreme_mode.api_generate_extreme, extreme_mode.check_extreme_solution),
+]
+
+
+def z3_check(check_func, data):
+    """Run a mode's check function with the native engine disabled."""
+    saved = truth_table.NATIVE_SOLVER_MAX_PLAYERS
+    truth_table.NATIVE_SOLVER_MAX_PLAYERS = 0
+    try:
+        return check_func(data)["valid"]
+    finally:
+        truth_table.NATIVE_SOLVER_MAX_PLAYERS = saved
+
+
+def generate(generate_func, num_players, tries=5):
+    """Generate a puzzle, retrying the occasional generator RuntimeError."""
+    for _ in range(tries - 1):
+        try:
+            return generate_func(num_players)
+        except RuntimeError:
+            continue
+    return generate_func(num_players)
+
+
+def test_native_matches_z3():
+    """Every possible guess gets the same verdict from both engines."""
+    for mode_name, generate_func, check_func in MODES:
+        for num_players in [3, 4, 5, 6]:
+            puzzle = generate(generate_func, num_players)
+            people = list(puzzle["solution"].keys())
+            for values in itertools.product([True, False], repeat=num_players):
+                data = {
+                    "statement_data": puzzle["statement_data"],
+                    "full_statement_data": puzzle.get("full_statement_data", puzzle["statement_data"]),
+                    "num_truth_tellers": puzzle["num_truth_tellers"],
+                    "guess": dict(zip(people, values)),
+                }
+                native = check_func(data)["valid"]
+                assert native == z3_check(check_func, data), (mode_name, puzzle, data["guess"])
+        print(f"✅ {mode_name}: native engine matches Z3 for every guess")
+
+
+def test_solve_and_count():
+    """The generated solution is among the native solutions."""
+    for mode_name, generate_func, _ in MODES:
+        puzzle = generate(generate_func, 6)
+        statements = puzzle.get("full_statement_data", puzzle["statement_data"])
+        compiled = statement_compiler.compile_puzzle(statements, puzzle["num_truth_tellers"])
+        solutions = puzzle_solver.find_solutions(compiled, limit=2 ** 6)
+        assert puzzle["solution"] in solutions
+        assert bin(compiled.mask).count("1") == len(solutions)
+        assert puzzle_solver.solve(compiled) == solutions[0]
+        print(f"✅ {mode_name}: {len(solutions)} solution(s), generated one included")
+
+
+def test_group_and_nested_if():
+    """Hand-checked GROUP and NESTED_IF semantics."""
+    statements = {
+        "A": {"mode": "GROUP", "members": ["B", "C"], "exactly": 1},
+        "B": {"mode": "NESTED_IF", "outer_cond": "A", "outer_val": True,
+              "inner_cond": "C", "inner_val": False, "inner_result": "A", "inner_result_val": False},
+        "C": {"mode": "DIRECT", "target": "C", "claim": True},
+    }
+    for values in itertools.product([True, False], repeat=3):
+        a, b, c = values
+        group = (b + c) == 1
+        nested = (not a) or (c) or (not a)
+        expected = (a == group) and (b == nested) and (c == c) and sum(values) == 2
+        guess = {"A": a, "B": b, "C": c}
+        assert puzzle_solver.check_puzzle(statements, 2, guess) == expected, guess
+    print("✅ GROUP / NESTED_IF semantics")
+
+
+def test_unsupported_falls_back():
+    """Unknown statement modes are rejected instead of being ignored."""
+    try:
+        puzzle_solver.solve(statement_compiler.compile_puzzle(
+            {"A": {"mode": "BOGUS"}, "B": {"target": "A", "truth_value": True}}, 1))
+    except statement_compiler.UnsupportedStatement:
+        print("✅ Unsupported statements raise UnsupportedStatement")
+    else:
+        raise AssertionError("expected UnsupportedStatement")
+
+
+if __name__ == "__main__":
+    test_native_matches_z3()
+    test_solve_and_count()
+    test_group_and_nested_if()
+    test_unsupported_falls_back()
+    print("🎉 All truth-table tests passed!")
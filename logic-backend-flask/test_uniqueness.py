@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Test that generated puzzles have exactly one solution."""
+
+from z3 import Solver
+
+import easy_mode
+import medium_mode
+import hard_mode
+import extreme_mode
+import puzzle_solver
+import statement_compiler
+import uniqueness
+
+MODES = [
+    ("Easy", easy_mode.api_generate_easy),
+    ("Medium", medium_mode.api_generate_medium),
+    ("Hard", hard_mode.api_generate_hard),
+    ("Extreme", extreme_mode.api_generate_extreme),
+]
+
+
+def generate(generate_func, num_players, tries=5):
+    """Generate a puzzle, retrying the occasional generator RuntimeError."""
+    for _ in range(tries - 1):
+        try:
+            return generate_func(num_players)
+        except RuntimeError:
+            continue
+    return generate_func(num_players)
+
+
+def all_solutions(statements, num_truth_tellers):
+    """Every solution of a puzzle as {player: bool} dicts."""
+    compiled = statement_compiler.compile_puzzle(statements, num_truth_tellers)
+    return puzzle_solver.find_solutions(compiled, limit=2 ** len(compiled.people))
+
+
+def test_generated_puzzles_are_unique():
+    """Every generator only returns puzzles whose solution is the only one."""
+    for mode_name, generate_func in MODES:
+        for num_players in [3, 4, 5, 8]:
+            for _ in range(5):
+                puzzle = generate(generate_func, num_players)
+                statements = puzzle.get("full_statement_data", puzzle["statement_data"])
+                solutions = all_solutions(statements, puzzle["num_truth_tellers"])
+                expected = uniqueness.min_solutions(mode_name.lower(), num_players, puzzle["num_truth_tellers"])
+                assert puzzle["solution"] in solutions, (mode_name, puzzle)
+                assert len(solutions) == expected, (mode_name, puzzle)
+        print(f"✅ {mode_name}: generated puzzles have a unique solution")
+
+
+def test_z3_count_matches_native():
+    """Blocking-clause counting agrees with the truth-table count."""
+    statements = {
+        "A": {"mode": "DIRECT", "target": "B", "claim": True},
+        "B": {"mode": "DIRECT", "target": "A", "claim": True},
+        "C": {"mode": "DIRECT", "target": "D", "claim": False},
+        "D": {"mode": "DIRECT", "target": "C", "claim": False},
+    }
+    compiled = statement_compiler.compile_puzzle(statements, 3)
+    z3_vars = compiled.z3_vars()
+    solver = Solver()
+    solver.add(compiled.z3_constraints())
+
+    native = len(puzzle_solver.find_solutions(compiled, limit=10))
+    assert native == 2
+    assert puzzle_solver.count_z3_models(solver, list(z3_vars.values()), limit=10) == native
+    assert puzzle_solver.count_z3_models(solver, list(z3_vars.values()), limit=1) == 1
+    # The solver still has a model for the caller afterwards
+    assert solver.model() is not None
+    print("✅ Z3 blocking-clause count matches the native count")
+
+
+def test_easy_mirror_solutions():
+    """Easy puzzles with half Truth-Tellers always have their mirror image as a second solution."""
+    assert uniqueness.min_solutions("easy", 4, 2) == 2
+    assert uniqueness.min_solutions("easy", 5, 3) == 1
+    assert uniqueness.min_solutions("medium", 4, 2) == 1
+    puzzle = generate(easy_mode.api_generate_easy, 4)
+    solutions = all_solutions(puzzle["statement_data"], puzzle["num_truth_tellers"])
+    mirror = {p: not v for p, v in puzzle["solution"].items()}
+    assert sorted(solutions, key=str) == sorted([puzzle["solution"], mirror], key=str)
+    print("✅ Easy 4-player puzzles have exactly the mirrored pair of solutions")
+
+
+if __name__ == "__main__":
+    test_generated_puzzles_are_unique()
+    test_z3_count_matches_native()
+    test_easy_mirror_solutions()
+    print("🎉 All uniqueness tests passed!")
@@ -0,0 +1,66 @@
+"""
+Native truth-table engine for Truth-Teller/Liar puzzles.
+
+A puzzle with n players only has 2^n possible role assignments (256 for the
+largest 8-player puzzles we serve), so building a Z3 solver for every check is
+overkill. Instead every boolean expression is represented as a bitmask over all
+assignments: bit ``a`` is set when the expression holds under assignment ``a``,
+where bit ``i`` of ``a`` says whether the i-th player is a Truth-Teller.
+
+Each statement compiles to "speaker is a Truth-Teller <=> claim holds", the
+puzzle is the bitwise AND of all its statements plus the truth-teller count,
+and check / solve / count-solutions become plain integer operations.
+puzzle_solver runs those operations on compiled puzzles; this module only
+holds the size limit and the mask helpers they share.
+
+Statements are parsed and compiled by statement_compiler, which also
+produces the Z3 form used above NATIVE_SOLVER_MAX_PLAYERS. Anything it does
+not recognise raises UnsupportedStatement.
+"""
+
+import os
+
+from statement_compiler import UnsupportedStatement, compile_puzzle
+
+# Largest player count the native engine is used for, which covers every
+# puzzle size we serve. Masks have 2^n bits; larger puzzles go to Z3.
+NATIVE_SOLVER_MAX_PLAYERS = int(os.getenv("NATIVE_SOLVER_MAX_PLAYERS", "8"))
+
+
+def should_use_native(num_players):
+    """Return True if a puzzle of this size should skip Z3."""
+    return 0 < num_players <= NATIVE_SOLVER_MAX_PLAYERS
+
+
+def solution_mask(statements, num_truth_tellers, people=None, simple=False):
+    """
+    Compile a whole puzzle into the mask of its consistent assignments.
+
+    Args:
+        statements: Dict of speaker -> statement dict
+        num_truth_tellers: Required number of Truth-Tellers
+        people: Player labels (defaults to the statement speakers, in order)
+        simple: Only read target/truth_value from each statement (easy mode)
+
+    Returns:
+        tuple: (mask, people, index)
+    """
+    num_players = len(people) if people is not None else len(statements)
+    if not should_use_native(num_players):
+        raise UnsupportedStatement(f"{num_players} players is above the native solver limit")
+    compiled = compile_puzzle(statements, num_truth_tellers, people, simple)
+    return compiled.mask, list(compiled.people), compiled.index
+
+
+def decode_assignment(assignment, people):
+    """Turn an assignment number back into a {player: is_truth_teller} dict."""
+    return {p: bool(assignment >> i & 1) for i, p in enumerate(people)}
+
+
+def iter_assignments(mask):
+    """Yield the assignment numbers set in a mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
@@ -0,0 +1,115 @@
+"""
+Solution counting for puzzle generation.
+
+A puzzle is only fair if exactly one assignment of roles satisfies it: the
+generators used to return the first Z3 model, so ambiguous puzzles accepted
+any consistent guess and /puzzle/solution picked one of several answers.
+
+Generators compile each candidate puzzle with statement_compiler and look
+for up to SOLUTION_LIMIT solutions with puzzle_solver.find_solutions() (the
+native truth-table mask, or Z3 with blocking clauses above the native
+limit). That is enough to tell "unsolvable", "unique" and "more than one"
+apart.
+
+Per-mode generation stats (attempts, rejections and latency) are kept per
+web worker and exposed through /puzzle/pool/stats. They are fed by
+solver_telemetry, which also ships back the attempts made in solver
+processes.
+"""
+
+import os
+import threading
+
+REQUIRE_UNIQUE_SOLUTION = os.getenv("REQUIRE_UNIQUE_SOLUTION", "true").lower() == "true"
+
+# Generators look for one more solution than the most any mode allows (see min_solutions)
+SOLUTION_LIMIT = 3
+
+
+def min_solutions(mode, num_players, num_truth_tellers):
+    """
+    Fewest solutions a puzzle of this mode and size can have.
+
+    Easy puzzles only use DIRECT statements, and flipping every player's role
+    keeps all of those true. When exactly half the players are Truth-Tellers
+    the flipped assignment also meets the count, so every easy puzzle of that
+    size has its mirror image as a second solution.
+    """
+    if mode == "easy" and num_players == 2 * num_truth_tellers:
+        return 2
+    return 1
+
+
+def is_unambiguous(mode, compiled, solutions):
+    """
+    Return True if the solutions found for a puzzle are as few as its mode and size allow.
+
+    That means exactly one solution, except for the mirrored easy puzzles
+    described in min_solutions(). Always True when the check is disabled.
+    """
+    if not REQUIRE_UNIQUE_SOLUTION:
+        return True
+    return len(solutions) <= min_solutions(mode, len(compiled.people), compiled.num_truth_tellers)
+
+
+class GenerationStats:
+    """Per-mode counters for generation attempts, rejections and latency."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._modes = {}
+
+    def _mode(self, mode):
+        return self._modes.setdefault(mode, {
+            "generated": 0,
+            "failed": 0,
+            "attempts": 0,
+            "rejected_unsat": 0,
+            "rejected_ambiguous": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0,
+        })
+
+    def record_rejection(self, mode, reason):
+        """Record a rejected attempt; reason is 'unsat' or 'ambiguous'."""
+        with self._lock:
+            stats = self._mode(mode)
+            stats["attempts"] += 1
+            stats[f"rejected_{reason}"] += 1
+
+    def record_generated(self, mode, seconds):
+        """Record a successful attempt and the total time spent on the puzzle."""
+        with self._lock:
+            stats = self._mode(mode)
+            stats["attempts"] += 1
+            stats["generated"] += 1
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+    def record_failed(self, mode):
+        """Record a puzzle that ran out of attempts."""
+        with self._lock:
+            self._mode(mode)["failed"] += 1
+
+    def snapshot(self):
+        """Return the counters plus derived rejection rates and average latency."""
+        with self._lock:
+            result = {}
+            for mode, stats in sorted(self._modes.items()):
+                attempts = stats["attempts"]
+                generated = stats["generated"]
+                result[mode] = {
+                    **stats,
+                    "unsat_rate": stats["rejected_unsat"] / attempts if attempts else None,
+                    "ambiguous_rate": stats["rejected_ambiguous"] / attempts if attempts else None,
+                    "avg_ms": stats["total_seconds"] / generated * 1000 if generated else None,
+                    "max_ms": stats["max_seconds"] * 1000,
+                }
+            return {"require_unique_solution": REQUIRE_UNIQUE_SOLUTION, "modes": result}
+
+    def reset(self):
+        with self._lock:
+            self._modes.clear()
+
+
+generation_stats = GenerationStats()
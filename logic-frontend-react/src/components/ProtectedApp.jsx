@@ -240,96 +240,57 @@ export default function ProtectedApp({ user, accessToken, authInitialized, onLog
     }
   };
 
-  const fetchUsername = async () => {
+  // Load ELO, username and both progress bar sets with a single request
+  const fetchDashboardData = async () => {
     if (!accessToken) {
-      // console.warn('⚠️ No access token available for username fetching');
+      setEloError('No authentication token available');
       return;
     }
 
+    setEloLoading(true);
+    setEloError(null);
+    setProgressBarsLoading(true);
+    setMasterProgressBarsLoading(true);
     try {
-      // console.log('🔍 Fetching username with access token...');
       const apiUrl = process.env.REACT_APP_API_URL || 'http://localhost:5000';
-      
-      const response = await fetch(`${apiUrl}/me`, {
+      const response = await fetch(`${apiUrl}/bootstrap`, {
         method: 'GET',
         headers: {
           'Authorization': `Bearer ${accessToken}`,
-          'Content-Type': 'application/json'
+          'Content-Type': 'application/json',
+          'Cache-Control': 'no-cache',
+          'Pragma': 'no-cache'
         }
       });
 
-      // console.log('📡 Username fetch response status:', response.status);
-
       if (response.ok) {
         const data = await response.json();
-        // console.log('✅ Username data received:', data);
-        setCurrentUsername(data.user.username || user?.email?.split('@')[0] || 'Player');
-      } else {
-        // console.error('❌ Username fetch failed:', response.status);
-        // Fallback to email prefix
-        setCurrentUsername(user?.email?.split('@')[0] || 'Player');
-      }
-    } catch (error) {
-      // console.error('❌ Error fetching username:', error);
-      // Fallback to email prefix
-      setCurrentUsername(user?.email?.split('@')[0] || 'Player');
-    }
-  };
-
-  const fetchProgressBars = async () => {
-    if (!accessToken) return;
-    
-    setProgressBarsLoading(true);
-    try {
-      const apiUrl = process.env.REACT_APP_API_URL || 'http://localhost:5000';
-      const response = await fetch(`${apiUrl}/practice/progress-bars`, {
-        headers: {
-          'Authorization': `Bearer ${accessToken}`,
-          'Content-Type': 'application/json'
+        if (data.elo?.error) {
+          setEloError(`Failed to fetch ELO: ${data.elo.error}`);
+        } else {
+          setEloData(data.elo);
         }
-      });
-
-      if (response.ok) {
-        const data = await response.json();
-        setProgressBarsData(data.progress_bars || []);
-        // console.log('✅ Progress bars loaded:', data.progress_bars);
+        setCurrentUsername(data.me?.user?.username || user?.email?.split('@')[0] || 'Player');
+        setProgressBarsData(data.practice_progress_bars || []);
+        setMasterProgressBarsData(data.master_progress_bars || []);
       } else {
-        // console.log('⚠️ Progress bars request failed:', response.status);
-        setProgressBarsData([]);
-      }
-    } catch (error) {
-      // console.error('❌ Error fetching progress bars:', error);
-      setProgressBarsData([]);
-    } finally {
-      setProgressBarsLoading(false);
-    }
-  };
-
-  const fetchMasterProgressBars = async () => {
-    if (!accessToken) return;
-    
-    setMasterProgressBarsLoading(true);
-    try {
-      const apiUrl = process.env.REACT_APP_API_URL || 'http://localhost:5000';
-      const response = await fetch(`${apiUrl}/master/progress-bars`, {
-        headers: {
-          'Authorization': `Bearer ${accessToken}`,
-          'Content-Type': 'application/json'
+        if (response.status === 401) {
+          setEloError('Session expired - please refresh the page');
+        } else {
+          setEloError(`Failed to fetch ELO: ${response.status}`);
         }
-      });
-
-      if (response.ok) {
-        const data = await response.json();
-        setMasterProgressBarsData(data.progress_bars || []);
-        // console.log('✅ Master progress bars loaded:', data.progress_bars);
-      } else {
-        // console.log('⚠️ Master progress bars request failed:', response.status);
+        setCurrentUsername(user?.email?.split('@')[0] || 'Player');
+        setProgressBarsData([]);
         setMasterProgressBarsData([]);
       }
     } catch (error) {
-      // console.error('❌ Error fetching master progress bars:', error);
+      setEloError(error.message || 'Network error while fetching ELO');
+      setCurrentUsername(user?.email?.split('@')[0] || 'Player');
+      setProgressBarsData([]);
       setMasterProgressBarsData([]);
     } finally {
+      setEloLoading(false);
+      setProgressBarsLoading(false);
       setMasterProgressBarsLoading(false);
     }
   };
@@ -450,17 +411,8 @@ export default function ProtectedApp({ user, accessToken, authInitialized, onLog
     if (authInitialized && user && accessToken) {
       // console.log('🎯 Auth initialized and token available, fetching all data in parallel...');
       
-      // Run all API calls in parallel for much faster loading
-      Promise.all([
-        fetchEloData(),
-        fetchUsername(),
-        fetchProgressBars(),
-        fetchMasterProgressBars()
-      ]).then(() => {
-        // console.log('✅ All data loaded successfully');
-      }).catch((error) => {
-        // console.error('❌ Error loading some data:', error);
-      });
+      // One request for everything the dashboard shows
+      fetchDashboardData();
     } else if (authInitialized && !user) {
       // console.log('📱 Auth initialized but no user - user not authenticated');
       setEloError(null);
@@ -844,10 +796,9 @@ export default function ProtectedApp({ user, accessToken, authInitialized, onLog
 
   const handleBackFromRanked = () => {
     setActivePanel(null);
-    // Always refresh ELO data when returning from ranked mode since matches might have been played
-    fetchEloData();
-    // Also refresh progress bars in case they played practice mode
-    fetchProgressBars();
+    // Always refresh ELO data when returning from ranked mode since matches might have been played,
+    // and progress bars in case they played practice mode
+    fetchDashboardData();
   };
 
   const handlePracticeSubTileClick = (difficulty) => {
@@ -226,14 +226,13 @@ export default function RankedPanel({ user, accessToken, onBack }) {
       try {
         // console.log('🚪 Applying ELO penalty for abandoning ranked puzzle...');
         const apiUrl = process.env.REACT_APP_API_URL || 'http://localhost:5000';
-        const timeTaken = (Date.now() - startTime) / 1000;
         
+        // The server grades and times the puzzle from its signed token or its stored copy
         const requestBody = {
           mode: 'ranked',
+          puzzle_token: puzzle.puzzle_token,
+          puzzle_id: puzzle.puzzle_id,
           player_assignments: playerGuesses,
-          statement_data: puzzle.statement_data,
-          num_truth_tellers: puzzle.num_truth_tellers,
-          time_taken: timeTaken,
           gave_up: true, // This will trigger full penalty
           abandoned: true // Special flag for abandoning
         };
@@ -244,7 +243,8 @@ export default function RankedPanel({ user, accessToken, onBack }) {
           method: 'POST',
           headers: {
             'Content-Type': 'application/json',
-            'Authorization': `Bearer ${accessToken}`
+            'Authorization': `Bearer ${accessToken}`,
+            'Idempotency-Key': puzzle.checkKey
           },
           body: JSON.stringify(requestBody)
         });
@@ -327,7 +327,9 @@ export default function RankedPanel({ user, accessToken, onBack }) {
       const data = await response.json();
       // console.log('✅ Ranked puzzle generated successfully');
       
-      setPuzzle(data);
+      // One Idempotency-Key per ranked puzzle: retries (and a give-up after a
+      // submit) return the first result instead of being scored again
+      setPuzzle({ ...data, checkKey: crypto.randomUUID() });
       setStartTime(Date.now());
       setCurrentTime(0); // Start timer at 0
       
@@ -431,14 +433,12 @@ export default function RankedPanel({ user, accessToken, onBack }) {
 
       const apiUrl = process.env.REACT_APP_API_URL || 'http://localhost:5000';
       
-      const timeTaken = startTime ? (Date.now() - startTime) / 1000 : 0;
-      
+      // The server grades and times the puzzle from its signed token or its stored copy
       const requestBody = {
         mode: 'ranked',
+        puzzle_token: puzzle.puzzle_token,
+        puzzle_id: puzzle.puzzle_id,
         player_assignments: playerGuesses,
-        statement_data: puzzle.statement_data,
-        num_truth_tellers: puzzle.num_truth_tellers,
-        time_taken: timeTaken,
         gave_up: false
       };
       
@@ -446,7 +446,8 @@ export default function RankedPanel({ user, accessToken, onBack }) {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
-          'Authorization': `Bearer ${accessToken}`
+          'Authorization': `Bearer ${accessToken}`,
+          'Idempotency-Key': puzzle.checkKey
         },
         body: JSON.stringify(requestBody)
       });
@@ -551,14 +552,12 @@ export default function RankedPanel({ user, accessToken, onBack }) {
       
       // Handle ELO penalty for giving up
       if (startTime && accessToken) {
-        const timeTaken = (Date.now() - startTime) / 1000;
         try {
           const requestBody = {
             mode: 'ranked',
+            puzzle_token: puzzle.puzzle_token,
+            puzzle_id: puzzle.puzzle_id,
             player_assignments: playerGuesses,
-            statement_data: puzzle.statement_data,
-            num_truth_tellers: puzzle.num_truth_tellers,
-            time_taken: timeTaken,
             gave_up: true
           };
           
@@ -566,7 +565,8 @@ export default function RankedPanel({ user, accessToken, onBack }) {
             method: 'POST',
             headers: {
               'Content-Type': 'application/json',
-              'Authorization': `Bearer ${accessToken}`
+              'Authorization': `Bearer ${accessToken}`,
+              'Idempotency-Key': puzzle.checkKey
             },
             body: JSON.stringify(requestBody)
           });
@@ -14,14 +14,18 @@ export const matchAPI = {
    * @param {string} accessToken - User's authentication token
    * @param {number} limit - Number of matches to fetch (default: 10)
    * @param {string} order - Order of matches: 'desc' for newest first, 'asc' for oldest first (default: 'desc')
-   * @returns {Promise<Object>} Response containing matches array
+   * @param {string|null} cursor - next_cursor from the previous page, or null for the first page
+   * @returns {Promise<Object>} Response containing matches array and next_cursor (null on the last page)
    */
-  async getUserMatches(accessToken, limit = 10, order = 'desc') {
+  async getUserMatches(accessToken, limit = 10, order = 'desc', cursor = null) {
     if (!accessToken) {
       throw new Error('Authentication token required');
     }
 
-    const url = `${API_URL}/user/matches?limit=${limit}&order=${order}`;
+    let url = `${API_URL}/user/matches?limit=${limit}&order=${order}`;
+    if (cursor) {
+      url += `&cursor=${encodeURIComponent(cursor)}`;
+    }
     // console.log('🔍 API: Fetching matches from:', url);
     
     const response = await fetch(url, {
@@ -0,0 +1,93 @@
+-- Ranked /puzzle/check results in one transaction (see commit_ranked_result in logic-backend-flask/app.py).
+-- Locks the caller's profile, applies the Elo change to the current row (not
+-- the copy the request started with) and records the match, returning the
+-- new state. The backend computes p_delta with elo_system.py:
+--   ranked matches:    elo = GREATEST(0, elo + p_delta)
+--   placement matches: hidden_elo = GREATEST(0, hidden_elo + p_delta), one more
+--                      placement match; the last one reveals the hidden Elo
+--                      (clamped to 0..2500 like reveal_placement_elo) as elo
+-- If the row is no longer in the state p_is_placement was computed for
+-- (placement finished by a concurrent request), nothing is written and
+-- 'ranked_state_changed' is raised so the client can resubmit.
+CREATE OR REPLACE FUNCTION public.commit_ranked_result(
+    p_user_id UUID,
+    p_is_placement BOOLEAN,
+    p_delta INTEGER,
+    p_mode TEXT,
+    p_num_players INTEGER,
+    p_solved BOOLEAN,
+    p_time_taken INTEGER,
+    p_placement_required INTEGER,
+    p_default_hidden_elo INTEGER
+) RETURNS JSONB AS $$
+DECLARE
+    prof public.profiles%ROWTYPE;
+    v_is_placement BOOLEAN;
+    v_elo_before INTEGER := NULL;
+    v_elo INTEGER;
+    v_hidden_elo INTEGER;
+    v_delta INTEGER := p_delta;
+    v_placement_count INTEGER;
+    v_is_ranked BOOLEAN;
+    v_revealed BOOLEAN := false;
+    v_match_id UUID;
+BEGIN
+    SELECT * INTO prof FROM public.profiles WHERE user_id = p_user_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'profile_not_found' USING ERRCODE = 'P0002';
+    END IF;
+
+    v_placement_count := COALESCE(prof.placement_matches_completed, 0);
+    v_is_placement := prof.elo IS NULL AND v_placement_count < p_placement_required;
+    IF v_is_placement IS DISTINCT FROM p_is_placement THEN
+        RAISE EXCEPTION 'ranked_state_changed' USING ERRCODE = '40001';
+    END IF;
+
+    IF v_is_placement THEN
+        v_hidden_elo := GREATEST(0, COALESCE(prof.hidden_elo, p_default_hidden_elo) + p_delta);
+        v_placement_count := v_placement_count + 1;
+        IF v_placement_count >= p_placement_required THEN
+            v_elo := GREATEST(0, LEAST(2500, v_hidden_elo));
+            v_delta := v_elo;  -- The full revealed Elo, as shown to the player
+            v_revealed := true;
+            v_is_ranked := true;
+            UPDATE public.profiles
+               SET elo = v_elo, hidden_elo = NULL, placement_matches_completed = v_placement_count, is_ranked = true
+             WHERE user_id = p_user_id;
+        ELSE
+            v_elo := NULL;
+            v_is_ranked := COALESCE(prof.is_ranked, false);
+            UPDATE public.profiles
+               SET hidden_elo = v_hidden_elo, placement_matches_completed = v_placement_count
+             WHERE user_id = p_user_id;
+        END IF;
+    ELSE
+        v_elo_before := prof.elo;
+        v_elo := GREATEST(0, prof.elo + p_delta);
+        v_hidden_elo := prof.hidden_elo;
+        v_is_ranked := COALESCE(prof.is_ranked, false);
+        UPDATE public.profiles SET elo = v_elo WHERE user_id = p_user_id;
+    END IF;
+
+    INSERT INTO public.matches (user_id, mode, num_players, solved, time_taken,
+                                elo_before, elo_after, elo_delta, is_placement_match)
+    VALUES (p_user_id, p_mode, p_num_players, p_solved, p_time_taken,
+            v_elo_before, v_elo, v_delta, v_is_placement)
+    RETURNING id INTO v_match_id;
+
+    RETURN jsonb_build_object(
+        'elo', v_elo,
+        'elo_before', v_elo_before,
+        'elo_delta', v_delta,
+        'hidden_elo', v_hidden_elo,
+        'placement_matches_completed', v_placement_count,
+        'is_ranked', v_is_ranked,
+        'revealed', v_revealed,
+        'match_id', v_match_id
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Only the backend (service role) may call it
+REVOKE EXECUTE ON FUNCTION public.commit_ranked_result(UUID, BOOLEAN, INTEGER, TEXT, INTEGER, BOOLEAN, INTEGER, INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.commit_ranked_result(UUID, BOOLEAN, INTEGER, TEXT, INTEGER, BOOLEAN, INTEGER, INTEGER, INTEGER) TO service_role;
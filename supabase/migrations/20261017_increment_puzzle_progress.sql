@@ -0,0 +1,23 @@
+-- Atomic practice/master progress increments (see logic-backend-flask/progress_writer.py).
+-- Adds the given amounts to the progress counters in one UPDATE, capping each
+-- counter at 10 in the database, so concurrent first-try solves cannot lose
+-- increments the way the old read-modify-write did. p_increments maps column
+-- names to amounts, e.g. {"easy_puzzles_solved": 2}; other keys are ignored.
+CREATE OR REPLACE FUNCTION public.increment_puzzle_progress(p_user_id UUID, p_increments JSONB)
+RETURNS SETOF public.profiles AS $$
+    UPDATE public.profiles SET
+        easy_puzzles_solved = LEAST(COALESCE(easy_puzzles_solved, 0) + COALESCE((p_increments->>'easy_puzzles_solved')::INTEGER, 0), 10),
+        medium_puzzles_solved = LEAST(COALESCE(medium_puzzles_solved, 0) + COALESCE((p_increments->>'medium_puzzles_solved')::INTEGER, 0), 10),
+        hard_puzzles_solved = LEAST(COALESCE(hard_puzzles_solved, 0) + COALESCE((p_increments->>'hard_puzzles_solved')::INTEGER, 0), 10),
+        extreme_puzzles_solved = LEAST(COALESCE(extreme_puzzles_solved, 0) + COALESCE((p_increments->>'extreme_puzzles_solved')::INTEGER, 0), 10),
+        master_easy_puzzles_solved = LEAST(COALESCE(master_easy_puzzles_solved, 0) + COALESCE((p_increments->>'master_easy_puzzles_solved')::INTEGER, 0), 10),
+        master_medium_puzzles_solved = LEAST(COALESCE(master_medium_puzzles_solved, 0) + COALESCE((p_increments->>'master_medium_puzzles_solved')::INTEGER, 0), 10),
+        master_hard_puzzles_solved = LEAST(COALESCE(master_hard_puzzles_solved, 0) + COALESCE((p_increments->>'master_hard_puzzles_solved')::INTEGER, 0), 10),
+        master_extreme_puzzles_solved = LEAST(COALESCE(master_extreme_puzzles_solved, 0) + COALESCE((p_increments->>'master_extreme_puzzles_solved')::INTEGER, 0), 10)
+    WHERE user_id = p_user_id
+    RETURNING *;
+$$ LANGUAGE sql;
+
+-- Only the backend (service role) may call it
+REVOKE EXECUTE ON FUNCTION public.increment_puzzle_progress(UUID, JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.increment_puzzle_progress(UUID, JSONB) TO service_role;
@@ -0,0 +1,7 @@
+-- Index for keyset-paginated match history (/user/matches, /user/elo, /bootstrap).
+-- Every page is a range scan of one user's rows in (created_at, id) order,
+-- so page latency no longer depends on how many matches the user has played.
+-- CONCURRENTLY avoids blocking match inserts while the index builds; run it
+-- outside a transaction.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS matches_user_id_created_at_id_idx
+    ON public.matches (user_id, created_at DESC, id DESC);
@@ -0,0 +1,116 @@
+-- Idempotent replay of journaled ranked results (see match_journal.py and
+-- replay_ranked_event in logic-backend-flask/app.py).
+-- Ranked results are appended to a local journal on the request path and
+-- committed by a background replayer, which may deliver an event more than
+-- once (a retry after a timeout, a crash before the ack was written). Each
+-- event carries a UUID that is stored on its match row; a unique index makes
+-- the second delivery a no-op that returns the current state with
+-- 'duplicate' = true.
+ALTER TABLE public.matches ADD COLUMN IF NOT EXISTS event_id UUID;
+CREATE UNIQUE INDEX IF NOT EXISTS matches_event_id_key ON public.matches (event_id);
+
+-- Adding a parameter creates a new overload, so drop the old signature first
+DROP FUNCTION IF EXISTS public.commit_ranked_result(UUID, BOOLEAN, INTEGER, TEXT, INTEGER, BOOLEAN, INTEGER, INTEGER, INTEGER);
+
+CREATE OR REPLACE FUNCTION public.commit_ranked_result(
+    p_user_id UUID,
+    p_is_placement BOOLEAN,
+    p_delta INTEGER,
+    p_mode TEXT,
+    p_num_players INTEGER,
+    p_solved BOOLEAN,
+    p_time_taken INTEGER,
+    p_placement_required INTEGER,
+    p_default_hidden_elo INTEGER,
+    p_event_id UUID DEFAULT NULL
+) RETURNS JSONB AS $$
+DECLARE
+    prof public.profiles%ROWTYPE;
+    v_is_placement BOOLEAN;
+    v_elo_before INTEGER := NULL;
+    v_elo INTEGER;
+    v_hidden_elo INTEGER;
+    v_delta INTEGER := p_delta;
+    v_placement_count INTEGER;
+    v_is_ranked BOOLEAN;
+    v_revealed BOOLEAN := false;
+    v_match_id UUID;
+BEGIN
+    SELECT * INTO prof FROM public.profiles WHERE user_id = p_user_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'profile_not_found' USING ERRCODE = 'P0002';
+    END IF;
+
+    -- A replayed event that was already applied returns the current state unchanged
+    IF p_event_id IS NOT NULL THEN
+        SELECT id INTO v_match_id FROM public.matches WHERE event_id = p_event_id;
+        IF FOUND THEN
+            RETURN jsonb_build_object(
+                'elo', prof.elo,
+                'elo_before', NULL,
+                'elo_delta', 0,
+                'hidden_elo', prof.hidden_elo,
+                'placement_matches_completed', COALESCE(prof.placement_matches_completed, 0),
+                'is_ranked', COALESCE(prof.is_ranked, false),
+                'revealed', false,
+                'match_id', v_match_id,
+                'duplicate', true
+            );
+        END IF;
+    END IF;
+
+    v_placement_count := COALESCE(prof.placement_matches_completed, 0);
+    v_is_placement := prof.elo IS NULL AND v_placement_count < p_placement_required;
+    IF v_is_placement IS DISTINCT FROM p_is_placement THEN
+        RAISE EXCEPTION 'ranked_state_changed' USING ERRCODE = '40001';
+    END IF;
+
+    IF v_is_placement THEN
+        v_hidden_elo := GREATEST(0, COALESCE(prof.hidden_elo, p_default_hidden_elo) + p_delta);
+        v_placement_count := v_placement_count + 1;
+        IF v_placement_count >= p_placement_required THEN
+            v_elo := GREATEST(0, LEAST(2500, v_hidden_elo));
+            v_delta := v_elo;  -- The full revealed Elo, as shown to the player
+            v_revealed := true;
+            v_is_ranked := true;
+            UPDATE public.profiles
+               SET elo = v_elo, hidden_elo = NULL, placement_matches_completed = v_placement_count, is_ranked = true
+             WHERE user_id = p_user_id;
+        ELSE
+            v_elo := NULL;
+            v_is_ranked := COALESCE(prof.is_ranked, false);
+            UPDATE public.profiles
+               SET hidden_elo = v_hidden_elo, placement_matches_completed = v_placement_count
+             WHERE user_id = p_user_id;
+        END IF;
+    ELSE
+        v_elo_before := prof.elo;
+        v_elo := GREATEST(0, prof.elo + p_delta);
+        v_hidden_elo := prof.hidden_elo;
+        v_is_ranked := COALESCE(prof.is_ranked, false);
+        UPDATE public.profiles SET elo = v_elo WHERE user_id = p_user_id;
+    END IF;
+
+    INSERT INTO public.matches (user_id, mode, num_players, solved, time_taken,
+                                elo_before, elo_after, elo_delta, is_placement_match, event_id)
+    VALUES (p_user_id, p_mode, p_num_players, p_solved, p_time_taken,
+            v_elo_before, v_elo, v_delta, v_is_placement, p_event_id)
+    RETURNING id INTO v_match_id;
+
+    RETURN jsonb_build_object(
+        'elo', v_elo,
+        'elo_before', v_elo_before,
+        'elo_delta', v_delta,
+        'hidden_elo', v_hidden_elo,
+        'placement_matches_completed', v_placement_count,
+        'is_ranked', v_is_ranked,
+        'revealed', v_revealed,
+        'match_id', v_match_id,
+        'duplicate', false
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Only the backend (service role) may call it
+REVOKE EXECUTE ON FUNCTION public.commit_ranked_result(UUID, BOOLEAN, INTEGER, TEXT, INTEGER, BOOLEAN, INTEGER, INTEGER, INTEGER, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.commit_ranked_result(UUID, BOOLEAN, INTEGER, TEXT, INTEGER, BOOLEAN, INTEGER, INTEGER, INTEGER, UUID) TO service_role;
@@ -19,6 +19,10 @@ create table public.matches (
     created_at timestamp with time zone default timezone('utc'::text, now()) not null
 );
 
+-- Match history pages are read newest first per user
+create index matches_user_id_created_at_id_idx
+    on public.matches (user_id, created_at desc, id desc);
+
 -- Enable row level security
 alter table public.profiles enable row level security;
 alter table public.matches enable row level security;